@@ -18,10 +18,13 @@ from typing import Dict, List, Optional, Set
 
 import openpyxl
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.engine import Connection, Engine
 
 from config import BRAND_CONFIG, BARBOUR
+from common.db.pool import get_engine
+from common.db.query import DB_FETCH_SIZE
+from common.db.timing import db_step
 from brands.barbour.core.site_utils import canonical_site
 from brands.barbour.core.supplier_price_rules import (
     strategy_all_ratio,
@@ -151,11 +154,8 @@ def _true_cost(
 #  引擎工厂
 # ---------------------------------------------------------------------------
 def _get_engine() -> Engine:
-    cfg = BRAND_CONFIG["barbour"]["PGSQL_CONFIG"]
-    return create_engine(
-        f"postgresql+psycopg2://{cfg['user']}:{cfg['password']}"
-        f"@{cfg['host']}:{cfg['port']}/{cfg['dbname']}"
-    )
+    """进程内共用的 Engine（common.db.pool），不再每次调用新建"""
+    return get_engine(BRAND_CONFIG["barbour"]["PGSQL_CONFIG"])
 
 
 # ---------------------------------------------------------------------------
@@ -613,6 +613,7 @@ def _load_publication_mappings(pub_dir: Path) -> Dict[str, str]:
 # ---------------------------------------------------------------------------
 #  核心业务函数
 # ---------------------------------------------------------------------------
+@db_step("fill_supplier_map")
 def fill_supplier_map(
     strategy: SupplierStrategy | None = None,
     force_refresh: bool = False,
@@ -711,6 +712,7 @@ def fill_supplier_map(
         logger.info("完成映射，总计 %d 条。", total_now)
 
 
+@db_step("reassign_low_stock_suppliers")
 def reassign_low_stock_suppliers(
     strategy: SupplierStrategy | None = None,
     size_threshold: int = 3,
@@ -746,17 +748,6 @@ def reassign_low_stock_suppliers(
             lambda s: canonical_site(s) or s
         )
 
-        # TrueCostStrategy 需要 offer 明细来计算真实成本
-        offers_df: Optional[pd.DataFrame] = None
-        if isinstance(strategy, (TrueCostStrategy, BandStockStrategy)):
-            offers_df = pd.read_sql(SQL_FULL_OFFERS, conn)
-            offers_df["site_name"] = offers_df["site_name"].map(
-                lambda s: canonical_site(s) or s
-            )
-
-        # 供 select_from_df 使用的数据源
-        candidate_df = offers_df if offers_df is not None else agg_df
-
         # 合并取当前站点表现
         cur_df = map_df.merge(
             agg_df.rename(
@@ -773,6 +764,30 @@ def reassign_low_stock_suppliers(
             cur_df["cur_sizes_in_stock"].fillna(0).astype(int)
         )
 
+        # TrueCostStrategy 需要 offer 明细来计算真实成本
+        offers_df: Optional[pd.DataFrame] = None
+        if isinstance(strategy, (TrueCostStrategy, BandStockStrategy)):
+            # 全量报价较大：服务端游标分批读取，每批只留需要重新选站点的编码（尺码不达标且不在排除清单）
+            need_codes = set(
+                cur_df.loc[cur_df["cur_sizes_in_stock"] < size_threshold, "product_code"].astype(str)
+            ) - exclude_codes
+            parts = [
+                chunk[chunk["product_code"].astype(str).isin(need_codes)]
+                for chunk in pd.read_sql(
+                    SQL_FULL_OFFERS, conn.execution_options(stream_results=True), chunksize=DB_FETCH_SIZE
+                )
+            ]
+            offers_df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+                columns=["product_code", "site_name", "original_price_gbp", "sale_price_gbp",
+                         "stock_count", "last_checked"]
+            )
+            offers_df["site_name"] = offers_df["site_name"].map(
+                lambda s: canonical_site(s) or s
+            )
+
+        # 供 select_from_df 使用的数据源
+        candidate_df = offers_df if offers_df is not None else agg_df
+
         for _, r in cur_df.iterrows():
             code = str(r["product_code"])
             if code in exclude_codes:
@@ -847,6 +862,7 @@ def reassign_low_stock_suppliers(
     return suggest
 
 
+@db_step("export_supplier_stock_price_report")
 def export_supplier_stock_price_report(
     min_sizes_ok: int = 1, output_path: str | None = None
 ) -> str:
@@ -960,6 +976,7 @@ def export_supplier_stock_price_report(
     return str(out_file)
 
 
+@db_step("apply_barbour_supplier_overrides")
 def apply_barbour_supplier_overrides(
     xlsx_path: str, dry_run: bool = False
 ) -> None:
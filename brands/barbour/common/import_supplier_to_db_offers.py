@@ -10,6 +10,7 @@ from brands.barbour.core.keyword_mapping import KEYWORD_EQUIVALENTS
 from common.product.size_utils import clean_size_for_barbour  # 旧名保留
 from brands.barbour.core.site_utils import canonical_site, assert_site_or_raise
 from config import BARBOUR, DEFAULT_STOCK_COUNT  # 已有导入就不要重复
+from common.ingest.txt_batch import TxtSource, iter_txt_sources, read_txt_lines
 from brands.barbour.core.supplier_price_rules import (
     strategy_all_ratio,
     strategy_ratio_when_no_discount,
@@ -114,7 +115,7 @@ def get_connection():
     return psycopg2.connect(**BARBOUR["PGSQL_CONFIG"])
 
 # ---------- TXT 解析 ----------
-def parse_txt(filepath: Path):
+def parse_txt(filepath: TxtSource):
     """
     解析统一 TXT，目标是产出：
       info = {
@@ -123,8 +124,7 @@ def parse_txt(filepath: Path):
         "offers": [ { "size": "UK 10", "price": 199.0, "stock_count": 3 }, ... ]
       }
     """
-    with open(filepath, "r", encoding="utf-8") as f:
-        lines = f.read().splitlines()
+    lines = read_txt_lines(filepath)
 
     info = {
         "style_name": "",
@@ -378,7 +378,7 @@ def import_txt_for_supplier(supplier: str, dryrun: bool = False, full_sweep: boo
             print(f"🗑️  已清空 {supplier} 的旧 offer 记录（{deleted} 行）")
 
         txt_dir = BARBOUR["TXT_DIRS"][supplier]
-        files = sorted(Path(txt_dir).glob("*.txt"))
+        files = iter_txt_sources(txt_dir)
         missing = []
 
         total_files = 0
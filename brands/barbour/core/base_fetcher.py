@@ -12,16 +12,58 @@ Barbour 采集器基类 - 统一接口和共享逻辑
 
     fetcher = AllweathersFetcher("allweathers", links_file, output_dir)
     fetcher.run_batch()
+
+抓取模式:
+    - "selenium"   (默认) 每个 URL 用 Chrome 渲染
+    - "async_http" asyncio + aiohttp 直接拉静态 HTML, 按 host 自适应并发 (common.crawl.host_limiter);
+                   静态 HTML 解析不出必填字段的 URL 自动回退 Selenium
+
+    class TerracesFetcher(BaseFetcher):
+        FETCH_MODE = "async_http"
+
+页面就绪 (Selenium):
+    子类声明 READY_PREDICATES 后, driver.get() 之后轮询谓词直到满足 (最多 READY_TIMEOUT 秒),
+    不再固定 sleep(wait_seconds); 未声明时保持旧的固定等待。
+
+    class AllweathersFetcher(BaseFetcher):
+        READY_PREDICATES = (jsonld_product_present(),)
+
+资源屏蔽 (Selenium):
+    子类用 LOAD_PROFILE 指定 common.browser.load_profile.LOAD_PROFILES 中的配置,
+    用 CDP 屏蔽图片 / 字体 / 样式表 / 埋点; 结束时日志输出每页节省的字节与耗时。
+    默认 None 不屏蔽任何资源: 依赖元素可见性 / 点击的站点拦掉样式表会出错, 确认过的站点再逐个开启。
+
+HTML 快照 (common.crawl.html_store):
+    两种模式抓到的 HTML 都压缩存入快照库; async_http 发条件请求 (ETag / Last-Modified),
+    内容指纹与上次相同且上次的 TXT 仍在时跳过解析。SNAPSHOT_HTML = False 可关闭。
+
+断点续跑 (common.crawl.frontier):
+    每个 URL 的状态 / 尝试次数 / 最近错误 / 是否写出空壳 TXT 记录在 SQLite frontier 中;
+    上一轮中途退出时 run_batch 只抓剩下的 URL。USE_FRONTIER = False 可关闭。
+    *_get_links 用 common.crawl.link_diff.save_links 写链接时, run_batch 只抓新增的和数据过期的,
+    下架商品的 TXT 被删除 (随后按库存 0 处理)。PLAN_FETCH = False 可关闭 (每次全部重抓)。
+    之后再经 brands.barbour.core.supplier_skip: 编码的首选供货商是其他站点且其数据新鲜时,
+    该页面沿用上次的 TXT 不重抓 (CROSS_SUPPLIER_SKIP = False 可关闭)。
+
+离线重放 (common.crawl.reparse):
+    make_reparser("brands.barbour.supplier.xxx_fetch_info:XxxFetcher") 在子进程里构造
+    offline=True 的采集器, 对快照 HTML 执行 parse_detail_page → 写 TXT, 不访问网络。
+
+分布式抓取 (common.crawl.job_queue):
+    make_batch_runner("brands.barbour.supplier.xxx_fetch_info:XxxFetcher") 返回 runner(urls, max_workers),
+    各 VM 上的 worker 从 Postgres 队列领取一块 URL 后调用 run_batch(urls=...)。
 """
 
 from __future__ import annotations
 
+import asyncio
+import importlib
 import logging
 import threading
 import time
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, NamedTuple, Optional, Sequence, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from bs4 import BeautifulSoup
@@ -34,7 +76,10 @@ from brands.barbour.core.size_normalizer import (
     format_size_detail_simple,
 )
 from brands.barbour.core.gender_classifier import infer_gender
+from brands.barbour.core.supplier_skip import plan_supplier_skip
 from brands.barbour.core.html_parser import (
+    parse_document,
+    parse_soup,
     extract_jsonld,
     extract_meta_tag,
     extract_og_tag,
@@ -49,7 +94,13 @@ from brands.barbour.core.text_utils import (
 )
 
 # 导入通用模块
-from common.browser.selenium_utils import get_driver, quit_driver, quit_all_drivers
+from common.browser.selenium_utils import get_driver, quit_driver, quit_all_drivers, log_pool_stats
+from common.browser.page_ready import ReadyPredicate, WAIT_RECORDER, wait_until_ready
+from common.browser.load_profile import LOAD_METER
+from common.crawl.frontier import get_frontier
+from common.crawl.host_limiter import HOST_LIMIT_MAX, get_host_limiter
+from common.crawl.link_diff import plan_fetch
+from common.crawl.html_store import get_html_store
 from common.ingest.txt_writer import format_txt
 
 # 配置
@@ -57,6 +108,28 @@ from config import SETTINGS
 
 DEFAULT_STOCK_COUNT = SETTINGS.get("DEFAULT_STOCK_COUNT", 3)
 
+# async_http 模式默认参数
+FETCH_MODES = ("selenium", "async_http")
+DEFAULT_HTTP_CONCURRENCY_PER_HOST = HOST_LIMIT_MAX   # 上限; 实际在途数由 host_limiter 按 AIMD 调整
+DEFAULT_HTTP_TIMEOUT = 20
+DEFAULT_HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/131.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-GB,en;q=0.9",
+}
+
+
+class StaticPage(NamedTuple):
+    """async_http 拉到的一页 (304 时 html 为 None, not_modified=True)"""
+    html: Optional[str]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    not_modified: bool = False
+
 
 # ================== 基类定义 ==================
 
@@ -74,8 +147,31 @@ class BaseFetcher(ABC):
     - 统一日志
     - 线程安全的驱动管理
     - 统一文件写入格式
+    - 可选 async_http 模式 (静态 HTML 够用的站点跳过 Chrome)
     """
 
+    # 子类可覆盖: "selenium" / "async_http"
+    FETCH_MODE: str = "selenium"
+    # async_http 模式的请求头, 子类可覆盖
+    HTTP_HEADERS: Dict[str, str] = DEFAULT_HTTP_HEADERS
+    # Selenium 页面就绪谓词 (全部满足才解析), 为空则固定 sleep(wait_seconds)
+    READY_PREDICATES: Sequence[ReadyPredicate] = ()
+    READY_TIMEOUT: float = 15.0
+    # 资源屏蔽配置名 (见 common/browser/load_profile.py), None 表示不屏蔽 (默认, 由站点子类按需开启)
+    LOAD_PROFILE: Optional[str] = None
+    # 是否把抓到的 HTML 存入快照库 (并据此跳过未变化页面的解析)
+    SNAPSHOT_HTML: bool = True
+    # 是否用 frontier 记录每个 URL 的抓取状态 (中断后续跑)
+    USE_FRONTIER: bool = True
+
+    # 是否按 link_diff.plan_fetch 只抓新增 / 过期的 URL (其余沿用 frontier 记录的 TXT);
+    # frontier 每个 URL 只记一个 TXT, 一个 URL 写多个 TXT 的站点需关闭
+    PLAN_FETCH: bool = True
+
+    # 抓取前查 barbour_offers / barbour_supplier_map, 首选其他站点且数据新鲜的编码对应页面不重抓
+    # (brands.barbour.core.supplier_skip); 一个 URL 写多个 TXT 的站点需关闭
+    CROSS_SUPPLIER_SKIP: bool = True
+
     def __init__(
         self,
         site_name: str,
@@ -86,6 +182,9 @@ class BaseFetcher(ABC):
         default_stock: int = DEFAULT_STOCK_COUNT,
         wait_seconds: float = 2.0,
         headless: bool = True,
+        fetch_mode: Optional[str] = None,
+        http_concurrency_per_host: int = DEFAULT_HTTP_CONCURRENCY_PER_HOST,
+        http_timeout: float = DEFAULT_HTTP_TIMEOUT,
     ):
         """
         初始化采集器
@@ -97,8 +196,12 @@ class BaseFetcher(ABC):
             max_workers: 并发线程数
             max_retries: 最大重试次数
             default_stock: 默认库存数量
-            wait_seconds: 页面等待时间 (秒)
+            wait_seconds: 页面等待时间 (秒), 仅在未声明 READY_PREDICATES 时使用
             headless: 是否使用无头模式
+            fetch_mode: 抓取模式, None 时使用类属性 FETCH_MODE
+            http_concurrency_per_host: async_http 模式下每个 host 的连接数上限
+                (实际在途请求数由 host_limiter 在 1 ~ 上限之间自适应)
+            http_timeout: async_http 模式单次请求超时 (秒)
         """
         self.site_name = site_name
         self.links_file = Path(links_file)
@@ -108,6 +211,16 @@ class BaseFetcher(ABC):
         self.default_stock = default_stock
         self.wait_seconds = wait_seconds
         self.headless = headless
+        self.fetch_mode = fetch_mode or self.FETCH_MODE
+        if self.fetch_mode not in FETCH_MODES:
+            raise ValueError(f"未知抓取模式: {self.fetch_mode} (可选: {FETCH_MODES})")
+        self.http_concurrency_per_host = max(1, int(http_concurrency_per_host))
+        self.http_timeout = http_timeout
+        self.host_limiter = get_host_limiter()
+        self.html_store = get_html_store() if self.SNAPSHOT_HTML else None
+        self.frontier = get_frontier(site_name) if self.USE_FRONTIER else None
+        # 离线重放 (reparse) 时为 True: 子类解析逻辑不得再使用浏览器 / 网络
+        self.offline = False
 
         # 创建输出目录
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -127,6 +240,9 @@ class BaseFetcher(ABC):
         # 统计
         self._success_count = 0
         self._fail_count = 0
+        self._http_success_count = 0
+        self._fallback_count = 0
+        self._unchanged_count = 0
         self._lock = threading.Lock()
 
     # ================== 抽象方法 - 子类必须实现 ==================
@@ -166,6 +282,9 @@ class BaseFetcher(ABC):
         """
         获取 Selenium 驱动 - 线程安全
 
+        driver 从 selenium_utils 的进程级池租用, 跨站点复用,
+        满页数 / 内存阈值时由池自动换新。
+
         Returns:
             WebDriver实例
         """
@@ -173,12 +292,18 @@ class BaseFetcher(ABC):
             name=self.site_name,
             headless=self.headless,
             window_size="1920,1080",
+            load_profile=self.LOAD_PROFILE,
         )
 
-    def quit_driver(self):
-        """关闭驱动"""
+    def quit_driver(self, discard: bool = False):
+        """
+        归还驱动到池
+
+        Args:
+            discard: True = 直接销毁 (renderer 崩溃等), 下次 get_driver() 拿新实例
+        """
         try:
-            quit_driver(self.site_name)
+            quit_driver(self.site_name, discard=discard)
         except Exception as e:
             self.logger.warning(f"驱动关闭失败: {e}")
 
@@ -199,28 +324,24 @@ class BaseFetcher(ABC):
         for attempt in range(1, self.max_retries + 1):
             try:
                 self.logger.info(f"[{idx}/{total}] [{attempt}/{self.max_retries}] 抓取: {url}")
+                if self.frontier is not None and attempt == 1:
+                    self.frontier.mark_started(url)
 
-                # Step 1: 获取HTML
+                # Step 1: 获取HTML (存快照; 内容未变化则沿用上次的 TXT)
                 html = self._fetch_html(url)
+                if self._skip_if_unchanged(url, html, idx, total):
+                    return url, True
 
-                # Step 2: 解析
-                info = self.parse_detail_page(html, url)
-
-                # Step 3: 验证必填字段
-                self._validate_info(info, url)
-
-                # Step 4: 填充默认字段
-                info.setdefault("Site Name", self.site_name)
-                info.setdefault("Source URL", url)
-
-                # Step 5: 写入文件
-                self._write_output(info)
+                # Step 2-5: 解析 → 验证 → 填充默认字段 → 写文件
+                info, txt_path = self._parse_and_write(html, url)
+                self._mark_output(url, txt_path)
 
                 code = info.get("Product Code", "N/A")
                 self.logger.info(f"✅ [{idx}/{total}] 成功: {code}")
 
                 with self._lock:
                     self._success_count += 1
+                self._on_product_done(url)
 
                 return url, True
 
@@ -238,10 +359,25 @@ class BaseFetcher(ABC):
                 if attempt == self.max_retries:
                     with self._lock:
                         self._fail_count += 1
+                    if self.frontier is not None:
+                        self.frontier.mark_failed(url, e)
                     return url, False
 
         return url, False
 
+    def _parse_and_write(self, html: str, url: str) -> Tuple[Dict[str, Any], Optional[Path]]:
+        """解析 + 验证必填字段 + 填充默认字段 + 写 TXT (在线抓取与离线重放共用)"""
+        info = self.parse_detail_page(html, url)
+        self._validate_info(info, url)
+        info.setdefault("Site Name", self.site_name)
+        info.setdefault("Source URL", url)
+        return info, self._write_output(info)
+
+    def reparse_html(self, html: str, url: str) -> Optional[Path]:
+        """离线重放入口: 用已存的 HTML 重新生成 TXT, 返回 TXT 路径"""
+        _, txt_path = self._parse_and_write(html, url)
+        return txt_path
+
     def _fetch_html(self, url: str) -> str:
         """
         获取HTML - 默认实现(Selenium)，子类可覆盖
@@ -257,9 +393,39 @@ class BaseFetcher(ABC):
         """
         driver = self.get_driver()
         driver.get(url)
-        time.sleep(self.wait_seconds)  # 等待渲染
+        self._wait_for_page(driver, url)
         return driver.page_source
 
+    def _wait_for_page(self, driver, url: str) -> bool:
+        """
+        等待页面渲染就绪，并记录实际等待时间
+
+        声明了 READY_PREDICATES 时轮询谓词 (超时后照常解析当前 page_source),
+        否则固定 sleep(wait_seconds)。
+
+        Returns:
+            是否在超时前就绪
+        """
+        if self.READY_PREDICATES:
+            ready, waited = wait_until_ready(driver, self.READY_PREDICATES, timeout=self.READY_TIMEOUT)
+            if not ready:
+                self.logger.warning(f"等待页面就绪超时 ({waited:.1f}s)，继续解析: {url}")
+        else:
+            time.sleep(self.wait_seconds)
+            ready, waited = True, self.wait_seconds
+
+        WAIT_RECORDER.record(self.site_name, waited, ready)
+        if self.LOAD_PROFILE:
+            LOAD_METER.after_page(driver, self.site_name)
+        return ready
+
+    def _on_product_done(self, url: str) -> None:
+        """
+        单个 URL 成功写入后的回调 - 默认无操作
+
+        子类可覆盖 (如记录断点续传进度)。Selenium 与 async_http 两条路径都会调用。
+        """
+
     def _validate_info(self, info: Dict[str, Any], url: str) -> None:
         """
         验证必填字段
@@ -287,12 +453,15 @@ class BaseFetcher(ABC):
             if field not in info:
                 raise ValueError(f"缺失必填字段: {field} (URL: {url})")
 
-    def _write_output(self, info: Dict[str, Any]) -> None:
+    def _write_output(self, info: Dict[str, Any]) -> Optional[Path]:
         """
         写入TXT文件 - 统一格式
 
         Args:
             info: 商品信息字典
+
+        Returns:
+            写入的 TXT 路径
         """
         code = info.get("Product Code", "").strip()
         if not code or code in ["Unknown", "No Data", "N/A", ""]:
@@ -310,30 +479,129 @@ class BaseFetcher(ABC):
         except Exception as e:
             self.logger.error(f"文件写入失败 {txt_path}: {e}")
             raise
+        return txt_path
+
+    # ================== HTML 快照 ==================
+
+    def _skip_if_unchanged(
+        self,
+        url: str,
+        html: Optional[str],
+        idx: int,
+        total: int,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        not_modified: bool = False,
+    ) -> bool:
+        """
+        存快照并判断能否跳过解析
+
+        not_modified=True 表示服务器返回 304 (html 为 None, 直接用本地快照)。
+        内容指纹与上次相同且上次的 TXT 仍在时记为成功并返回 True。
+        """
+        if self.html_store is None:
+            return False
+        if not_modified:
+            changed = False
+            self.html_store.touch_not_modified(url, self.site_name)
+        else:
+            page = self.html_store.put(
+                url, html or "", site=self.site_name, etag=etag, last_modified=last_modified
+            )
+            changed = page.changed
+        if not self.html_store.can_skip(url, changed):
+            return False
+
+        self.logger.info(f"⏭️ [{idx}/{total}] 内容未变化, 沿用上次 TXT: {url}")
+        if self.frontier is not None:
+            snap = self.html_store.latest(url)
+            self.frontier.mark_done(url, snap.output_path if snap else None)
+        with self._lock:
+            self._success_count += 1
+            self._unchanged_count += 1
+        self._on_product_done(url)
+        return True
+
+    def _mark_output(self, url: str, txt_path: Optional[Path]) -> None:
+        """记录当前快照对应的 TXT (下次内容不变时可跳过解析), 并在 frontier 中标记完成"""
+        if self.html_store is not None and txt_path is not None:
+            self.html_store.mark_output(url, txt_path)
+        if self.frontier is not None:
+            self.frontier.mark_done(url, txt_path)
 
     # ================== 批量入口 ==================
 
-    def run_batch(self) -> Tuple[int, int]:
+    def run_batch(self, urls: Optional[List[str]] = None) -> Tuple[int, int]:
         """
         批量抓取 - 主入口
 
+        Args:
+            urls: 直接指定要抓的 URL (分布式队列的 worker 按块传入); None 时读 links_file
+
         Returns:
             (成功数, 失败数)
         """
-        # 读取链接
-        if not self.links_file.exists():
-            self.logger.error(f"链接文件不存在: {self.links_file}")
-            return 0, 0
+        chunk = urls is not None
+        if chunk:
+            urls = list(dict.fromkeys(u.strip() for u in urls if u and u.strip()))
+            planned = urls
+        else:
+            # 读取链接
+            if not self.links_file.exists():
+                self.logger.error(f"链接文件不存在: {self.links_file}")
+                return 0, 0
+            urls = self._load_urls()
+            # 链接采集做过增量对比时，只抓新增 + 数据过期的
+            planned = urls
+            if self.PLAN_FETCH and self.frontier is not None:
+                planned = plan_fetch(self.site_name, urls, self.links_file)
+            if self.CROSS_SUPPLIER_SKIP and self.frontier is not None:
+                planned = plan_supplier_skip(self.site_name, planned)
 
-        urls = self._load_urls()
         if not urls:
             self.logger.warning("无有效链接")
             return 0, 0
+        if self.frontier is not None:
+            # 队列 worker 按块传入: 每块单独一轮, 不续跑同机其他 worker 进程的 run
+            urls = self.frontier.begin_chunk(planned) if chunk else self.frontier.begin(planned)
+            if not urls:
+                self.frontier.finish()
+                self.logger.info("✅ 上一轮已全部完成, 无需续跑")
+                return 0, 0
 
         total = len(urls)
-        self.logger.info(f"📄 共 {total} 个商品待抓取 (并发度: {self.max_workers})")
+        self.logger.info(
+            f"📄 共 {total} 个商品待抓取 (并发度: {self.max_workers}, 模式: {self.fetch_mode})"
+        )
+
+        if self.fetch_mode == "async_http":
+            fallback_urls = asyncio.run(self._run_async_http(urls))
+            self.logger.info(
+                f"⚡ async_http 完成: 成功 {self._http_success_count}, "
+                f"回退 Selenium {len(fallback_urls)}"
+            )
+            if fallback_urls:
+                self._run_threaded(fallback_urls)
+        else:
+            self._run_threaded(urls)
+
+        # 统计
+        success = self._success_count
+        fail = self._fail_count
+        self.logger.info(f"✅ 完成: 成功 {success}, 失败 {fail}")
+        if self._unchanged_count:
+            self.logger.info(f"⏭️ 内容未变化跳过解析: {self._unchanged_count}")
+        if self.frontier is not None:
+            left = self.frontier.finish()
+            if left:
+                self.logger.warning(f"frontier 中仍有 {left} 个 URL 未处理")
+            self.logger.info(self.frontier.format_stats())
+
+        return success, fail
 
-        # 并发抓取
+    def _run_threaded(self, urls: List[str]) -> None:
+        """Selenium 路径: 线程池并发执行 fetch_one_product"""
+        total = len(urls)
         try:
             with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
                 futures = {
@@ -349,14 +617,155 @@ class BaseFetcher(ABC):
                         self.logger.error(f"任务异常: {url} - {e}")
         finally:
             quit_all_drivers()
-            self.logger.info("🧹 已清理所有 driver")
+            self.logger.info("🧹 已归还所有 driver 到池")
+            log_pool_stats(f"[DriverPool:{self.site_name}]")
+            self.logger.info(WAIT_RECORDER.format_summary(self.site_name))
+            if self.LOAD_PROFILE and LOAD_METER.summary(self.site_name)["pages_blocked"]:
+                self.logger.info(LOAD_METER.format_summary(self.site_name))
 
-        # 统计
-        success = self._success_count
-        fail = self._fail_count
-        self.logger.info(f"✅ 完成: 成功 {success}, 失败 {fail}")
+    # ================== async_http 模式 ==================
 
-        return success, fail
+    async def _run_async_http(self, urls: List[str]) -> List[str]:
+        """
+        async_http 路径: aiohttp 并发拉取静态 HTML, 按 host 自适应限流 (AIMD)
+
+        解析/写文件放到线程池执行 (parse_detail_page 可能访问数据库),
+        不阻塞事件循环。固定数量的协程从 URL 列表依次取任务 (抓取并发 + 解析线程数),
+        不为每个 URL 各建一个协程一起等名额。
+
+        Returns:
+            需要回退 Selenium 的 URL 列表 (保持原顺序)
+        """
+        try:
+            import aiohttp
+        except ImportError:
+            self.logger.warning("未安装 aiohttp, async_http 模式不可用, 全部回退 Selenium")
+            return list(urls)
+
+        total = len(urls)
+        loop = asyncio.get_running_loop()
+        timeout = aiohttp.ClientTimeout(total=self.http_timeout)
+        connector = aiohttp.TCPConnector(limit_per_host=self.http_concurrency_per_host)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as parse_pool:
+            async with aiohttp.ClientSession(
+                headers=self.HTTP_HEADERS, timeout=timeout, connector=connector
+            ) as session:
+
+                async def _one(idx: int, url: str) -> Optional[str]:
+                    page = await self._fetch_html_async(session, url, idx, total)
+                    if page is None:
+                        return url
+                    ok = await loop.run_in_executor(
+                        parse_pool, self._process_static_html, page, url, idx, total
+                    )
+                    return None if ok else url
+
+                results: List[Optional[str]] = [None] * total
+                todo = iter(enumerate(urls))
+
+                async def _worker() -> None:
+                    for idx, url in todo:
+                        results[idx] = await _one(idx + 1, url)
+
+                n_workers = min(total, self.http_concurrency_per_host + self.max_workers)
+                await asyncio.gather(*(_worker() for _ in range(n_workers)))
+
+        fallback = [u for u in results if u]
+        with self._lock:
+            self._fallback_count += len(fallback)
+        self.host_limiter.save()
+        self.logger.info(self.host_limiter.format_stats())
+        return fallback
+
+    async def _fetch_html_async(self, session, url: str, idx: int, total: int) -> Optional[StaticPage]:
+        """
+        异步获取静态 HTML - 网络错误/5xx/429 指数退避重试
+
+        有快照时带 If-None-Match / If-Modified-Since, 304 时 html 为 None。
+
+        Returns:
+            StaticPage; 多次失败或被拒绝 (403 等) 返回 None, 交给 Selenium
+        """
+        headers = self.html_store.conditional_headers(url) if self.html_store is not None else {}
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                async with self.host_limiter.aslot(url) as slot, \
+                        session.get(url, allow_redirects=True, headers=headers) as resp:
+                    slot.record(resp.status, resp.headers.get("Retry-After"))
+                    if resp.status == 304 and headers:
+                        return StaticPage(html=None, not_modified=True)
+                    if resp.status == 200:
+                        return StaticPage(
+                            html=await resp.text(errors="ignore"),
+                            etag=resp.headers.get("ETag"),
+                            last_modified=resp.headers.get("Last-Modified"),
+                        )
+                    if resp.status not in (429, 500, 502, 503, 504):
+                        self.logger.info(f"[{idx}/{total}] HTTP {resp.status}, 回退 Selenium: {url}")
+                        return None
+                    err = f"HTTP {resp.status}"
+            except Exception as e:
+                err = f"{type(e).__name__}: {e}"
+
+            self.logger.warning(f"[{idx}/{total}] [{attempt}/{self.max_retries}] 静态请求失败: {url} - {err}")
+            if attempt < self.max_retries:
+                await asyncio.sleep(min(2 ** attempt, 30))
+
+        return None
+
+    def _process_static_html(self, page: StaticPage, url: str, idx: int, total: int) -> bool:
+        """
+        存快照 + 解析 + 校验 + 写文件 (静态 HTML)
+
+        与 fetch_one_product 相同的 parse_detail_page / _write_output,
+        只是 HTML 来源不同。任何一步不满足都返回 False, 由 Selenium 重抓。
+        """
+        try:
+            if self._skip_if_unchanged(
+                url, page.html, idx, total,
+                etag=page.etag, last_modified=page.last_modified, not_modified=page.not_modified,
+            ):
+                return True
+            html = page.html
+            if html is None:
+                # 304 但无法沿用 (TXT 已被清理): 用本地快照重新解析
+                html = self.html_store.load_latest(url) if self.html_store is not None else None
+                if html is None:
+                    return False
+            info = self.parse_detail_page(html, url)
+            self._validate_info(info, url)
+            if not self._is_static_info_complete(info):
+                self.logger.info(f"[{idx}/{total}] 静态 HTML 字段不全, 回退 Selenium: {url}")
+                return False
+
+            info.setdefault("Site Name", self.site_name)
+            info.setdefault("Source URL", url)
+            self._mark_output(url, self._write_output(info))
+        except Exception as e:
+            self.logger.info(f"[{idx}/{total}] 静态 HTML 解析失败, 回退 Selenium: {url} - {e}")
+            return False
+
+        code = info.get("Product Code", "N/A")
+        self.logger.info(f"⚡ [{idx}/{total}] 成功 (http): {code}")
+        with self._lock:
+            self._success_count += 1
+            self._http_success_count += 1
+        self._on_product_done(url)
+        return True
+
+    def _is_static_info_complete(self, info: Dict[str, Any]) -> bool:
+        """
+        判断静态 HTML 解析结果是否可直接落盘 - 子类可覆盖
+
+        默认: 编码和尺码都必须有实际值 (JS 渲染的尺码在静态 HTML 中常常缺失)。
+        """
+        missing = ("", "No Data", "Unknown", "N/A", None)
+        code = info.get("Product Code")
+        code = code.strip() if isinstance(code, str) else code
+        if code in missing:
+            return False
+        return info.get("Product Size Detail") not in missing
 
     def _load_urls(self) -> List[str]:
         """
@@ -395,6 +804,14 @@ class BaseFetcher(ABC):
 
     # ================== 工具方法 (供子类使用) ==================
 
+    def parse_document(self, html: str):
+        """按 SETTINGS["HTML_PARSER_BACKEND"] 建树, 结果可直接传给 extract_jsonld / extract_meta / extract_og"""
+        return parse_document(html)
+
+    def parse_soup(self, html: str) -> BeautifulSoup:
+        """按 SETTINGS["HTML_PARSER_BACKEND"] 建 BeautifulSoup 树（parse_detail_page 等用 BeautifulSoup API 的解析代码用）"""
+        return parse_soup(html)
+
     def extract_jsonld(self, soup: BeautifulSoup, target_type: str = "Product") -> Optional[Dict]:
         """提取 JSON-LD 数据"""
         return extract_jsonld(soup, target_type)
@@ -494,3 +911,58 @@ def setup_logging(level: int = logging.INFO):
         format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S",
     )
+
+
+def make_reparser(fetcher_cls: str, output_dir: Optional[str] = None):
+    """
+    离线重放的 handler 工厂 (common.crawl.reparse 在每个子进程里调用一次)
+
+    Args:
+        fetcher_cls: "模块:类名", 模块需定义 SITE_NAME / LINKS_FILE / OUTPUT_DIR
+        output_dir: 覆盖输出目录 (默认写回站点 TXT 目录)
+
+    Returns:
+        handler(html, url) -> TXT 路径
+    """
+    module_name, cls_name = fetcher_cls.split(":", 1)
+    module = importlib.import_module(module_name)
+    cls = getattr(module, cls_name)
+
+    fetcher = cls(
+        site_name=module.SITE_NAME,
+        links_file=module.LINKS_FILE,
+        output_dir=output_dir or module.OUTPUT_DIR,
+        max_workers=1,
+    )
+    fetcher.offline = True
+    fetcher.html_store = None      # 索引由主进程统一更新
+    fetcher.frontier = None
+    return fetcher.reparse_html
+
+
+def make_batch_runner(fetcher_cls: str, **fetcher_kwargs):
+    """
+    分布式抓取队列的 runner 工厂 (common.crawl.job_queue 的 worker 调用一次)
+
+    Args:
+        fetcher_cls: "模块:类名", 模块需定义 SITE_NAME / LINKS_FILE / OUTPUT_DIR
+        fetcher_kwargs: 传给采集器构造函数的其他参数 (wait_seconds 等)
+
+    Returns:
+        runner(urls, max_workers): 对一块 URL 执行 run_batch, 结果记在 frontier 中
+    """
+    module_name, cls_name = fetcher_cls.split(":", 1)
+    module = importlib.import_module(module_name)
+    cls = getattr(module, cls_name)
+
+    def runner(urls: List[str], max_workers: int = 4) -> Tuple[int, int]:
+        fetcher = cls(
+            site_name=module.SITE_NAME,
+            links_file=module.LINKS_FILE,
+            output_dir=module.OUTPUT_DIR,
+            max_workers=max_workers,
+            **fetcher_kwargs,
+        )
+        return fetcher.run_batch(urls=urls)
+
+    return runner
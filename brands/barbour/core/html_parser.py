@@ -4,15 +4,124 @@ HTML/JSON-LD 解析工具
 统一处理所有采集脚本的HTML解析逻辑，消除重复代码
 
 重复率: 在 8+ 个采集脚本中重复出现
+
+解析后端 (SETTINGS["HTML_PARSER_BACKEND"]):
+- "bs4"        BeautifulSoup + html.parser (默认, 与旧行为一致)
+- "bs4-lxml"   BeautifulSoup + lxml 建树 (同一套 Tag API, 建树更快)
+- "selectolax" selectolax / Lexbor (C 实现, 建树和选择器都快一个数量级)
+
+各站点的 parse_detail_page 等解析代码用 parse_soup(html)（BaseFetcher.parse_soup）建树:
+它们直接用 find / select / get_text 等 BeautifulSoup API，所以总是得到 BeautifulSoup,
+配置为 "bs4-lxml" 或 "selectolax" 时都用 lxml 建树（未安装 lxml 时退回 html.parser）。
+
+只用到下列辅助函数的代码可以用 parse_document(html)，"selectolax" 时得到 Lexbor 文档;
+这些函数既接受 BeautifulSoup/Tag, 也接受 selectolax 的文档/节点, 签名不变:
+
+    doc = parse_document(html)
+    jsonld = extract_jsonld(doc, "Product")
+    title = extract_og_tag(doc, "title")
+
+对比两种后端的耗时和提取结果: python test/html_parser_benchmark.py
 """
 
 from __future__ import annotations
 
-import json
 import re
 from typing import Dict, Any, Optional, List
 from bs4 import BeautifulSoup
 
+from config import SETTINGS
+from common.crawl.embedded_json import EmbeddedJson
+
+try:
+    from selectolax.lexbor import LexborHTMLParser, LexborNode  # 可选: pip install selectolax
+except ImportError:
+    LexborHTMLParser = LexborNode = None
+
+HTML_PARSER_BACKENDS = ("bs4", "bs4-lxml", "selectolax")
+HTML_PARSER_BACKEND = SETTINGS.get("HTML_PARSER_BACKEND", "bs4")
+
+
+# ================== 解析后端 ==================
+
+def parse_document(html: str, backend: Optional[str] = None) -> Any:
+    """
+    按后端配置把 HTML 建成文档树
+
+    Args:
+        html: 页面 HTML
+        backend: "bs4" / "bs4-lxml" / "selectolax", None 使用 HTML_PARSER_BACKEND
+
+    Returns:
+        BeautifulSoup 或 LexborHTMLParser; selectolax / lxml 未安装时退回 html.parser
+    """
+    backend = backend or HTML_PARSER_BACKEND
+    if backend not in HTML_PARSER_BACKENDS:
+        raise ValueError(f"未知解析后端: {backend} (可选: {HTML_PARSER_BACKENDS})")
+
+    if backend == "selectolax" and LexborHTMLParser is not None:
+        return LexborHTMLParser(html)
+    if backend == "bs4-lxml":
+        try:
+            return BeautifulSoup(html, "lxml")
+        except Exception:
+            pass
+    return BeautifulSoup(html, "html.parser")
+
+
+def parse_soup(html: str, backend: Optional[str] = None) -> BeautifulSoup:
+    """
+    按后端配置建 BeautifulSoup 树（解析代码用到 BeautifulSoup API 时用）
+
+    "bs4" 用 html.parser；"bs4-lxml" / "selectolax" 用 lxml 建树，未安装 lxml 时退回 html.parser
+    """
+    backend = backend or HTML_PARSER_BACKEND
+    if backend not in HTML_PARSER_BACKENDS:
+        raise ValueError(f"未知解析后端: {backend} (可选: {HTML_PARSER_BACKENDS})")
+    return parse_document(html, "bs4" if backend == "bs4" else "bs4-lxml")
+
+
+def _is_fast(node: Any) -> bool:
+    return LexborNode is not None and isinstance(node, (LexborHTMLParser, LexborNode))
+
+
+def _select(node: Any, css: str) -> List[Any]:
+    """node.select(css); selectolax 的节点会匹配到自身, 这里去掉以与 bs4 一致"""
+    if not _is_fast(node):
+        return node.select(css)
+    found = node.css(css)
+    if isinstance(node, LexborNode):
+        found = [n for n in found if n.mem_id != node.mem_id]
+    return found
+
+
+def _select_one(node: Any, css: str) -> Any:
+    if not _is_fast(node):
+        return node.select_one(css)
+    found = _select(node, css)
+    return found[0] if found else None
+
+
+def _text(node: Any) -> str:
+    """等价于 Tag.get_text(strip=True)"""
+    if not _is_fast(node):
+        return node.get_text(strip=True)
+    return node.text(deep=True, separator="", strip=True)
+
+
+def _attr(node: Any, name: str) -> Optional[str]:
+    if not _is_fast(node):
+        return node.get(name)
+    return node.attributes.get(name)
+
+
+def _find_meta(doc: Any, attr_name: str, value: str) -> Any:
+    """等价于 soup.find("meta", attrs={attr_name: value}) (只取第一个)"""
+    if not _is_fast(doc):
+        return doc.find("meta", attrs={attr_name: value})
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return _select_one(doc, f'meta[{attr_name}="{escaped}"]')
+
 # ================== JSON-LD 解析 ==================
 
 def extract_jsonld(
@@ -34,48 +143,10 @@ def extract_jsonld(
         >>> jsonld = extract_jsonld(soup, "Product")
         >>> print(jsonld.get("name"))
     """
-    if isinstance(target_type, str):
-        target_types = [target_type]
-    else:
-        target_types = target_type
-
-    # 查找所有 JSON-LD script 标签
-    for script in soup.select('script[type="application/ld+json"]'):
-        try:
-            raw_text = script.get_text(strip=True)
-            if not raw_text:
-                continue
-
-            # 解析 JSON
-            data = json.loads(raw_text)
-
-            # 处理数组形式
-            if isinstance(data, list):
-                for item in data:
-                    if isinstance(item, dict) and _is_target_type(item, target_types):
-                        return item
-
-            # 处理单个对象
-            if isinstance(data, dict) and _is_target_type(data, target_types):
-                return data
-
-        except (json.JSONDecodeError, Exception):
-            continue
-
-    return None
-
-
-def _is_target_type(data: Dict, target_types: List[str]) -> bool:
-    """检查JSON-LD对象是否匹配目标类型"""
-    obj_type = data.get("@type", "")
-
-    if isinstance(obj_type, str):
-        return obj_type.lower() in [t.lower() for t in target_types]
-
-    if isinstance(obj_type, list):
-        return any(t.lower() in [tt.lower() for tt in target_types] for t in obj_type)
-
-    return False
+    # 解码 / @type 匹配 / 展开顶层数组与 @graph 都交给 common.crawl.embedded_json，
+    # 与直接拿 HTML 的 extract_embedded_json(html).jsonld_first() 结果一致
+    texts = [_text(script) for script in _select(soup, 'script[type="application/ld+json"]')]
+    return EmbeddedJson.from_jsonld(texts).jsonld_first(target_type)
 
 
 def extract_jsonld_field(
@@ -134,21 +205,21 @@ def extract_meta_tag(
         >>> title = extract_meta_tag(soup, "og:title", name_attr="property")
     """
     # 尝试 name 属性
-    tag = soup.find("meta", attrs={name_attr: name})
-    if tag and tag.get(attr):
-        return tag[attr]
+    tag = _find_meta(soup, name_attr, name)
+    if tag is not None and _attr(tag, attr):
+        return _attr(tag, attr)
 
     # 如果 name_attr 是 "name", 再尝试 "property"
     if name_attr == "name":
-        tag = soup.find("meta", attrs={"property": name})
-        if tag and tag.get(attr):
-            return tag[attr]
+        tag = _find_meta(soup, "property", name)
+        if tag is not None and _attr(tag, attr):
+            return _attr(tag, attr)
 
     # 如果 name_attr 是 "property", 再尝试 "name"
     if name_attr == "property":
-        tag = soup.find("meta", attrs={"name": name})
-        if tag and tag.get(attr):
-            return tag[attr]
+        tag = _find_meta(soup, "name", name)
+        if tag is not None and _attr(tag, attr):
+            return _attr(tag, attr)
 
     return None
 
@@ -254,7 +325,7 @@ def extract_prices_from_element(
     从价格容器元素中提取原价和折扣价
 
     Args:
-        price_element: 价格容器元素 (BeautifulSoup Tag)
+        price_element: 价格容器元素 (BeautifulSoup Tag / selectolax 节点)
         original_selector: 原价选择器
         discount_selector: 折扣价选择器
 
@@ -272,26 +343,26 @@ def extract_prices_from_element(
     discount_price = None
 
     # 提取折扣价
-    discount_tag = price_element.select_one(discount_selector)
-    if discount_tag:
-        discount_price = extract_price_from_text(discount_tag.get_text(strip=True))
+    discount_tag = _select_one(price_element, discount_selector)
+    if discount_tag is not None:
+        discount_price = extract_price_from_text(_text(discount_tag))
 
     # 提取原价
-    original_tag = price_element.select_one(original_selector)
-    if original_tag:
-        original_price = extract_price_from_text(original_tag.get_text(strip=True))
+    original_tag = _select_one(price_element, original_selector)
+    if original_tag is not None:
+        original_price = extract_price_from_text(_text(original_tag))
 
     # 兜底: 从 data-testvalue 属性读取
     if original_price is None:
-        testvalue = price_element.get("data-testvalue")
+        testvalue = _attr(price_element, "data-testvalue")
         if testvalue:
             original_price = extract_price_from_text(testvalue)
 
     # 兜底: 从第一个 span 读取
     if original_price is None:
-        first_span = price_element.find("span")
-        if first_span:
-            original_price = extract_price_from_text(first_span.get_text(strip=True))
+        first_span = price_element.find("span") if not _is_fast(price_element) else _select_one(price_element, "span")
+        if first_span is not None:
+            original_price = extract_price_from_text(_text(first_span))
 
     return original_price, discount_price
 
@@ -333,8 +404,8 @@ def extract_image_urls(
     for selector in selectors:
         # img 标签
         if selector.startswith("img"):
-            for img in soup.select(selector):
-                url = img.get("src") or img.get("data-src") or img.get("data-lazy")
+            for img in _select(soup, selector):
+                url = _attr(img, "src") or _attr(img, "data-src") or _attr(img, "data-lazy")
                 if url and url not in seen:
                     urls.append(url)
                     seen.add(url)
@@ -343,9 +414,9 @@ def extract_image_urls(
 
         # meta 标签
         elif selector.startswith("meta"):
-            tag = soup.select_one(selector)
-            if tag:
-                url = tag.get("content")
+            tag = _select_one(soup, selector)
+            if tag is not None:
+                url = _attr(tag, "content")
                 if url and url not in seen:
                     urls.append(url)
                     seen.add(url)
@@ -381,8 +452,8 @@ def extract_sizes_from_select(soup: BeautifulSoup) -> List[str]:
     ]
 
     for selector in selectors:
-        for option in soup.select(selector):
-            text = option.get_text(strip=True)
+        for option in _select(soup, selector):
+            text = _text(option)
 
             # 过滤空值和提示文本
             if not text or text.lower() in ["select size", "choose size", "size", "--"]:
@@ -455,8 +526,9 @@ def extract_barbour_code_from_description(soup: BeautifulSoup) -> Optional[str]:
             return code
 
     # 尝试从页面文本
-    for tag in soup.find_all(["p", "div", "span"]):
-        text = tag.get_text(strip=True)
+    tags = _select(soup, "p, div, span") if _is_fast(soup) else soup.find_all(["p", "div", "span"])
+    for tag in tags:
+        text = _text(tag)
         code = extract_barbour_code_from_text(text)
         if code:
             return code
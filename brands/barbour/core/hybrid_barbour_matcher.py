@@ -23,6 +23,8 @@ import json
 import re
 import unicodedata
 
+from common.db.query import execute_prepared
+
 # --- 复用：颜色标准化 ---
 try:
     from brands.barbour.core.color_utils import normalize_color as _normalize_color
@@ -138,7 +140,7 @@ def resolve_by_partial_code(
     """
     try:
         with raw_conn.cursor() as cur:
-            cur.execute(sql, (f"{partial_code}%",))
+            execute_prepared(cur, sql, (f"{partial_code}%",))
             rows = cur.fetchall()
     except Exception as e:
         dbg["reason"] = f"DB_ERROR: {e}"
@@ -202,7 +204,7 @@ def load_lexicon_set(raw_conn, brand: str, level: int) -> set[str]:
       WHERE brand=%s AND level=%s AND is_active=true
     """
     with raw_conn.cursor() as cur:
-        cur.execute(sql, (brand, lvl))
+        execute_prepared(cur, sql, (brand, lvl))
         return {str(r[0]).strip().lower() for r in cur.fetchall() if r and r[0]}
 
 
@@ -287,7 +289,7 @@ def match_by_lexicon(
     LIMIT %s
     """
     with raw_conn.cursor() as cur:
-        cur.execute(sql, (scraped_l1, int(recall_limit)))
+        execute_prepared(cur, sql, (scraped_l1, int(recall_limit)))
         rows = cur.fetchall()
 
     dbg["candidates"] = len(rows)
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Barbour 跨供货商跳过 - 抓取前查 barbour_offers / barbour_supplier_map，少抓不会被选中的页面
+
+7+ 个供货商大量重复同一批颜色编码，而 build_supplier_jingya_mapping_v2 每个编码只选一个站点。
+某站点 S 的一个商品页，如果它对应的所有编码:
+- 在 barbour_supplier_map 中的首选站点是别的站点 P，且
+- P 在 SUPPLIER_SKIP_TTL_HOURS 内真正抓取过、有货尺码数仍 >= SUPPLIER_MIN_SIZES（P 依然会被选中）
+那么重抓这个页面对选源没有影响，可以跳过（MODE = "skip"）或排到最后再抓（MODE = "defer"）。
+
+为了不让 S 的 offer 在导入时被当成"下架"软删，跳过的页面沿用上次的 TXT
+（被 backup_and_clear 清掉的从最近一次备份拷回，同 link_diff）；
+S 自己的数据超过 SUPPLIER_SKIP_MAX_STALE_HOURS 或找不到上次 TXT 时照常抓，
+保证非首选站点的数据不会无限期陈旧（首选站点缺货时 reassign 仍有可用数据）。
+
+"抓取过"以 html_store 中 P 的商品页最近一次请求时间（fetched_at，304 也算）为准，
+不用 barbour_offers.last_checked：沿用上次 TXT / 从备份恢复的 TXT 导入时也会刷新 last_checked，
+会把多轮没抓过的数据当成新鲜的。未开启 HTML_STORE_ENABLED 时没有抓取时间可依据，不跳过。
+
+数据库查询失败时不跳过，原样返回。
+
+使用方式 (BaseFetcher.run_batch 已接入):
+    from brands.barbour.core.supplier_skip import plan_supplier_skip
+    urls = plan_supplier_skip("terraces", urls)
+"""
+
+from __future__ import annotations
+
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import psycopg2
+
+from config import BARBOUR
+from brands.barbour.core.site_utils import canonical_site
+from common.crawl.frontier import get_frontier
+from common.crawl.html_store import get_html_store
+from common.maintenance.backup_and_clear import restore_from_latest_backup
+
+SKIP_MODES = ("skip", "defer", "off")
+SUPPLIER_SKIP_MODE = BARBOUR.get("SUPPLIER_SKIP_MODE", "skip")
+SUPPLIER_SKIP_TTL_HOURS = float(BARBOUR.get("SUPPLIER_SKIP_TTL_HOURS", 24))
+SUPPLIER_SKIP_MAX_STALE_HOURS = float(BARBOUR.get("SUPPLIER_SKIP_MAX_STALE_HOURS", 72))
+SUPPLIER_MIN_SIZES = int(BARBOUR.get("SUPPLIER_MIN_SIZES", 2))
+
+# 本站 URL → 编码 → 首选站点、其商品页 URL、有货尺码数是否够（抓取时间另查 html_store）
+SQL_PREFERRED = """
+SELECT u.offer_url, u.product_code, m.site_name, p.urls,
+       COALESCE(p.sizes_in_stock >= %(min_sizes)s, FALSE) AS enough
+FROM (
+    SELECT DISTINCT offer_url, product_code
+    FROM barbour_offers
+    WHERE site_name = %(site)s
+      AND offer_url = ANY(%(urls)s)
+      AND product_code IS NOT NULL
+) u
+LEFT JOIN barbour_supplier_map m ON m.product_code = u.product_code
+LEFT JOIN LATERAL (
+    SELECT ARRAY_AGG(DISTINCT o.offer_url) AS urls,
+           SUM(CASE WHEN COALESCE(o.stock_count, 0) > 0 THEN 1 ELSE 0 END) AS sizes_in_stock
+    FROM barbour_offers o
+    WHERE o.product_code = u.product_code
+      AND o.site_name = m.site_name
+      AND o.is_active = TRUE
+) p ON TRUE
+"""
+
+
+@dataclass
+class SupplierSkipStats:
+    """一次抓取的跨供货商跳过统计"""
+    site: str
+    mode: str
+    total: int = 0
+    known: int = 0              # 在 barbour_offers 中查到编码的 URL
+    covered: int = 0            # 所有编码都由其他站点的新鲜数据覆盖
+    skipped: int = 0            # 本次省掉的页面加载
+    deferred: int = 0
+    stale_refetch: int = 0      # 被覆盖但本站数据过旧 / 找不到上次 TXT，照常抓
+    restored: int = 0           # 从备份拷回的 TXT
+    by_preferred: Counter = field(default_factory=Counter)
+
+    def format(self) -> str:
+        action = "排到最后" if self.mode == "defer" else "跳过"
+        n = self.deferred if self.mode == "defer" else self.skipped
+        lines = [
+            f"🪄 [{self.site}] 跨供货商{action} {n} / {self.total} 页"
+            f"（编码已知 {self.known}，首选站点数据 {SUPPLIER_SKIP_TTL_HOURS:g}h 内新鲜 {self.covered}，"
+            f"本站数据过旧或无上次 TXT 照抓 {self.stale_refetch}，从备份恢复 TXT {self.restored}）"
+        ]
+        if self.by_preferred:
+            top = ", ".join(f"{s}×{c}" for s, c in self.by_preferred.most_common())
+            lines.append(f"   首选站点: {top}")
+        return "\n".join(lines)
+
+
+def _fetched_within(urls: Optional[List[str]], max_age: float, cache: Dict[str, float]) -> bool:
+    """这些商品页中任一个在 max_age 秒内真正请求过（html_store 的 fetched_at）"""
+    store = get_html_store()
+    if store is None or not urls:
+        return False
+    cutoff = time.time() - max_age
+    for url in urls:
+        if url not in cache:
+            snap = store.latest(url)
+            cache[url] = snap.fetched_at if snap is not None else 0.0
+        if cache[url] >= cutoff:
+            return True
+    return False
+
+
+def _query_preferred(site: str, urls: List[str]) -> Dict[str, List[tuple]]:
+    """{url: [(编码, 首选站点, 首选数据新鲜), ...]}"""
+    result: Dict[str, List[tuple]] = defaultdict(list)
+    conn = psycopg2.connect(**BARBOUR["PGSQL_CONFIG"])
+    try:
+        with conn.cursor() as cur:
+            cur.execute(SQL_PREFERRED, {
+                "site": site,
+                "urls": urls,
+                "min_sizes": SUPPLIER_MIN_SIZES,
+            })
+            rows = cur.fetchall()
+    finally:
+        conn.close()
+
+    fetched: Dict[str, float] = {}
+    for url, code, preferred, pref_urls, enough in rows:
+        fresh = bool(enough) and _fetched_within(pref_urls, SUPPLIER_SKIP_TTL_HOURS * 3600, fetched)
+        result[url].append((code, canonical_site(preferred) or preferred, fresh))
+    return result
+
+
+def plan_supplier_skip(site: str, urls: List[str], mode: Optional[str] = None) -> List[str]:
+    """
+    返回本次需要抓的 URL（skip 模式去掉被覆盖的，defer 模式把它们移到末尾）
+
+    Args:
+        site: 采集器的站点名（frontier 站点名，如 "Philip Morris"）
+        urls: 待抓 URL（link_diff.plan_fetch 之后）
+        mode: skip / defer / off，None 时取 BARBOUR["SUPPLIER_SKIP_MODE"]
+    """
+    mode = mode or SUPPLIER_SKIP_MODE
+    if mode not in SKIP_MODES:
+        raise ValueError(f"未知跳过模式: {mode} (可选: {SKIP_MODES})")
+    canon = canonical_site(site) or site.lower()
+    if mode == "off" or not urls:
+        return urls
+
+    stats = SupplierSkipStats(site=site, mode=mode, total=len(urls))
+    try:
+        preferred = _query_preferred(canon, urls)
+    except Exception as e:
+        print(f"⚠️ [{site}] 查询首选供货商失败，不跳过: {e}")
+        return urls
+
+    covered: List[str] = []
+    for url in urls:
+        rows = preferred.get(url)
+        if not rows:
+            continue
+        stats.known += 1
+        # 任一编码首选本站 / 没有映射 / 首选站点数据不新鲜，都要抓
+        if all(p and p != canon and fresh for _, p, fresh in rows):
+            covered.append(url)
+            stats.by_preferred.update({p for _, p, _ in rows})
+    stats.covered = len(covered)
+
+    frontier = get_frontier(site)
+    own = frontier.fresh_outputs(covered, SUPPLIER_SKIP_MAX_STALE_HOURS * 3600) if frontier is not None else {}
+    stats.restored = len(restore_from_latest_backup(own.values()))
+    reusable: Set[str] = {u for u, p in own.items() if Path(p).exists()}
+    stats.stale_refetch = stats.covered - len(reusable)
+
+    todo = [u for u in urls if u not in reusable]
+    if mode == "defer":
+        todo += [u for u in urls if u in reusable]
+        stats.deferred = len(reusable)
+    else:
+        stats.skipped = len(reusable)
+
+    print(stats.format())
+    return todo
@@ -9,10 +9,12 @@ Barbour 回填（严格：仅按 (product_code + size) 精确匹配最低价；
 
 from __future__ import annotations
 from typing import List, Tuple, Iterable
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.engine import Connection
 
 from config import BRAND_CONFIG
+from common.db.pool import get_engine
+from common.db.timing import db_step
 from common.pricing.price_utils import calculate_jingya_prices
 
 # —— 尺码归一化：写死一份轻量规则，确保两边一致（不依赖外部包）
@@ -20,11 +22,12 @@ import re
 import sys, inspect
 
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 import pandas as pd
 from config import BRAND_CONFIG, DEFAULT_STOCK_COUNT
 from brands.barbour.core.site_utils import canonical_site
 
+@db_step("merge_band_stock_into_inventory")
 def merge_band_stock_into_inventory(band_ratio: float = 0.10, size_threshold: int = 1):
     """
     在 barbour_inventory 已经回填完“主供货商价格”的前提下：
@@ -34,9 +37,7 @@ def merge_band_stock_into_inventory(band_ratio: float = 0.10, size_threshold: in
     - 只改 barbour_inventory.stock_count，不动价格字段
     """
     cfg = BRAND_CONFIG["barbour"]["PGSQL_CONFIG"]
-    eng = create_engine(
-        f"postgresql+psycopg2://{cfg['user']}:{cfg['password']}@{cfg['host']}:{cfg['port']}/{cfg['dbname']}"
-    )
+    eng = get_engine(cfg)
 
     SQL_AGG = text("""
     WITH agg AS (
@@ -256,6 +257,7 @@ SQL_APPLY_BEST = text("""
     RETURNING bi.id
 """)
 
+@db_step("backfill_barbour_inventory_single_supplier")
 def backfill_barbour_inventory_single_supplier():
     """
     方案1：单一主供货商回填
@@ -266,9 +268,7 @@ def backfill_barbour_inventory_single_supplier():
     print(">>> LOADED FROM:", __file__, file=sys.stderr)
 
     cfg = BRAND_CONFIG["barbour"]["PGSQL_CONFIG"]
-    engine = create_engine(
-        f"postgresql+psycopg2://{cfg['user']}:{cfg['password']}@{cfg['host']}:{cfg['port']}/{cfg['dbname']}"
-    )
+    engine = get_engine(cfg)
     with engine.begin() as conn:
         _ensure_price_columns(conn)
 
@@ -374,13 +374,12 @@ def backfill_barbour_inventory_single_supplier():
     print(f"✅ 单一主供应商回填完成：命中 {len(hit_ids)} 行。")
 
 
+@db_step("backfill_barbour_inventory_mapped_only")
 def backfill_barbour_inventory_mapped_only():
     print(">>> MODE: EXACT_ONLY", file=sys.stderr)
     print(">>> LOADED FROM:", __file__, file=sys.stderr)
     cfg = BRAND_CONFIG["barbour"]["PGSQL_CONFIG"]
-    engine = create_engine(
-        f"postgresql+psycopg2://{cfg['user']}:{cfg['password']}@{cfg['host']}:{cfg['port']}/{cfg['dbname']}"
-    )
+    engine = get_engine(cfg)
     with engine.begin() as conn:
         _ensure_price_columns(conn)
 
@@ -478,10 +477,11 @@ def backfill_barbour_inventory_mapped_only():
 
 import os
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from config import BRAND_CONFIG
 from common.pricing.price_utils import calculate_jingya_prices
 
+@db_step("apply_fixed_prices_from_excel")
 def apply_fixed_prices_from_excel(
     xlsx_path: str,
     sheet_name: str | None = None,
@@ -515,9 +515,7 @@ def apply_fixed_prices_from_excel(
         return
 
     cfg = BRAND_CONFIG["barbour"]["PGSQL_CONFIG"]
-    engine = create_engine(
-        f"postgresql+psycopg2://{cfg['user']}:{cfg['password']}@{cfg['host']}:{cfg['port']}/{cfg['dbname']}"
-    )
+    engine = get_engine(cfg)
 
     df = pd.read_excel(xlsx_path, sheet_name=sheet_name)
 
@@ -19,6 +19,7 @@ from brands.barbour.supplier.cho_get_links import cho_get_links
 from brands.barbour.supplier.cho_fetch_info import cho_fetch_info
 from brands.barbour.supplier.philipmorrisdirect_fetch_info import philipmorris_fetch_info
 from brands.barbour.tools.move_non_barbour_files import move_non_barbour_files
+from common.browser.selenium_utils import log_pool_stats, shutdown_driver_pool
 def barbour_crawl_import_pipleline():
     print("\n🟡 Step: 1️⃣ 清空 TXT + 发布目录")
     backup_and_clear_brand_dirs(BARBOUR)
@@ -49,6 +50,10 @@ def barbour_crawl_import_pipleline():
     move_non_barbour_files(r"D:\TB\Products\barbour\publication\cho\TXT",r"D:\TB\Products\barbour\publication\cho\TXT.bk")
     move_non_barbour_files(r"D:\TB\Products\barbour\publication\philipmorris\TXT",r"D:\TB\Products\barbour\publication\philipmorris\TXT.bk")
     move_non_barbour_files(r"D:\TB\Products\barbour\publication\terraces\TXT",r"D:\TB\Products\barbour\publication\terraces\TXT.bk")
+
+    # 各站点共用同一个 Chrome 池，全部步骤结束后再统一关闭
+    log_pool_stats("[DriverPool:barbour_crawl]")
+    shutdown_driver_pool()
     
 if __name__ == "__main__":
     barbour_crawl_import_pipleline()
@@ -7,7 +7,7 @@ Allweathers 采集器 - 重构版 (使用 BaseFetcher)
 - Product Code: 从 hasVariant SKU 提取
 - 尺码: 从 hasVariant 提取 (含库存状态)
 - 价格: DOM <price-list> 提取 + meta 兜底
-- Driver: 每线程独立 (线程安全)
+- Driver: 每线程从 selenium_utils driver 池租用 (线程安全)
 - 新增 Feature / Material 提取
 - 字段名: 与 format_txt 对齐 (Product Price / Adjusted Price)
 
@@ -18,8 +18,6 @@ Allweathers 采集器 - 重构版 (使用 BaseFetcher)
 from __future__ import annotations
 
 import re
-import time
-import threading
 from typing import Dict, Any, Optional
 from bs4 import BeautifulSoup
 
@@ -27,9 +25,8 @@ import demjson3
 
 # 导入基类和工具
 from brands.barbour.core.base_fetcher import BaseFetcher, setup_logging
-
-# 导入通用模块
-from common.browser.selenium_utils import get_driver, quit_driver
+from common.browser.page_ready import jsonld_product_present
+from common.crawl.embedded_json import extract_embedded_json
 
 # 配置
 from config import BARBOUR, SETTINGS
@@ -63,7 +60,7 @@ def _extract_name_and_color(soup: BeautifulSoup) -> tuple[str, str]:
     return "Unknown", "Unknown"
 
 
-def _extract_description(soup: BeautifulSoup) -> str:
+def _extract_description(soup: BeautifulSoup, product: Optional[dict] = None) -> str:
     """提取描述: twitter:description > og:description > JSON-LD"""
     m = soup.find("meta", attrs={"name": "twitter:description"})
     if m and m.get("content"):
@@ -75,20 +72,14 @@ def _extract_description(soup: BeautifulSoup) -> str:
     if m and m.get("content"):
         return re.sub(r"\s+", " ", m["content"].strip())
 
-    for s in soup.find_all("script", {"type": "application/ld+json"}):
-        try:
-            j = demjson3.decode(s.string)
-        except Exception:
-            continue
-        if isinstance(j, dict) and j.get("@type") in ("ProductGroup", "Product"):
-            desc = re.sub(r"\s+", " ", (j.get("description") or "").strip())
-            if desc:
-                desc = re.split(r"(Key\s*Features|Materials\s*&\s*Technical)", desc, flags=re.I)[0].strip(" -–|,")
-                return desc
+    desc = re.sub(r"\s+", " ", (product or {}).get("description") or "").strip()
+    if desc:
+        desc = re.split(r"(Key\s*Features|Materials\s*&\s*Technical)", desc, flags=re.I)[0].strip(" -–|,")
+        return desc
     return "No Data"
 
 
-def _extract_features(soup: BeautifulSoup) -> str:
+def _extract_features(soup: BeautifulSoup, product: Optional[dict] = None) -> str:
     """提取 Key Features"""
     h = soup.find(["h2", "h3"], string=re.compile(r"Key\s*Features", re.I))
     if h:
@@ -99,27 +90,21 @@ def _extract_features(soup: BeautifulSoup) -> str:
             if items:
                 return " | ".join(items)
 
-    for s in soup.find_all("script", {"type": "application/ld+json"}):
-        try:
-            j = demjson3.decode(s.string)
-        except Exception:
-            continue
-        if isinstance(j, dict) and j.get("@type") in ("ProductGroup", "Product"):
-            desc = j.get("description") or ""
-            if "Key" in desc:
-                m = re.search(
-                    r"Key\s*Features.*?:\s*(.+?)\s*(Materials\s*&\s*Technical|Frequently|$)",
-                    desc, flags=re.I | re.S
-                )
-                if m:
-                    parts = [re.sub(r"\s+", " ", p).strip() for p in re.split(r"[\r\n]+|•|- ", m.group(1))]
-                    parts = [p for p in parts if p]
-                    if parts:
-                        return " | ".join(parts)
+    desc = (product or {}).get("description") or ""
+    if "Key" in desc:
+        m = re.search(
+            r"Key\s*Features.*?:\s*(.+?)\s*(Materials\s*&\s*Technical|Frequently|$)",
+            desc, flags=re.I | re.S
+        )
+        if m:
+            parts = [re.sub(r"\s+", " ", p).strip() for p in re.split(r"[\r\n]+|•|- ", m.group(1))]
+            parts = [p for p in parts if p]
+            if parts:
+                return " | ".join(parts)
     return "No Data"
 
 
-def _extract_material_outer(soup: BeautifulSoup) -> str:
+def _extract_material_outer(soup: BeautifulSoup, product: Optional[dict] = None) -> str:
     """提取外层材质"""
     h = soup.find(["h2", "h3"], string=re.compile(r"Materials\s*&\s*Technical", re.I))
     if h:
@@ -131,18 +116,12 @@ def _extract_material_outer(soup: BeautifulSoup) -> str:
                 if m:
                     return m.group(1)
 
-    for s in soup.find_all("script", {"type": "application/ld+json"}):
-        try:
-            j = demjson3.decode(s.string)
-        except Exception:
-            continue
-        if isinstance(j, dict) and j.get("@type") in ("ProductGroup", "Product"):
-            desc = j.get("description") or ""
-            m = re.search(r"Outer:\s*(.+)", desc, flags=re.I)
-            if m:
-                outer = re.sub(r"\s+", " ", m.group(1)).strip()
-                outer = re.split(r"[\r\n;]+", outer)[0].strip()
-                return outer
+    desc = (product or {}).get("description") or ""
+    m = re.search(r"Outer:\s*(.+)", desc, flags=re.I)
+    if m:
+        outer = re.sub(r"\s+", " ", m.group(1)).strip()
+        outer = re.split(r"[\r\n;]+", outer)[0].strip()
+        return outer
     return "No Data"
 
 
@@ -195,47 +174,25 @@ class AllweathersFetcher(BaseFetcher):
 
     重写:
     - parse_detail_page: 与 v1 逻辑对齐
-    - _fetch_html: 每线程独立 driver (线程安全)
+    - Selenium 回退: 基类 _fetch_html (每线程从 driver 池租用, 不再每页重启 Chrome)
+    - async_http 模式: ProductGroup JSON-LD 是服务端渲染的, 静态 HTML 即可解析
     """
 
-    def _fetch_html(self, url: str) -> str:
-        """
-        覆盖基类: 每线程独立 driver, 避免多线程冲突.
-        driver name 使用 site_name + thread id 保证唯一.
-        """
-        tid = threading.current_thread().ident
-        driver_name = f"{self.site_name}_{tid}"
-        driver = get_driver(
-            name=driver_name,
-            headless=self.headless,
-            window_size="1920,1080",
-        )
-        try:
-            driver.get(url)
-            time.sleep(self.wait_seconds)
-            return driver.page_source
-        finally:
-            quit_driver(driver_name)
+    FETCH_MODE = "async_http"
+    READY_PREDICATES = (jsonld_product_present(),)
 
     def parse_detail_page(self, html: str, url: str) -> Dict[str, Any]:
         """
         解析 Allweathers 商品详情页 - 与 v1 逻辑完全对齐
         """
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.parse_soup(html)
 
         # 1. 名称 & 颜色 (og:title)
         name, color = _extract_name_and_color(soup)
 
         # 2. JSON-LD (Shopify 用 ProductGroup)
-        jsonld = None
-        for s in soup.find_all("script", {"type": "application/ld+json"}):
-            try:
-                j = demjson3.decode(s.string)
-            except Exception:
-                continue
-            if isinstance(j, dict) and j.get("@type") in ("ProductGroup", "Product"):
-                jsonld = j
-                break
+        #    只解码一次，描述 / 特性 / 材质共用；orjson 失败再用 demjson3 兼容非标 JSON
+        jsonld = extract_embedded_json(html, fallback=demjson3.decode).jsonld_first(("ProductGroup", "Product"))
 
         if not jsonld:
             raise ValueError("未找到 JSON-LD 数据段")
@@ -270,9 +227,9 @@ class AllweathersFetcher(BaseFetcher):
         )
 
         # 5. 描述 / 特性 / 材质
-        description = _extract_description(soup)
-        features = _extract_features(soup)
-        material_outer = _extract_material_outer(soup)
+        description = _extract_description(soup, jsonld)
+        features = _extract_features(soup, jsonld)
+        material_outer = _extract_material_outer(soup, jsonld)
 
         # 6. 价格: DOM 成对价优先, meta 兜底
         price_header = _extract_header_price(soup)
@@ -318,9 +275,12 @@ class AllweathersFetcher(BaseFetcher):
 def allweathers_fetch_info(
     max_workers: int = 6,
     headless: bool = False,
+    fetch_mode: Optional[str] = None,
 ):
     """
     主函数 - 兼容旧版接口
+
+    fetch_mode: "selenium" / "async_http", None 使用 AllweathersFetcher.FETCH_MODE
     """
     setup_logging()
 
@@ -332,6 +292,7 @@ def allweathers_fetch_info(
         max_retries=3,
         wait_seconds=2.5,
         headless=headless,
+        fetch_mode=fetch_mode,
     )
 
     success, fail = fetcher.run_batch()
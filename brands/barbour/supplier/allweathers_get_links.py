@@ -7,6 +7,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 from config import BARBOUR
+from common.crawl.link_diff import save_links
 from common.browser.selenium_utils import get_driver, quit_driver
 
 # ========= 类目配置：在这里增删类目链接 =========
@@ -107,7 +108,7 @@ def allweathers_get_links():
 
     # 写入文件（去重后的总集合）
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    OUTPUT_PATH.write_text("\n".join(sorted(all_links)), encoding="utf-8")
+    save_links("allweathers", all_links, OUTPUT_PATH)
 
     print("\n🎯 抓取完成")
     print(f"📦 共提取 {len(all_links)} 条商品链接（多类目去重后总数）")
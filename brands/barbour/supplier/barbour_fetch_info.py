@@ -21,10 +21,10 @@ import time
 from pathlib import Path
 from typing import Dict, Any, Optional
 from bs4 import BeautifulSoup
-import requests
 
 from brands.barbour.core.base_fetcher import BaseFetcher, setup_logging
 from config import BARBOUR
+from common.crawl.http_client import get_http_client
 
 SITE_NAME = "barbour"
 LINKS_FILE = BARBOUR["LINKS_FILES"]["barbour"]
@@ -55,7 +55,7 @@ class BarbourFetcher(BaseFetcher):
         覆盖基类方法 - Barbour 官网使用 requests (不需要 Selenium)
         """
         try:
-            response = requests.get(url, headers=HEADERS, timeout=30)
+            response = get_http_client(SITE_NAME, headers=HEADERS, pool_size=self.max_workers).get(url, timeout=30)
             response.raise_for_status()
             return response.text
         except Exception as e:
@@ -66,7 +66,7 @@ class BarbourFetcher(BaseFetcher):
         """
         Barbour 官网特定解析逻辑
         """
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.parse_soup(html)
 
         # 1. 从 JSON-LD 提取名称和 SKU
         jsonld = self.extract_jsonld(soup, "Product") or {}
@@ -243,6 +243,7 @@ def barbour_fetch_info(
 
     success, fail = fetcher.run_batch()
     print(f"\n✅ Barbour 官网抓取完成: 成功 {success}, 失败 {fail}")
+    print(get_http_client(SITE_NAME).format_stats())
 
 
 if __name__ == "__main__":
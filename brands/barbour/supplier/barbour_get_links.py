@@ -2,6 +2,7 @@ import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 from config import BARBOUR
+from common.crawl.link_diff import save_links
 from pathlib import Path
 import time
 
@@ -91,9 +92,7 @@ def barbour_get_links():
 
     unique_links = sorted(set(all_links))
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        for link in unique_links:
-            f.write(link.strip() + "\n")
+    save_links("barbour", unique_links, OUTPUT_FILE)
 
     print(f"\n✅ 共写入 {len(unique_links)} 条链接 → {OUTPUT_FILE}")
 
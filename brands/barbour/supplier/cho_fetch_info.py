@@ -17,22 +17,25 @@ CHO (Country House Outdoor) 采集器 - 重构版
 from __future__ import annotations
 
 import re
+import threading
 import time
 from typing import Dict, Any, Optional, Tuple
 from bs4 import BeautifulSoup
-import psycopg2
 import demjson3
 
 from brands.barbour.core.hybrid_barbour_matcher import resolve_product_code
 
 # 导入基类和工具
 from brands.barbour.core.base_fetcher import BaseFetcher, setup_logging
+from common.browser.page_ready import jsonld_product_present
+from common.crawl.embedded_json import extract_embedded_json
 
 # 导入通用模块
 from common.browser.selenium_utils import get_driver
 
 # 配置
 from config import BARBOUR, SETTINGS, PGSQL_CONFIG
+from common.db.pool import connect
 
 SITE_NAME = "cho"
 LINKS_FILE = BARBOUR["LINKS_FILES"].get("cho", "")
@@ -91,19 +94,12 @@ def _extract_price_pair_from_dom_cho(soup: BeautifulSoup) -> Tuple[Optional[floa
     return None, None
 
 
-def _load_product_jsonld(soup: BeautifulSoup) -> dict:
-    """返回 JSON-LD 中的 ProductGroup / Product 节点 (用 demjson3 兼容非标 JSON)"""
-    for tag in soup.find_all("script", {"type": "application/ld+json"}):
-        txt = (tag.string or tag.text or "").strip()
-        if not txt:
-            continue
-        try:
-            j = demjson3.decode(txt)
-        except Exception:
-            continue
-        if isinstance(j, dict) and j.get("@type") in ("ProductGroup", "Product"):
-            return j
-    raise ValueError("未找到 ProductGroup/Product JSON-LD 数据")
+def _load_product_jsonld(html: str) -> dict:
+    """返回 JSON-LD 中的 ProductGroup / Product 节点 (orjson 解不了再用 demjson3 兼容非标 JSON)"""
+    data = extract_embedded_json(html, fallback=demjson3.decode).jsonld_first(("ProductGroup", "Product"))
+    if data is None:
+        raise ValueError("未找到 ProductGroup/Product JSON-LD 数据")
+    return data
 
 
 def _extract_code_from_description(desc: str) -> str:
@@ -168,31 +164,50 @@ class CHOFetcher(BaseFetcher):
     - parse_detail_page: 从 hasVariant 解析尺码/颜色, DOM 解析价格
     - _fetch_html: 每线程独立 driver
     - 截断编码自动通过 DB 匹配补全
+    - async_http 模式: hasVariant JSON-LD 在静态 HTML 中, 缺字段时回退 Selenium
     """
 
-    
+    FETCH_MODE = "async_http"
+    READY_PREDICATES = (jsonld_product_present(),)
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self._db_conn = None
+        self._db_local = threading.local()
+        self._db_conns = []
 
     def _get_db_conn(self):
-        """懒加载 DB 连接 (用于 partial_code 查询)"""
-        if self._db_conn is None or self._db_conn.closed:
+        """懒加载 DB 连接 (用于 partial_code 查询); 每个解析线程一个, 事务互不干扰"""
+        conn = getattr(self._db_local, "conn", None)
+        if conn is None or conn.closed:
             try:
-                self._db_conn = psycopg2.connect(**PGSQL_CONFIG)
+                conn = connect(PGSQL_CONFIG)
                 self.logger.info("🔗 DB 连接已建立 (用于编码补全)")
             except Exception as e:
                 self.logger.warning(f"DB 连接失败, 跳过编码补全: {e}")
                 return None
-        return self._db_conn
+            self._db_local.conn = conn
+            with self._lock:
+                self._db_conns.append(conn)
+        return conn
+
+    def run_batch(self, urls=None):
+        """批量结束后把各线程的 DB 连接放回池"""
+        try:
+            return super().run_batch(urls)
+        finally:
+            with self._lock:
+                conns, self._db_conns = self._db_conns, []
+            for conn in conns:
+                if not conn.closed:
+                    conn.close()
+            self._db_local = threading.local()
 
     def parse_detail_page(self, html: str, url: str) -> Dict[str, Any]:
         """解析 CHO 商品详情页 - 与 v1 逻辑完全对齐"""
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.parse_soup(html)
 
         # 1. JSON-LD (ProductGroup)
-        data = _load_product_jsonld(soup)
+        data = _load_product_jsonld(html)
         name = data.get("name") or (soup.title.get_text(strip=True) if soup.title else "No Data")
         desc = data.get("description") or ""
         desc = desc.replace("\\n", "\n")
@@ -304,8 +319,13 @@ class CHOFetcher(BaseFetcher):
 def cho_fetch_info(
     max_workers: int = 4,
     headless: bool = False,
+    fetch_mode: Optional[str] = None,
 ):
-    """主函数 - 兼容旧版接口"""
+    """
+    主函数 - 兼容旧版接口
+
+    fetch_mode: "selenium" / "async_http", None 使用 CHOFetcher.FETCH_MODE
+    """
     setup_logging()
 
     fetcher = CHOFetcher(
@@ -316,6 +336,7 @@ def cho_fetch_info(
         max_retries=3,
         wait_seconds=2.5,
         headless=headless,
+        fetch_mode=fetch_mode,
     )
 
     success, fail = fetcher.run_batch()
@@ -23,6 +23,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 from config import BARBOUR
+from common.crawl.link_diff import save_links
 from common.browser.selenium_utils import get_driver, quit_driver
 
 # ========= 类目配置：在这里增删类目链接 =========
@@ -156,7 +157,7 @@ def cho_get_links():
     # 写入文件（去重后的总集合）
     sorted_links = sorted(all_links)
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    OUTPUT_PATH.write_text("\n".join(sorted_links), encoding="utf-8")
+    save_links("cho", sorted_links, OUTPUT_PATH)
 
     print("\n🎯 抓取完成")
     print(f"📦 共提取 {len(sorted_links)} 条商品链接（多类目去重后总数）")
@@ -22,25 +22,19 @@ from __future__ import annotations
 import re
 import json
 import time
-import threading
-from pathlib import Path
 from typing import Dict, Any, Optional, List
 from bs4 import BeautifulSoup
 import requests
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import TimeoutException
-
-# driver 轮换周期：每个线程每抓满 N 页就 quit 一次（防止 renderer 内存耗尽）
-_DRIVER_RECYCLE_EVERY = 100
 
 # 导入基类和工具
 from brands.barbour.core.base_fetcher import BaseFetcher, setup_logging
+from common.browser.page_ready import selector_present
 
 # 导入统一匹配器
 from brands.barbour.core.hybrid_barbour_matcher import resolve_product_code
 
 # SQLAlchemy
-from sqlalchemy import create_engine
+from common.db.pool import get_engine
 from sqlalchemy.engine import Connection
 
 # 配置
@@ -75,7 +69,7 @@ class HouseOfFraserFetcher(BaseFetcher):
     特点:
     - Next.js __NEXT_DATA__ 解析
     - hybrid_barbour_matcher 多级匹配
-    - 断点续传 (自动跳过已完成的 URL)
+    - 断点续传: 基类 frontier (中断后只抓剩下的 URL)
     """
 
     # requests 模式的 User-Agent 和 session（共享连接池）
@@ -89,6 +83,13 @@ class HouseOfFraserFetcher(BaseFetcher):
         "Accept-Language": "en-GB,en;q=0.9",
     }
 
+    # 产品价格出现即表示 JS 已完成渲染
+    READY_PREDICATES = (
+        selector_present("p[data-testid='price'], [data-testid='price'], [class*='Price_'], [class*='price']"),
+    )
+    READY_TIMEOUT = 30
+    LOAD_PROFILE = "houseoffraser"
+
     def __init__(self, *args, use_requests: bool = True, **kwargs):
         """
         初始化
@@ -102,48 +103,12 @@ class HouseOfFraserFetcher(BaseFetcher):
         self._session = requests.Session()
         self._session.headers.update(self._REQ_HEADERS)
 
-        # 每线程抓取计数（用于定期轮换 driver，防止 renderer 内存耗尽）
-        self._thread_fetch_count = threading.local()
-
         # 创建数据库引擎
-        engine_url = (
-            f"postgresql+psycopg2://{PG['user']}:{PG['password']}"
-            f"@{PG['host']}:{PG['port']}/{PG['dbname']}"
-        )
-        self._engine = create_engine(engine_url, pool_size=self.max_workers + 2)
-
-        # 断点续传：进度文件
-        self._progress_file = Path(self.output_dir) / ".done_urls.txt"
-        self._done_urls = self._load_done_urls()
-        self._progress_lock = threading.Lock()
-
-    # ================== 断点续传 ==================
-
-    def _load_done_urls(self) -> set:
-        """加载已完成的 URL 集合"""
-        if not self._progress_file.exists():
-            return set()
-        try:
-            lines = self._progress_file.read_text(encoding="utf-8").splitlines()
-            done = {line.strip() for line in lines if line.strip()}
-            self.logger.info(f"📋 已完成 {len(done)} 个，自动跳过")
-            return done
-        except Exception:
-            return set()
-
-    def _mark_done(self, url: str) -> None:
-        """记录已完成的 URL（线程安全、追加写入）"""
-        with self._progress_lock:
-            self._done_urls.add(url)
-            try:
-                with open(self._progress_file, "a", encoding="utf-8") as f:
-                    f.write(url + "\n")
-            except Exception:
-                pass
+        self._engine = get_engine(PG, pool_size=self.max_workers + 2)
 
     def _load_urls(self) -> List[str]:
         """
-        重写：保留 #colcode=... fragment + 过滤已完成的 URL
+        重写：保留 #colcode=... fragment
 
         HoF 链接格式: .../product-123456#colcode=12345678
         基类 normalize_url 会把 # 后面全部删掉，导致 Selenium 打开时
@@ -168,13 +133,7 @@ class HouseOfFraserFetcher(BaseFetcher):
             if url not in seen:
                 seen.add(url)
                 all_urls.append(url)
-
-        before = len(all_urls)
-        urls = [u for u in all_urls if u not in self._done_urls]
-        skipped = before - len(urls)
-        if skipped > 0:
-            self.logger.info(f"⏭️ 跳过已完成 {skipped} 个，剩余 {len(urls)} 个待抓取")
-        return urls
+        return all_urls
 
     def _fetch_html(self, url: str) -> str:
         """
@@ -183,17 +142,9 @@ class HouseOfFraserFetcher(BaseFetcher):
         HoF 是 Next.js App Router (RSC streaming) 站点，尺码/库存数据完全通过
         客户端 JS 渲染，requests 获取的静态 HTML 中没有任何尺码信息，
         必须用 Selenium 等待 JS 执行完毕后才能抓取。
-        """
-        # ── 定期轮换 driver（防止 Chrome renderer 内存耗尽） ──────────────
-        if not hasattr(self._thread_fetch_count, "n"):
-            self._thread_fetch_count.n = 0
-        self._thread_fetch_count.n += 1
-        if self._thread_fetch_count.n % _DRIVER_RECYCLE_EVERY == 0:
-            self.logger.debug(
-                f"[driver-recycle] 当前线程已抓取 {self._thread_fetch_count.n} 页，主动重置 driver"
-            )
-            self.quit_driver()          # 从池中移除，下一次 get_driver() 创建全新实例
 
+        driver 定期轮换（防止 renderer 内存耗尽）由 selenium_utils 的池按页数 / RSS 负责。
+        """
         driver = self.get_driver()
 
         try:
@@ -204,29 +155,14 @@ class HouseOfFraserFetcher(BaseFetcher):
             self.logger.warning(
                 f"driver.get() 失败（{type(e).__name__}），重置 driver 以供重试"
             )
-            self.quit_driver()
+            self.quit_driver(discard=True)
             raise                       # 传给 fetch_one_product 的重试循环
 
-        # 等待产品价格出现（表示 JS 已完成渲染）
-        try:
-            WebDriverWait(driver, 30).until(
-                lambda d: d.find_elements("css selector", "p[data-testid='price'], [data-testid='price']")
-                          or d.find_elements("css selector", "[class*='Price_']")
-                          or d.find_elements("css selector", "[class*='price']")
-            )
-        except TimeoutException:
-            self.logger.warning(f"等待价格元素超时 (30s)，继续解析: {url}")
+        # 等待产品价格出现（READY_PREDICATES，超时后照常解析）
+        self._wait_for_page(driver, url)
 
         return driver.page_source
 
-    def fetch_one_product(self, url: str, idx: int, total: int):
-        """重写：成功后记录进度"""
-        result = super().fetch_one_product(url, idx, total)
-        url_out, success = result
-        if success:
-            self._mark_done(url_out)
-        return result
-
     # ================== 页面解析 ==================
 
     def parse_detail_page(self, html: str, url: str) -> Dict[str, Any]:
@@ -238,7 +174,7 @@ class HouseOfFraserFetcher(BaseFetcher):
         - 价格在 data-testid="price"
         - 使用 Lexicon 匹配获取 Product Code
         """
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.parse_soup(html)
 
         # 1. 从 JSON-LD 提取基础信息
         jd = self._from_jsonld_product(soup) or {}
@@ -433,6 +369,10 @@ class HouseOfFraserFetcher(BaseFetcher):
         if bs4_detail:
             return bs4_detail
 
+        # 离线重放没有浏览器可用
+        if self.offline:
+            return {}
+
         # --- JS 聚类法 ---
         try:
             driver = self.get_driver()
@@ -545,7 +485,7 @@ class HouseOfFraserFetcher(BaseFetcher):
         except Exception as e:
             self.logger.warning(f"JS 提取尺码失败: {e}")
             # execute_script 失败通常意味着 renderer 已崩溃，立刻重置 driver
-            self.quit_driver()
+            self.quit_driver(discard=True)
             return {}
 
     def _extract_size_detail_from_soup(self, soup: BeautifulSoup) -> Dict[str, Dict]:
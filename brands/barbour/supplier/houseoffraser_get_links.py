@@ -9,6 +9,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 from config import BARBOUR
+from common.crawl.link_diff import save_links
 from common.browser.selenium_utils import get_driver as get_shared_driver, quit_driver
 
 # ✅ 两个入口：Barbour & Barbour International（第1页无参，其余 ?dcp=N）
@@ -219,7 +220,7 @@ def houseoffraser_get_links():
 
         # ✅ 写入 txt（覆盖写）
         links_sorted = sorted(all_links)
-        OUTPUT_PATH.write_text("\n".join(links_sorted), encoding="utf-8")
+        save_links("houseoffraser", links_sorted, OUTPUT_PATH)
 
         print(f"\n✅ 抓取完成：共 {len(links_sorted)} 条链接")
         print(f"📝 已写入: {OUTPUT_PATH}")
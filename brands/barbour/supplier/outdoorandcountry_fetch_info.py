@@ -25,12 +25,11 @@ import re
 import threading
 from pathlib import Path
 from typing import Dict, Any
-from bs4 import BeautifulSoup
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import TimeoutException
 
 # 导入基类和工具
 from brands.barbour.core.base_fetcher import BaseFetcher, setup_logging
+from common.browser.page_ready import html_contains
+from common.browser.load_profile import LOAD_METER
 
 # ── undetected_chromedriver 驱动池（按线程 id 隔离）──────────────────
 # OutdoorAndCountry 被 Cloudflare 保护，必须用 uc 绕过；
@@ -79,6 +78,10 @@ class OutdoorAndCountryFetcher(BaseFetcher):
     - MPN 字段优先
     """
 
+    # Cloudflare challenge 通过后内联脚本 var stockInfo 才会出现
+    READY_PREDICATES = (html_contains("var stockInfo"),)
+    READY_TIMEOUT = 30
+    LOAD_PROFILE = "outdoorandcountry"
 
     def get_driver(self):
         """
@@ -101,7 +104,9 @@ class OutdoorAndCountryFetcher(BaseFetcher):
                 )
                 _uc_drivers[key] = driver
                 self.logger.info(f"🚗 [uc] undetected_chromedriver 已启动 (key={key})")
-            return _uc_drivers[key]
+            driver = _uc_drivers[key]
+        LOAD_METER.before_page(driver, self.LOAD_PROFILE, self.site_name)
+        return driver
 
     def quit_driver(self):
         key = f"oc_uc_{threading.get_ident()}"
@@ -120,12 +125,7 @@ class OutdoorAndCountryFetcher(BaseFetcher):
         """
         driver = self.get_driver()
         driver.get(url)
-        try:
-            WebDriverWait(driver, 30).until(
-                lambda d: "var stockInfo" in d.page_source
-            )
-        except TimeoutException:
-            self.logger.warning(f"等待 stockInfo 超时 (30s)，继续使用当前 page_source: {url}")
+        self._wait_for_page(driver, url)
         return driver.page_source
 
     def parse_detail_page(self, html: str, url: str) -> Dict[str, Any]:
@@ -137,7 +137,7 @@ class OutdoorAndCountryFetcher(BaseFetcher):
         - JSON-LD 的 MPN 字段包含编码
         - 需要从 URL 提取颜色
         """
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.parse_soup(html)
 
         # 1. 使用站点特定解析器获取基础信息
         info = parse_offer_info(html, url, site_name=SITE_NAME) or {}
@@ -208,7 +208,7 @@ class OutdoorAndCountryFetcher(BaseFetcher):
 
     def _extract_description(self, html: str) -> str:
         """提取商品描述"""
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.parse_soup(html)
 
         # 优先 og:description
         tag = soup.find("meta", attrs={"property": "og:description"})
@@ -226,7 +226,7 @@ class OutdoorAndCountryFetcher(BaseFetcher):
 
     def _extract_features(self, html: str) -> str:
         """提取产品特征列表"""
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.parse_soup(html)
 
         h3 = soup.find("h3", attrs={"title": "Features"})
         if h3:
@@ -240,7 +240,7 @@ class OutdoorAndCountryFetcher(BaseFetcher):
     def _extract_color_code_from_jsonld(self, html: str) -> str:
         """从 JSON-LD 的 MPN 字段提取 Barbour Product Code"""
         import json
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.parse_soup(html)
 
         for script in soup.find_all("script", type="application/ld+json"):
             try:
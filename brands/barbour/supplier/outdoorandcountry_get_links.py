@@ -5,6 +5,7 @@ from bs4 import BeautifulSoup
 from common.browser.driver_auto import build_uc_driver
 from pathlib import Path
 from config import BARBOUR
+from common.crawl.link_diff import save_links
 import time
 import re
 import json
@@ -310,9 +311,7 @@ def outdoorandcountry_fetch_and_save_links():
         print(f"✅ [{label}] 链接提取: {len(links)} 条，页面快照保存: {debug_file}")
 
     # 保存总链接
-    with OUTPUT_FILE.open("w", encoding="utf-8") as f:
-        for link in sorted(all_links):
-            f.write(link + "\n")
+    save_links("outdoorandcountry", all_links, OUTPUT_FILE)
 
     print(f"\n🎉 共提取商品链接: {len(all_links)} 条")
     print(f"📄 链接写入: {OUTPUT_FILE}")
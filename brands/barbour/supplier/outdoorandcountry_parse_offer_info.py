@@ -1,10 +1,11 @@
 # === outdoorandcountry_parse_offer_info.py ===
 import re
 import json
-from bs4 import BeautifulSoup
 import demjson3
 from urllib.parse import urlparse, parse_qs, unquote_plus
 
+from brands.barbour.core.html_parser import parse_soup
+
 def extract_js_map_array(js_text: str, var_name: str) -> dict:
     pattern = re.compile(rf"{var_name}\[['\"](?P<key>[^'\"]+)['\"]\]\s*=\s*['\"](?P<val>[^'\"]+)['\"];")
     return {m.group("key"): m.group("val") for m in pattern.finditer(js_text)}
@@ -110,7 +111,7 @@ def parse_offer_info(html: str, url: str, site_name="Outdoor and Country") -> di
         c = re.sub(r'\s*/\s*', ' / ', c)
         return re.sub(r'\s+', ' ', c).strip() or "Unknown"
 
-    soup = BeautifulSoup(html, "html.parser")
+    soup = parse_soup(html)
     scripts = soup.find_all("script")
     js_text = "\n".join(script.get_text() for script in scripts if script.get_text())
 
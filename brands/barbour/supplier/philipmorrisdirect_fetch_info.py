@@ -28,6 +28,7 @@ from bs4 import BeautifulSoup
 
 # 导入基类和工具
 from brands.barbour.core.base_fetcher import BaseFetcher, setup_logging
+from common.browser.page_ready import selector_non_empty
 
 # Selenium
 from selenium.webdriver.common.by import By
@@ -363,6 +364,16 @@ class PhilipMorrisFetcher(BaseFetcher):
     - 每个颜色生成独立 TXT
     """
 
+    # 标题与价格都渲染出来后再读 page_source / 查颜色按钮
+    READY_PREDICATES = (
+        selector_non_empty("h1.productView-title"),
+        selector_non_empty("span.price.price--withTax"),
+    )
+    LOAD_PROFILE = "philipmorris"
+    # 一个 URL 按颜色写多个 TXT, frontier 只记一个, 沿用 / 从备份拷回上次 TXT 会漏掉其他颜色
+    PLAN_FETCH = False
+    CROSS_SUPPLIER_SKIP = False
+
     def _fetch_html(self, url: str) -> str:
         """
         覆盖基类方法 - 不使用基类的 HTML 获取
@@ -382,16 +393,18 @@ class PhilipMorrisFetcher(BaseFetcher):
         for attempt in range(1, self.max_retries + 1):
             try:
                 self.logger.info(f"[{idx}/{total}] [{attempt}/{self.max_retries}] 抓取: {url}")
+                if self.frontier is not None and attempt == 1:
+                    self.frontier.mark_started(url)
 
                 driver = self.get_driver()
 
                 try:
                     driver.get(url)
                     self._accept_cookies(driver)
-                    time.sleep(2)
+                    self._wait_for_page(driver, url)
 
                     html = driver.page_source
-                    soup = BeautifulSoup(html, "html.parser")
+                    soup = self.parse_soup(html)
 
                     # 基础信息
                     style = extract_style_code(html) or ""
@@ -433,7 +446,7 @@ class PhilipMorrisFetcher(BaseFetcher):
                             time.sleep(1.3)
 
                             html_c = driver.page_source
-                            soup_c = BeautifulSoup(html_c, "html.parser")
+                            soup_c = self.parse_soup(html_c)
 
                             orig, sale = self._extract_prices(soup_c)
                             size_detail = self._extract_sizes(html_c)
@@ -478,6 +491,8 @@ class PhilipMorrisFetcher(BaseFetcher):
 
                     if not variants:
                         self.logger.warning("无变体 -> 跳过")
+                        if self.frontier is not None:
+                            self.frontier.mark_failed(url, "无变体")
                         return url, False
 
                     # 写入每个颜色的 TXT
@@ -525,6 +540,8 @@ class PhilipMorrisFetcher(BaseFetcher):
 
                     with self._lock:
                         self._success_count += 1
+                    if self.frontier is not None:
+                        self.frontier.mark_done(url, fpath)
 
                     return url, True
 
@@ -544,6 +561,8 @@ class PhilipMorrisFetcher(BaseFetcher):
                 if attempt == self.max_retries:
                     with self._lock:
                         self._fail_count += 1
+                    if self.frontier is not None:
+                        self.frontier.mark_failed(url, e)
                     return url, False
 
         return url, False
@@ -596,7 +615,7 @@ class PhilipMorrisFetcher(BaseFetcher):
 
     def _extract_sizes(self, html: str) -> Dict[str, Dict]:
         """提取尺码 → {raw_size: {"stock_count": N, "ean": "..."}}"""
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.parse_soup(html)
         labels = soup.select("label.form-option")
         result: Dict[str, Dict] = {}
 
@@ -7,6 +7,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 from config import BARBOUR
+from common.crawl.link_diff import save_links
 from common.browser.driver_auto import build_uc_driver
 
 # ====== 多个分类 URL，按需增减 ======
@@ -86,7 +87,7 @@ def philipmorris_get_links():
     # 统一去重后写入文件
     sorted_links = sorted(all_links)
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    OUTPUT_PATH.write_text("\n".join(sorted_links), encoding="utf-8")
+    save_links("philipmorris", sorted_links, OUTPUT_PATH)
     print(f"\n🎯 共提取 {len(sorted_links)} 条商品链接（多分类去重后），已保存至：{OUTPUT_PATH}")
 
 
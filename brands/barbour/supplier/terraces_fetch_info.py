@@ -22,19 +22,18 @@ from __future__ import annotations
 
 import re
 import json
-import threading
-from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional
 from bs4 import BeautifulSoup
 
 # 导入基类和工具
 from brands.barbour.core.base_fetcher import BaseFetcher, setup_logging
+from common.browser.page_ready import selector_non_empty, selector_present
 
 # 导入统一匹配器
 from brands.barbour.core.hybrid_barbour_matcher import resolve_product_code
 
-# SQLAlchemy
-from sqlalchemy import create_engine
+# 数据库（共用连接池 / Engine）
+from common.db.pool import get_engine
 
 # 配置
 from config import BARBOUR, BRAND_CONFIG, SETTINGS
@@ -75,66 +74,22 @@ class TerracesFetcher(BaseFetcher):
     特点:
     - 使用 selenium_utils 管理驱动（per-thread 复用）
     - hybrid_barbour_matcher 多级匹配
-    - 断点续传（自动跳过已完成的 URL）
+    - 断点续传: 基类 frontier（中断后只抓剩下的 URL）
+    - async_http 模式: Shopify 产品 JSON 在静态 HTML 中, 缺字段时回退 Selenium
     """
 
+    FETCH_MODE = "async_http"
+    READY_PREDICATES = (
+        selector_present('meta[name="twitter:title"]'),
+        selector_non_empty("div.product-price"),
+    )
+
     def __init__(self, *args, **kwargs):
-        """初始化 + 数据库引擎 + 进度文件"""
+        """初始化 + 数据库引擎"""
         super().__init__(*args, **kwargs)
 
         # 创建数据库引擎
-        engine_url = (
-            f"postgresql+psycopg2://{PG['user']}:{PG['password']}"
-            f"@{PG['host']}:{PG['port']}/{PG['dbname']}"
-        )
-        self._engine = create_engine(engine_url, pool_size=self.max_workers + 2)
-
-        # 断点续传：进度文件
-        self._progress_file = Path(self.output_dir) / ".done_urls.txt"
-        self._done_urls = self._load_done_urls()
-        self._progress_lock = threading.Lock()
-
-    # ================== 断点续传 ==================
-
-    def _load_done_urls(self) -> set:
-        """加载已完成的 URL 集合"""
-        if not self._progress_file.exists():
-            return set()
-        try:
-            lines = self._progress_file.read_text(encoding="utf-8").splitlines()
-            done = {line.strip() for line in lines if line.strip()}
-            self.logger.info(f"📋 已完成 {len(done)} 个，自动跳过")
-            return done
-        except Exception:
-            return set()
-
-    def _mark_done(self, url: str) -> None:
-        """记录已完成的 URL（线程安全、追加写入）"""
-        with self._progress_lock:
-            self._done_urls.add(url)
-            try:
-                with open(self._progress_file, "a", encoding="utf-8") as f:
-                    f.write(url + "\n")
-            except Exception:
-                pass
-
-    def _load_urls(self) -> List[str]:
-        """重写：加载链接并过滤掉已完成的"""
-        all_urls = super()._load_urls()
-        before = len(all_urls)
-        urls = [u for u in all_urls if u not in self._done_urls]
-        skipped = before - len(urls)
-        if skipped > 0:
-            self.logger.info(f"⏭️ 跳过已完成 {skipped} 个，剩余 {len(urls)} 个待抓取")
-        return urls
-
-    def fetch_one_product(self, url: str, idx: int, total: int):
-        """重写：成功后记录进度"""
-        result = super().fetch_one_product(url, idx, total)
-        url_out, success = result
-        if success:
-            self._mark_done(url_out)
-        return result
+        self._engine = get_engine(PG, pool_size=self.max_workers + 2)
 
     def parse_detail_page(self, html: str, url: str) -> Dict[str, Any]:
         """
@@ -146,7 +101,7 @@ class TerracesFetcher(BaseFetcher):
         - 尺码: JSON 或 DOM
         - 需要数据库匹配获取 Product Code
         """
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.parse_soup(html)
 
         # 1. 提取标题和颜色
         h1 = soup.select_one("h1.primary-title a") or soup.select_one("h1.primary-title")
@@ -495,6 +450,7 @@ class TerracesFetcher(BaseFetcher):
 def terraces_fetch_info(
     max_workers: int = 8,
     headless: bool = True,
+    fetch_mode: Optional[str] = None,
 ):
     """
     主函数 - 兼容旧版接口
@@ -502,6 +458,7 @@ def terraces_fetch_info(
     Args:
         max_workers: 并发线程数
         headless: 是否无头模式
+        fetch_mode: "selenium" / "async_http", None 使用 TerracesFetcher.FETCH_MODE
     """
     setup_logging()
 
@@ -513,6 +470,7 @@ def terraces_fetch_info(
         max_retries=3,
         wait_seconds=2.0,
         headless=headless,
+        fetch_mode=fetch_mode,
     )
 
     success, fail = fetcher.run_batch()
@@ -5,6 +5,7 @@ from pathlib import Path
 import sys
 from urllib.parse import urljoin
 from config import BARBOUR  # ✅ 使用 config 中的 TERRACES 配置
+from common.crawl.link_diff import save_links
 
 sys.stdout.reconfigure(encoding='utf-8')
 
@@ -70,14 +71,8 @@ def collect_terraces_links(max_pages=50, wait=1, max_empty_pages=3, output_file=
                 break
         time.sleep(wait)
 
-    # ✅ 确保目录存在并删除旧文件
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    if output_file.exists():
-        output_file.unlink()
-
-    with open(output_file, "w", encoding="utf-8") as f:
-        for link in sorted(all_links):
-            f.write(link + "\n")
+    # ✅ 覆盖写，同时与上一轮对比（新增 / 下架 / 未变化）
+    save_links("terraces", all_links, output_file)
 
     print(f"\n🎉 共抓取链接: {len(all_links)}，已保存到: {output_file}")
     return len(all_links)
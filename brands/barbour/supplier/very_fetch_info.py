@@ -25,11 +25,13 @@ from selenium.webdriver.support import expected_conditions as EC
 
 # 统一 Selenium 驱动
 from common.browser.selenium_utils import get_driver as selenium_get_driver, quit_driver
+from common.crawl.html_store import get_html_store
 
 # ===== DB 与项目配置 =====
 from sqlalchemy import create_engine
 from sqlalchemy.engine import Connection
 from config import BARBOUR, BRAND_CONFIG
+from brands.barbour.core.html_parser import parse_soup
 from brands.barbour.core.site_utils import assert_site_or_raise as canon
 from brands.barbour.core.sim_matcher import match_product, choose_best, explain_results
 from config import BARBOUR, BRAND_CONFIG, SETTINGS
@@ -339,7 +341,7 @@ def _split_title_color(title: str) -> tuple[str, str | None]:
 
 
 def parse_info(html: str, url: str) -> Dict[str, Any]:
-    soup = BeautifulSoup(html, "html.parser")
+    soup = parse_soup(html)
 
     initial = _json_from_script(html, "window.__product_body_initial_state__")
     productData = None  # 暂不强依赖 mergeIntoDataLayer
@@ -405,6 +407,18 @@ def process_url(url: str, conn: Connection, delay: float = DEFAULT_DELAY, driver
         time.sleep(delay)
     html = driver.page_source
 
+    store = get_html_store()
+    if store is not None:
+        store.put(url, html, site=SITE_NAME)
+
+    out_path = process_html(html, url, conn)
+    if store is not None and out_path.exists():
+        store.mark_output(url, out_path)
+    return out_path
+
+
+def process_html(html: str, url: str, conn: Connection) -> Path:
+    """解析 + 相似度匹配编码 + 写 TXT（在线抓取与离线重放共用）"""
     info = parse_info(html, url)
 
     # ============= 相似度匹配（与 HOF 一致） =============
@@ -478,6 +492,21 @@ def process_url(url: str, conn: Connection, delay: float = DEFAULT_DELAY, driver
     return out_path
 
 
+def make_reparser():
+    """离线重放（common.crawl.reparse）的 handler 工厂：每个子进程一个 DB 引擎"""
+    engine_url = (
+        f"postgresql+psycopg2://{PG['user']}:{PG['password']}"
+        f"@{PG['host']}:{PG['port']}/{PG['dbname']}"
+    )
+    engine = create_engine(engine_url)
+
+    def _handler(html: str, url: str) -> Path:
+        with engine.begin() as conn:
+            return process_html(html, url, conn)
+
+    return _handler
+
+
 # ================== 多线程封装（统一框架） ==================
 
 def _process_single_url(idx: int, total: int, url: str, engine, delay: float, headless: bool):
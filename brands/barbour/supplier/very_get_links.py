@@ -20,6 +20,7 @@ from selenium.webdriver.chrome.options import Options
 
 from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
 from config import BARBOUR, GLOBAL_CHROMEDRIVER_PATH
+from common.crawl.link_diff import save_links
 from selenium.webdriver.chrome.service import Service
 
 # ===== 站点与输出 =====
@@ -270,7 +271,7 @@ def save_to_file(urls: List[str], path: Path):
 
 def very_get_links(list_start_url: str = LIST_START_URL):
     urls = fetch_listing_urls(list_start_url)
-    save_to_file(urls, OUTPUT_FILE)
+    save_links("very", urls, OUTPUT_FILE)
 
 if __name__ == "__main__":
     very_get_links()
@@ -2,16 +2,17 @@ import sys
 from pathlib import Path
 import re
 import json
-import requests
 from bs4 import BeautifulSoup
 
 sys.path.append(str(Path(__file__).resolve().parents[2]))
 
 from config import BIRKENSTOCK
+from common.crawl.http_client import get_http_client
 from common.ingest.txt_writer import format_txt
 
 # === 配置 ===
 HEADERS = {"User-Agent": "Mozilla/5.0"}
+HTTP = get_http_client("birkenstock", headers=HEADERS, pool_size=1)
 LINK_FILE = BIRKENSTOCK["BASE"] / "publication" / "product_links.txt"
 TXT_DIR = BIRKENSTOCK["TXT_DIR"]
 BRAND = BIRKENSTOCK["BRAND"]
@@ -121,7 +122,7 @@ def detect_gender(text):
 
 def process_product(url):
     try:
-        r = requests.get(url, headers=HEADERS, timeout=15)
+        r = HTTP.get(url, timeout=15)
         r.raise_for_status()
         soup = BeautifulSoup(r.text, "html.parser")
 
@@ -194,6 +195,7 @@ def main():
             filepath.parent.mkdir(parents=True, exist_ok=True)
             format_txt(info, filepath, BRAND)
             print(f"✅ 写入: {filepath.name}")
+    print(HTTP.format_stats())
 
 if __name__ == "__main__":
     main()
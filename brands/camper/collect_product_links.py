@@ -12,6 +12,7 @@ from bs4 import BeautifulSoup
 import time
 from pathlib import Path
 from config import CAMPER  # ✅ 根据品牌切换
+from common.crawl.link_diff import save_links
 import sys
 import re
 
@@ -216,11 +217,8 @@ def camper_get_links():
             page += 1
             time.sleep(WAIT)
 
-    # 输出
-    LINKS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(LINKS_FILE, "w", encoding="utf-8") as f:
-        for link in sorted(all_links):
-            f.write(link + "\n")
+    # 输出（同时与上一轮对比：新增 / 下架 / 未变化）
+    save_links("camper", all_links, LINKS_FILE)
 
     print(f"\n🎉 共抓取链接: {len(all_links)}，已保存到: {LINKS_FILE}")
 
@@ -3,17 +3,18 @@
 # V2 (requests, 无 Chrome) + voucherPrices 折扣价提取
 import gc
 import re
-import json
-import time
-import threading
 from pathlib import Path
 from typing import Optional, List
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-import requests
 from bs4 import BeautifulSoup
 
 from config import CAMPER, SIZE_RANGE_CONFIG
+from common.crawl.frontier import get_frontier
+from common.crawl.host_limiter import HOST_LIMIT_MAX, get_host_limiter
+from common.crawl.http_client import get_http_client
+from common.crawl.embedded_json import extract_embedded_json
+from common.crawl.link_diff import plan_fetch
 from common.ingest.txt_writer import format_txt
 from common.product.category_utils import infer_style_category
 
@@ -21,7 +22,8 @@ PRODUCT_URLS_FILE = Path(CAMPER["LINKS_FILE"])
 SAVE_PATH = Path(CAMPER["TXT_DIR"])
 SAVE_PATH.mkdir(parents=True, exist_ok=True)
 
-MAX_WORKERS = 8  # requests 并发，可根据网络调整
+MAX_WORKERS = HOST_LIMIT_MAX  # 线程上限；在途请求数由 host_limiter 按 AIMD 自适应
+SITE = "camper"  # frontier 中的站点名（断点续跑 / 空壳补抓）
 
 
 # ---------------------------
@@ -158,65 +160,35 @@ def extract_sizes(product_sheet: dict) -> tuple[dict, dict]:
 
 
 # ---------------------------
-# HTTP 抓取（thread-local Session）
+# HTTP 抓取（common.crawl.http_client：共用连接池 + 重试退避 + host 限流）
 # ---------------------------
 
-_thread_local = threading.local()
-
 _HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
         "AppleWebKit/537.36 (KHTML, like Gecko) "
         "Chrome/149.0.0.0 Safari/537.36"
     ),
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    "Accept-Language": "en-GB,en;q=0.9",
-    "Accept-Encoding": "gzip, deflate, br",
-    "Connection": "keep-alive",
 }
 
 
-def _get_session() -> requests.Session:
-    if not hasattr(_thread_local, "sess") or _thread_local.sess is None:
-        s = requests.Session()
-        s.headers.update(_HEADERS)
-        _thread_local.sess = s
-    return _thread_local.sess
+def _client():
+    return get_http_client(SITE, headers=_HEADERS, pool_size=MAX_WORKERS)
 
 
 def _fetch_product_sheet(url: str, timeout: int = 20, retry: int = 2) -> tuple[str, dict | None]:
-    """返回 (title, product_sheet)；失败返回 ('', None)"""
-    sess = _get_session()
-    last_err = None
-    for attempt in range(retry + 1):
-        try:
-            r = sess.get(url, timeout=timeout)
-            r.raise_for_status()
-
-            soup = BeautifulSoup(r.text, "html.parser")
-            title_tag = soup.find("title")
-            title = title_tag.get_text(strip=True) if title_tag else ""
-
-            script_tag = soup.select_one("script#__NEXT_DATA__")
-            if not script_tag or not script_tag.string:
-                del soup
-                return title, None
-
-            data = json.loads(script_tag.string)
-            product_sheet = (
-                data.get("props", {})
-                    .get("pageProps", {})
-                    .get("productSheet")
-            )
-            del soup, data, script_tag
-            gc.collect()
-            return title, product_sheet
-
-        except Exception as e:
-            last_err = e
-            time.sleep(0.8 * (attempt + 1))
-
-    return "", None
+    """返回 (title, product_sheet)；失败返回 ('', None)。超时 / 429 / 5xx 由 HttpClient 退避重试"""
+    try:
+        r = _client().get(url, timeout=timeout, retries=retry)
+        r.raise_for_status()
+
+        # 只扫一遍 HTML 取 <title> 和 __NEXT_DATA__，不建 DOM 树
+        page = extract_embedded_json(r.text)
+        product_sheet = page.query("next_data", "props.pageProps.productSheet")
+        return page.title, product_sheet
+
+    except Exception:
+        return "", None
 
 
 # ---------------------------
@@ -224,8 +196,11 @@ def _fetch_product_sheet(url: str, timeout: int = 20, retry: int = 2) -> tuple[s
 # ---------------------------
 
 def process_product_url(url: str) -> tuple[bool, str, str]:
+    frontier = get_frontier(SITE)
     try:
         print(f"\n🔍 正在访问: {url}")
+        if frontier is not None:
+            frontier.mark_started(url)
         title_text, product_sheet = _fetch_product_sheet(url)
 
         if not product_sheet:
@@ -239,6 +214,8 @@ def process_product_url(url: str) -> tuple[bool, str, str]:
 
         if original_price == 0.0:
             print(f"⏭️ 跳过 {product_sheet.get('code', '?')}：价格为 0，商品已下架")
+            if frontier is not None:
+                frontier.mark_delisted(url)
             return True, url, ""
 
         color_data = product_sheet.get("color", "")
@@ -277,6 +254,8 @@ def process_product_url(url: str) -> tuple[bool, str, str]:
 
         filepath = SAVE_PATH / f"{product_code}.txt"
         format_txt(info, filepath, brand="camper")
+        if frontier is not None:
+            frontier.mark_done(url, filepath)
         del product_sheet, info
         gc.collect()
 
@@ -309,8 +288,15 @@ def camper_fetch_product_info(
         with open(lf, "r", encoding="utf-8") as f:
             url_list = [line.strip() for line in f if line.strip()]
         source = lf
+        # 采集时写的那份链接文件：只抓新增 + 数据过期的
+        url_list = plan_fetch(SITE, url_list, lf)
 
     print(f"📄 使用链接来源: {source} | 共 {len(url_list)} 条 | MAX_WORKERS={max_workers}")
+    _client().ensure_pool_size(max_workers)
+    frontier = get_frontier(SITE)
+    if frontier is not None:
+        # urls 由分布式队列 worker 按块传入时，每块单独一轮（不续跑同机其他 worker 的 run）
+        url_list = frontier.begin_chunk(url_list) if urls is not None else frontier.begin(url_list)
 
     ok_cnt = 0
     failed = []
@@ -323,6 +309,8 @@ def camper_fetch_product_info(
             else:
                 print(f"❌ 失败: {url} | {err}")
                 failed.append(url)
+                if frontier is not None:
+                    frontier.mark_failed(url, err)
 
     if failed:
         fail_path = SAVE_PATH.parent / "failed_urls_v5.txt"
@@ -330,6 +318,13 @@ def camper_fetch_product_info(
         print(f"⚠️ 失败链接已输出: {fail_path}")
 
     print(f"\n✅ 全部完成，成功 {ok_cnt}，失败 {len(failed)}")
+    if frontier is not None:
+        frontier.finish()
+        print(frontier.format_stats())
+    limiter = get_host_limiter()
+    limiter.save()
+    print(limiter.format_stats())
+    print(_client().format_stats())
 
 
 if __name__ == "__main__":
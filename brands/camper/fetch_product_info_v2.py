@@ -1,17 +1,16 @@
 # camper_fetch_product_info_fast.py
 import re
-import json
-import time
-import threading
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-import requests
 from bs4 import BeautifulSoup
 
 from config import CAMPER, SIZE_RANGE_CONFIG
 from common.ingest.txt_writer import format_txt
 from common.product.category_utils import infer_style_category
+from common.crawl.embedded_json import extract_embedded_json
+from common.crawl.html_store import fetch_with_store, get_html_store
+from common.crawl.http_client import get_http_client
 
 PRODUCT_URLS_FILE = Path(CAMPER["LINKS_FILE"])
 SAVE_PATH = Path(CAMPER["TXT_DIR"])
@@ -168,63 +167,53 @@ def extract_sizes(product_sheet: dict) -> tuple[dict, dict]:
     return size_map, size_detail
 
 
-# thread-local requests Session（requests.Session 不是严格线程安全，别全局共享一个）
-thread_local = threading.local()
+def _client():
+    """共用连接池 + 重试退避 + host 限流（common.crawl.http_client）"""
+    return get_http_client("camper", headers={"User-Agent": "Mozilla/5.0"}, pool_size=MAX_WORKERS)
 
-def get_http_session() -> requests.Session:
-    if not hasattr(thread_local, "sess") or thread_local.sess is None:
-        s = requests.Session()
-        s.headers.update({
-            "User-Agent": "Mozilla/5.0",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Language": "en-GB,en;q=0.9",
-            "Connection": "keep-alive",
-        })
-        thread_local.sess = s
-    return thread_local.sess
 
+def parse_next_data(html: str) -> tuple[str, dict] | tuple[str, None]:
+    """从页面 HTML 取 (title, product_sheet)；没有 __NEXT_DATA__ 时 product_sheet 为 None"""
+    page = extract_embedded_json(html)
+    return page.title, page.query("next_data", "props.pageProps.productSheet")
 
-def fetch_next_data(url: str, timeout=20, retry=2) -> tuple[str, dict] | tuple[str, None]:
+
+def fetch_page(url: str, timeout=20, retry=2):
     """
-    返回 (title, product_sheet)；失败返回 (title/空, None)
+    条件请求拉取页面并存入 HTML 快照库；返回 StoredPage，失败返回 None
     """
-    sess = get_http_session()
-    last_err = None
-
-    for i in range(retry + 1):
-        try:
-            r = sess.get(url, timeout=timeout)
-            r.raise_for_status()
-
-            soup = BeautifulSoup(r.text, "html.parser")
-            title_tag = soup.find("title")
-            title_text = title_tag.get_text(strip=True) if title_tag else ""
-
-            script_tag = soup.select_one("script#__NEXT_DATA__")
-            if not script_tag or not script_tag.string:
-                return title_text, None
-
-            data = json.loads(script_tag.string)
-
-            product_sheet = (
-                data.get("props", {})
-                    .get("pageProps", {})
-                    .get("productSheet")
-            )
-            return title_text, product_sheet
+    try:
+        return fetch_with_store(_client(), url, site="camper", timeout=timeout, retries=retry)
+    except Exception:
+        return None
 
-        except Exception as e:
-            last_err = e
-            # 简单退避
-            time.sleep(0.6 * (i + 1))
 
-    return "", None
+def fetch_next_data(url: str, timeout=20, retry=2) -> tuple[str, dict] | tuple[str, None]:
+    """
+    返回 (title, product_sheet)；失败返回 (title/空, None)
+    """
+    page = fetch_page(url, timeout=timeout, retry=retry)
+    if page is None:
+        return "", None
+    try:
+        return parse_next_data(page.html)
+    except Exception:
+        return "", None
 
 
 def process_product_url(url: str) -> tuple[bool, str, str]:
     try:
         print(f"\n🔍 正在访问: {url}")
-        title_text, product_sheet = fetch_next_data(url)
+        page = fetch_page(url)
+        if page is None:
+            return False, url, "请求失败"
+
+        store = get_html_store()
+        if store is not None and store.can_skip(url, page.changed):
+            print(f"⏭️ 内容未变化，沿用上次 TXT: {url}")
+            return True, url, ""
+
+        title_text, product_sheet = parse_next_data(page.html)
 
         if not product_sheet:
             return False, url, "未获取到 productSheet（可能页面结构变化/跳转）"
@@ -280,6 +269,8 @@ def process_product_url(url: str) -> tuple[bool, str, str]:
 
         filepath = SAVE_PATH / f"{product_code}.txt"
         format_txt(info, filepath, brand="camper")
+        if store is not None:
+            store.mark_output(url, filepath)
         price_src = "no_discount" if original_price == discount_price else "discount"
         print(f"✅ 完成 TXT: {filepath.name}  (src={price_src}, P={original_price}, D={discount_price})")
         return True, url, ""
@@ -312,6 +303,7 @@ def camper_fetch_product_info(
         source = str(lf)
 
     print(f"📄 使用链接来源: {source} | 共 {len(url_list)} 条 | MAX_WORKERS={max_workers}")
+    _client().ensure_pool_size(max_workers)
 
     ok_cnt = 0
     fail_cnt = 0
@@ -327,6 +319,7 @@ def camper_fetch_product_info(
                 print(f"❌ 失败: {url} | {msg}")
 
     print(f"\n✅ 完成：成功 {ok_cnt}，失败 {fail_cnt}，输出目录：{SAVE_PATH}")
+    print(_client().format_stats())
 
 
 
@@ -23,7 +23,7 @@ def main():
     camper_get_links()
 
     print("\n🟡 Step: 3️⃣ 抓取商品信息")
-    camper_fetch_product_info(max_workers=1)
+    camper_fetch_product_info()
 
 
 
@@ -37,7 +37,7 @@ def main():
         print("  - 无缺失商品，跳过")
 
     print("\n🟡 Step: 3️⃣ 找出TXT中价格/库存全空的商品（网络原因导致抓取失败），重新抓一遍")
-    empty_product_link = generate_empty_product_links_for_brand("camper")
+    empty_product_link = generate_empty_product_links_for_brand("camper", use_frontier=True)
     if empty_product_link.exists() and empty_product_link.stat().st_size > 0:
         camper_fetch_product_info(links_file=str(empty_product_link))
     else:
@@ -8,12 +8,13 @@ sys.path.append(str(Path(__file__).resolve().parents[2]))
 
 import re
 import json
-import requests
 from bs4 import BeautifulSoup
 from config import CLARKS
+from common.crawl.http_client import get_http_client
 from common.ingest.txt_writer import format_txt
 
 HEADERS = {"User-Agent": "Mozilla/5.0"}
+HTTP = get_http_client("clarks", headers=HEADERS, pool_size=1)
 LINK_FILE = CLARKS["BASE"] / "publication" / "product_links.txt"
 TXT_DIR = CLARKS["TXT_DIR"]
 BRAND = CLARKS["BRAND"]
@@ -266,7 +267,7 @@ def extract_kids_size_stock(soup):
 # =========================
 def process_product(url):
     try:
-        r = requests.get(url, headers=HEADERS, timeout=15)
+        r = HTTP.get(url, timeout=15)
         r.raise_for_status()
         soup = BeautifulSoup(r.text, "html.parser")
 
@@ -379,6 +380,7 @@ def clarks_fetch_info(links_file=None):
             filepath.parent.mkdir(parents=True, exist_ok=True)
             format_txt(info, filepath, BRAND)
             print(f"✅ 写入: {filepath.name}")
+    print(HTTP.format_stats())
 
 
 if __name__ == "__main__":
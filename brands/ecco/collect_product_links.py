@@ -9,6 +9,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 from config import ECCO, ensure_all_dirs
+from common.crawl.link_diff import save_links
 from selenium.webdriver.chrome.service import Service
 
 # 解决 Windows 控制台中文输出问题
@@ -316,10 +317,8 @@ def ecco_get_links():
             except Exception as e:
                 print(f"⚠️ [{label}] 抓取异常，跳过该类目继续: {e}")
 
-        # 写入 TXT
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            for link in sorted(all_links):
-                f.write(link + "\n")
+        # 写入 TXT（同时与上一轮对比：新增 / 下架 / 未变化）
+        save_links("ecco", all_links, OUTPUT_FILE)
 
         print("\n🎉 所有类目抓取完成")
         print(f"📦 共采集到产品链接 {len(all_links)} 条")
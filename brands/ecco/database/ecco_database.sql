@@ -32,6 +32,8 @@ CREATE TABLE ecco_inventory (
     -- 状态控制
     last_checked TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- 最后检查时间
     is_published BOOLEAN DEFAULT FALSE,               -- 是否已发布（平台上架状态）
+    row_hash CHAR(32),                                -- 增量导入用：TXT 解析值的哈希（为空表示需要重写）
+    removed_at TIMESTAMP,                             -- 增量导入用：TXT 中消失的时间（软删除，库存置 0、取消发布并清空渠道绑定）
 
     -- 唯一约束：同一商品+尺码唯一
     UNIQUE (product_code, size)
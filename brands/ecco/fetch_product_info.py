@@ -16,15 +16,17 @@ from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from html import unescape
 from config import ECCO, SIZE_RANGE_CONFIG, DEFAULT_STOCK_COUNT
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import json
 import re
 import demjson3
 
+from common.crawl.http_client import get_http_client
 from common.ingest.txt_writer import format_txt
+from common.browser.page_ready import (
+    WAIT_RECORDER, jsonld_product_present, selector_non_empty, wait_until_ready,
+)
+from common.browser.load_profile import LOAD_METER
 
 # ===== 路径配置 =====
 LINKS_FILE = ECCO["LINKS_FILE"]
@@ -44,6 +46,14 @@ ENABLE_SELENIUM    = True
 SELENIUM_FIRST     = True   # True = 全程用浏览器（价格最准）；False = requests 优先
 MAX_WORKERS        = 1
 PAGE_LOAD_TIMEOUT  = 30  # seconds — prevents hanging on crashed tab
+LOAD_PROFILE       = "ecco"  # common/browser/load_profile.py：CDP 屏蔽图片/字体/样式/埋点
+READY_TIMEOUT      = 10  # seconds — 等 JSON-LD 与 SelectedVariantPrice 渲染的上限
+
+# 页面就绪: JSON-LD 已输出且当前售价已渲染（替代固定 sleep）
+READY_PREDICATES = (
+    jsonld_product_present(),
+    selector_non_empty('[data-testid="SelectedVariantPrice"]'),
+)
 
 
 # ============ 工具函数（与 v1 相同）============
@@ -456,27 +466,14 @@ def save_debug_html(url, html, tag="loaded"):
     ts = time.strftime("%Y%m%d-%H%M%S")
     (DEBUG_DIR / f"{ts}_{tag}_{code_hint}.html").write_text(html or "", encoding="utf-8", errors="ignore")
 
-def _make_session() -> requests.Session:
-    s = requests.Session()
-    retry = Retry(total=4, backoff_factor=1.5,
-                  status_forcelist=(429, 500, 502, 503, 504))
-    s.mount("https://", HTTPAdapter(max_retries=retry))
-    s.mount("http://",  HTTPAdapter(max_retries=retry))
-    s.headers.update(HDRS)
-    return s
-
-_session: requests.Session | None = None
-
-def _get_session() -> requests.Session:
-    global _session
-    if _session is None:
-        _session = _make_session()
-    return _session
+def _client():
+    """共用连接池 + 重试退避 (429/5xx/超时最多 4 次) + host 限流（common.crawl.http_client）"""
+    return get_http_client("ecco", headers=HDRS, pool_size=max(MAX_WORKERS, 4), retries=4, backoff=1.5)
 
 def fetch_html(url_or_file: str) -> str:
     if not is_url(url_or_file):
         return Path(url_or_file).read_text(encoding="utf-8", errors="ignore")
-    r = _get_session().get(url_or_file, timeout=REQUEST_TIMEOUT)
+    r = _client().get(url_or_file, timeout=REQUEST_TIMEOUT)
     r.raise_for_status()
     return r.text
 
@@ -488,7 +485,7 @@ def get_driver():
     if _selenium_driver is not None:
         return _selenium_driver
     from common.browser.driver_auto import build_uc_driver
-    _selenium_driver = build_uc_driver(headless=False)
+    _selenium_driver = build_uc_driver(headless=False, load_profile=LOAD_PROFILE)
     _selenium_driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
     return _selenium_driver
 
@@ -504,8 +501,13 @@ def _reset_driver():
 def fetch_html_selenium(url):
     try:
         d = get_driver()
+        LOAD_METER.before_page(d, LOAD_PROFILE, "ecco")
         d.get(url)
-        time.sleep(1.5)
+        ready, waited = wait_until_ready(d, READY_PREDICATES, timeout=READY_TIMEOUT)
+        WAIT_RECORDER.record("ecco", waited, ready)
+        LOAD_METER.after_page(d, "ecco")
+        if not ready:
+            print(f"⚠️  等待页面就绪超时 ({waited:.1f}s)，继续解析: {url}")
         return d.page_source
     except Exception as e:
         print(f"⚠️  Selenium 异常，重置 driver: {e}")
@@ -676,6 +678,7 @@ def ecco_fetch_info(links_file=None, max_workers: int = MAX_WORKERS):
         print("⚠️ 链接文件为空，直接退出。")
         return
 
+    _client().ensure_pool_size(max_workers)
     with ThreadPoolExecutor(max_workers=max_workers) as ex:
         futures = [ex.submit(process_one, url, i + 1, total) for i, url in enumerate(urls)]
         for _ in as_completed(futures):
@@ -686,6 +689,11 @@ def ecco_fetch_info(links_file=None, max_workers: int = MAX_WORKERS):
             get_driver().quit()
         except Exception:
             pass
+        print(WAIT_RECORDER.format_summary("ecco"))
+        print(LOAD_METER.format_summary("ecco"))
+    http_stats = _client().format_stats()
+    if http_stats:
+        print(http_stats)
 
     print("✅ 完成")
 
@@ -5,6 +5,7 @@ from urllib.parse import urljoin
 import requests
 from pathlib import Path
 import sys
+from common.crawl.link_diff import save_links
 sys.stdout.reconfigure(encoding='utf-8')
 
 
@@ -76,9 +77,7 @@ def collect_all_product_links():
         total_links.update(links)
         last_soup = soup  # 用于保存最后一个页面的 HTML 调试信息
 
-    with open(SAVE_FILE, "w", encoding="utf-8") as f:
-        for link in sorted(total_links):
-            f.write(link + "\n")
+    save_links("geox", total_links, SAVE_FILE)
     print(f"\n📦 共提取商品链接: {len(total_links)} 条")
     print(f"📄 链接已保存至: {SAVE_FILE}")
 
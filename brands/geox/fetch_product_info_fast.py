@@ -11,18 +11,22 @@ from typing import Dict, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse
 
-import requests
 from bs4 import BeautifulSoup
 
 from config import SIZE_RANGE_CONFIG, GEOX, DEFAULT_STOCK_COUNT
 from common.ingest.txt_writer import format_txt
 from common.product.category_utils import infer_style_category
+from common.crawl.frontier import get_frontier
+from common.crawl.host_limiter import HOST_LIMIT_MAX, get_host_limiter
+from common.crawl.html_store import fetch_with_store, get_html_store
+from common.crawl.http_client import HttpClient, get_http_client
+from common.crawl.link_diff import plan_fetch
 
 # ===================== 配置 =====================
 PRODUCT_LINK_FILE = GEOX["BASE"] / "publication" / "product_links.txt"
 TXT_OUTPUT_DIR = GEOX["TXT_DIR"]
 BRAND = "geox"
-MAX_THREADS = 8      # requests 无浏览器开销，可跑更多线程；如被限速降到 4
+MAX_THREADS = HOST_LIMIT_MAX   # 线程上限；实际在途请求数由 host_limiter 按限流情况自动调整
 
 HEADERS = {
     "User-Agent": (
@@ -195,62 +199,104 @@ def parse_product(html: str, url: str) -> Optional[Dict]:
     }
 
 
-def fetch_one(session: requests.Session, idx: int, total: int, url: str) -> Tuple[bool, str]:
+def _write_info(info: Dict) -> Path:
+    txt_path = TXT_OUTPUT_DIR / f"{info['Product Code']}.txt"
+    txt_path.parent.mkdir(parents=True, exist_ok=True)
+    format_txt(info, txt_path, brand=BRAND)
+    return txt_path
+
+
+def reparse_html(html: str, url: str) -> Path:
+    """离线重放（common.crawl.reparse）：用快照 HTML 重新生成 TXT"""
+    info = parse_product(html, url)
+    if not info:
+        raise ValueError(f"解析失败: {url}")
+    return _write_info(info)
+
+
+def fetch_one(client: HttpClient, idx: int, total: int, url: str) -> Tuple[bool, str]:
+    frontier = get_frontier(BRAND)
+    if frontier is not None:
+        frontier.mark_started(url)
     try:
-        r = session.get(url, headers=HEADERS, timeout=15)
-        r.raise_for_status()
-        info = parse_product(r.text, url)
+        page = fetch_with_store(client, url, site=BRAND, timeout=15)
+        store = get_html_store()
+        if store is not None and store.can_skip(url, page.changed):
+            print(f"[{idx}/{total}] ⏭️ 内容未变化: {url}")
+            if frontier is not None:
+                frontier.mark_done(url, store.latest(url).output_path)
+            return True, url
+
+        info = parse_product(page.html, url)
         if not info:
             print(f"[{idx}/{total}] ⚠️ 解析失败: {url}")
+            if frontier is not None:
+                frontier.mark_failed(url, "解析失败")
             return False, url
 
-        txt_path = TXT_OUTPUT_DIR / f"{info['Product Code']}.txt"
-        txt_path.parent.mkdir(parents=True, exist_ok=True)
-        format_txt(info, txt_path, brand=BRAND)
+        txt_path = _write_info(info)
+        if store is not None:
+            store.mark_output(url, txt_path)
+        if frontier is not None:
+            frontier.mark_done(url, txt_path)
         print(f"[{idx}/{total}] ✅ {info['Product Code']}")
         return True, url
 
     except Exception as e:
         print(f"[{idx}/{total}] ❌ {url} → {e}")
+        if frontier is not None:
+            frontier.mark_failed(url, e)
         return False, url
 
 
 # ===================== 主入口 =====================
-def fetch_all_product_info(links_file=None, max_workers: int = MAX_THREADS):
+def fetch_all_product_info(links_file=None, max_workers: int = MAX_THREADS, urls=None):
     """
     GEOX 快速抓取入口（requests + 多线程，无需浏览器）。
     接口与 fetch_product_info_jingya.py 完全兼容。
 
     :param links_file: 可选，自定义 product_links.txt 路径。
-    :param max_workers: 线程数，默认 8；被限速时调低。
+    :param max_workers: 线程数上限；在途请求数由 host_limiter 自适应，被限速时自动收缩，无需手动调低。
+    :param urls: 可选，直接指定 URL 列表（分布式队列 worker 按块传入），此时不读链接文件。
     """
-    links_path = Path(links_file) if links_file else PRODUCT_LINK_FILE
-    if not links_path.exists():
-        print(f"❌ 缺少链接文件: {links_path}")
-        return
+    chunk = urls is not None
+    if chunk:
+        urls = [u.strip() for u in urls if u and u.strip()]
+    else:
+        links_path = Path(links_file) if links_file else PRODUCT_LINK_FILE
+        if not links_path.exists():
+            print(f"❌ 缺少链接文件: {links_path}")
+            return
+
+        with open(links_path, "r", encoding="utf-8") as f:
+            urls = [u.strip() for u in f if u.strip()]
 
-    with open(links_path, "r", encoding="utf-8") as f:
-        urls = [u.strip() for u in f if u.strip()]
+        if not urls:
+            print(f"⚠️ 链接列表为空: {links_path}")
+            return
 
-    if not urls:
-        print(f"⚠️ 链接列表为空: {links_path}")
-        return
+        # 采集时写的那份链接文件：只抓新增 + 数据过期的；下架的删 TXT
+        urls = plan_fetch(BRAND, urls, links_path)
+    frontier = get_frontier(BRAND)
+    if frontier is not None:
+        # urls 由分布式队列 worker 按块传入时，每块单独一轮（不续跑同机其他 worker 的 run）
+        urls = frontier.begin_chunk(urls) if chunk else frontier.begin(urls)
 
     total = len(urls)
     print(f"📦 本次需要抓取 GEOX 商品数量: {total}，线程数: {max_workers}")
     t0 = time.time()
     success = fail = 0
 
-    session = requests.Session()
-    # 先访问首页，拿到 cookies（避免部分反爬检测）
+    # 所有线程共用连接池和 cookie；先访问首页拿到 cookies（避免部分反爬检测）
+    client = get_http_client(BRAND, headers=HEADERS, pool_size=max_workers)
     try:
-        session.get("https://www.geox.com/en-GB/", headers=HEADERS, timeout=10)
+        client.get("https://www.geox.com/en-GB/", timeout=10, retries=0)
     except Exception:
         pass
 
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         futures = {
-            executor.submit(fetch_one, session, idx, total, url): url
+            executor.submit(fetch_one, client, idx, total, url): url
             for idx, url in enumerate(urls, 1)
         }
         for fut in as_completed(futures):
@@ -265,6 +311,13 @@ def fetch_all_product_info(links_file=None, max_workers: int = MAX_THREADS):
         f"\n✅ GEOX 抓取完成：成功 {success} 条，失败 {fail} 条，"
         f"耗时约 {dt/60:.1f} 分钟"
     )
+    if frontier is not None:
+        frontier.finish()
+        print(frontier.format_stats())
+    limiter = get_host_limiter()
+    limiter.save()
+    print(limiter.format_stats())
+    print(client.format_stats())
 
 
 if __name__ == "__main__":
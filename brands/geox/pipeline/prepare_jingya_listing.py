@@ -46,7 +46,8 @@ def main():
         fetch_all_product_info(missing_product_link)
 
     print("\n🟡 Step: 3️⃣ 找出TXT中价格/库存全空的商品（网络原因导致抓取失败），重新抓一遍")
-    empty_product_link = generate_empty_product_links_for_brand("geox")
+    empty_product_link = generate_empty_product_links_for_brand(
+        "geox", use_frontier=not MEMBER_DISCOUNT_MODE)
     if empty_product_link.exists() and empty_product_link.stat().st_size > 0:
         fetch_all_product_info(str(empty_product_link))
     else:
@@ -4,31 +4,27 @@
 # 使用 format_txt 写入鲸芽标准格式 TXT
 from __future__ import annotations
 
-import json
 import re
 import time
 from pathlib import Path
 
-import requests
 from bs4 import BeautifulSoup
 
 from config import MARKSANDSPENCER
+from common.crawl.embedded_json import EmbeddedJson, extract_embedded_json
+from common.crawl.http_client import get_http_client
 from common.ingest.txt_writer import format_txt
 from common.product.style_category_normalizer import normalize_style_category
 
 
 CANON_SITE = "Marks & Spencer"
 
-_SESSION = requests.Session()
-_SESSION.headers.update({
+_HTTP = get_http_client("marksandspencer", pool_size=1, headers={
     "User-Agent": (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
         "AppleWebKit/537.36 (KHTML, like Gecko) "
         "Chrome/124.0.0.0 Safari/537.36"
     ),
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    "Accept-Language": "en-GB,en;q=0.9",
-    "Accept-Encoding": "gzip, deflate, br",
 })
 
 
@@ -190,15 +186,6 @@ def _clean(s: str) -> str:
     return re.sub(r"\s+", " ", s).strip()
 
 
-def _load_json_safe(text: str):
-    if not text:
-        return None
-    text = text.replace("undefined", "null")
-    try:
-        return json.loads(text)
-    except Exception:
-        return None
-
 def _get_color_from_url(url: str) -> str:
     from urllib.parse import urlparse, parse_qs
     qs = parse_qs(urlparse(url).query)
@@ -221,22 +208,14 @@ def _normalize_color_code(color: str) -> str:
 
 
 
-def _extract_jsonld_breadcrumbs(soup: BeautifulSoup) -> list[str]:
+def _extract_jsonld_breadcrumbs(page: EmbeddedJson) -> list[str]:
     """
     从页面 JSON-LD BreadcrumbList 提取面包屑文本和路径。
     例: ["Home", "/", "Men", "/c/men", "Men's Knitwear", "/l/men/mens-knitwear"]
     用于 _infer_gender 判断性别。
     """
     results: list[str] = []
-    for tag in soup.find_all("script", {"type": "application/ld+json"}):
-        try:
-            data = _load_json_safe(tag.string)
-        except Exception:
-            continue
-        if not isinstance(data, dict):
-            continue
-        if data.get("@type") != "BreadcrumbList":
-            continue
+    for data in page.jsonld("BreadcrumbList"):
         for item in (data.get("itemListElement") or []):
             inner = item.get("item") or {}
             name = inner.get("name") or ""
@@ -248,7 +227,7 @@ def _extract_jsonld_breadcrumbs(soup: BeautifulSoup) -> list[str]:
     return results
 
 
-def _extract_product_sheet(soup: BeautifulSoup):
+def _extract_product_sheet(page: EmbeddedJson):
     """
     从 <script id="__NEXT_DATA__"> 中取商品核心信息
 
@@ -256,16 +235,10 @@ def _extract_product_sheet(soup: BeautifulSoup):
     若不存在，则适配新结构的 pageProps.productDetails，
     构造一个"仿 productSheet"的 dict，让后续解析逻辑复用。
     """
-    tag = soup.find("script", {"id": "__NEXT_DATA__", "type": "application/json"})
-    if not tag:
-        return None
-
-    data = _load_json_safe(tag.string)
-    if not isinstance(data, dict):
+    page_props = page.query("next_data", "props.pageProps")
+    if not isinstance(page_props, dict):
         return None
 
-    page_props = (data.get("props") or {}).get("pageProps") or {}
-
     # 1️⃣ 旧结构：直接存在 productSheet
     sheet = page_props.get("productSheet")
     if sheet:
@@ -551,20 +524,19 @@ def _infer_gender(name: str, sheet: dict, url: str):
 
 def extract_page(url: str) -> dict:
     """用 requests 抓取页面 HTML，解析 __NEXT_DATA__ JSON（SSR，不需要 JS 执行）"""
-    resp = _SESSION.get(url, timeout=30)
+    resp = _HTTP.get(url, timeout=30)
     resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
-
-    title_tag = soup.find("title")
-    title = _clean(title_tag.text) if title_tag else "No Data"
+    # 一次扫描取 <title> / __NEXT_DATA__ / JSON-LD，不建 DOM 树
+    page = extract_embedded_json(resp.text)
+    title = _clean(page.title) or "No Data"
 
     # --- 解析核心 JSON ---
-    sheet = _extract_product_sheet(soup)
+    sheet = _extract_product_sheet(page)
     if not sheet:
         raise Exception("没有找到 productSheet")
 
     # 用 JSON-LD BreadcrumbList 补充面包屑（包含 "Men"/"Women" 等路径，比 __NEXT_DATA__ 更可靠）
-    jsonld_crumbs = _extract_jsonld_breadcrumbs(soup)
+    jsonld_crumbs = _extract_jsonld_breadcrumbs(page)
     if jsonld_crumbs:
         sheet["breadcrumbs"] = (sheet.get("breadcrumbs") or []) + jsonld_crumbs
 
@@ -667,6 +639,8 @@ def fetch_jackcet_info():
         except Exception as e:
             print(f"❌ 解析失败: {url}\n   错误: {e}")
 
+    print(_HTTP.format_stats())
+
 
 if __name__ == "__main__":
     fetch_jackcet_info()
@@ -1,10 +1,9 @@
 from __future__ import annotations
-import json, re, time
+import re, time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
-import requests
 from bs4 import BeautifulSoup
 
 # === 项目内路径/配置 ===
@@ -16,6 +15,9 @@ except ImportError:
 
 # === 文本写入：沿用你的 writer ===
 from common.ingest.txt_writer import format_txt
+from common.crawl.embedded_json import extract_embedded_json
+from common.crawl.html_store import StoredPage, fetch_with_store, get_html_store
+from common.crawl.http_client import get_http_client
 
 UA = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -34,17 +36,25 @@ def _money_to_float(text: Optional[str]) -> float:
     m = re.search(r"(\d+(?:\.\d+)?)", t)
     return float(m.group(1)) if m else 0.0
 
-def _fetch_html(url: str, retry: int = 3, timeout: int = 25) -> str:
-    last_exc = None
-    for _ in range(retry):
+def _client():
+    """共用连接池 + 重试退避 + host 限流（common.crawl.http_client）"""
+    return get_http_client("reiss", headers=HEADERS)
+
+def _fetch_html(url: str, retry: int = 3, timeout: int = 25) -> StoredPage:
+    """
+    条件请求 + 存 HTML 快照；page.changed=False 表示内容与上次相同。
+    超时 / 429 / 5xx 由 HttpClient 退避重试；返回 200 但正文为空时间隔 1.2s 再取，最多 retry 次
+    """
+    for attempt in range(retry):
         try:
-            r = requests.get(url, headers=HEADERS, timeout=timeout)
-            if r.status_code == 200 and r.text:
-                return r.text
+            page = fetch_with_store(_client(), url, site="reiss", timeout=timeout, retries=retry - 1)
         except Exception as e:
-            last_exc = e
-        time.sleep(1.2)
-    raise RuntimeError(f"GET {url} failed: {last_exc or 'HTTP '+str(r.status_code)}")
+            raise RuntimeError(f"GET {url} failed: {e}") from e
+        if page.html:
+            return page
+        if attempt + 1 < retry:
+            time.sleep(1.2)
+    raise RuntimeError(f"GET {url} failed: empty body")
 
 def _product_code_from_url(url: str) -> Optional[str]:
     # /style/su583537/ap8544 -> ap8544 -> AP8-544
@@ -56,13 +66,8 @@ def _product_code_from_url(url: str) -> Optional[str]:
         return f"{pid[:3]}-{pid[3:]}"
     return pid
 
-def _parse_next_data(soup: BeautifulSoup) -> Optional[Dict]:
-    tag = soup.find("script", id="__NEXT_DATA__", type="application/json")
-    if not tag:
-        return None
-    data = json.loads(tag.string or "{}")
-    q = (((data.get("props") or {}).get("pageProps") or {})
-         .get("dehydratedState") or {}).get("queries") or []
+def _parse_next_data(html: str) -> Optional[Dict]:
+    q = extract_embedded_json(html).query("next_data", "props.pageProps.dehydratedState.queries") or []
     for item in q:
         state = item.get("state") or {}
         key = item.get("queryKey")
@@ -218,7 +223,7 @@ def _fill_and_quantify_sizes(size_map: Dict[str, str],
 def parse_reiss_product(html: str, url: str) -> Dict:
     soup = BeautifulSoup(html, "html.parser")
 
-    next_data = _parse_next_data(soup)
+    next_data = _parse_next_data(html)
 
     product_title = _parse_name_from_title(soup)
     color = _parse_dom_color(soup)
@@ -298,18 +303,35 @@ def parse_reiss_product(html: str, url: str) -> Dict:
     }
     return info
 
+def _write_info(info: Dict, url: str, save_dir: Path, brand: str = "reiss") -> Path:
+    fname = info["Product Code"].replace("/", "_")
+    if not fname or fname == "UNKNOWN":
+        fname = (_product_code_from_url(url) or re.sub(r"\W+", "_", url))[:80]
+    path = Path(save_dir) / f"{fname}.txt"
+    format_txt(info, path, brand=brand)
+    return path
+
+
+def reparse_html(html: str, url: str) -> Path:
+    """离线重放（common.crawl.reparse）：用快照 HTML 重新生成 TXT"""
+    if not REISS:
+        raise ValueError("缺少 REISS 配置，无法确定输出目录")
+    return _write_info(parse_reiss_product(html, url), url, Path(REISS["TXT_DIR"]))
+
+
 # === 公共入口（名称/签名未改） ===
 def fetch_one_and_write(url: str, save_dir: Path, brand: str = "reiss") -> Tuple[str, bool, str]:
     try:
-        html = _fetch_html(url)
-        info = parse_reiss_product(html, url)
-
-        fname = info["Product Code"].replace("/", "_")
-        if not fname or fname == "UNKNOWN":
-            fname = (_product_code_from_url(url) or re.sub(r"\W+", "_", url))[:80]
-        path = Path(save_dir) / f"{fname}.txt"
-
-        format_txt(info, path, brand=brand)
+        page = _fetch_html(url)
+        store = get_html_store()
+        if store is not None and store.can_skip(url, page.changed):
+            print(f"⏭️ 内容未变化，沿用上次 TXT: {url}")
+            return url, True, ""
+
+        info = parse_reiss_product(page.html, url)
+        path = _write_info(info, url, save_dir, brand)
+        if store is not None:
+            store.mark_output(url, path)
         print(f"✅ TXT 写入: {path.name}")
         return url, True, ""
     except Exception as e:
@@ -357,6 +379,7 @@ def reiss_fetch_all(
     ok = fail = 0
     errs: List[str] = []
 
+    _client().ensure_pool_size(max_workers)
     with ThreadPoolExecutor(max_workers=max_workers) as ex:
         futs = [ex.submit(fetch_one_and_write, u, Path(save_dir), "reiss") for u in urls]
         for fut in as_completed(futs):
@@ -367,5 +390,6 @@ def reiss_fetch_all(
                 errs.append(msg)
 
     print(f"🎯 完成：成功 {ok}，失败 {fail}，输出目录：{save_dir}")
+    print(_client().format_stats())
     if fail:
         print("⚠️ 失败原因示例：", errs[:3])
@@ -57,6 +57,11 @@ BARBOUR = {
     "TABLE_NAME": "barbour_inventory",
     "TAOBAO_STORE_DISCOUNT": 1,  # 不包关税→淘宝店铺价再打9折
     "SUPPLIER_MIN_SIZES": 2,    # 供应商映射：至少要有几个有货尺码才算"可用"
+    # 跨供货商跳过（brands/barbour/core/supplier_skip.py）：编码的首选站点是别家且 TTL 内检查过、仍可用时，
+    # 本站该页面不重抓（skip）/ 排到最后（defer）/ 不处理（off）；本站数据超过 MAX_STALE 小时照常抓
+    "SUPPLIER_SKIP_MODE": "skip",
+    "SUPPLIER_SKIP_TTL_HOURS": 24,
+    "SUPPLIER_SKIP_MAX_STALE_HOURS": 72,
     "PGSQL_CONFIG": PGSQL_CONFIG,
     "LINKS_FILE": BARBOUR_BASE / "publication" / "barbour" / "product_links.txt",
     # === 新增 houseoffraser 配置 ===
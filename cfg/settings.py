@@ -101,4 +101,63 @@ SETTINGS = {
     "DRIVER_DIR": str(DRIVER_DIR),
     "CHROMEDRIVER_PATH": GLOBAL_CHROMEDRIVER_PATH,
     "GECKODRIVER_PATH": GLOBAL_GECKODRIVER_PATH,
+    # selenium_utils 进程级 Chrome 池
+    "DRIVER_POOL_SIZE": 8,          # 同时存活的 Chrome 上限（get_driver 持有租约的线程更多时临时扩容到线程数）
+    "DRIVER_POOL_MAX_GROW": 16,     # 临时扩容的硬上限，更多的线程排队等 driver 归还
+    "DRIVER_MAX_PAGES": 100,        # 单个 Chrome 服务满 N 页后回收重建
+    "DRIVER_MAX_RSS_MB": 1500,      # Chrome 进程树 RSS 超过 M MB 回收重建（需 psutil）
+    "DRIVER_ACQUIRE_TIMEOUT": 300,  # 池满时等待空闲 driver 的最长秒数
+    # common/browser/load_profile.py：每 N 页放行 1 页作基线，用于估算资源屏蔽节省量（0 = 不采样）
+    "LOAD_PROFILE_SAMPLE_EVERY": 20,
+    # common/crawl/html_store.py：抓取的 HTML 压缩存档 + 条件请求；目录为空时用 BASE_DIR/_html_store
+    "HTML_STORE_ENABLED": True,
+    "HTML_STORE_DIR": None,
+    # brands/barbour/core/html_parser.py 建树后端: bs4 / bs4-lxml / selectolax（未安装时回退 bs4）
+    # 各站点解析代码（parse_soup）在 bs4-lxml / selectolax 下都用 lxml 建树；selectolax 只对 parse_document 生效
+    "HTML_PARSER_BACKEND": "bs4",
+    # common/crawl/frontier.py：每个 URL 的抓取状态（断点续跑 / 空壳补抓）；目录为空时用 BASE_DIR/_crawl_frontier
+    "CRAWL_FRONTIER_ENABLED": True,
+    "CRAWL_FRONTIER_DIR": None,
+    "CRAWL_FRONTIER_MAX_ATTEMPTS": 5,  # 同一轮失败 N 次后续跑不再重试
+    # common/crawl/host_limiter.py：按 host 自适应并发 (AIMD)，学到的值存 HOST_LIMITS_FILE（为空时 BASE_DIR/_crawl_frontier/host_limits.json）
+    "HOST_CONCURRENCY_INITIAL": 4,
+    "HOST_CONCURRENCY_MAX": 16,
+    "HOST_LIMITS_FILE": None,
+    # common/crawl/http_client.py：requests 抓取共用客户端（连接池 / 重试退避 / 按 host 统计）
+    "HTTP_POOL_SIZE": 16,     # 每个 host 保留的 keep-alive 连接数（各 fetcher 会按线程数调大）
+    "HTTP_TIMEOUT": 20,
+    "HTTP_RETRIES": 2,        # 超时 / 连接错误 / 429 / 5xx 的重试次数
+    "HTTP_BACKOFF": 0.8,      # 退避基数（秒），第 n 次重试等 BACKOFF * 2^(n-1)，有 Retry-After 时取较大者
+    # common/crawl/link_diff.py：链接增量（新增 / 下架 / 未变化），未变化的链接只在数据超过 N 小时后重抓
+    "LINK_DIFF_ENABLED": True,
+    "LINK_DIFF_MAX_AGE_HOURS": 24,
+    "LINK_DIFF_MAX_REMOVED_RATIO": 0.5,  # 一次"下架"超过上轮链接的该比例时视为采集异常，不处理下架
+    # common/crawl/job_queue.py：Postgres 分布式抓取队列（多台 VM 一起抓）；连接为空时用 db_config.PGSQL_CONFIG
+    "CRAWL_QUEUE_PGSQL": None,
+    "CRAWL_QUEUE_LEASE_SEC": 300,     # 租约时长；worker 每 1/3 租约心跳续约，崩溃后过期由其他 worker 接手
+    "CRAWL_QUEUE_MAX_ATTEMPTS": 3,
+    "CRAWL_QUEUE_CHUNK": 20,          # worker 每次领取的 URL 数（同一站点）
+    "CRAWL_QUEUE_POLL_SEC": 5,
+    # common/ingest/txt_batch.py：format_txt 输出方式 txt（只写 TXT）/ both（TXT + 批次）/ batch（只写批次，TXT 按需 export）
+    "TXT_OUTPUT_MODE": "txt",
+    "TXT_BATCH_FLUSH_EVERY": 200,     # 每 N 条记录压缩成一帧追加写入批次文件
+    # common/ingest/txt_records.py：TXT 解析结果缓存，键为 (路径, mtime, size)；文件为空时用 BASE_DIR/_txt_cache/txt_records.sqlite
+    "TXT_RECORD_CACHE_ENABLED": True,
+    "TXT_RECORD_CACHE_FILE": None,
+    # common/image/dir_index.py：图片 / TXT 目录索引，距上次检查超过 N 秒时 stat 一次目录，mtime 变了才重新列
+    "DIR_INDEX_REFRESH_SEC": 5,
+    # common/ingest/staging_upsert.py：COPY 批量 UPSERT 中被拒绝的行写到这里（为空时 BASE_DIR/_quarantine）
+    "UPSERT_QUARANTINE_DIR": None,
+    # common/ingest/store_sku_map.py：店铺导出 Excel 的 SKU 映射解析缓存目录（为空时 BASE_DIR/_sku_map_cache）
+    "SKU_MAP_CACHE_DIR": None,
+    # channels/jingya/ingest/import_txt_to_db.py：供货商库存导入方式，"incremental" 按 row_hash 只写变化行 / "truncate" 清表重灌
+    "SUPPLIER_IMPORT_MODE": "incremental",
+    # incremental 模式软删除（removed_at）超过该天数的行在导入时物理删除；0 = 不清理
+    "SUPPLIER_REMOVED_RETENTION_DAYS": 30,
+    # common/db：进程内连接池（同一 PGSQL_CONFIG 最多保留的空闲连接数）与 SQL 计时
+    "DB_POOL_MAX_IDLE": 8,
+    "DB_SLOW_QUERY_MS": 2000,         # 单条 SQL 超过该毫秒数立即打印
+    "DB_LOG_STATEMENTS": False,       # True 时每条 SQL 都打印耗时 / 行数
+    "DB_TIMING_REPORT": True,         # 进程退出时打印按步骤汇总的 SQL 耗时
+    "DB_FETCH_SIZE": 5000,            # 服务端游标每批拉取行数（iter_rows / read_frame）
 }
@@ -1,10 +1,12 @@
-import psycopg2
 import pandas as pd
 from pathlib import Path
 from typing import Optional
 from datetime import datetime
 
 from config import BRAND_CONFIG, PGSQL_CONFIG, BARBOUR
+from common.db.pool import connect
+from common.db.query import read_frame
+from common.db.timing import db_step
 
 ###############################################################################
 # 公共小工具
@@ -13,7 +15,7 @@ from config import BRAND_CONFIG, PGSQL_CONFIG, BARBOUR
 def _get_pg_conn_and_table(brand: str):
     """
     根据品牌拿到：
-    - psycopg2连接对象
+    - 连接池中的连接对象（close() 归还到池）
     - 该品牌对应的表名
     """
     brand_l = brand.lower().strip()
@@ -24,13 +26,7 @@ def _get_pg_conn_and_table(brand: str):
     table_name = cfg["TABLE_NAME"]
     pgcfg = cfg.get("PGSQL_CONFIG", PGSQL_CONFIG)
 
-    conn = psycopg2.connect(
-        host=pgcfg["host"],
-        port=pgcfg["port"],
-        user=pgcfg["user"],
-        password=pgcfg["password"],
-        dbname=pgcfg["dbname"],
-    )
+    conn = connect(pgcfg)
     return conn, table_name
 
 
@@ -58,7 +54,7 @@ def _fetch_brand_inventory_for_jingya(brand: str) -> pd.DataFrame:
           AND TRIM(skuid) <> ''
     """
 
-    df_db = pd.read_sql(sql, conn)
+    df_db = read_frame(conn, sql)
     conn.close()
 
     # 清洗
@@ -157,6 +153,7 @@ def _export_jingya_diff_report(df_bad: pd.DataFrame, output_report_path: str) ->
     return str(out_path)
 
 
+@db_step("check_jingya_price_mismatch")
 def check_jingya_price_mismatch(
     brand: str,
     jingya_excel_path: str,
@@ -237,7 +234,7 @@ def _fetch_brand_inventory_for_taobao(brand: str) -> pd.DataFrame:
           AND TRIM(size) <> ''
     """
 
-    df_db = pd.read_sql(sql, conn)
+    df_db = read_frame(conn, sql)
     conn.close()
 
     df_db["product_code"] = df_db["product_code"].astype(str).str.strip()
@@ -386,6 +383,7 @@ def _export_taobao_risk_report(df_bad: pd.DataFrame, output_report_path: str) ->
     return str(out_path)
 
 
+@db_step("check_taobao_margin_safety")
 def check_taobao_margin_safety(
     brand: str,
     taobao_excel_path: str,
@@ -0,0 +1,34 @@
+-- 为各品牌供货商库存表添加增量导入字段（channels/jingya/ingest/import_txt_to_db.py 的 incremental 模式）
+--   row_hash   : 解析列的 md5，未变化的行导入时跳过
+--   removed_at : TXT 中已消失的 SKU 的软删除时间（同时清空库存、发布状态与渠道绑定）
+--                超过 SETTINGS["SUPPLIER_REMOVED_RETENTION_DAYS"] 天的软删除行在下次导入时物理删除
+-- 执行一次即可，幂等（使用 IF EXISTS / IF NOT EXISTS 语法）；未执行前导入自动退回 truncate 模式
+-- 执行：psql -h 192.168.1.44 -U postgres -d eminzora_inventory_db -f add_supplier_sync_fields.sql
+
+ALTER TABLE IF EXISTS public.camper_inventory
+  ADD COLUMN IF NOT EXISTS row_hash   CHAR(32),
+  ADD COLUMN IF NOT EXISTS removed_at TIMESTAMP;
+
+ALTER TABLE IF EXISTS public.clarks_inventory
+  ADD COLUMN IF NOT EXISTS row_hash   CHAR(32),
+  ADD COLUMN IF NOT EXISTS removed_at TIMESTAMP;
+
+ALTER TABLE IF EXISTS public.geox_inventory
+  ADD COLUMN IF NOT EXISTS row_hash   CHAR(32),
+  ADD COLUMN IF NOT EXISTS removed_at TIMESTAMP;
+
+ALTER TABLE IF EXISTS public.ecco_inventory
+  ADD COLUMN IF NOT EXISTS row_hash   CHAR(32),
+  ADD COLUMN IF NOT EXISTS removed_at TIMESTAMP;
+
+ALTER TABLE IF EXISTS public.birkenstock_inventory
+  ADD COLUMN IF NOT EXISTS row_hash   CHAR(32),
+  ADD COLUMN IF NOT EXISTS removed_at TIMESTAMP;
+
+ALTER TABLE IF EXISTS public.reiss_inventory
+  ADD COLUMN IF NOT EXISTS row_hash   CHAR(32),
+  ADD COLUMN IF NOT EXISTS removed_at TIMESTAMP;
+
+ALTER TABLE IF EXISTS public.marksandspencer_inventory
+  ADD COLUMN IF NOT EXISTS row_hash   CHAR(32),
+  ADD COLUMN IF NOT EXISTS removed_at TIMESTAMP;
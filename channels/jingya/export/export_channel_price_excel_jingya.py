@@ -19,9 +19,11 @@ import math
 
 import pandas as pd
 import openpyxl
-import psycopg2
 
 from config import BRAND_CONFIG,BRAND_DISCOUNT
+from common.db.pool import connect, get_engine
+from common.db.query import read_frame
+from common.db.timing import db_step
 try:
     from config import PGSQL_CONFIG  # 兜底
 except Exception:
@@ -90,6 +92,7 @@ def _write_one_excel(df_chunk: pd.DataFrame, file_path: Path):
     wb.save(file_path)
     wb.close()
 
+@db_step("export_jiangya_channel_prices")
 def export_jiangya_channel_prices(
     brand: str,
     output_dir: Optional[str] = None,
@@ -115,10 +118,7 @@ def export_jiangya_channel_prices(
     if not pgcfg:
         raise RuntimeError("PGSQL配置缺失")
 
-    conn = psycopg2.connect(
-        host=pgcfg["host"], port=pgcfg["port"],
-        user=pgcfg["user"], password=pgcfg["password"], dbname=pgcfg["dbname"],
-    )
+    conn = connect(pgcfg)
     sql = f"""
         SELECT
             channel_product_id,
@@ -131,7 +131,7 @@ def export_jiangya_channel_prices(
         WHERE channel_product_id IS NOT NULL
           AND TRIM(channel_product_id) <> ''
     """
-    df = pd.read_sql(sql, conn)
+    df = read_frame(conn, sql)
 
     # ── 诊断：统计数据库中商品的 channel_product_id 覆盖情况 ──
     sql_total = f"SELECT COUNT(DISTINCT product_code) FROM {table}"
@@ -309,7 +309,7 @@ import os
 import math
 import pandas as pd
 from pathlib import Path
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from config import PGSQL_CONFIG, BRAND_CONFIG
 
 def export_channel_price_by_sku(
@@ -359,12 +359,7 @@ def export_channel_price_by_sku(
     #    这里的 SQL 需要跟你的 barbour_inventory / offers 结构一致
     #    下面 SQL 是示例，请和你线上已有的SQL对齐
     # ============================================================
-    conn_url = (
-        f"postgresql+psycopg2://{PGSQL_CONFIG['user']}:"
-        f"{PGSQL_CONFIG['password']}@{PGSQL_CONFIG['host']}:"
-        f"{PGSQL_CONFIG['port']}/{PGSQL_CONFIG['database']}"
-    )
-    engine = create_engine(conn_url)
+    engine = get_engine(PGSQL_CONFIG)
 
     # 这个SQL假设 barbour_inventory 里已经 merge 了供货商和价格信息
     # 如果你原始实现不同，请把你原来的 SELECT 整段粘回来覆盖这里就行，
@@ -16,9 +16,11 @@ from typing import Optional, List, Set
 
 import pandas as pd
 import openpyxl
-import psycopg2
 
 from config import BRAND_CONFIG
+from common.db.pool import connect
+from common.db.query import read_frame
+from common.db.timing import db_step
 try:
     from config import PGSQL_CONFIG  # 兜底
 except Exception:
@@ -76,6 +78,7 @@ def _write_one_excel(df_chunk: pd.DataFrame, file_path: Path):
     wb.save(file_path)
     wb.close()
 
+@db_step("export_stock_excel")
 def export_stock_excel(
     brand: str,
     output_dir: Optional[str] = None,
@@ -104,16 +107,13 @@ def export_stock_excel(
         exclude_codes = _load_exclude_codes_from_excel(Path(exclude_excel_file))
 
     # 1) 读取数据：仅 channel_product_id 非空/非空串；同时取 product_code 供白名单过滤
-    conn = psycopg2.connect(
-        host=pgcfg["host"], port=pgcfg["port"],
-        user=pgcfg["user"], password=pgcfg["password"], dbname=pgcfg["dbname"],
-    )
+    conn = connect(pgcfg)
     sql = f"""
         SELECT channel_product_id, skuid, stock_count, product_code
         FROM {table}
         WHERE channel_product_id IS NOT NULL AND TRIM(channel_product_id) <> ''
     """
-    df = pd.read_sql(sql, conn)
+    df = read_frame(conn, sql)
     conn.close()
 
     # 1b) 按白名单排除
@@ -2,10 +2,12 @@ import os
 import re
 import shutil
 import pandas as pd
-from sqlalchemy import create_engine
 from config import BRAND_CONFIG, SETTINGS, EXCHANGE_RATE
+from common.db.pool import get_engine
+from common.db.timing import db_step
 from common.pricing.price_utils import calculate_jingya_prices
 from common.text.generate_taobao_title_v1 import generate_taobao_title
+from common.ingest.txt_records import get_txt_record
 
 # ==== 固定参数 ====
 上市季节 = "2025春季"
@@ -47,6 +49,7 @@ def get_category_v2(title: str, content: str, heel_height: str) -> str:
         return "其他休闲鞋"
     return "其他休闲鞋"
 
+@db_step("generate_publication_excels")
 def generate_publication_excels(brand: str):
     brand = brand.lower()
     if brand not in BRAND_CONFIG:
@@ -71,9 +74,7 @@ def generate_publication_excels(brand: str):
 
     # ==== 连接数据库 ====
     print(f"\n🔌 正在连接数据库，品牌：{brand.upper()}...")
-    engine = create_engine(
-        f"postgresql+psycopg2://{pg_cfg['user']}:{pg_cfg['password']}@{pg_cfg['host']}:{pg_cfg['port']}/{pg_cfg['dbname']}"
-    )
+    engine = get_engine(pg_cfg)
 
     print("\n📊 正在查询符合条件的商品...")
     query = f"""
@@ -143,13 +144,12 @@ def generate_publication_excels(brand: str):
     print("\n📦 正在读取 TXT 并生成商品行数据...")
     for idx, code in enumerate(product_codes, 1):
         code_clean = code.strip().upper()
-        txt_path = txt_folder / f"{code_clean}.txt"
-        if not txt_path.exists():
-            print(f"❌ 缺少 TXT 文件: {txt_path}")
+        rec = get_txt_record(txt_folder, code_clean)
+        if rec is None:
+            print(f"❌ 缺少 TXT 文件: {txt_folder / f'{code_clean}.txt'}")
             continue
 
-        with open(txt_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = rec.text
 
         title_en = extract_field("Product Name", content)
         title_cn = generate_taobao_title(code, content, brand)["taobao_title"]
@@ -1,8 +1,10 @@
 import os
-import psycopg2
 import pandas as pd
 from pathlib import Path
 from config import CAMPER, CLARKS, ECCO, GEOX,BRAND_CONFIG
+from common.ingest.staging_upsert import copy_rows
+from common.db.pool import connect
+from common.db.timing import db_step
 # 顶部补充
 import re
 
@@ -48,13 +50,66 @@ def _read_gei_as_str(gei_file: Path) -> pd.DataFrame:
         gei_file,
         dtype={"sku名称": str, "渠道产品id": str, "货品id": str, "skuID": str}
     )
-    # 统一清洗
+    # 统一清洗（空单元格 → ""，不再变成 "nan"）
     for col in ("sku名称", "渠道产品id", "货品id", "skuID"):
         if col in df.columns:
-            df[col] = df[col].map(_clean_id)
+            df[col] = df[col].map(lambda x: _clean_id(None if pd.isna(x) else x))
     return df
 
 
+GEI_BIND_COLUMNS = ["product_code", "size", "channel_product_id", "channel_item_id", "skuid", "sku_name"]
+
+
+def parse_gei_bindings(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    GEI 导出 → (bindings, unparsed)，按列一次算完：
+    - bindings: GEI_BIND_COLUMNS，sku名称 形如 "K200155-025，40" 拆成 编码 / 尺码（尺码去掉"码"），
+      sku_name = 编码去掉"-" + 尺码；同一 (编码, 尺码) 出现多次时保留最后一行（与逐行 UPDATE 的结果一致），
+      另加 dup_conflict 列：该键在 GEI 里出现多次且绑定值不一致
+    - unparsed: 无法解析的原始行（sku名称 / 渠道产品id / 货品id / skuID）
+    """
+    def col(name: str) -> pd.Series:
+        if name not in df.columns:
+            return pd.Series("", index=df.index, dtype=object)
+        return df[name].fillna("").astype(str)
+
+    raw = col("sku名称").str.strip()
+    parts = raw.str.split("，")
+    ok = parts.str.len() == 2
+
+    unparsed = pd.DataFrame({
+        "sku名称": raw, "渠道产品id": col("渠道产品id"), "货品id": col("货品id"), "skuID": col("skuID"),
+    })[~ok].reset_index(drop=True)
+
+    code = parts[ok].str[0].str.strip()
+    size = parts[ok].str[1].map(_normalize_size)
+    bindings = pd.DataFrame({
+        "product_code": code,
+        "size": size,
+        "channel_product_id": col("渠道产品id")[ok],
+        "channel_item_id": col("货品id")[ok],
+        "skuid": col("skuID")[ok],
+        "sku_name": code.str.replace("-", "", regex=False) + size,
+    }).astype(object)
+
+    variants = bindings.drop_duplicates().groupby(["product_code", "size"]).size()
+    conflicted = set(variants[variants > 1].index)
+    bindings = bindings.drop_duplicates(["product_code", "size"], keep="last").reset_index(drop=True)
+    bindings["dup_conflict"] = [k in conflicted for k in zip(bindings["product_code"], bindings["size"])]
+    return bindings, unparsed
+
+
+def _stage_gei_bindings(cur, bindings: pd.DataFrame) -> None:
+    """把 parse_gei_bindings 的结果 COPY 进临时表 _gei_bind（事务结束自动删除）"""
+    cur.execute("""
+        CREATE TEMP TABLE _gei_bind (
+            product_code TEXT, size TEXT,
+            channel_product_id TEXT, channel_item_id TEXT, skuid TEXT, sku_name TEXT
+        ) ON COMMIT DROP
+    """)
+    copy_rows(cur, "_gei_bind", GEI_BIND_COLUMNS, bindings[GEI_BIND_COLUMNS].itertuples(index=False))
+
+
 def find_latest_gei_file(document_dir: Path) -> Path | None:
     files = list(document_dir.glob("GEI@sales_catalogue_export@*.xlsx"))
     if not files:
@@ -63,9 +118,12 @@ def find_latest_gei_file(document_dir: Path) -> Path | None:
     print(f"📄 使用文件: {latest.name}")
     return latest
 
+@db_step("insert_jingyaid_to_db")
 def insert_jingyaid_to_db(brand: str, debug: bool = False):
     """
     从 GEI@sales_catalogue_export@*.xlsx 更新数据库中的渠道绑定信息
+    整份 GEI 清洗后 COPY 进临时表，一条 UPDATE ... FROM 关联写入全部绑定；
+    匹配 / 未匹配 / 冲突都从同一次关联结果统计。
     参数:
         brand: 品牌名（如 clarks）
         debug: 是否开启调试模式，若为 True，则打印跳过的编码与尺码并保存日志
@@ -87,104 +145,69 @@ def insert_jingyaid_to_db(brand: str, debug: bool = False):
     if gei_file is None:
         print(f"⏭️ 未找到 GEI 文件，跳过 insert_jingyaid_to_db（{brand}）")
         return
-    df = _read_gei_as_str(gei_file)
+    bindings, unparsed = parse_gei_bindings(_read_gei_as_str(gei_file))
+    print(f"🧩 解析 GEI 完成：有效 (code,size) = {len(bindings)}，无法解析 {len(unparsed)} 行")
 
-    updated = 0
-    skipped = 0
-    updated_codes: set = set()  # 去重：成功更新的商品编码
-    skipped_records = []       # ⚙️ 新增：收集跳过记录
-    unparsed_records = []      # ⚙️ 收集无法解析的记录
-
-    conn = psycopg2.connect(**db_config)
+    conn = connect(db_config)
     with conn:
         with conn.cursor() as cur:
-            for _, row in df.iterrows():
-                sku_name_raw = str(row.get("sku名称", "")).strip()
-
-                # ---- 解析 sku名称 (形如 "K200155-025，40") ----
-                if "，" not in sku_name_raw:
-                    skipped += 1
-                    unparsed_records.append({
-                        "sku名称": sku_name_raw,
-                        "渠道产品id": str(row.get("渠道产品id", "")),
-                        "货品id": str(row.get("货品id", "")),
-                        "skuID": str(row.get("skuID", "")),
-                    })
-                    continue
-
-                parts = list(map(str.strip, sku_name_raw.split("，")))
-                if len(parts) != 2:
-                    skipped += 1
-                    unparsed_records.append({
-                        "sku名称": sku_name_raw,
-                        "渠道产品id": str(row.get("渠道产品id", "")),
-                        "货品id": str(row.get("货品id", "")),
-                        "skuID": str(row.get("skuID", "")),
-                    })
-                    continue
-
-                try:
-                    product_code, size = parts
-                    size = _normalize_size(size)
-                    new_sku_name = product_code.replace("-", "") + size
-                    sql = f"""
-                        UPDATE {table_name}
-                        SET
-                            channel_product_id = %s,
-                            channel_item_id = %s,
-                            skuid = %s,
-                            sku_name = %s,
-                            is_published = TRUE,
-                            last_checked = CURRENT_TIMESTAMP
-                        WHERE product_code = %s AND size = %s
-                    """
-                    params = (
-                        str(row.get("渠道产品id")),
-                        str(row.get("货品id")),
-                        str(row.get("skuID")),
-                        new_sku_name,
-                        product_code,
-                        size
-                    )
-                    cur.execute(sql, params)
-                    if cur.rowcount:
-                        updated += 1
-                        updated_codes.add(product_code)
-                    else:
-                        skipped += 1
-                        skipped_records.append((product_code, size))
-
-                except Exception as e:
-                    print(f"❌ 行处理失败: {e}")
-                    skipped += 1
-                    skipped_records.append((product_code, size))
+            _stage_gei_bindings(cur, bindings)
+
+            # ---- 关联结果：每个 GEI 键匹配到几行、是否改绑（库里已有不同的 skuid）、编码本身是否存在 ----
+            cur.execute(f"""
+                SELECT b.product_code, b.size,
+                       COUNT(t.product_code) AS matched_rows,
+                       COALESCE(BOOL_OR(NULLIF(TRIM(t.skuid), '') IS NOT NULL
+                                        AND t.skuid IS DISTINCT FROM NULLIF(b.skuid, '')), FALSE) AS rebound,
+                       c.product_code IS NOT NULL AS code_known
+                FROM _gei_bind b
+                LEFT JOIN {table_name} t ON t.product_code = b.product_code AND t.size = b.size
+                LEFT JOIN (SELECT DISTINCT product_code FROM {table_name}) c ON c.product_code = b.product_code
+                GROUP BY b.product_code, b.size, c.product_code
+            """)
+            joined = cur.fetchall()
+
+            cur.execute(f"""
+                UPDATE {table_name} t
+                SET
+                    channel_product_id = NULLIF(b.channel_product_id, ''),
+                    channel_item_id = NULLIF(b.channel_item_id, ''),
+                    skuid = NULLIF(b.skuid, ''),
+                    sku_name = b.sku_name,
+                    is_published = TRUE,
+                    last_checked = CURRENT_TIMESTAMP
+                FROM _gei_bind b
+                WHERE t.product_code = b.product_code AND t.size = b.size
+            """)
+            updated = cur.rowcount
+    conn.close()
+
+    matched = [(c, s) for c, s, n, _, _ in joined if n]
+    rebound = [(c, s) for c, s, n, r, _ in joined if n and r]
+    code_missing = [(c, s) for c, s, n, _, known in joined if not n and not known]
+    size_missing = [(c, s) for c, s, n, _, known in joined if not n and known]
+    skipped_records = code_missing + size_missing
+    dup_conflicts = list(zip(*(bindings.loc[bindings["dup_conflict"], c] for c in ("product_code", "size"))))
 
     # ---- 总结输出 ----
+    updated_codes = {c for c, _ in matched}
+    skipped = len(skipped_records) + len(unparsed)
     print(f"✅ 更新完成：成功 {len(updated_codes)} 个商品 / {updated} 条SKU，跳过 {skipped} 条")
-
-    # ---- 诊断：打印跳过样本，快速判断编码/尺码格式是否对不上 ----
-    if skipped_records:
-        print(f"⚠️ 跳过样本（前10条，格式: product_code / size）:")
-        for code, size in skipped_records[:10]:
-            print(f"   ⏭️  [{code}] / [{size}]")
-        # 检查这些编码在数据库中是否存在（忽略尺码）
-        conn2 = psycopg2.connect(**db_config)
-        sample_codes = list({c for c, _ in skipped_records[:50]})
-        placeholders = ",".join(["%s"] * len(sample_codes))
-        with conn2.cursor() as cur2:
-            cur2.execute(
-                f"SELECT DISTINCT product_code FROM {table_name} WHERE product_code IN ({placeholders})",
-                sample_codes,
-            )
-            found_in_db = {r[0] for r in cur2.fetchall()}
-        conn2.close()
-        not_in_db = [c for c in sample_codes if c not in found_in_db]
-        if not_in_db:
-            print(f"   ❌ 其中 {len(not_in_db)} 个编码在数据库中完全不存在（可能编码格式不匹配）:")
-            for c in not_in_db[:10]:
-                print(f"      {c}")
-        else:
-            print(f"   ✅ 编码在DB中均存在，问题可能出在尺码格式不匹配")
+    print(f"📊 关联结果：匹配 {len(matched)} 个键 / 未匹配 {len(skipped_records)} 个键"
+          f"（编码不存在 {len(code_missing)}，编码存在但尺码对不上 {len(size_missing)}）/ "
+          f"改绑 {len(rebound)} 个键 / GEI 内重复且不一致 {len(dup_conflicts)} 个键")
+
+    # ---- 诊断：未匹配 / 冲突样本，快速判断编码/尺码格式是否对不上 ----
+    for title, keys in (
+        ("编码在数据库中完全不存在（可能编码格式不匹配）", code_missing),
+        ("编码存在但尺码不匹配", size_missing),
+        ("库中已绑定其他 skuID，已按 GEI 改绑", rebound),
+        ("GEI 中同一编码尺码有多条不同绑定，已取最后一条", dup_conflicts),
+    ):
+        if keys:
+            print(f"⚠️ {title}（前10条，格式: product_code / size）:")
+            for code, size in keys[:10]:
+                print(f"   ⏭️  [{code}] / [{size}]")
 
     # ---- 调试信息 ----
     if debug:
@@ -202,21 +225,23 @@ def insert_jingyaid_to_db(brand: str, debug: bool = False):
             print("✅ 无跳过记录。")
 
     # ---- 无法解析的记录 ----
-    if unparsed_records:
-        error_df = pd.DataFrame(unparsed_records)
+    if not unparsed.empty:
         error_file = output_dir / "unparsed_sku_names.xlsx"
-        error_df.to_excel(error_file, index=False)
+        unparsed.to_excel(error_file, index=False)
         print(f"⚠️ 无法解析的记录已输出到：{error_file}")
     else:
         print("✅ 没有无法解析的记录")
 
 
-def insert_missing_products_with_zero_stock(brand: str):
+@db_step("insert_missing_products_with_zero_stock")
+def insert_missing_products_with_zero_stock(brand: str) -> dict | None:
     """
     从 GEI@sales_catalogue_export@*.xlsx 补齐数据库：
     - 对缺失的 (product_code, size) 插入新行（stock_count=0），并写入 skuid / channel_product_id / channel_item_id / sku_name；
     - 对已存在但 skuid 为空的行进行 UPDATE 补齐；
     - 仅以 GEI 里实际出现过的尺码为准，不再根据标题猜尺码。
+    GEI 清洗后 COPY 进临时表，补齐（关联）和插入（反关联）各一条 SQL，在同一个事务里完成。
+    返回 {"inserted": 新增行数, "updated": 补齐 skuid 行数, "unparsed": 无法解析的 GEI 行数}
     """
     brand = brand.lower()
     if brand not in BRAND_CONFIG:
@@ -233,137 +258,61 @@ def insert_missing_products_with_zero_stock(brand: str):
     gei_file = find_latest_gei_file(document_dir)
     if gei_file is None:
         print(f"⏭️ 未找到 GEI 文件，跳过 insert_missing_products_with_zero_stock（{brand}）")
-        return
-    df = _read_gei_as_str(gei_file)
-
-    # —— 1) 解析 GEI：构建 (product_code, size) → info 映射（含 skuid）
-    # GEI 列名示例：sku名称（形如 "K200155-025，40"），渠道产品id，货品id，skuID
-    sku_map = {}  # key: (code, size) -> dict(...)
-    unparsed_rows = []
-
-    for _, row in df.iterrows():
-        sku_name_raw = str(row.get("sku名称", "")).strip()
-        if "，" not in sku_name_raw:
-            unparsed_rows.append({
-                "sku名称": sku_name_raw,
-                "渠道产品id": str(row.get("渠道产品id", "")),
-                "货品id": str(row.get("货品id", "")),
-                "skuID": str(row.get("skuID", "")),
-            })
-            continue
-
-        parts = [p.strip() for p in sku_name_raw.split("，")]
-        if len(parts) != 2:
-            unparsed_rows.append({
-                "sku名称": sku_name_raw,
-                "渠道产品id": str(row.get("渠道产品id", "")),
-                "货品id": str(row.get("货品id", "")),
-                "skuID": str(row.get("skuID", "")),
-            })
-            continue
-
-        code, size = parts
-        size = _normalize_size(size)   # ⭐⭐新增同样的清洗步骤
-        skuid              = _clean_id(row.get("skuID", ""))   # ← 关键
-        channel_product_id = _clean_id(row.get("渠道产品id", ""))
-        channel_item_id    = _clean_id(row.get("货品id", ""))
-        # 你的 insert_jingyaid_to_db 里这样构造 sku_name：
-        sku_name = code.replace("-", "") + size
-
-        sku_map[(code, size)] = {
-            "product_code": code,
-            "size": size,
-            "skuid": skuid,
-            "channel_product_id": channel_product_id,
-            "channel_item_id": channel_item_id,
-            "sku_name": sku_name,
-        }
-
-    print(f"🧩 解析 GEI 完成：有效 (code,size) = {len(sku_map)}")
-
-    if unparsed_rows:
-        pd.DataFrame(unparsed_rows).to_excel(output_dir / "unparsed_sku_names.xlsx", index=False)
-        print(f"⚠️ 无法解析的 GEI 行已输出：{output_dir / 'unparsed_sku_names.xlsx'}")
+        return None
 
-    # —— 2) 查询数据库已存在的 (product_code, size)
-    conn = psycopg2.connect(**db_config)
-    existing_keys = set()
-    with conn:
-        with conn.cursor() as cur:
-            cur.execute(f"SELECT product_code, size, COALESCE(NULLIF(TRIM(skuid), ''), NULL) AS skuid FROM {table_name}")
-            rows = cur.fetchall()
-            # rows: list of tuples (code, size, skuid_or_none)
-            existing_with_skuid = set()
-            existing_without_skuid = set()
-            for code, size, sk in rows:
-                key = (str(code), str(size))
-                existing_keys.add(key)
-                if sk:
-                    existing_with_skuid.add(key)
-                else:
-                    existing_without_skuid.add(key)
-
-    # —— 3) 需要插入的缺失键（只以 GEI 中有的数据为准）
-    to_insert = [k for k in sku_map.keys() if k not in existing_keys]
-    # —— 4) 需要更新 skuid 的键（库里有该行但 skuid 为空，且 GEI 有 skuid）
-    to_update = [k for k in existing_without_skuid if k in sku_map and sku_map[k]["skuid"]]
-
-    print(f"➕ 待插入: {len(to_insert)} 行；🛠 待补齐 skuid: {len(to_update)} 行")
-
-    inserted = 0
-    updated = 0
+    # —— 1) 解析 GEI：(product_code, size) → skuid / channel_* / sku_name
+    bindings, unparsed = parse_gei_bindings(_read_gei_as_str(gei_file))
+    print(f"🧩 解析 GEI 完成：有效 (code,size) = {len(bindings)}")
 
+    if not unparsed.empty:
+        unparsed.to_excel(output_dir / "unparsed_sku_names.xlsx", index=False)
+        print(f"⚠️ 无法解析的 GEI 行已输出：{output_dir / 'unparsed_sku_names.xlsx'}")
+
+    conn = connect(db_config)
     with conn:
         with conn.cursor() as cur:
-            # 3) 插入缺失行（stock_count=0；带 skuid / channel_* / sku_name）
-            insert_sql = f"""
+            _stage_gei_bindings(cur, bindings)
+
+            # —— 2) 已有但 skuid 为空、且 GEI 有 skuid 的行：补齐 skuid / sku_name / channel_*
+            #       （先于插入执行，新插入的行本身就带 GEI 的 skuid）
+            cur.execute(f"""
+                UPDATE {table_name} t
+                SET skuid = b.skuid,
+                    sku_name = b.sku_name,
+                    channel_product_id = COALESCE(NULLIF(b.channel_product_id, ''), t.channel_product_id),
+                    channel_item_id = COALESCE(NULLIF(b.channel_item_id, ''), t.channel_item_id),
+                    last_checked = CURRENT_TIMESTAMP
+                FROM _gei_bind b
+                WHERE t.product_code = b.product_code AND t.size = b.size
+                  AND (t.skuid IS NULL OR TRIM(t.skuid) = '')
+                  AND b.skuid <> ''
+            """)
+            updated = cur.rowcount
+
+            # —— 3) 表里没有的 (product_code, size)：插入 stock_count=0 的行
+            #       性别无法从 GEI 精准判断，这里不再猜；product_url 留空占位
+            cur.execute(f"""
                 INSERT INTO {table_name} (
                     product_code, product_url, size, gender,
                     stock_count, channel_product_id, channel_item_id,
                     skuid, sku_name,
                     is_published, last_checked
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, FALSE, CURRENT_TIMESTAMP)
-            """
-            # 性别无法从 GEI 精准判断，这里不再猜；统一 None 或留空
-            for key in to_insert:
-                info = sku_map[key]
-                cur.execute(insert_sql, (
-                    info["product_code"],
-                    "",                  # product_url 占位
-                    info["size"],
-                    None,                # gender 不再猜
-                    0,                   # stock_count = 0
-                    info["channel_product_id"],
-                    info["channel_item_id"],
-                    info["skuid"],
-                    info["sku_name"],
-                ))
-                inserted += 1
-
-            # 4) 更新已有但 skuid 为空的行（同时补齐 sku_name 与 channel_*）
-            update_sql = f"""
-                UPDATE {table_name}
-                SET skuid = %s,
-                    sku_name = %s,
-                    channel_product_id = COALESCE(NULLIF(%s, ''), channel_product_id),
-                    channel_item_id = COALESCE(NULLIF(%s, ''), channel_item_id),
-                    last_checked = CURRENT_TIMESTAMP
-                WHERE product_code = %s AND size = %s AND (skuid IS NULL OR TRIM(skuid) = '')
-            """
-            for key in to_update:
-                info = sku_map[key]
-                cur.execute(update_sql, (
-                    info["skuid"],
-                    info["sku_name"],
-                    info["channel_product_id"],
-                    info["channel_item_id"],
-                    info["product_code"],
-                    info["size"],
-                ))
-                updated += cur.rowcount
-
+                )
+                SELECT b.product_code, '', b.size, NULL,
+                       0, NULLIF(b.channel_product_id, ''), NULLIF(b.channel_item_id, ''),
+                       NULLIF(b.skuid, ''), b.sku_name,
+                       FALSE, CURRENT_TIMESTAMP
+                FROM _gei_bind b
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {table_name} t
+                    WHERE t.product_code = b.product_code AND t.size = b.size
+                )
+            """)
+            inserted = cur.rowcount
     conn.close()
+
     print(f"✅ 插入完成：新增 {inserted} 行；✅ 补齐 skuid：更新 {updated} 行")
+    return {"inserted": inserted, "updated": updated, "unparsed": len(unparsed)}
 
 
 
@@ -1,5 +1,5 @@
+import hashlib
 import math
-import psycopg2
 from pathlib import Path
 from psycopg2.extras import execute_batch
 from config import (
@@ -8,6 +8,10 @@ from config import (
     BRAND_PRICE_OVERRIDES,
 )
 from common.ingest.txt_parser import jingya_parse_txt_file
+from common.ingest.txt_records import load_txt_records
+from cfg.settings import SETTINGS
+from common.db.pool import connect, get_conn
+from common.db.timing import db_step
 from channels.jingya.pricing.brand_price_rules import compute_brand_base_price
 try:
     from common.pricing.price_utils import calculate_jingya_prices
@@ -23,6 +27,21 @@ except Exception:
 
 
 MIN_STOCK_THRESHOLD = 2  # 小于该值的库存将置为0
+SUPPLIER_IMPORT_MODE = str(SETTINGS.get("SUPPLIER_IMPORT_MODE", "incremental")).lower()
+SUPPLIER_REMOVED_RETENTION_DAYS = int(SETTINGS.get("SUPPLIER_REMOVED_RETENTION_DAYS", 30))
+
+# enriched 元组的列顺序（与 INSERT 列一致）
+SUPPLIER_COLUMNS = (
+    "product_code", "product_url", "size", "gender",
+    "ean", "stock_count",
+    "original_price_gbp", "discount_price_gbp", "is_published",
+    "product_description", "product_title", "style_category",
+    "jingya_untaxed_price", "taobao_store_price",
+)
+# 参与 row_hash / 增量 UPDATE 的列：is_published 与渠道 ID 由第5步 insert_jingyaid_to_db 维护，不在这里覆盖
+_KEY_COLUMNS = ("product_code", "size")
+_SYNC_COLUMNS = tuple(c for c in SUPPLIER_COLUMNS if c not in _KEY_COLUMNS + ("is_published",))
+_COL_INDEX = {c: i for i, c in enumerate(SUPPLIER_COLUMNS)}
 
 def _safe_float(x) -> float:
     try:
@@ -45,10 +64,130 @@ def _safe_float(x) -> float:
 #         base_raw = d if d > 0 else o
 #     return base_raw * _brand_discount(brand)
 
+def _row_hash(row: tuple) -> str:
+    """(product_code, size) 这一行的解析值哈希；值不变则哈希不变，增量导入时跳过"""
+    payload = "\x1f".join(
+        "" if row[_COL_INDEX[c]] is None else str(row[_COL_INDEX[c]])
+        for c in _KEY_COLUMNS + _SYNC_COLUMNS
+    )
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+SYNC_MIGRATION_SQL = "channels/jingya/database/add_supplier_sync_fields.sql"
+
+
+def _has_sync_columns(cur, table_name: str) -> bool:
+    """表上是否已有 row_hash / removed_at（由 SYNC_MIGRATION_SQL 添加，导入时不做 ALTER）"""
+    cur.execute(
+        "SELECT COUNT(DISTINCT column_name) FROM information_schema.columns "
+        "WHERE lower(table_name) = lower(%s) AND column_name IN ('row_hash', 'removed_at')",
+        (table_name,),
+    )
+    return cur.fetchone()[0] == 2
+
+
+def _sync_incremental(cur, table_name: str, enriched: list) -> dict:
+    """
+    按 (product_code, size) 增量同步，在调用方的同一个事务里完成:
+    - TXT 有、表里没有           → INSERT
+    - 两边都有但 row_hash 不同   → UPDATE 解析列（is_published / 渠道 ID 保持不动），清除 removed_at
+    - 表里有、TXT 没有           → 软删除：stock_count=0、removed_at=now、row_hash 置空，
+                                   并取消发布、清空渠道绑定（与以前清表重灌后该行不存在一致；
+                                   若渠道里仍有该 SKU，第5步 / 补零库存步骤会按 GEI 重新绑定）
+    - 哈希相同                   → 只刷新 last_checked（仍表示"最近一次导入的 TXT 里有这一行"）
+    - 软删除超过 SUPPLIER_REMOVED_RETENTION_DAYS 天的行 → 物理删除
+    整个过程不清表，其他连接任何时候都只会看到旧数据或新数据。
+    """
+    incoming = {}
+    skipped = 0
+    for row in enriched:
+        code, size = row[_COL_INDEX["product_code"]], row[_COL_INDEX["size"]]
+        if not code or size is None or size == "":
+            skipped += 1
+            continue
+        incoming[(code, size)] = row  # 重复的 (编码, 尺码) 以最后一条为准
+    if skipped:
+        print(f"⚠️ 跳过 {skipped} 条缺少编码 / 尺码的记录")
+
+    cur.execute(f"SELECT product_code, size, row_hash, removed_at IS NOT NULL FROM {table_name}")
+    existing = {(r[0], r[1]): (r[2], r[3]) for r in cur.fetchall()}
+
+    inserts, updates, unchanged = [], [], []
+    for key, row in incoming.items():
+        h = _row_hash(row)
+        old = existing.get(key)
+        if old is None:
+            inserts.append(row + (h,))
+        elif old[0] != h or old[1]:
+            updates.append(tuple(row[_COL_INDEX[c]] for c in _SYNC_COLUMNS) + (h,) + key)
+        else:
+            unchanged.append(key)
+    removes = [key for key, (_, removed) in existing.items() if key not in incoming and not removed]
+
+    if inserts:
+        placeholders = ", ".join(["%s"] * (len(SUPPLIER_COLUMNS) + 1))
+        execute_batch(cur, f"""
+            INSERT INTO {table_name} ({", ".join(SUPPLIER_COLUMNS)}, row_hash)
+            VALUES ({placeholders})
+        """, inserts, page_size=500)
+    if updates:
+        assignments = ", ".join(f"{c} = %s" for c in _SYNC_COLUMNS)
+        execute_batch(cur, f"""
+            UPDATE {table_name}
+               SET {assignments}, row_hash = %s, removed_at = NULL, last_checked = CURRENT_TIMESTAMP
+             WHERE product_code = %s AND size = %s
+        """, updates, page_size=500)
+    if removes:
+        execute_batch(cur, f"""
+            UPDATE {table_name}
+               SET stock_count = 0, is_published = FALSE,
+                   channel_product_id = NULL, channel_item_id = NULL, skuid = NULL, sku_name = NULL,
+                   row_hash = NULL, removed_at = CURRENT_TIMESTAMP, last_checked = CURRENT_TIMESTAMP
+             WHERE product_code = %s AND size = %s
+        """, removes, page_size=500)
+    if unchanged:
+        cur.execute(f"""
+            UPDATE {table_name} t
+               SET last_checked = CURRENT_TIMESTAMP
+              FROM unnest(%s::text[], %s::text[]) AS u(code, size)
+             WHERE t.product_code = u.code AND t.size = u.size
+        """, ([k[0] for k in unchanged], [k[1] for k in unchanged]))
+    purged = 0
+    if SUPPLIER_REMOVED_RETENTION_DAYS > 0:
+        cur.execute(
+            f"DELETE FROM {table_name} WHERE removed_at < CURRENT_TIMESTAMP - %s * INTERVAL '1 day'",
+            (SUPPLIER_REMOVED_RETENTION_DAYS,),
+        )
+        purged = cur.rowcount
+
+    stats = {
+        "inserted": len(inserts), "updated": len(updates),
+        "removed": len(removes), "unchanged": len(unchanged), "purged": purged,
+    }
+    written = len(inserts) + len(updates) + len(removes)
+    total = len(incoming) + len(removes)
+    print(
+        f"🔁 增量同步 {table_name}：新增 {stats['inserted']} / 更新 {stats['updated']} / "
+        f"软删除 {stats['removed']} / 未变 {stats['unchanged']}，写入 {written}/{total} 行"
+        f"（{(written / total if total else 0):.1%}）"
+    )
+    if purged:
+        print(f"🗑️ 清理软删除超过 {SUPPLIER_REMOVED_RETENTION_DAYS} 天的行 {purged} 条")
+    return stats
+
+
 import tempfile
 from datetime import datetime
-def import_txt_to_db_supplier(brand_name: str):
+@db_step("import_txt_to_db_supplier")
+def import_txt_to_db_supplier(brand_name: str, mode: str = None):
+    """
+    mode: "incremental"（默认，按 row_hash 只写变化行并软删除消失的 SKU）或 "truncate"（清表后全量重灌）；
+          为空时取 SETTINGS["SUPPLIER_IMPORT_MODE"]
+    """
     brand_name = brand_name.lower()
+    mode = (mode or SUPPLIER_IMPORT_MODE).lower()
+    if mode not in ("incremental", "truncate"):
+        raise ValueError(f"❌ 不支持的导入方式: {mode}")
 
     overrides = BRAND_PRICE_OVERRIDES.get(brand_name, {})
     exchange_rate  = EXCHANGE_RATE
@@ -76,8 +215,8 @@ def import_txt_to_db_supplier(brand_name: str):
 
     # 1️⃣ 解析 TXT
     parsed_records = []
-    for file in Path(txt_dir).glob("*.txt"):
-        recs = jingya_parse_txt_file(file)
+    for rec in load_txt_records(txt_dir):
+        recs = jingya_parse_txt_file(rec)
         if recs:
             parsed_records.extend(recs)
 
@@ -149,14 +288,17 @@ def import_txt_to_db_supplier(brand_name: str):
             untaxed, retail
         ))
 
-    # 3️⃣ 安全校验：TRUNCATE 前检查编码重叠率，防止抓取数据错误导致库存清零
+    # 3️⃣ 安全校验：入库前检查编码重叠率，防止抓取数据错误导致库存清零（增量模式下则是整批软删除）
     _OVERLAP_THRESHOLD = 0.25  # 低于25%视为异常
     _MIN_DB_CODES = 30         # 数据库编码数量低于此值时跳过检查（首次导入）
     new_codes = {r[0] for r in enriched if r[0]}
-    _conn_check = psycopg2.connect(**pg_config)
+    _conn_check = connect(pg_config)
     with _conn_check:
         with _conn_check.cursor() as _cur:
-            _cur.execute(f"SELECT DISTINCT product_code FROM {table_name} WHERE product_code IS NOT NULL")
+            # 已软删除的编码不算"库里现有"，否则下架编码越积越多，重叠率被拉低后导入会被误中止
+            has_sync = _has_sync_columns(_cur, table_name)
+            live = " AND removed_at IS NULL" if has_sync else ""
+            _cur.execute(f"SELECT DISTINCT product_code FROM {table_name} WHERE product_code IS NOT NULL{live}")
             existing_db_codes = {row[0] for row in _cur.fetchall()}
     _conn_check.close()
     if len(existing_db_codes) >= _MIN_DB_CODES:
@@ -171,27 +313,34 @@ def import_txt_to_db_supplier(brand_name: str):
             return
 
     # 4️⃣ 入库
-    conn = psycopg2.connect(**pg_config)
-    with conn:
+    with get_conn(pg_config) as conn:
         with conn.cursor() as cur:
-            cur.execute(f"TRUNCATE TABLE {table_name}")
-            print(f"🧹 已清空表 {table_name}")
-
-            sql = f"""
-                INSERT INTO {table_name} (
-                    product_code, product_url, size, gender,
-                    ean, stock_count,
-                    original_price_gbp, discount_price_gbp, is_published,
-                    product_description, product_title, style_category,
-                    jingya_untaxed_price, taobao_store_price
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            execute_batch(cur, sql, enriched, page_size=500)
+            if mode == "incremental" and not has_sync:
+                print(f"⚠️ 表 {table_name} 缺少 row_hash / removed_at 列，本次按 truncate 导入；"
+                      f"请先执行 {SYNC_MIGRATION_SQL}")
+                mode = "truncate"
+            if mode == "incremental":
+                _sync_incremental(cur, table_name, enriched)
+            else:
+                cur.execute(f"TRUNCATE TABLE {table_name}")
+                print(f"🧹 已清空表 {table_name}")
+
+                sql = f"""
+                    INSERT INTO {table_name} (
+                        product_code, product_url, size, gender,
+                        ean, stock_count,
+                        original_price_gbp, discount_price_gbp, is_published,
+                        product_description, product_title, style_category,
+                        jingya_untaxed_price, taobao_store_price
+                    )
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """
+                execute_batch(cur, sql, enriched, page_size=500)
             print(f"✅ [{brand_name.upper()}] 数据已写入 {table_name}")
 
             # 4️⃣ 检查缺失 product_code
-            cur.execute(f"SELECT DISTINCT product_code FROM {table_name}")
+            cur.execute(f"SELECT DISTINCT product_code FROM {table_name}"
+                        + (" WHERE removed_at IS NULL" if has_sync else ""))
             existing_codes = {r[0] for r in cur.fetchall()}
             all_codes = {r[0] for r in enriched if r[0]}
             missing_codes = sorted(all_codes - existing_codes)
@@ -1,10 +1,14 @@
-import psycopg2
 from pathlib import Path
 from datetime import datetime
 import pandas as pd
 from config import BRAND_CONFIG
+from common.ingest.txt_batch import iter_txt_sources
 from common.ingest.txt_parser import parse_txt_to_record
 from common.pricing.price_utils import calculate_discount_price_from_float
+from common.ingest.staging_upsert import copy_upsert
+from common.ingest.store_sku_map import StoreSkuMap, load_store_sku_map
+from common.db.pool import connect
+from common.db.timing import db_step
 
 # —— 品牌基准折扣（对 base_price 先打折；1.0=不打折，0.9=9折 等）——
 BRAND_BASE_DISCOUNT = {
@@ -23,36 +27,139 @@ def get_brand_discount(brand: str) -> float:
         return 1.0
 
 
-def load_sku_mapping_from_store(store_path: Path):
+def load_sku_mapping_from_store(store_path: Path) -> StoreSkuMap:
     """
-    读取店铺 Excel，建立 { "product_code,size": (skuid, item_id) } 映射。
-    注意：会自动前向填充合并单元格，规避空值。
+    读取店铺 Excel，建立 "product_code,size" → (skuid, item_id) 与 skuid → item_id 两个索引。
+    合并单元格前向填充、按列向量化解析，解析结果按 Excel 的 mtime / sha1 缓存（common.ingest.store_sku_map）。
     """
-    sku_map = {}
-    for file in store_path.glob("*.xls*"):
-        if file.name.startswith("~$"):
-            continue
-        print(f"📂 读取映射文件: {file.name}")
-        df = pd.read_excel(file, dtype=str)
-        df = df.fillna(method="ffill")  # 修复合并单元格中缺失的宝贝ID、商家编码
-        for _, row in df.iterrows():
-            spec = str(row.get("sku规格", "")).replace("，", ",").strip().rstrip(",")
-            skuid = str(row.get("skuID", "")).strip()
-            itemid = str(row.get("宝贝ID", "")).strip()
-            if spec and skuid:
-                sku_map[spec] = (skuid, itemid if itemid else None)
-    return sku_map
+    return load_store_sku_map(store_path)
+
+
+# —— 统一的库存状态映射（大小写/空格/中英兼容） ——
+IN_STOCK_KEYS = {"有货", "现货", "可购买", "in stock", "available", "有存货"}
+OUT_STOCK_KEYS = {"无货", "缺货", "sold out", "out of stock", "不可购买"}
+_IN_STOCK = {s.lower() for s in IN_STOCK_KEYS}
+_OUT_STOCK = {s.lower() for s in OUT_STOCK_KEYS}
+
+# build_sku_frame / join_store_skus 的列 → 库存表的列（按写入顺序）
+IMPORT_COLUMNS = {
+    "product_code": "product_code",
+    "product_url": "product_url",
+    "size": "size",
+    "gender": "gender",
+    "skuid": "skuid",
+    "stock_status": "stock_status",
+    "stock_count": "stock_count",
+    "ori_price": "original_price_gbp",
+    "dis_price": "discount_price_gbp",
+    "store_price": "taobao_store_price",
+    "stock_name": "stock_name",
+    "last_checked": "last_checked",
+    "is_published": "is_published",
+    "ean": "ean",
+    "item_id": "item_id",
+}
+
+SKU_COLUMNS = [
+    "product_code", "product_url", "size", "gender", "stock_status", "ori_price", "dis_price", "ean",
+]
+
 
+def _to_float_safe(v):
+    if isinstance(v, (int, float)):
+        return float(v)
+    s = str(v).strip()
+    return float(s) if s.replace('.', '', 1).isdigit() else None
 
+
+def build_sku_frame(txt_sources, brand_name: str) -> pd.DataFrame:
+    """
+    所有 TXT 只解析一次：每个 SKU 一行，价格 / 库存在这里算好，各店铺共用
+    列：product_code, product_url, size, gender, stock_status, stock_count,
+        ori_price, dis_price, store_price, ean
+    """
+    rows = []
+    empty_files = 0
+    for src in txt_sources:
+        try:
+            records = parse_txt_to_record(src, brand_name)
+        except Exception as e:
+            print(f"❌ 错误文件: {src.name} - {e}")
+            continue
+        if not records:
+            empty_files += 1
+            continue
+        for r in records:
+            # 兼容 camper/其它品牌的解析结构
+            if brand_name == "camper":
+                product_code, url, size, gender, _, stock_status, ori_price, dis_price, _, ean = r
+            else:
+                product_code, url, size, gender, _, stock_status, ori_price, dis_price, _ = r
+                ean = None
+            rows.append((product_code, url, size, gender, stock_status,
+                         _to_float_safe(ori_price), _to_float_safe(dis_price), ean))
+    if empty_files:
+        print(f"⚠️ 无数据的 TXT: {empty_files} 个")
+
+    df = pd.DataFrame(rows, columns=SKU_COLUMNS)
+    if df.empty:
+        return df.assign(stock_count=pd.Series(dtype=int), store_price=pd.Series(dtype=float))
+
+    # —— 价格：取非零最小值作为 base_price → 按品牌基准折扣 → price_utils 计算导入价（人民币）——
+    prices = df[["ori_price", "dis_price"]].astype(float)
+    base_price = prices.where(prices > 0).min(axis=1)
+    discounted_base = base_price * get_brand_discount(brand_name)
+    # 每个不同的折后价只算一次；0 价/空价不参与计算，避免假价污染
+    unique_bases = discounted_base.dropna()
+    price_of = {b: float(calculate_discount_price_from_float(b)) for b in unique_bases[unique_bases > 0].unique()}
+    df["store_price"] = discounted_base.map(price_of).astype(object).where(discounted_base.isin(price_of.keys()), None)
+    df["ori_price"] = df["ori_price"].astype(object).where(df["ori_price"].notna(), None)
+    df["dis_price"] = df["dis_price"].astype(object).where(df["dis_price"].notna(), None)
+
+    # —— 标准化库存状态 + 计算 stock_count（有货=3，无货=0）——
+    status_key = df["stock_status"].astype(str).str.strip().str.lower()
+    in_stock = status_key.isin(_IN_STOCK)
+    unknown = ~in_stock & ~status_key.isin(_OUT_STOCK)
+    if unknown.any():
+        top = df.loc[unknown, "stock_status"].astype(str).value_counts().head(5)
+        detail = ", ".join(f"{k}×{v}" for k, v in top.items())
+        print(f"⚠️ 未知库存状态 {int(unknown.sum())} 条，按无货处理（{detail}）")
+    df["stock_status"] = in_stock.map({True: "有货", False: "无货"})
+    df["stock_count"] = in_stock.map({True: 3, False: 0})
+
+    print(f"📥 解析 TXT 完成: {df['product_code'].nunique()} 个商品 / {len(df)} 个 SKU，"
+          f"有货 {int(in_stock.sum())}，可计算导入价 {int(df['store_price'].notna().sum())}")
+    return df
+
+
+def join_store_skus(skus: pd.DataFrame, sku_map: StoreSkuMap) -> pd.DataFrame:
+    """按 "product_code,size" 一次性关联店铺的 skuID / 宝贝ID（缺宝贝ID 时按 skuID 索引补回）"""
+    spec_key = skus["product_code"].astype(str) + "," + skus["size"].astype(str)
+    df = skus.assign(spec_key=spec_key).merge(sku_map.frame, on="spec_key", how="left")
+    df["item_id"] = df["item_id"].where(df["item_id"].notna(), df["skuid"].map(sku_map.item_by_sku))
+    df["skuid"] = df["skuid"].astype(object).where(df["skuid"].notna(), None)
+    df["item_id"] = df["item_id"].astype(object).where(df["item_id"].notna(), None)
+    df["is_published"] = df["skuid"].notna()
+    return df
+
+
+def _to_rows(df: pd.DataFrame, columns) -> list:
+    """DataFrame → psycopg2 参数元组（numpy 类型转为 Python 原生类型，缺失值为 None）"""
+    out = df[columns].astype(object)
+    return [tuple(r) for r in out.where(out.notna(), None).values.tolist()]
+
+
+@db_step("import_txt_to_db")
 def import_txt_to_db(brand_name: str):
     """
     将品牌 TXT 批量导入数据库：
-      - 解析 TXT -> 记录
+      - 解析 TXT -> 记录（每个文件只解析一次，所有店铺共用）
       - 标准化库存状态：有货/无货
       - stock_count：有货=3，无货=0
       - 价格：按品牌基准折扣 -> 走 price_utils 计算 taobao_store_price
-      - 匹配店铺 skuID / item_id
-      - UPSERT：冲突键 (product_code, size, stock_name)
+      - 按店铺匹配 skuID / item_id（DataFrame 一次关联）
+      - UPSERT：COPY 进暂存表后一条 INSERT ... ON CONFLICT (product_code, size, stock_name)，
+        坏行隔离到 QUARANTINE_DIR（common.ingest.staging_upsert）
     """
     brand_name = brand_name.lower()
     if brand_name not in BRAND_CONFIG:
@@ -64,63 +171,26 @@ def import_txt_to_db(brand_name: str):
     TABLE_NAME = config["TABLE_NAME"]
     STORE_DIR = config["STORE_DIR"]
 
-    conn = psycopg2.connect(**PGSQL)
-    cur = conn.cursor()
-
-    # —— 构造插入 SQL：两种分支（camper 多 ean 字段） ——
-    if brand_name == "camper":
-        insert_sql = f"""
-            INSERT INTO {TABLE_NAME} (
-                product_code, product_url, size, gender, skuid,
-                stock_status, stock_count, original_price_gbp, discount_price_gbp,
-                taobao_store_price,
-                stock_name, last_checked, is_published, ean, item_id
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (product_code, size, stock_name)
-            DO UPDATE SET
-                stock_status = EXCLUDED.stock_status,
-                stock_count = EXCLUDED.stock_count,
-                discount_price_gbp = EXCLUDED.discount_price_gbp,
-                original_price_gbp = EXCLUDED.original_price_gbp,
-                taobao_store_price = EXCLUDED.taobao_store_price,
-                skuid = EXCLUDED.skuid,
-                item_id = EXCLUDED.item_id,
-                last_checked = EXCLUDED.last_checked,
-                is_published = EXCLUDED.is_published,
-                ean = EXCLUDED.ean;
-        """
-    else:
-        insert_sql = f"""
-            INSERT INTO {TABLE_NAME} (
-                product_code, product_url, size, gender, skuid,
-                stock_status, stock_count, original_price_gbp, discount_price_gbp,
-                taobao_store_price,
-                stock_name, last_checked, is_published, item_id
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (product_code, size, stock_name)
-            DO UPDATE SET
-                stock_status = EXCLUDED.stock_status,
-                stock_count = EXCLUDED.stock_count,
-                discount_price_gbp = EXCLUDED.discount_price_gbp,
-                original_price_gbp = EXCLUDED.original_price_gbp,
-                taobao_store_price = EXCLUDED.taobao_store_price,
-                skuid = EXCLUDED.skuid,
-                item_id = EXCLUDED.item_id,
-                last_checked = EXCLUDED.last_checked,
-                is_published = EXCLUDED.is_published;
-        """
-
-    # —— 收集 TXT 文件 ——
-    txt_files = list(TXT_DIR.glob("*.txt"))
+    # —— 收集 TXT 文件（含 TXT 批次库中的记录），只解析一次 ——
+    txt_files = iter_txt_sources(TXT_DIR)
     if not txt_files:
         print(f"⚠️ 没有 TXT 文件在目录 {TXT_DIR}")
-        cur.close()
-        conn.close()
         return
 
-    # —— 统一的库存状态映射（大小写/空格/中英兼容） ——
-    IN_STOCK_KEYS = {"有货", "现货", "可购买", "in stock", "available", "有存货"}
-    OUT_STOCK_KEYS = {"无货", "缺货", "sold out", "out of stock", "不可购买"}
+    skus = build_sku_frame(txt_files, brand_name)
+    if skus.empty:
+        print("⚠️ 没有可导入的数据")
+        return
+
+    # —— DataFrame 列 → 表列（camper 多 ean 字段）；冲突时 product_url / gender 保持不变 ——
+    columns = dict(IMPORT_COLUMNS)
+    if brand_name != "camper":
+        columns.pop("ean")
+    update_cols = [c for c in columns.values() if c not in ("product_code", "size", "stock_name", "product_url", "gender")]
+    compare_cols = [c for c in update_cols if c != "last_checked"]
+    now = datetime.now()
+
+    conn = connect(PGSQL)
 
     for store_folder in STORE_DIR.iterdir():
         if not store_folder.is_dir() or store_folder.name == "clarks_default":
@@ -129,118 +199,27 @@ def import_txt_to_db(brand_name: str):
         stock_name = store_folder.name
         print(f"\n🔄 处理店铺: {stock_name}")
 
-        # 加载店铺 sku 映射
+        # 加载店铺 sku 映射，一次关联到全部 SKU
         sku_map = load_sku_mapping_from_store(store_folder)
         print(f"🔢 映射表共 {len(sku_map)} 条")
+        df = join_store_skus(skus, sku_map).assign(stock_name=stock_name, last_checked=now)
+        matched = int(df["is_published"].sum())
+
+        rows = _to_rows(df, list(columns))
+        try:
+            stats = copy_upsert(
+                conn, TABLE_NAME, list(columns.values()), rows,
+                conflict_cols=["product_code", "size", "stock_name"],
+                update_cols=update_cols, compare_cols=compare_cols,
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ 店铺 {stock_name} 导入失败，已回滚: {e}")
+            continue
+
+        print(f"✅ 店铺 {stock_name}: 匹配 SKU {matched}，未匹配 {len(df) - matched}")
+        print(stats.format())
 
-        for file in txt_files:
-            try:
-                records = parse_txt_to_record(file, brand_name)
-                if not records:
-                    print(f"⚠️ 无数据: {file.name}")
-                    continue
-
-                inserted = 0
-                for r in records:
-                    # 兼容 camper/其它品牌的解析结构
-                    if brand_name == "camper":
-                        product_code, url, size, gender, _, stock_status, ori_price, dis_price, _, ean = r
-                    else:
-                        product_code, url, size, gender, _, stock_status, ori_price, dis_price, _ = r
-                        ean = None
-
-                    # —— 清洗价格字段 —— 
-                    def to_float_safe(v):
-                        if isinstance(v, (int, float)):
-                            return float(v)
-                        s = str(v).strip()
-                        return float(s) if s.replace('.', '', 1).isdigit() else None
-
-                    ori_price = to_float_safe(ori_price)
-                    dis_price = to_float_safe(dis_price)
-
-                    # 取非零最小值作为 base_price（排除 0 / None）
-                    candidates = [p for p in (ori_price, dis_price) if p is not None and p > 0]
-                    base_price = min(candidates) if candidates else None
-
-                    # —— 按品牌对 base_price 先打折 —— 
-                    brand_discount = get_brand_discount(brand_name)
-                    discounted_base = base_price * brand_discount if base_price is not None else None
-
-                    # —— 计算导入价（人民币）：用折后价参与 price_utils 规则 —— 
-                    store_price = None
-                    if discounted_base is not None and discounted_base > 0:
-                        store_price = float(calculate_discount_price_from_float(discounted_base))
-                    else:
-                        store_price = None  # 禁止用 0 价/空价参与计算，避免假价污染
-
-                    # —— 标准化库存状态 + 计算 stock_count —— 
-                    status_raw = str(stock_status).strip()
-                    status_key = status_raw.lower()
-                    if status_key in {s.lower() for s in IN_STOCK_KEYS}:
-                        stock_status_norm = "有货"
-                        stock_count = 3
-                    elif status_key in {s.lower() for s in OUT_STOCK_KEYS}:
-                        stock_status_norm = "无货"
-                        stock_count = 0
-                    else:
-                        print(f"⚠️ 未知库存状态：{stock_status}（文件: {file.name}, code={product_code}, size={size}）→ 按无货处理")
-                        stock_status_norm = "无货"
-                        stock_count = 0
-
-                    # —— 匹配 SKU —— 
-                    spec_key = f"{product_code},{size}"
-                    sku_entry = sku_map.get(spec_key)
-                    if sku_entry:
-                        skuid, item_id = sku_entry
-                        if not item_id and skuid:
-                            # 用相同 skuid 的另一行补回 item_id
-                            item_id = next((iid for sid, iid in sku_map.values() if sid == skuid and iid), None)
-                        print(f"🔑 匹配成功: {spec_key} → SKU ID: {skuid}, 宝贝ID: {item_id}")
-                    else:
-                        skuid = item_id = None
-                        print(f"⚠️ 未匹配 SKU: {spec_key}")
-
-                    is_published = skuid is not None
-
-                    # —— 调试日志 —— 
-                    print(
-                        "[DEBUG] "
-                        f"brand={brand_name}, discount={brand_discount}, "
-                        f"ori_price={ori_price}, dis_price={dis_price}, "
-                        f"base_price={base_price}, discounted_base={discounted_base}, store_price={store_price}, "
-                        f"stock_status={stock_status_norm}, stock_count={stock_count}, "
-                        f"product_code={product_code}, size={size}, stock_name={stock_name}"
-                    )
-
-                    # —— 组装记录并插入 —— 
-                    if brand_name == "camper":
-                        full_record = (
-                            product_code, url, size, gender, skuid,
-                            stock_status_norm, stock_count, ori_price, dis_price,
-                            store_price,
-                            stock_name, datetime.now(), is_published, ean, item_id
-                        )
-                    else:
-                        full_record = (
-                            product_code, url, size, gender, skuid,
-                            stock_status_norm, stock_count, ori_price, dis_price,
-                            store_price,
-                            stock_name, datetime.now(), is_published, item_id
-                        )
-
-                    try:
-                        cur.execute(insert_sql, full_record)
-                        inserted += 1
-                    except Exception as e:
-                        conn.rollback()
-                        print(f"❌ 插入失败: {file.name} - code={product_code}, size={size} - {e}")
-
-                print(f"✅ 已导入: {file.name}（{inserted} 条） → 店铺: {stock_name}")
-            except Exception as e:
-                print(f"❌ 错误文件: {file.name} - {e}")
-
-    conn.commit()
-    cur.close()
     conn.close()
     print(f"✅ 品牌 [{brand_name}] 的 TXT 数据已全部导入数据库。")
@@ -1,4 +1,5 @@
-import psycopg2
+from common.db.pool import get_conn
+from common.db.timing import db_step
 from config import CAMPER, CLARKS, ECCO, GEOX
 
 # ✅ 品牌配置
@@ -9,6 +10,7 @@ BRAND_MAP = {
     "geox": GEOX,
 }
 
+@db_step("disable_low_stock_products")
 def disable_low_stock_products(brand_name: str, min_sizes: int = 2):
     brand_name = brand_name.lower()
     if brand_name not in BRAND_MAP:
@@ -27,8 +29,7 @@ def disable_low_stock_products(brand_name: str, min_sizes: int = 2):
         HAVING COUNT(size) <= %s;
     """
 
-    conn = psycopg2.connect(**pg_config)
-    with conn:
+    with get_conn(pg_config) as conn:
         with conn.cursor() as cur:
             cur.execute(query_find, (min_sizes,))
             codes = cur.fetchall()
@@ -41,8 +42,7 @@ def disable_low_stock_products(brand_name: str, min_sizes: int = 2):
     print(f"🔍 [{brand_name.upper()}] 找到 {len(product_codes)} 个商品需要清零库存并下架")
 
     # ✅ 批量更新库存和发布状态
-    conn = psycopg2.connect(**pg_config)
-    with conn:
+    with get_conn(pg_config) as conn:
         with conn.cursor() as cur:
             update_sql = f"""
                 UPDATE {table_name}
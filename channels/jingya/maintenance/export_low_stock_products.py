@@ -7,10 +7,12 @@
 import os
 from pathlib import Path
 from datetime import datetime
-import psycopg2
 import pandas as pd
 from psycopg2.extras import DictCursor, RealDictCursor
 
+from common.db.pool import connect, get_conn
+from common.db.timing import db_step
+
 from config import BRAND_CONFIG  # 使用你项目里的 BRAND_CONFIG / TABLE_NAME / PGSQL_CONFIG
 
 
@@ -70,7 +72,7 @@ def export_low_stock_channel_products(
 
     conn = None
     try:
-        conn = psycopg2.connect(**pgsql)
+        conn = connect(pgsql)
         with conn.cursor(cursor_factory=DictCursor) as cur:
             cur.execute(sql, (stock_threshold, max_allowed_size_count))
             rows = cur.fetchall()
@@ -105,6 +107,7 @@ def _sql_trim_id(expr: str) -> str:
     return f"NULLIF(REGEXP_REPLACE(TRIM({expr}), '^\\[|\\]$', '', 'g'), '')"
 
 
+@db_step("export_low_stock_for_brand")
 def export_low_stock_for_brand(
     brand: str,
     threshold: int = 5,
@@ -167,7 +170,7 @@ def export_low_stock_for_brand(
         ORDER BY "总库存" ASC, "商品编码" ASC;
         """
 
-    with psycopg2.connect(**pg) as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+    with get_conn(pg) as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute(sql, (threshold,))
         rows = cur.fetchall()
 
@@ -13,6 +13,10 @@ fetch_info 抓取时偶尔会因为网络问题（超时/被拦截等）写出"
 2. 判断该商品是否"价格 + 库存全部为空"。
 3. 收集这些商品的 Source URL，写入一个 links 文件，供该品牌的 fetch_info 函数重新抓取。
 
+use_frontier=True 时（fetch_info 已接入 common.crawl.frontier 的品牌，如 camper / geox 快速模式）
+直接查询 frontier 中"写出的 TXT 为空壳"的 URL，不再逐个解析 TXT_DIR；frontier 里没有该品牌记录时
+仍回退扫描目录。
+
 前置约定（与 common/ingest/txt_writer.py 保持一致，所有品牌统一）：
 - TXT 为 "Key: Value" 格式，每行一个字段。
 - 价格字段：Product Price / Adjusted Price
@@ -29,67 +33,25 @@ fetch_info 抓取时偶尔会因为网络问题（超时/被拦截等）写出"
 """
 
 from pathlib import Path
-from typing import Dict, List
+from typing import List
 import argparse
 
 from config import BRAND_CONFIG
-from common.utils.txt_parser import extract_product_info
-
-# 视为"无价格"的占位值
-_EMPTY_PRICE_VALUES = {"", "0", "0.0", "0.00"}
-
-
-def _is_price_empty(info: Dict[str, str]) -> bool:
-    for key in ("Product Price", "Adjusted Price"):
-        val = (info.get(key) or "").strip()
-        if val not in _EMPTY_PRICE_VALUES:
-            return False
-    return True
-
-
-def _has_stock(info: Dict[str, str]) -> bool:
-    # 1) 优先看 Product Size Detail: "SIZE:stock:EAN;..."（stock 为数字时判断 > 0）
-    detail = (info.get("Product Size Detail") or "").strip()
-    for token in detail.split(";"):
-        token = token.strip()
-        if not token:
-            continue
-        parts = token.split(":")
-        if len(parts) >= 2:
-            try:
-                if int(parts[1]) > 0:
-                    return True
-            except ValueError:
-                pass  # 非数字库存写法（如 barbour 的 text 模式），交给下面的 Product Size 判断
-
-    # 2) 兜底看 Product Size: "SIZE:有货/无货;..."
-    size_map = (info.get("Product Size") or "").strip()
-    for token in size_map.split(";"):
-        token = token.strip()
-        if not token:
-            continue
-        parts = token.split(":")
-        if len(parts) >= 2 and parts[1].strip() == "有货":
-            return True
-
-    return False
-
-
-def is_empty_product_info(info: Dict[str, str]) -> bool:
-    """价格和库存是否同时全空（典型的网络失败空壳 TXT）"""
-    if not info:
-        return True
-    return _is_price_empty(info) and not _has_stock(info)
+from common.crawl.frontier import get_frontier
+from common.ingest.txt_records import load_txt_records
+from common.utils.txt_parser import is_empty_product_info
 
 
 def generate_empty_product_links_for_brand(brand: str,
-                                            output_filename: str = "empty_product_links.txt") -> Path:
+                                            output_filename: str = "empty_product_links.txt",
+                                            use_frontier: bool = False) -> Path:
     """
     为指定品牌生成"价格+库存全空"的商品链接文件。
     output_filename 可以是:
         1) 仅文件名  → 自动写到 brand/publication/ 下
         2) 完整路径（绝对路径/相对路径） → 直接按此路径写入
     无论是否找到结果都会写文件（找不到则写空文件），避免遗留上一次运行的旧内容。
+    use_frontier: 从 frontier 查询空壳 URL（只适用于所有 TXT 都由接入 frontier 的 fetch_info 写出的品牌）
     """
     if brand not in BRAND_CONFIG:
         raise ValueError(f"未知 brand：{brand}，请检查 BRAND_CONFIG 中是否已配置。")
@@ -109,6 +71,17 @@ def generate_empty_product_links_for_brand(brand: str,
     print(f"📁 TXT 目录：{txt_dir}")
     print(f"📂 输出文件：{empty_links_file}")
 
+    frontier = get_frontier(brand) if use_frontier else None
+    if frontier is not None and frontier.has_entries():
+        empty_urls = frontier.empty_urls()
+        empty_links_file.write_text("\n".join(empty_urls), encoding="utf-8")
+        print(f"📊 frontier 查询：价格/库存全空={len(empty_urls)}（未扫描 TXT 目录）")
+        if empty_urls:
+            print(f"💾 已写入 {len(empty_urls)} 条空数据商品链接到：{empty_links_file}")
+        else:
+            print("🎉 没有发现价格/库存全空的商品。")
+        return empty_links_file
+
     if not txt_dir.exists():
         print(f"⚠️ TXT 目录不存在：{txt_dir}")
         empty_links_file.write_text("", encoding="utf-8")
@@ -118,16 +91,15 @@ def generate_empty_product_links_for_brand(brand: str,
     no_url_codes: List[str] = []
     total = 0
 
-    for txt_file in txt_dir.glob("*.txt"):
+    for rec in load_txt_records(txt_dir):
         total += 1
-        info = extract_product_info(txt_file)
-        if not is_empty_product_info(info):
+        if not is_empty_product_info(rec.fields):
             continue
-        url = (info.get("Source URL") or "").strip()
+        url = rec.get("Source URL")
         if url:
             empty_urls.append(url)
         else:
-            no_url_codes.append(txt_file.stem)
+            no_url_codes.append(rec.stem)
 
     empty_urls = sorted(set(empty_urls))
     empty_links_file.write_text("\n".join(empty_urls), encoding="utf-8")
@@ -163,9 +135,14 @@ def main():
         default="empty_product_links.txt",
         help="输出的 links 文件名（默认：empty_product_links.txt）"
     )
+    parser.add_argument(
+        "--frontier",
+        action="store_true",
+        help="从 crawl frontier 查询空壳 URL，而不是扫描 TXT 目录"
+    )
 
     args = parser.parse_args()
-    generate_empty_product_links_for_brand(args.brand, args.output)
+    generate_empty_product_links_for_brand(args.brand, args.output, use_frontier=args.frontier)
 
 
 if __name__ == "__main__":
@@ -24,7 +24,6 @@ from pathlib import Path
 from typing import Dict, Set
 import argparse
 
-import psycopg2
 from psycopg2.extras import DictCursor
 
 from config import BRAND_CONFIG  # 请确认你已有这个结构，没有的话稍微改一下即可
@@ -50,6 +49,8 @@ def load_codes_from_txt_dir(txt_dir: Path) -> Set[str]:
 
 from psycopg2.extras import DictCursor
 from psycopg2.errors import UndefinedColumn   # 新增这一行
+from common.db.pool import get_conn
+from common.db.timing import db_step
 
 def load_codes_and_urls_from_db(table: str, db_conf: Dict) -> Dict[str, str]:
     """
@@ -75,7 +76,7 @@ def load_codes_and_urls_from_db(table: str, db_conf: Dict) -> Dict[str, str]:
     mapping: Dict[str, str] = {}
 
     print(f"🔌 正在连接数据库：{db_conf.get('host')} / {db_conf.get('dbname')}，读取 {table} ...")
-    with psycopg2.connect(**db_conf) as conn:
+    with get_conn(db_conf) as conn:
         with conn.cursor(cursor_factory=DictCursor) as cur:
             try:
                 # 1️⃣ 先用 product_code（你现在真实在用的列名）
@@ -97,6 +98,7 @@ def load_codes_and_urls_from_db(table: str, db_conf: Dict) -> Dict[str, str]:
     return mapping
 
 
+@db_step("generate_missing_links_for_brand")
 def generate_missing_links_for_brand(brand: str,
                                      output_filename: str = "product_links_missing.txt") -> Path:
     """
@@ -202,7 +202,7 @@ def main():
     camper_get_links()
 
     print("\n🟡 Step: 3️⃣ 抓取商品信息")
-    camper_fetch_product_info(max_workers=4)
+    camper_fetch_product_info()
 
     print("\n🟡 Step: 4️⃣ 导入 TXT → 数据库，如果库存低于2的直接设置成0")
     import_txt_to_db_supplier("camper")  # ✅ 新逻辑
@@ -5,6 +5,8 @@ from typing import Dict
 import pandas as pd
 from sqlalchemy import create_engine
 
+from common.ingest.txt_records import load_txt_records
+
 from config import (
     CLARKS,
     CAMPER,
@@ -33,18 +35,11 @@ def get_engine(pg_cfg):
 
 def load_titles_from_txt(txt_dir: Path) -> pd.DataFrame:
     """扫描 TXT_DIR 下所有 TXT 文件, 提取 Product Name 作为标题"""
-    records = []
-    for file in txt_dir.glob("*.txt"):
-        try:
-            code = file.stem.strip()
-            with open(file, "r", encoding="utf-8") as f:
-                for line in f:
-                    if line.startswith("Product Name:"):
-                        title = line.split("Product Name:", 1)[-1].strip()
-                        records.append((code, title))
-                        break
-        except Exception as e:
-            print(f"⚠️  读取标题失败: {file.name} → {e}")
+    records = [
+        (rec.stem.strip(), rec.title)
+        for rec in load_txt_records(txt_dir)
+        if "Product Name" in rec.fields
+    ]
     return pd.DataFrame(records, columns=["product_code", "title"])
 
 
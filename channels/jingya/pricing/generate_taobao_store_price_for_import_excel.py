@@ -15,10 +15,12 @@ import unicodedata
 import re
 from typing import List, Dict, Optional, Iterable, Tuple
 import pandas as pd
-import psycopg2
 import math
 
 from config import BRAND_CONFIG
+from common.db.pool import connect
+from common.db.query import execute_prepared, read_frame
+from common.db.timing import db_step
 
 # ===== 列名别名 =====
 COL_ALIASES = {
@@ -140,9 +142,6 @@ def _flush_filtered(output_dir: Path, input_file: str, logger=None):
 
 
 
-import psycopg2
-from psycopg2.extras import execute_values
-
 from psycopg2.extras import execute_values
 
 def _fetch_prices_by_code_and_size_bulk(
@@ -154,7 +153,7 @@ def _fetch_prices_by_code_and_size_bulk(
     批量从 {table} 里拿 (product_code, size) 对应的 taobao_store_price。
     关键点：
     - 不再使用 execute_values（之前只拿到最后一批，导致严重丢价）
-    - 手动分批，每批用 WITH wanted AS (VALUES ...) JOIN，逐批执行 cur.execute()
+    - 手动分批，每批把编码 / 尺码作为两个数组 unnest 后 JOIN，逐批 fetchall（预备语句）
     - 汇总所有批次返回，去重后输出 DataFrame
     """
 
@@ -175,38 +174,32 @@ def _fetch_prices_by_code_and_size_bulk(
 
     print(f"[PRICEDEBUG] 待查询组合总数: {len(cleaned_pairs)}，去重后: {len(unique_pairs)}")
 
-    # 2. 分批，每批 50 个 (code,size)
-    CHUNK_SIZE = 50
+    # 2. 分批，每批 500 个 (code,size)：编码 / 尺码各作为一个数组参数，
+    #    同一条 SQL 走预备语句（每个文件、每批只发 EXECUTE）
+    CHUNK_SIZE = 500
     all_rows: list[tuple[str, str, float]] = []
+    query_sql = (
+        f"SELECT t.product_code, t.size, t.taobao_store_price "
+        f"FROM {table} t "
+        "JOIN unnest(%s::text[], %s::text[]) AS w(code, size) "
+        "ON t.product_code = w.code AND t.size = w.size"
+    )
 
     with conn.cursor() as cur:
         total_batches = (len(unique_pairs) + CHUNK_SIZE - 1) // CHUNK_SIZE
 
         for batch_idx, start in enumerate(range(0, len(unique_pairs), CHUNK_SIZE), start=1):
             batch = unique_pairs[start:start + CHUNK_SIZE]
-
-            # 用 mogrify 把每条 (code,size) 变成安全的 SQL ('CODE','SIZE') 片段
-            values_sql_list = [
-                cur.mogrify("(%s,%s)", (code, size)).decode("utf-8")
-                for code, size in batch
-            ]
-            values_sql_block = ",".join(values_sql_list)
-
-            # 构造本批 SQL
-            query_sql = (
-                f"WITH wanted(code,size) AS (VALUES {values_sql_block}) "
-                f"SELECT t.product_code, t.size, t.taobao_store_price "
-                f"FROM {table} t "
-                "JOIN wanted w ON t.product_code = w.code AND t.size = w.size"
-            )
+            codes = [code for code, _ in batch]
+            sizes = [size for _, size in batch]
 
             # Debug: 打印本批的关键信息（不会太吵）
             print("\n[DEBUG SQL BATCH]")
             print(f"  批次 {batch_idx}/{total_batches}, 本批组合数: {len(batch)}")
-            print(f"  示例VALUES前5个: {', '.join(values_sql_list[:5])}")
+            print(f"  示例前5个: {', '.join(f'({c},{z})' for c, z in batch[:5])}")
 
             # 真正执行
-            cur.execute(query_sql)
+            execute_prepared(cur, query_sql, (codes, sizes))
             batch_rows = cur.fetchall()
             print(f"  -> 本批返回 {len(batch_rows)} 行")
 
@@ -345,6 +338,7 @@ def generate_price_excel(
     return _generate_price_excel_from_file(brand, excel_file, output_path, drop_rows_without_price, table, pg)
 
 # ===== 批量：处理 input_dir 下所有 Excel =====
+@db_step("generate_price_excels_bulk")
 def generate_price_excels_bulk(
     brand: str,
     input_dir: str,
@@ -566,7 +560,6 @@ def _generate_price_excel_from_file(
       - 过滤掉的行写入 output_dir/temp/*_filtered_reasons_*.xlsx 方便排查
     """
     import pandas as pd
-    import psycopg2
     from pathlib import Path
 
     logger = _get_logger(f"price_export.{brand}")
@@ -670,7 +663,7 @@ def _generate_price_excel_from_file(
     uniq_pairs = len(set(pairs_for_price))
     logger.info(f"待查价组合: total={len(pairs_for_price)} unique={uniq_pairs} | table={table_name}")
 
-    conn = psycopg2.connect(**pgsql_config)
+    conn = connect(pgsql_config)
     try:
         df_price = _fetch_prices_by_code_and_size_bulk(conn, table_name, pairs_for_price)
     finally:
@@ -918,7 +911,7 @@ def _compare_price_vs_db_single(
         return
 
     # 7) 批量查 DB 价格（taobao_store_price + jingya_untaxed_price）
-    conn = psycopg2.connect(**pgsql_config)
+    conn = connect(pgsql_config)
     try:
         df_db = _fetch_product_prices_by_code(conn, table, df_products["product_code"].tolist())
     finally:
@@ -983,6 +976,7 @@ def _compare_price_vs_db_single(
     logger.info(f"差价报告已生成: {out_path} | rows={len(df_out)}")
 
 
+@db_step("compare_price_vs_db_bulk")
 def compare_price_vs_db_bulk(
     brand: str,
     input_dir: str,
@@ -1073,6 +1067,7 @@ def compare_price_vs_db_bulk(
 
 
 # ===== 新增：批量导出 SKU 库存 =====
+@db_step("generate_stock_excels_bulk")
 def generate_stock_excels_bulk(
     brand: str,
     input_dir: str | Path,
@@ -1090,7 +1085,6 @@ def generate_stock_excels_bulk(
     - 输出：<输入文件名+suffix>.xlsx，只有两列：SKUID, 调整后库存
     """
     import pandas as pd
-    import psycopg2
     from pathlib import Path
 
     def _to_text(v):
@@ -1120,9 +1114,9 @@ def generate_stock_excels_bulk(
     output_dir.mkdir(parents=True, exist_ok=True)
 
     # 1) 拉取“可售状态”并做映射（仅按 product_code）
-    conn = psycopg2.connect(**pg)
+    conn = connect(pg)
     try:
-        df_flag = pd.read_sql(f'SELECT product_code, taobao_store_price FROM {table}', conn)
+        df_flag = read_frame(conn, f'SELECT product_code, taobao_store_price FROM {table}')
     finally:
         conn.close()
 
@@ -18,6 +18,7 @@ from pathlib import Path
 import undetected_chromedriver as uc
 from selenium.common.exceptions import SessionNotCreatedException, WebDriverException
 from cfg.settings import GLOBAL_CHROMEDRIVER_PATH
+from common.browser.load_profile import apply_load_profile
 
 # Serialize uc.Chrome creation to prevent WinError 32 when multiple threads
 # try to rename the downloaded chromedriver.exe simultaneously.
@@ -80,7 +81,7 @@ def _get_driver_major(driver_path: str) -> int | None:
         return None
 
 
-def build_uc_driver(headless=False, extra_options=None, retries=2, verbose=True):
+def build_uc_driver(headless=False, extra_options=None, retries=2, verbose=True, load_profile=None):
     """
     自动适配本机 Chrome 主版本，构建 uc.Chrome 并返回 driver 实例。
 
@@ -89,6 +90,7 @@ def build_uc_driver(headless=False, extra_options=None, retries=2, verbose=True)
       - extra_options: 额外的 Chrome 启动参数（list[str]），例如 ["--disable-gpu"]
       - retries: 失败后（清缓存）最大重试次数
       - verbose: 是否打印调试信息
+      - load_profile: common.browser.load_profile 的名称 / LoadProfile，启动后即用 CDP 屏蔽对应资源
 
     返回：
       - selenium webdriver 实例（undetected_chromedriver.Chrome）
@@ -132,6 +134,8 @@ def build_uc_driver(headless=False, extra_options=None, retries=2, verbose=True)
                 driver = uc.Chrome(**kwargs)
                 if verbose:
                     print("✅ uc.Chrome started successfully.")
+                if load_profile is not None:
+                    apply_load_profile(driver, load_profile)
                 return driver
             except SessionNotCreatedException as e:
                 last_err = e
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+页面加载配置 (load profile) - 用 CDP 拦截爬虫 Chrome 不需要的资源
+
+解析器只读 DOM 文本和 JSON，图片 / 字体 / 样式表 / 视频 / 埋点脚本全是白下载。
+每个站点声明一个 LoadProfile：按资源类型 + URL 通配符屏蔽，
+allow_patterns 中的 XHR（如库存接口）永远不会被屏蔽。
+
+屏蔽通过 Network.setBlockedURLs 实现（selenium / undetected_chromedriver 都支持
+execute_cdp_cmd，不需要事件回调）。
+
+节省量统计: 每个站点每 LOAD_PROFILE_SAMPLE_EVERY 页放行一页作为基线 (不屏蔽)，
+用 Performance API 读取传输字节数与 load 耗时，对比屏蔽页得到每页节省的字节 / 时间。
+
+使用方式:
+    from common.browser.load_profile import LOAD_METER
+
+    driver = get_driver("houseoffraser", load_profile="houseoffraser")   # 每页调用一次
+    driver.get(url)
+    ...  # 等待页面就绪
+    LOAD_METER.after_page(driver, "houseoffraser")
+    print(LOAD_METER.format_summary("houseoffraser"))
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional, Tuple, Union
+
+from cfg.settings import SETTINGS
+
+# 每 N 页放行 1 页作为基线；0 = 不采样（只屏蔽，不统计节省量）
+SAMPLE_EVERY = int(SETTINGS.get("LOAD_PROFILE_SAMPLE_EVERY", 20))
+
+# driver 上记录当前屏蔽状态的属性名: (profile 名, 是否屏蔽中)
+_STATE_ATTR = "_tb_load_profile_state"
+
+# 资源类型 → URL 通配符 (setBlockedURLs 只认 URL，按扩展名近似资源类型)
+RESOURCE_TYPE_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    "image": (
+        "*.png", "*.png?*", "*.jpg", "*.jpg?*", "*.jpeg", "*.jpeg?*", "*.gif", "*.gif?*",
+        "*.webp", "*.webp?*", "*.avif", "*.avif?*", "*.svg", "*.svg?*", "*.ico", "*.ico?*",
+    ),
+    "font": (
+        "*.woff", "*.woff?*", "*.woff2", "*.woff2?*", "*.ttf", "*.ttf?*", "*.otf", "*.otf?*",
+        "*.eot", "*.eot?*",
+    ),
+    "stylesheet": ("*.css", "*.css?*"),
+    "media": (
+        "*.mp4", "*.mp4?*", "*.webm", "*.webm?*", "*.m3u8", "*.m3u8?*", "*.mp3", "*.mp3?*",
+        "*.mov", "*.mov?*",
+    ),
+}
+
+# 常见埋点 / 广告 / 评价挂件域名
+TRACKER_PATTERNS: Tuple[str, ...] = (
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*googleadservices.com*",
+    "*doubleclick.net*",
+    "*connect.facebook.net*",
+    "*facebook.com/tr*",
+    "*hotjar.com*",
+    "*clarity.ms*",
+    "*bat.bing.com*",
+    "*analytics.tiktok.com*",
+    "*criteo.com*",
+    "*criteo.net*",
+    "*pinterest.com/ct*",
+    "*snapchat.com*",
+    "*quantummetric.com*",
+    "*trustpilot.com*",
+    "*yotpo.com*",
+    "*feefo.com*",
+    "*cdn.cookielaw.org/*/otBannerSdk.js*",
+)
+
+
+@dataclass(frozen=True)
+class LoadProfile:
+    """一个站点的资源屏蔽规则"""
+    name: str
+    block_types: Tuple[str, ...] = ("image", "font", "stylesheet", "media")
+    block_trackers: bool = True
+    block_patterns: Tuple[str, ...] = ()     # 额外屏蔽的 URL 通配符
+    allow_patterns: Tuple[str, ...] = ()     # 永不屏蔽的 URL 通配符（如库存 XHR）
+
+    def blocked_urls(self) -> List[str]:
+        """
+        最终下发给 Network.setBlockedURLs 的通配符列表
+
+        setBlockedURLs 没有例外规则，所以与 allow_patterns 冲突的屏蔽规则直接剔除
+        （allow 通配符本身能被该屏蔽规则匹配，即视为冲突）。
+        """
+        patterns: List[str] = []
+        for t in self.block_types:
+            patterns.extend(RESOURCE_TYPE_PATTERNS.get(t, ()))
+        if self.block_trackers:
+            patterns.extend(TRACKER_PATTERNS)
+        patterns.extend(self.block_patterns)
+
+        out: List[str] = []
+        for p in patterns:
+            if p in out:
+                continue
+            if any(fnmatchcase(a, p) for a in self.allow_patterns):
+                continue
+            out.append(p)
+        return out
+
+
+# ================== 站点配置 ==================
+
+LOAD_PROFILES: Dict[str, LoadProfile] = {
+    # 通用配置（图片 / 字体 / 样式表 / 媒体 + 埋点）；BaseFetcher 默认不屏蔽，站点确认不依赖样式后再选用
+    "default": LoadProfile(name="default"),
+    # Next.js 站点，价格 / 尺码都在 DOM 和 __NEXT_DATA__ 里
+    "houseoffraser": LoadProfile(
+        name="houseoffraser",
+        allow_patterns=("*/api/*stock*", "*/api/*product*"),
+    ),
+    # BigCommerce：切换颜色时走 product-attributes XHR 取尺码 / 库存；
+    # 颜色 / 尺码靠点击和元素可见性驱动，不拦样式表（隐藏的选项元素点不到）
+    "philipmorris": LoadProfile(
+        name="philipmorris",
+        block_types=("image", "font", "media"),
+        allow_patterns=("*/remote/v1/product-attributes/*",),
+    ),
+    # Cloudflare 保护：不拦样式表 / challenge 相关请求，只去掉图片字体视频和埋点
+    "outdoorandcountry": LoadProfile(
+        name="outdoorandcountry",
+        block_types=("image", "font", "media"),
+        allow_patterns=("*challenges.cloudflare.com*", "*/cdn-cgi/*"),
+    ),
+    # ECCO Selenium 优先模式：价格由前端渲染，JS / XHR 全部放行
+    "ecco": LoadProfile(
+        name="ecco",
+        allow_patterns=("*/api/*",),
+    ),
+}
+
+ProfileLike = Union[str, LoadProfile, None]
+
+
+def get_load_profile(profile: ProfileLike) -> Optional[LoadProfile]:
+    """名称 / LoadProfile / None → LoadProfile；未知名称抛 KeyError"""
+    if profile is None or isinstance(profile, LoadProfile):
+        return profile
+    try:
+        return LOAD_PROFILES[profile]
+    except KeyError:
+        raise KeyError(f"未知 load profile: {profile}，可选: {sorted(LOAD_PROFILES)}") from None
+
+
+def apply_load_profile(driver, profile: ProfileLike, enabled: bool = True) -> bool:
+    """
+    对 driver 下发（或清除）屏蔽规则；状态未变化时不发 CDP 命令
+
+    Returns:
+        下发成功 / 无需变化返回 True，CDP 不可用返回 False
+    """
+    prof = get_load_profile(profile)
+    active = bool(prof) and enabled
+    state = (prof.name if prof else "", active)
+    if getattr(driver, _STATE_ATTR, None) == state:
+        return True
+
+    urls = prof.blocked_urls() if active else []
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": urls})
+    except Exception as e:
+        print(f"[load_profile] ⚠️ 下发屏蔽规则失败 ({state[0] or 'none'}): {e}")
+        return False
+
+    try:
+        setattr(driver, _STATE_ATTR, state)
+    except Exception:
+        pass
+    return True
+
+
+def clear_load_profile(driver) -> None:
+    """清除屏蔽规则（driver 换给没有 profile 的调用方时使用）"""
+    if getattr(driver, _STATE_ATTR, None) not in (None, ("", False)):
+        apply_load_profile(driver, None)
+
+
+# ================== 节省量统计 ==================
+
+_PAGE_METRICS_JS = """
+    var nav = performance.getEntriesByType('navigation')[0] || {};
+    var res = performance.getEntriesByType('resource');
+    var bytes = nav.transferSize || 0;
+    for (var i = 0; i < res.length; i++) { bytes += res[i].transferSize || 0; }
+    var load = nav.loadEventEnd > 0 ? nav.loadEventEnd : (nav.domContentLoadedEventEnd || 0);
+    return {bytes: bytes, requests: res.length + 1, load_ms: load};
+"""
+
+
+class LoadMeter:
+    """
+    按站点统计屏蔽页 / 基线页的传输字节与 load 耗时（线程安全）
+
+    before_page(): 决定本页是否作为基线（不屏蔽），并下发对应规则
+    after_page():  页面加载完成后读取 Performance API 记一笔
+    """
+
+    def __init__(self, sample_every: int = SAMPLE_EVERY):
+        self.sample_every = sample_every
+        self._lock = threading.Lock()
+        self._pages: Dict[str, int] = {}
+        # site -> {"on": [(bytes, requests, load_ms)], "off": [...]}
+        self._samples: Dict[str, Dict[str, List[Tuple[float, float, float]]]] = {}
+
+    def before_page(self, driver, profile: ProfileLike, site: str) -> None:
+        prof = get_load_profile(profile)
+        if prof is None:
+            clear_load_profile(driver)
+            return
+        with self._lock:
+            n = self._pages.get(site, 0) + 1
+            self._pages[site] = n
+        baseline = bool(self.sample_every) and n % self.sample_every == 0
+        apply_load_profile(driver, prof, enabled=not baseline)
+
+    def after_page(self, driver, site: str) -> Optional[Dict[str, float]]:
+        state = getattr(driver, _STATE_ATTR, None)
+        if not state or not state[0]:
+            return None
+        try:
+            m = driver.execute_script(_PAGE_METRICS_JS) or {}
+        except Exception:
+            return None
+        row = (float(m.get("bytes") or 0), float(m.get("requests") or 0), float(m.get("load_ms") or 0))
+        with self._lock:
+            bucket = self._samples.setdefault(site, {"on": [], "off": []})
+            bucket["on" if state[1] else "off"].append(row)
+        return {"bytes": row[0], "requests": row[1], "load_ms": row[2], "blocked": state[1]}
+
+    def summary(self, site: str) -> Dict[str, float]:
+        with self._lock:
+            bucket = self._samples.get(site, {"on": [], "off": []})
+            on, off = list(bucket["on"]), list(bucket["off"])
+
+        def _avg(rows, i):
+            return sum(r[i] for r in rows) / len(rows) if rows else 0.0
+
+        st = {
+            "pages_blocked": len(on),
+            "pages_baseline": len(off),
+            "kb_blocked": round(_avg(on, 0) / 1024, 1),
+            "kb_baseline": round(_avg(off, 0) / 1024, 1),
+            "req_blocked": round(_avg(on, 1), 1),
+            "req_baseline": round(_avg(off, 1), 1),
+            "load_ms_blocked": round(_avg(on, 2)),
+            "load_ms_baseline": round(_avg(off, 2)),
+            "kb_saved_per_page": 0.0,
+            "ms_saved_per_page": 0,
+        }
+        if on and off:
+            st["kb_saved_per_page"] = round(st["kb_baseline"] - st["kb_blocked"], 1)
+            st["ms_saved_per_page"] = st["load_ms_baseline"] - st["load_ms_blocked"]
+        return st
+
+    def format_summary(self, site: str) -> str:
+        st = self.summary(site)
+        if not st["pages_baseline"]:
+            return (
+                f"资源屏蔽 [{site}] pages={st['pages_blocked']} avg={st['kb_blocked']}KB "
+                f"load={st['load_ms_blocked']}ms (无基线页，未估算节省量)"
+            )
+        return (
+            f"资源屏蔽 [{site}] pages={st['pages_blocked']}+{st['pages_baseline']}基线 "
+            f"avg={st['kb_blocked']}KB vs {st['kb_baseline']}KB "
+            f"req={st['req_blocked']} vs {st['req_baseline']} "
+            f"load={st['load_ms_blocked']}ms vs {st['load_ms_baseline']}ms "
+            f"→ 每页节省 {st['kb_saved_per_page']}KB / {st['ms_saved_per_page']}ms"
+        )
+
+
+# 进程级统计：各 fetcher 共用
+LOAD_METER = LoadMeter()
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+页面就绪判定 - 用轮询谓词代替 driver.get() 之后的固定 sleep
+
+快页面一满足条件就返回，慢页面最多等到 timeout，不会半渲染就被解析。
+每次等待的实际耗时由 WaitRecorder 记录，便于按站点查看延迟。
+
+使用方式:
+    from common.browser.page_ready import jsonld_product_present, selector_non_empty, wait_until_ready
+
+    driver.get(url)
+    ready, waited = wait_until_ready(
+        driver,
+        [jsonld_product_present(), selector_non_empty("div.product-price")],
+        timeout=15,
+    )
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# 谓词: 接收 driver，返回 True 表示页面已就绪；抛异常视为未就绪
+ReadyPredicate = Callable[[object], bool]
+
+DEFAULT_POLL_SECONDS = 0.2
+
+
+# ================== 谓词工厂 ==================
+
+def document_complete() -> ReadyPredicate:
+    """document.readyState == 'complete'"""
+    def _pred(driver) -> bool:
+        return driver.execute_script("return document.readyState") == "complete"
+    _pred.__name__ = "document_complete"
+    return _pred
+
+
+def jsonld_product_present(types: Sequence[str] = ("Product", "ProductGroup")) -> ReadyPredicate:
+    """存在 @type 为 Product / ProductGroup 的 JSON-LD 脚本"""
+    js = """
+        var types = arguments[0];
+        var nodes = document.querySelectorAll('script[type="application/ld+json"]');
+        for (var i = 0; i < nodes.length; i++) {
+            var t = nodes[i].textContent || "";
+            for (var j = 0; j < types.length; j++) {
+                if (t.indexOf('"' + types[j] + '"') !== -1) return true;
+            }
+        }
+        return false;
+    """
+    def _pred(driver) -> bool:
+        return bool(driver.execute_script(js, list(types)))
+    _pred.__name__ = f"jsonld_product_present({','.join(types)})"
+    return _pred
+
+
+def selector_present(css: str) -> ReadyPredicate:
+    """至少有一个元素匹配 CSS 选择器"""
+    def _pred(driver) -> bool:
+        return bool(driver.execute_script("return document.querySelector(arguments[0]) !== null", css))
+    _pred.__name__ = f"selector_present({css})"
+    return _pred
+
+
+def selector_non_empty(css: str) -> ReadyPredicate:
+    """匹配 CSS 选择器的元素中至少有一个文本非空（如价格已渲染）"""
+    js = """
+        var nodes = document.querySelectorAll(arguments[0]);
+        for (var i = 0; i < nodes.length; i++) {
+            if ((nodes[i].textContent || "").trim()) return true;
+        }
+        return false;
+    """
+    def _pred(driver) -> bool:
+        return bool(driver.execute_script(js, css))
+    _pred.__name__ = f"selector_non_empty({css})"
+    return _pred
+
+
+def html_contains(text: str) -> ReadyPredicate:
+    """页面 HTML 中包含指定文本（如内联脚本变量 'var stockInfo'）"""
+    js = "return document.documentElement.outerHTML.indexOf(arguments[0]) !== -1"
+    def _pred(driver) -> bool:
+        return bool(driver.execute_script(js, text))
+    _pred.__name__ = f"html_contains({text})"
+    return _pred
+
+
+def any_of(*preds: ReadyPredicate) -> ReadyPredicate:
+    """任一谓词满足即就绪"""
+    def _pred(driver) -> bool:
+        return any(_safe_check(p, driver) for p in preds)
+    _pred.__name__ = "any_of(" + ", ".join(getattr(p, "__name__", "?") for p in preds) + ")"
+    return _pred
+
+
+# ================== 等待 ==================
+
+def _safe_check(pred: ReadyPredicate, driver) -> bool:
+    try:
+        return bool(pred(driver))
+    except Exception:
+        return False
+
+
+def wait_until_ready(
+    driver,
+    predicates: Sequence[ReadyPredicate],
+    timeout: float = 15.0,
+    poll: float = DEFAULT_POLL_SECONDS,
+) -> Tuple[bool, float]:
+    """
+    轮询直到所有谓词都满足或超时
+
+    Args:
+        driver: Selenium WebDriver
+        predicates: 谓词列表（全部满足才算就绪）；为空时立即返回
+        timeout: 最长等待秒数
+        poll: 轮询间隔
+
+    Returns:
+        (是否就绪, 实际等待秒数)
+    """
+    t0 = time.monotonic()
+    if not predicates:
+        return True, 0.0
+
+    deadline = t0 + timeout
+    while True:
+        if all(_safe_check(p, driver) for p in predicates):
+            return True, time.monotonic() - t0
+        if time.monotonic() >= deadline:
+            return False, time.monotonic() - t0
+        time.sleep(poll)
+
+
+# ================== 等待耗时统计 ==================
+
+class WaitRecorder:
+    """按站点记录每次页面等待的实际耗时（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits: Dict[str, List[float]] = {}
+        self._timeouts: Dict[str, int] = {}
+
+    def record(self, site: str, seconds: float, ready: bool = True) -> None:
+        with self._lock:
+            self._waits.setdefault(site, []).append(seconds)
+            if not ready:
+                self._timeouts[site] = self._timeouts.get(site, 0) + 1
+
+    def summary(self, site: str) -> Dict[str, float]:
+        with self._lock:
+            waits = sorted(self._waits.get(site, []))
+            timeouts = self._timeouts.get(site, 0)
+        if not waits:
+            return {"pages": 0, "avg_s": 0.0, "p50_s": 0.0, "p95_s": 0.0, "max_s": 0.0, "timeouts": timeouts}
+        n = len(waits)
+        return {
+            "pages": n,
+            "avg_s": round(sum(waits) / n, 3),
+            "p50_s": round(waits[int(0.50 * (n - 1))], 3),
+            "p95_s": round(waits[int(0.95 * (n - 1))], 3),
+            "max_s": round(waits[-1], 3),
+            "timeouts": timeouts,
+        }
+
+    def format_summary(self, site: str) -> str:
+        st = self.summary(site)
+        return (
+            f"页面等待 [{site}] pages={st['pages']} avg={st['avg_s']}s "
+            f"p50={st['p50_s']}s p95={st['p95_s']}s max={st['max_s']}s 超时={st['timeouts']}"
+        )
+
+
+# 进程级记录器：各 fetcher 共用，pipeline 结束时可统一打印
+WAIT_RECORDER = WaitRecorder()
@@ -4,18 +4,35 @@ from __future__ import annotations
 import atexit
 import os
 import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Optional
-from cfg.settings import GLOBAL_CHROMEDRIVER_PATH
+from typing import Dict, List, Optional, Tuple
+from cfg.settings import GLOBAL_CHROMEDRIVER_PATH, SETTINGS
+from common.browser.load_profile import LOAD_METER, ProfileLike
+
+try:
+    import psutil  # 可选：用于按 RSS 回收 driver
+except ImportError:
+    psutil = None
 
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 
-# 所有脚本共用的 driver 池（内部 key 会带线程 id，避免多线程抢同一个 driver）
-_DRIVERS: Dict[str, webdriver.Chrome] = {}
+# get_driver(name) 的租约表（内部 key 会带线程 id，避免多线程抢同一个 driver）
+# 真正的 Chrome 实例归进程级 DriverPool 所有，跨站点 / 跨 pipeline 步骤复用
+_LEASES: Dict[str, "PooledDriver"] = {}
 _DRIVERS_LOCK = threading.Lock()
+_LEASES_PENDING = 0                  # 正在为新租约 acquire 的线程数（算进扩容需求，避免同时启动的线程漏算）
+
+# 池参数（cfg/settings.py SETTINGS 可覆盖）
+POOL_MAX_SIZE = int(SETTINGS.get("DRIVER_POOL_SIZE", 8))
+POOL_GROW_LIMIT = int(SETTINGS.get("DRIVER_POOL_MAX_GROW", 16))   # grow() 临时扩容的硬上限
+POOL_MAX_PAGES = int(SETTINGS.get("DRIVER_MAX_PAGES", 100))       # 每个 driver 服务 N 页后回收
+POOL_MAX_RSS_MB = int(SETTINGS.get("DRIVER_MAX_RSS_MB", 1500))    # Chrome 进程树 RSS 超过 M MB 回收
+POOL_ACQUIRE_TIMEOUT = float(SETTINGS.get("DRIVER_ACQUIRE_TIMEOUT", 300))
 
 # 环境变量名称（可选覆盖全局 config）
 _ENV_DRIVER_KEY = "CHROMEDRIVER_PATH"
@@ -162,73 +179,416 @@ def _build_chrome_options(
     return options
 
 
-def get_driver(
-    name: str = "default",
-    headless: bool = True,
-    window_size: str = "1200,2000",
-):
-    global _DRIVERS
+def _create_chrome(headless: bool, window_size: str) -> webdriver.Chrome:
+    """按给定参数启动一个新的 Chrome（不进池，由 DriverPool 调用）"""
+    options = _build_chrome_options(
+        headless=headless,
+        window_size=window_size
+    )
 
-    key = _make_key(name)
+    # ⭐ 核心：只从 settings.py / env 取 driver
+    driver_path = _resolve_driver_path()
+
+    service = Service(str(driver_path))
+    driver = webdriver.Chrome(service=service, options=options)
+    driver.set_page_load_timeout(30)   # 防止 driver.get() 无限阻塞（默认 300s）
+    driver.set_script_timeout(15)       # 防止 execute_script() 无限阻塞
+    return driver
+
+
+def _safe_quit(driver) -> None:
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+def _driver_rss_mb(driver) -> Optional[float]:
+    """chromedriver + 全部 Chrome 子进程的 RSS 总和（MB）；无 psutil 时返回 None"""
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        procs = [root] + root.children(recursive=True)
+    except Exception:
+        return None
+    total = 0
+    for p in procs:
+        try:
+            total += p.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return total / 1024 / 1024
 
-    with _DRIVERS_LOCK:
-        if key in _DRIVERS:
-            return _DRIVERS[key]
 
-        options = _build_chrome_options(
-            headless=headless,
-            window_size=window_size
-        )
+# ================== 进程级 driver 池 ==================
 
-        # ⭐ 核心：只从 settings.py / env 取 driver
-        driver_path = _resolve_driver_path()
+@dataclass(eq=False)
+class PooledDriver:
+    """池中的一个 Chrome 实例 + 使用统计（租约对象）"""
+    driver: webdriver.Chrome
+    config: Tuple[bool, str]            # (headless, window_size)
+    pages: int = 0
+    owner: str = ""                      # 最近一次租用者（站点名），换站点时清 cookie
+    created_at: float = field(default_factory=time.monotonic)
+    dead: bool = False                   # 原地换新失败，名额已释放，不能再归还到池
 
-        print(f"🚗 [get_driver] 使用本地 chromedriver: {driver_path} (key={key})")
 
-        service = Service(str(driver_path))
-        driver = webdriver.Chrome(service=service, options=options)
-        driver.set_page_load_timeout(30)   # 防止 driver.get() 无限阻塞（默认 300s）
-        driver.set_script_timeout(15)       # 防止 execute_script() 无限阻塞
+class DriverPool:
+    """
+    有上限、可复用的 Chrome driver 池
+
+    - acquire / release：租约式借还，超过 max_size 时排队等待
+    - 借出前做健康检查，挂掉的 driver 自动重建
+    - 单个 driver 服务满 max_pages 页或 RSS 超过 max_rss_mb 时回收重建
+    - 不同 (headless, window_size) 的 driver 不混用；池满时会淘汰其他配置的空闲 driver
+    - stats()：等待时间、每 driver 页数、重启次数
+    - get_driver 的租约按线程一直持有到 quit，线程数超过 max_size 时排队只会等到超时：
+      这种情况下 get_driver 用 grow() 临时扩容到持有租约的线程数（最多 grow_limit），quit_all_drivers 时恢复；
+      超过 grow_limit 的线程在 acquire 里排队，等别的线程 quit_driver 归还
+    - 原地换新（健康检查 / 页数 / RSS）时新 Chrome 起不来：该条目作废并释放名额，异常抛给调用方
+    """
 
-        _DRIVERS[key] = driver
+    def __init__(
+        self,
+        max_size: int = POOL_MAX_SIZE,
+        max_pages: int = POOL_MAX_PAGES,
+        max_rss_mb: int = POOL_MAX_RSS_MB,
+        acquire_timeout: float = POOL_ACQUIRE_TIMEOUT,
+        grow_limit: int = POOL_GROW_LIMIT,
+    ):
+        self.max_size = max(1, max_size)
+        self.base_size = self.max_size
+        self.grow_limit = max(self.max_size, grow_limit)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.acquire_timeout = acquire_timeout
+
+        self._cond = threading.Condition()
+        self._idle: Dict[Tuple[bool, str], List[PooledDriver]] = {}
+        self._alive = 0                  # 已创建且未销毁的 driver 数（含正在创建的）
+
+        # 指标
+        self._acquires = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._created = 0
+        self._restarts = 0               # 健康检查失败 / 页数 / RSS 触发的重建
+        self._evicted = 0
+        self._retired_pages: List[int] = []
+
+    # ---------- 借 / 还 ----------
+
+    def acquire(self, headless: bool = True, window_size: str = "1200,2000", owner: str = "") -> PooledDriver:
+        config = (headless, window_size)
+        t0 = time.monotonic()
+        deadline = t0 + self.acquire_timeout
+        pooled: Optional[PooledDriver] = None
+        victim: Optional[PooledDriver] = None
+
+        with self._cond:
+            while True:
+                idle = self._idle.get(config)
+                if idle:
+                    pooled = idle.pop()
+                    break
+                if self._alive < self.max_size:
+                    self._alive += 1
+                    break
+                victim = self._pop_other_idle(config)
+                if victim is not None:
+                    self._evicted += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(
+                        f"❌ 等待 Chrome driver 超时 ({self.acquire_timeout:.0f}s)，池已满 (max_size={self.max_size})"
+                    )
+                self._cond.wait(remaining)
+
+            waited = time.monotonic() - t0
+            self._acquires += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        if victim is not None:
+            self._retire(victim, count_restart=False, keep_slot=True)
+
+        if pooled is None:
+            try:
+                pooled = PooledDriver(driver=self._spawn(config), config=config)
+            except Exception:
+                with self._cond:
+                    self._alive -= 1
+                    self._cond.notify()
+                raise
+        elif not self._is_healthy(pooled):
+            print(f"[selenium_utils] ♻️ driver 健康检查失败，重建 (pages={pooled.pages})")
+            self._replace(pooled)      # 失败时 _replace 已作废条目、释放名额
+
+        if owner and pooled.owner and pooled.owner != owner:
+            self._reset_state(pooled)
+        pooled.owner = owner or pooled.owner
+        return pooled
+
+    def release(self, pooled: PooledDriver, discard: bool = False) -> None:
+        """归还 driver；discard=True 时直接销毁（如 renderer 已崩溃）；扩容后多出来的 driver 归还时销毁"""
+        if pooled.dead:
+            return
+        with self._cond:
+            over = self._alive > self.max_size
+        if discard or over:
+            self._retire(pooled, count_restart=False)
+            return
+        try:
+            pooled.driver.get("about:blank")   # 停掉页面 JS，释放渲染内存
+        except Exception:
+            self._retire(pooled, count_restart=False)
+            return
+        with self._cond:
+            self._idle.setdefault(pooled.config, []).append(pooled)
+            self._cond.notify()
+
+    def grow(self, size: int) -> None:
+        """把容量临时提高到 size（不会缩小，最多到 grow_limit）"""
+        with self._cond:
+            size = min(size, self.grow_limit)
+            if size > self.max_size:
+                print(f"[selenium_utils] ⤴️ 持有 driver 的线程数超过池容量，扩容 {self.max_size} → {size}")
+                self.max_size = size
+                self._cond.notify_all()
+
+    def reset_capacity(self) -> None:
+        """恢复初始容量；多出来的 driver 在归还时销毁"""
+        with self._cond:
+            self.max_size = self.base_size
+            excess = self._alive - self.max_size
+            doomed = []
+            for lst in self._idle.values():
+                while excess > 0 and lst:
+                    doomed.append(lst.pop())
+                    excess -= 1
+        for p in doomed:
+            self._retire(p, count_restart=False)
+
+    def touch(self, pooled: PooledDriver) -> PooledDriver:
+        """记录一次页面使用；达到页数 / RSS 阈值时原地重建（重建失败时条目作废，异常抛给调用方）"""
+        pooled.pages += 1
+        if self.max_pages and pooled.pages > self.max_pages:
+            print(f"[selenium_utils] ♻️ driver 已服务 {pooled.pages - 1} 页，回收重建")
+            self._replace(pooled)
+            pooled.pages = 1
+            return pooled
+        if self.max_rss_mb and pooled.pages % 10 == 0:
+            rss = _driver_rss_mb(pooled.driver)
+            if rss is not None and rss > self.max_rss_mb:
+                print(f"[selenium_utils] ♻️ driver RSS {rss:.0f}MB > {self.max_rss_mb}MB，回收重建")
+                self._replace(pooled)
+                pooled.pages = 1
+        return pooled
+
+    def shutdown(self) -> None:
+        """销毁所有空闲 driver（借出中的由 release / 进程退出处理）"""
+        with self._cond:
+            items = [p for lst in self._idle.values() for p in lst]
+            self._idle.clear()
+        for p in items:
+            self._retire(p, count_restart=False)
+
+    # ---------- 指标 ----------
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            idle = sum(len(v) for v in self._idle.values())
+            retired = list(self._retired_pages)
+            live_pages = [p.pages for lst in self._idle.values() for p in lst]
+            acquires = self._acquires
+            all_pages = retired + live_pages
+            return {
+                "alive": self._alive,
+                "max_size": self.max_size,
+                "idle": idle,
+                "leased": self._alive - idle,
+                "created": self._created,
+                "restarts": self._restarts,
+                "evicted": self._evicted,
+                "acquires": acquires,
+                "wait_total_s": round(self._wait_total, 3),
+                "wait_avg_s": round(self._wait_total / acquires, 3) if acquires else 0.0,
+                "wait_max_s": round(self._wait_max, 3),
+                "pages_per_driver": round(sum(all_pages) / len(all_pages), 1) if all_pages else 0.0,
+            }
+
+    # ---------- 内部 ----------
+
+    def _spawn(self, config: Tuple[bool, str]) -> webdriver.Chrome:
+        headless, window_size = config
+        driver = _create_chrome(headless, window_size)
+        with self._cond:
+            self._created += 1
+        print(f"🚗 [DriverPool] 新建 Chrome (headless={headless}, window={window_size}, alive={self._alive})")
         return driver
 
+    def _replace(self, pooled: PooledDriver) -> None:
+        """原地换新 Chrome；新建失败时条目作废（dead）并释放名额，避免池 / 租约里留着已关闭的 driver"""
+        old = pooled.driver
+        with self._cond:
+            self._restarts += 1
+            self._retired_pages.append(pooled.pages)
+        _safe_quit(old)
+        try:
+            pooled.driver = self._spawn(pooled.config)
+        except Exception:
+            pooled.dead = True
+            with self._cond:
+                self._alive -= 1
+                self._cond.notify()
+            raise
+        pooled.created_at = time.monotonic()
+        pooled.pages = 0
+
+    def _retire(self, pooled: PooledDriver, count_restart: bool, keep_slot: bool = False) -> None:
+        _safe_quit(pooled.driver)
+        with self._cond:
+            self._retired_pages.append(pooled.pages)
+            if count_restart:
+                self._restarts += 1
+            if not keep_slot:
+                self._alive -= 1
+                self._cond.notify()
+
+    def _pop_other_idle(self, config: Tuple[bool, str]) -> Optional[PooledDriver]:
+        for cfg, lst in self._idle.items():
+            if cfg != config and lst:
+                return lst.pop(0)
+        return None
 
+    @staticmethod
+    def _is_healthy(pooled: PooledDriver) -> bool:
+        try:
+            return pooled.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
 
-def quit_driver(name: str = "default"):
+    @staticmethod
+    def _reset_state(pooled: PooledDriver) -> None:
+        """换站点复用前清理 cookie / 缓存，避免上一站点的会话串到下一站点"""
+        try:
+            pooled.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            pooled.driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+        except Exception:
+            pass
+
+
+_POOL = DriverPool()
+
+
+def get_driver_pool() -> DriverPool:
+    return _POOL
+
+
+def get_pool_stats() -> Dict[str, float]:
+    return _POOL.stats()
+
+
+def log_pool_stats(prefix: str = "[DriverPool]") -> None:
+    st = _POOL.stats()
+    print(
+        f"📊 {prefix} alive={st['alive']} leased={st['leased']} created={st['created']} "
+        f"restarts={st['restarts']} evicted={st['evicted']} "
+        f"wait_avg={st['wait_avg_s']}s wait_max={st['wait_max_s']}s "
+        f"pages/driver={st['pages_per_driver']}"
+    )
+
+
+def get_driver(
+    name: str = "default",
+    headless: bool = True,
+    window_size: str = "1200,2000",
+    load_profile: ProfileLike = None,
+):
     """
-    关闭【当前线程】的同名 driver，不影响其他线程。
+    返回【当前线程】名为 name 的 driver（从进程级池租用）。
+
+    同一线程重复调用返回同一个 driver，每次调用计为一次页面使用，
+    满 POOL_MAX_PAGES 页 / 超 POOL_MAX_RSS_MB 时池会原地换新 Chrome。
+
+    load_profile: common.browser.load_profile 中的名称 / LoadProfile，
+        下一页按该配置用 CDP 屏蔽图片字体样式等资源；None 时清除上一个租用者的规则。
     """
-    global _DRIVERS
+    global _LEASES_PENDING
     key = _make_key(name)
 
     with _DRIVERS_LOCK:
-        driver = _DRIVERS.pop(key, None)
+        pooled = _LEASES.get(key)
 
-    if driver is not None:
+    if pooled is not None:
         try:
-            driver.quit()
+            driver = _POOL.touch(pooled).driver
         except Exception:
-            pass
+            # 原地换新失败：条目已作废，丢掉租约，下次 get_driver 重新从池里借
+            with _DRIVERS_LOCK:
+                if _LEASES.get(key) is pooled:
+                    del _LEASES[key]
+            raise
+    else:
+        # 租约持有到 quit 为止：每个持有租约的线程都要占一个 driver，按线程数扩容（最多 grow_limit）而不是排队等超时
+        with _DRIVERS_LOCK:
+            _LEASES_PENDING += 1
+            holders = len(_LEASES) + _LEASES_PENDING
+        if holders > _POOL.max_size:
+            _POOL.grow(holders)
+        pooled = None
+        try:
+            pooled = _POOL.acquire(headless=headless, window_size=window_size, owner=name)
+            pooled.pages += 1
+        finally:
+            with _DRIVERS_LOCK:
+                _LEASES_PENDING -= 1
+                if pooled is not None:
+                    _LEASES[key] = pooled
+        driver = pooled.driver
+
+    LOAD_METER.before_page(driver, load_profile, name)
+    return driver
+
+
+def quit_driver(name: str = "default", discard: bool = False):
+    """
+    归还【当前线程】的同名 driver 到池中，不影响其他线程。
+
+    discard=True：直接销毁（driver 已崩溃时使用），下次 get_driver() 拿到新实例。
+    """
+    key = _make_key(name)
+
+    with _DRIVERS_LOCK:
+        pooled = _LEASES.pop(key, None)
+
+    if pooled is not None:
+        _POOL.release(pooled, discard=discard)
 
 
 def quit_all_drivers():
     """
-    旧接口不变：关闭所有 driver。
-    建议每个 pipeline 结束时调用一次。
+    旧接口不变：归还所有线程借出的 driver。
+    Chrome 进程留在池里给下一个站点 / 下一个 pipeline 步骤复用，
+    进程退出时统一关闭（或手动调用 shutdown_driver_pool）。
     """
-    global _DRIVERS
     with _DRIVERS_LOCK:
-        items = list(_DRIVERS.items())
-        _DRIVERS.clear()
+        items = list(_LEASES.values())
+        _LEASES.clear()
 
-    for _, driver in items:
-        try:
-            driver.quit()
-        except Exception:
-            pass
+    _POOL.reset_capacity()
+    for pooled in items:
+        _POOL.release(pooled)
+
+
+def shutdown_driver_pool():
+    """真正关闭所有 Chrome 进程"""
+    quit_all_drivers()
+    _POOL.shutdown()
 
 
 @atexit.register
 def _cleanup():
-    quit_all_drivers()
+    shutdown_driver_pool()
@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+页面内嵌 JSON 提取 - Next.js __NEXT_DATA__ / JSON-LD / window.__STATE__ 等，一次扫描 + 快速解码
+
+以前各 fetcher 各自找 script 再 json.loads:
+camper 建整棵 BeautifulSoup 只为取 __NEXT_DATA__，reiss 的 _parse_next_data、M&S 的
+_extract_product_sheet 同样如此；allweathers 每页用 demjson3 把同一段 JSON-LD 解析 4 次。
+
+现在 extract_embedded_json(html):
+- 一个正则扫一遍 HTML，收集所有 <script> 中的 JSON 块（不建 DOM 树），顺带取 <title>
+- 每块在第一次访问时才解码，解码结果缓存；有 orjson 时用 orjson，
+  失败再退回 json（strict=False，允许字符串里有换行）、把 undefined 当 null、调用方给的 fallback
+- query(obj, "props.pageProps.productSheet.sizes[*].value") 按路径取值，
+  find_all(obj, "price") 在整棵 JSON 里找某个键（价格 / 尺码 / 库存节点位置不固定时用）
+
+使用方式:
+    from common.crawl.embedded_json import extract_embedded_json, query
+
+    page = extract_embedded_json(html)
+    sheet = page.query("next_data", "props.pageProps.productSheet")
+    product = page.jsonld_first(("Product", "ProductGroup"))
+    prices = query(product, "offers[*].price")
+    crumbs = page.jsonld("BreadcrumbList")
+    state = page.state("__INITIAL_STATE__")
+"""
+
+from __future__ import annotations
+
+import html as html_lib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    import orjson  # 可选: pip install orjson，大 JSON 解码快数倍
+except ImportError:
+    orjson = None
+
+_SCRIPT_RE = re.compile(r"<script\b([^>]*)>(.*?)</script\s*>", re.S | re.I)
+_ATTR_RE = re.compile(r"""([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""")
+_TITLE_RE = re.compile(r"<title\b[^>]*>(.*?)</title\s*>", re.S | re.I)
+# 内联脚本里的状态赋值: window.__INITIAL_STATE__ = {...} / var stockInfo = {...}
+_STATE_RE = re.compile(r"(?:window\.|self\.|var\s+|let\s+|const\s+)([A-Za-z_$][\w$]*)\s*=\s*(?=[\[{])")
+_UNDEFINED_RE = re.compile(r"\bundefined\b")
+_PATH_RE = re.compile(r"\[(\*|-?\d+)\]|([^.\[\]]+)")
+
+_MISSING = object()
+Decoder = Callable[[str], Any]
+
+
+# ================== 解码 ==================
+
+def loads(text: Union[str, bytes], fallback: Optional[Decoder] = None) -> Any:
+    """
+    解码 JSON：orjson → json(strict=False) → undefined 视为 null → fallback；全部失败时抛 ValueError
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", errors="replace")
+    try:
+        return json.loads(text, strict=False)
+    except ValueError:
+        pass
+    if "undefined" in text:
+        try:
+            return json.loads(_UNDEFINED_RE.sub("null", text), strict=False)
+        except ValueError:
+            pass
+    if fallback is not None:
+        try:
+            return fallback(text)
+        except Exception:
+            pass
+    raise ValueError("无法解码的 JSON")
+
+
+def _raw_decode(text: str, start: int) -> Any:
+    """从 start 处解码一个 JSON 值（后面可以跟其他 JS 代码）"""
+    value, _ = json.JSONDecoder(strict=False).raw_decode(text, start)
+    return value
+
+
+# ================== 路径查询 ==================
+
+def _parse_path(path: str) -> List[Union[str, int]]:
+    steps: List[Union[str, int]] = []
+    for index, key in _PATH_RE.findall(path):
+        if key:
+            steps.append(key)
+        elif index == "*":
+            steps.append("*")
+        else:
+            steps.append(int(index))
+    return steps
+
+
+def query(obj: Any, path: str, default: Any = None) -> Any:
+    """
+    按路径取值："a.b[0].c"；含 [*] 时展开列表（dict 则展开其值），返回所有命中值的列表
+
+    路径上任一环节缺失时返回 default（含 [*] 时返回 []）。
+    """
+    steps = _parse_path(path)
+    wildcard = "*" in steps
+    nodes = [obj]
+    for step in steps:
+        nxt = []
+        for node in nodes:
+            if step == "*":
+                if isinstance(node, list):
+                    nxt.extend(node)
+                elif isinstance(node, dict):
+                    nxt.extend(node.values())
+            elif isinstance(step, int):
+                if isinstance(node, list) and -len(node) <= step < len(node):
+                    nxt.append(node[step])
+            elif isinstance(node, dict) and step in node:
+                nxt.append(node[step])
+        nodes = nxt
+        if not nodes:
+            return [] if wildcard else default
+    if wildcard:
+        return [n for n in nodes if n is not None]
+    return nodes[0] if nodes[0] is not None else default
+
+
+def find_all(obj: Any, key: str, where: Optional[Callable[[Dict], bool]] = None) -> Iterator[Any]:
+    """深度优先遍历，产出所有名为 key 的值（where 过滤其所在的 dict）"""
+    stack = [obj]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if key in node and (where is None or where(node)):
+                yield node[key]
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+def find_first(obj: Any, *keys: str, default: Any = None) -> Any:
+    """按 keys 顺序，返回第一个在整棵 JSON 中出现且非空的值"""
+    for key in keys:
+        for value in find_all(obj, key):
+            if value not in (None, "", [], {}):
+                return value
+    return default
+
+
+def _type_matches(obj: Any, types: Sequence[str]) -> bool:
+    if not isinstance(obj, dict):
+        return False
+    t = obj.get("@type")
+    names = t if isinstance(t, list) else [t]
+    wanted = {x.lower() for x in types}
+    return any(isinstance(n, str) and n.lower() in wanted for n in names)
+
+
+# ================== 页面 ==================
+
+@dataclass
+class JsonBlob:
+    """页面中的一段内嵌 JSON（第一次访问 data 时解码）"""
+    kind: str                       # jsonld / json / state
+    name: str                       # script id，或 state 的变量名
+    text: str
+    start: int = 0                  # state: JSON 在 text 中的起点
+    fallback: Optional[Decoder] = None
+    _data: Any = field(default=_MISSING, repr=False)
+
+    @property
+    def data(self) -> Any:
+        if self._data is _MISSING:
+            try:
+                if self.kind == "state":
+                    self._data = _raw_decode(self.text, self.start)
+                else:
+                    self._data = loads(self.text.strip(), self.fallback)
+            except ValueError:
+                self._data = None
+        return self._data
+
+
+class EmbeddedJson:
+    """一个页面里所有内嵌 JSON 的索引"""
+
+    def __init__(self, html: str, fallback: Optional[Decoder] = None):
+        self.blobs: List[JsonBlob] = []
+        self.title = ""
+        m = _TITLE_RE.search(html or "")
+        if m:
+            self.title = html_lib.unescape(m.group(1)).strip()
+
+        for m in _SCRIPT_RE.finditer(html or ""):
+            attrs = self._attrs(m.group(1))
+            body = m.group(2)
+            if not body.strip():
+                continue
+            stype = attrs.get("type", "").lower()
+            sid = attrs.get("id", "")
+            if "ld+json" in stype:
+                self.blobs.append(JsonBlob("jsonld", sid, body, fallback=fallback))
+            elif stype.endswith("json"):
+                self.blobs.append(JsonBlob("json", sid, body, fallback=fallback))
+            elif stype in ("", "text/javascript", "application/javascript", "module"):
+                for s in _STATE_RE.finditer(body):
+                    self.blobs.append(JsonBlob("state", s.group(1), body, start=s.end()))
+
+    @classmethod
+    def from_jsonld(cls, texts: Sequence[str], fallback: Optional[Decoder] = None) -> "EmbeddedJson":
+        """已经建好 DOM 的调用方（如 html_parser.extract_jsonld）直接传入各 JSON-LD script 的文本"""
+        page = cls("")
+        page.blobs = [JsonBlob("jsonld", "", t, fallback=fallback) for t in texts if t and t.strip()]
+        return page
+
+    @staticmethod
+    def _attrs(raw: str) -> Dict[str, str]:
+        return {
+            k.lower(): html_lib.unescape(a or b or c)
+            for k, a, b, c in _ATTR_RE.findall(raw)
+        }
+
+    # ---------- 取块 ----------
+
+    def by_id(self, script_id: str) -> Any:
+        """<script type="application/json" id=...> 的内容"""
+        for blob in self.blobs:
+            if blob.kind == "json" and blob.name == script_id:
+                return blob.data
+        return None
+
+    @property
+    def next_data(self) -> Optional[Dict[str, Any]]:
+        data = self.by_id("__NEXT_DATA__")
+        return data if isinstance(data, dict) else None
+
+    def state(self, name: str) -> Any:
+        """内联脚本中 window.NAME = {...} / var NAME = {...} 的值（第一个能解码的）"""
+        for blob in self.blobs:
+            if blob.kind == "state" and blob.name == name and blob.data is not None:
+                return blob.data
+        return None
+
+    def jsonld(self, types: Union[str, Sequence[str], None] = None) -> List[Dict[str, Any]]:
+        """
+        所有 JSON-LD 对象（展开顶层数组与 @graph），types 给定时只返回匹配 @type 的（不区分大小写）
+        """
+        if isinstance(types, str):
+            types = [types]
+        result: List[Dict[str, Any]] = []
+        for blob in self.blobs:
+            if blob.kind != "jsonld":
+                continue
+            data = blob.data
+            items = data if isinstance(data, list) else [data]
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                graph = item.get("@graph")
+                for obj in (graph if isinstance(graph, list) else [item]):
+                    if isinstance(obj, dict) and (types is None or _type_matches(obj, types)):
+                        result.append(obj)
+        return result
+
+    def jsonld_first(self, types: Union[str, Sequence[str]] = "Product") -> Optional[Dict[str, Any]]:
+        found = self.jsonld(types)
+        return found[0] if found else None
+
+    def query(self, source: str, path: str, default: Any = None) -> Any:
+        """
+        source: "next_data" / "jsonld:<Type>" / "state:<变量名>" / "id:<script id>"
+        """
+        kind, _, arg = source.partition(":")
+        if kind == "next_data":
+            root = self.next_data
+        elif kind == "jsonld":
+            root = self.jsonld_first(arg or "Product")
+        elif kind == "state":
+            root = self.state(arg)
+        elif kind == "id":
+            root = self.by_id(arg)
+        else:
+            raise ValueError(f"未知来源: {source}")
+        if root is None:
+            return [] if "[*]" in path else default
+        return query(root, path, default) if path else root
+
+
+def extract_embedded_json(html: str, fallback: Optional[Decoder] = None) -> EmbeddedJson:
+    """扫描一次 HTML，返回内嵌 JSON 索引；fallback 为最后的解码手段（如 demjson3.decode）"""
+    return EmbeddedJson(html, fallback=fallback)
+
+
+# ================== JSON-LD 报价 ==================
+
+def jsonld_offers(product: Optional[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Product / ProductGroup 的所有 (变体, offer)：
+    兼容 offers 为 dict / list / AggregateOffer.offers，以及 ProductGroup.hasVariant[*].offers
+    """
+    if not isinstance(product, dict):
+        return []
+    variants = product.get("hasVariant")
+    owners = [v for v in variants if isinstance(v, dict)] if isinstance(variants, list) else [product]
+    result = []
+    for owner in owners:
+        offers = owner.get("offers")
+        if isinstance(offers, dict) and isinstance(offers.get("offers"), list):
+            offers = offers["offers"]
+        for offer in (offers if isinstance(offers, list) else [offers]):
+            if isinstance(offer, dict):
+                result.append((owner, offer))
+    return result
+
+
+def offer_in_stock(offer: Dict[str, Any]) -> bool:
+    """availability 为 InStock / LimitedAvailability / PreOrder 时视为有货"""
+    avail = str(offer.get("availability") or "").lower()
+    return any(k in avail for k in ("instock", "limitedavailability", "preorder"))
@@ -0,0 +1,424 @@
+# -*- coding: utf-8 -*-
+"""
+抓取前沿 (crawl frontier) - SQLite 持久化的 URL 状态表，支持断点续跑
+
+每个站点的每个 URL 一行：状态 / 尝试次数 / 最近错误 / 最近成功时间 / 下次可重试时间 /
+产出的 TXT 及其是否为"空壳"（价格 + 库存全空）。
+
+一次抓取 = 一个 run:
+- begin(urls): 上一轮没有正常结束（进程崩溃 / Ctrl+C）时续跑，只返回未完成的 URL；
+               否则开新一轮，全部 URL 重置为 pending
+- mark_started / mark_done / mark_failed: 每个 URL 处理过程中更新状态；商品已下架、没写 TXT 时用 mark_delisted
+- finish(): 批量正常结束时关闭 run，下次 begin 开新一轮（没调用到 finish 即视为中断）
+- begin_chunk(urls): 分布式队列 worker 每领一块 URL 单独一轮，不续跑、不影响同机其他进程的 run
+
+补抓不再重新扫描 TXT_DIR:
+- empty_urls(): 最近一次写出的 TXT 为空壳的 URL
+- failed_urls(): 最近一轮最终失败的 URL
+
+状态:
+    pending      本轮待抓
+    in_progress  已开始（进程崩溃时停留在此状态，续跑时重新抓）
+    done         已写出 TXT（empty=1 表示空壳）
+    failed       本轮失败，next_eligible_at 之后可重试
+
+使用方式:
+    from common.crawl.frontier import get_frontier
+
+    frontier = get_frontier("camper")
+    todo = frontier.begin(urls)              # 续跑时只剩未完成的
+    for url in todo:
+        frontier.mark_started(url)
+        try:
+            path = fetch_and_write(url)
+            frontier.mark_done(url, path)    # 读回 TXT 判断是否空壳
+        except Exception as e:
+            frontier.mark_failed(url, e)
+    frontier.finish()
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from cfg.paths import BASE_DIR
+from cfg.settings import SETTINGS
+from common.ingest.txt_records import txt_exists
+from common.utils.txt_parser import extract_product_info, is_empty_product_info
+
+CRAWL_FRONTIER_ENABLED = bool(SETTINGS.get("CRAWL_FRONTIER_ENABLED", True))
+CRAWL_FRONTIER_DIR = Path(SETTINGS.get("CRAWL_FRONTIER_DIR") or BASE_DIR / "_crawl_frontier")
+
+# 失败重试退避: RETRY_BASE_SEC * 2^(attempts-1)，上限 RETRY_MAX_SEC；同一轮失败 MAX_ATTEMPTS 次后不再续跑
+RETRY_BASE_SEC = 60
+RETRY_MAX_SEC = 6 * 3600
+MAX_ATTEMPTS = int(SETTINGS.get("CRAWL_FRONTIER_MAX_ATTEMPTS", 5))
+
+STATUSES = ("pending", "in_progress", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    site          TEXT NOT NULL,
+    started_at    REAL NOT NULL,
+    finished_at   REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_site ON runs(site);
+
+CREATE TABLE IF NOT EXISTS frontier (
+    site             TEXT NOT NULL,
+    url              TEXT NOT NULL,
+    run_id           INTEGER,
+    status           TEXT NOT NULL DEFAULT 'pending',
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    last_error       TEXT,
+    last_attempt_at  REAL,
+    last_success_at  REAL,
+    next_eligible_at REAL NOT NULL DEFAULT 0,
+    output_path      TEXT,
+    empty            INTEGER NOT NULL DEFAULT 0,
+    added_at         REAL NOT NULL,
+    PRIMARY KEY (site, url)
+);
+CREATE INDEX IF NOT EXISTS idx_frontier_status ON frontier(site, status);
+"""
+
+
+@dataclass
+class FrontierEntry:
+    """frontier 表中的一行"""
+    site: str
+    url: str
+    run_id: Optional[int]
+    status: str
+    attempts: int
+    last_error: Optional[str]
+    last_attempt_at: Optional[float]
+    last_success_at: Optional[float]
+    next_eligible_at: float
+    output_path: Optional[str]
+    empty: int
+    added_at: float
+
+
+def _backoff(attempts: int) -> float:
+    return min(RETRY_BASE_SEC * 2 ** max(attempts - 1, 0), RETRY_MAX_SEC)
+
+
+def is_empty_txt(path: Path | str) -> bool:
+    """TXT 是否为价格 + 库存全空的空壳（规则同 generate_empty_product_links_for_brand）"""
+    return is_empty_product_info(extract_product_info(Path(path)))
+
+
+class CrawlFrontier:
+    """单个站点的抓取前沿（线程安全，多个站点共用一个 SQLite 文件）"""
+
+    def __init__(self, site: str, root: Path | str = CRAWL_FRONTIER_DIR):
+        self.site = site
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.run_id: Optional[int] = None
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.root / "frontier.sqlite"), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    # ---------- run ----------
+
+    def begin(self, urls: Iterable[str], resume: bool = True) -> List[str]:
+        """
+        开始（或续跑）一轮抓取，返回本次需要处理的 URL（保持传入顺序）
+
+        Args:
+            urls: 本次的链接列表（links 文件内容）
+            resume: False 时即使上一轮未结束也强制开新一轮
+        """
+        urls = list(dict.fromkeys(u for u in urls if u))
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id FROM runs WHERE site = ? AND finished_at IS NULL "
+                "ORDER BY run_id DESC LIMIT 1",
+                (self.site,),
+            ).fetchone()
+            resuming = bool(resume and row)
+            if resuming:
+                self.run_id = row["run_id"]
+            else:
+                if row:
+                    self._conn.execute(
+                        "UPDATE runs SET finished_at = ? WHERE site = ? AND finished_at IS NULL",
+                        (now, self.site),
+                    )
+                self.run_id = self._conn.execute(
+                    "INSERT INTO runs (site, started_at) VALUES (?, ?)", (self.site, now)
+                ).lastrowid
+
+            # 新 URL 入表；不属于本轮的 URL 重置为 pending（续跑时本轮已有的行保持原状态）
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO frontier (site, url, added_at) VALUES (?, ?, ?)",
+                [(self.site, u, now) for u in urls],
+            )
+            self._conn.executemany(
+                "UPDATE frontier SET run_id = ?, status = 'pending', attempts = 0, next_eligible_at = 0 "
+                "WHERE site = ? AND url = ? AND (run_id IS NULL OR run_id != ?)",
+                [(self.run_id, self.site, u, self.run_id) for u in urls],
+            )
+            self._conn.commit()
+
+            rows = self._conn.execute(
+                "SELECT url, status, attempts, next_eligible_at, output_path FROM frontier "
+                "WHERE site = ? AND run_id = ?",
+                (self.site, self.run_id),
+            ).fetchall()
+
+        todo = {r["url"] for r in rows if self._needs_fetch(r, now)}
+        result = [u for u in urls if u in todo]
+        if resuming:
+            print(
+                f"🔁 [{self.site}] 续跑第 {self.run_id} 轮: 剩余 {len(result)} / {len(urls)} 条 "
+                f"(已完成的跳过)"
+            )
+        return result
+
+    def begin_chunk(self, urls: Iterable[str]) -> List[str]:
+        """
+        为分布式队列领到的一块 URL 单独开一轮，返回全部 URL（保持传入顺序）
+
+        同一台 VM 上的多个 worker 进程共用 frontier.sqlite: begin() 会续跑别的进程未结束的 run，
+        别的进程 finish() 又会把它关掉。块的 run 建立时即记为已结束，begin() 既不会续跑它、
+        也不会因此关闭其他 run；块内 URL（包括本机已 done 的、被重新租出的任务）全部重置为 pending。
+        中断由队列的租约过期负责重试，不需要 frontier 续跑。
+        """
+        urls = list(dict.fromkeys(u for u in urls if u))
+        now = time.time()
+        with self._lock:
+            self.run_id = self._conn.execute(
+                "INSERT INTO runs (site, started_at, finished_at) VALUES (?, ?, ?)", (self.site, now, now)
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO frontier (site, url, added_at) VALUES (?, ?, ?)",
+                [(self.site, u, now) for u in urls],
+            )
+            self._conn.executemany(
+                "UPDATE frontier SET run_id = ?, status = 'pending', attempts = 0, next_eligible_at = 0 "
+                "WHERE site = ? AND url = ?",
+                [(self.run_id, self.site, u) for u in urls],
+            )
+            self._conn.commit()
+        return urls
+
+    def finish(self) -> int:
+        """关闭本轮（批量正常结束时调用），返回仍停留在 pending / in_progress 的 URL 数"""
+        if self.run_id is None:
+            return 0
+        with self._lock:
+            left = self._conn.execute(
+                "SELECT COUNT(*) FROM frontier WHERE site = ? AND run_id = ? "
+                "AND status IN ('pending', 'in_progress')",
+                (self.site, self.run_id),
+            ).fetchone()[0]
+            self._conn.execute(
+                "UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), self.run_id)
+            )
+            self._conn.commit()
+        self.run_id = None
+        return left
+
+    # ---------- 单个 URL ----------
+
+    def mark_started(self, url: str) -> None:
+        self._execute(
+            "UPDATE frontier SET status = 'in_progress', last_attempt_at = ? WHERE site = ? AND url = ?",
+            (time.time(), self.site, url),
+        )
+
+    def mark_done(self, url: str, output_path: Path | str | None = None, empty: Optional[bool] = None) -> None:
+        """
+        成功写出 TXT；empty 为 None 时读回 output_path 判断是否空壳
+
+        内容未变化沿用上次 TXT 的情况也调用此方法（output_path 传上次的 TXT）。
+        """
+        if empty is None:
+            empty = bool(output_path) and is_empty_txt(output_path)
+        self._execute(
+            "INSERT INTO frontier (site, url, run_id, status, last_attempt_at, last_success_at, "
+            "output_path, empty, added_at, last_error) VALUES (?, ?, ?, 'done', ?, ?, ?, ?, ?, NULL) "
+            "ON CONFLICT(site, url) DO UPDATE SET status = 'done', last_error = NULL, "
+            "last_attempt_at = excluded.last_attempt_at, last_success_at = excluded.last_success_at, "
+            "output_path = COALESCE(excluded.output_path, output_path), empty = excluded.empty",
+            (self.site, url, self.run_id, time.time(), time.time(),
+             str(output_path) if output_path else None, int(bool(empty)), time.time()),
+        )
+
+    def mark_delisted(self, url: str) -> None:
+        """
+        页面还在但商品已下架（如价格为 0），本次没有写 TXT：按空壳记为完成并清掉上次的 TXT 路径，
+        避免 plan_fetch 把旧 TXT 当作新鲜数据沿用、或从备份恢复回来
+        """
+        now = time.time()
+        self._execute(
+            "INSERT INTO frontier (site, url, run_id, status, last_attempt_at, last_success_at, "
+            "output_path, empty, added_at, last_error) VALUES (?, ?, ?, 'done', ?, ?, NULL, 1, ?, NULL) "
+            "ON CONFLICT(site, url) DO UPDATE SET status = 'done', last_error = NULL, "
+            "last_attempt_at = excluded.last_attempt_at, last_success_at = excluded.last_success_at, "
+            "output_path = NULL, empty = 1",
+            (self.site, url, self.run_id, now, now, now),
+        )
+
+    def mark_failed(self, url: str, error: object = None) -> None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts FROM frontier WHERE site = ? AND url = ?", (self.site, url)
+            ).fetchone()
+            attempts = (row["attempts"] if row else 0) + 1
+            self._conn.execute(
+                "INSERT INTO frontier (site, url, run_id, status, attempts, last_error, last_attempt_at, "
+                "next_eligible_at, added_at) VALUES (?, ?, ?, 'failed', ?, ?, ?, ?, ?) "
+                "ON CONFLICT(site, url) DO UPDATE SET status = 'failed', attempts = excluded.attempts, "
+                "last_error = excluded.last_error, last_attempt_at = excluded.last_attempt_at, "
+                "next_eligible_at = excluded.next_eligible_at",
+                (self.site, url, self.run_id, attempts, str(error)[:500] if error is not None else None,
+                 now, now + _backoff(attempts), now),
+            )
+            self._conn.commit()
+
+    # ---------- 查询 ----------
+
+    def entry(self, url: str) -> Optional[FrontierEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM frontier WHERE site = ? AND url = ?", (self.site, url)
+            ).fetchone()
+        return FrontierEntry(**dict(row)) if row else None
+
+    def urls(self, status: Optional[str] = None, empty: Optional[bool] = None) -> List[str]:
+        """按状态 / 空壳标记筛选 URL（按 URL 排序）"""
+        sql = "SELECT url FROM frontier WHERE site = ?"
+        args: list = [self.site]
+        if status is not None:
+            if status not in STATUSES:
+                raise ValueError(f"未知状态: {status} (可选: {STATUSES})")
+            sql += " AND status = ?"
+            args.append(status)
+        if empty is not None:
+            sql += " AND empty = ?"
+            args.append(int(empty))
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY url", args).fetchall()
+        return [r["url"] for r in rows]
+
+    def empty_urls(self) -> List[str]:
+        """最近一次写出的 TXT 为空壳、且该 TXT 仍在的 URL（替代扫描 TXT_DIR）"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, output_path FROM frontier WHERE site = ? AND status = 'done' AND empty = 1 "
+                "ORDER BY url",
+                (self.site,),
+            ).fetchall()
+        return [r["url"] for r in rows if r["output_path"] and txt_exists(r["output_path"])]
+
+    def failed_urls(self) -> List[str]:
+        return self.urls(status="failed")
+
+    def fresh_outputs(self, urls: Iterable[str], max_age: float) -> Dict[str, str]:
+        """
+        max_age 秒内成功抓取过、且 TXT 不是空壳的 URL → 上次写出的 TXT 路径
+
+        TXT 文件本身是否还在由调用方判断（可能已被 backup_and_clear 清走）。
+        """
+        wanted = set(urls)
+        cutoff = time.time() - max_age
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, output_path FROM frontier WHERE site = ? AND status = 'done' AND empty = 0 "
+                "AND output_path IS NOT NULL AND last_success_at >= ?",
+                (self.site, cutoff),
+            ).fetchall()
+        return {r["url"]: r["output_path"] for r in rows if r["url"] in wanted}
+
+    def forget(self, urls: Iterable[str]) -> List[str]:
+        """从 frontier 删除这些 URL（商品已下架），返回它们最后写出的 TXT 路径"""
+        urls = list(urls)
+        with self._lock:
+            paths = [
+                r["output_path"]
+                for u in urls
+                for r in self._conn.execute(
+                    "SELECT output_path FROM frontier WHERE site = ? AND url = ?", (self.site, u)
+                ).fetchall()
+                if r["output_path"]
+            ]
+            self._conn.executemany(
+                "DELETE FROM frontier WHERE site = ? AND url = ?", [(self.site, u) for u in urls]
+            )
+            self._conn.commit()
+        return paths
+
+    def has_entries(self) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM frontier WHERE site = ? LIMIT 1", (self.site,)
+            ).fetchone()
+        return row is not None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS n, SUM(empty) AS e FROM frontier WHERE site = ? GROUP BY status",
+                (self.site,),
+            ).fetchall()
+        st = {s: 0 for s in STATUSES}
+        st["empty"] = 0
+        for r in rows:
+            st[r["status"]] = r["n"]
+            if r["status"] == "done":
+                st["empty"] = r["e"] or 0
+        return st
+
+    def format_stats(self) -> str:
+        st = self.stats()
+        return (
+            f"🗂️ frontier [{self.site}] done={st['done']} (空壳 {st['empty']}) "
+            f"failed={st['failed']} pending={st['pending'] + st['in_progress']}"
+        )
+
+    # ---------- 内部 ----------
+
+    @staticmethod
+    def _needs_fetch(row: sqlite3.Row, now: float) -> bool:
+        if row["status"] in ("pending", "in_progress"):
+            return True
+        if row["status"] == "failed":
+            return row["attempts"] < MAX_ATTEMPTS and row["next_eligible_at"] <= now
+        # done 但 TXT 已被清理（如 backup_and_clear_brand_dirs）→ 重抓
+        return bool(row["output_path"]) and not txt_exists(row["output_path"])
+
+    def _execute(self, sql: str, args: tuple) -> None:
+        with self._lock:
+            self._conn.execute(sql, args)
+            self._conn.commit()
+
+
+_FRONTIERS: Dict[str, CrawlFrontier] = {}
+_FRONTIERS_LOCK = threading.Lock()
+
+
+def get_frontier(site: str) -> Optional[CrawlFrontier]:
+    """进程级 frontier（每个站点一个实例）；SETTINGS["CRAWL_FRONTIER_ENABLED"] 为 False 时返回 None"""
+    if not CRAWL_FRONTIER_ENABLED:
+        return None
+    with _FRONTIERS_LOCK:
+        if site not in _FRONTIERS:
+            _FRONTIERS[site] = CrawlFrontier(site)
+        return _FRONTIERS[site]
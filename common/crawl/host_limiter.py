@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+"""
+按 host 自适应并发 (AIMD) - requests / aiohttp 抓取共用
+
+以前每个脚本手写并发数（geox MAX_THREADS = 8、"被限速时调到 4"、camper max_workers=1 ...）。
+现在线程池 / 协程可以开得比较大，真正的在途请求数由本模块按 host 控制:
+
+- 加性增: 请求成功且延迟、错误率正常时，每满一个窗口 (≈ limit 个成功请求) limit += 1
+- 乘性减: 429 / 503 / 超时 / 连接错误时 limit *= BACKOFF_FACTOR（上次减小之前发出的请求
+          再失败不重复减，相当于每个 RTT 最多减一次），
+          带 Retry-After 时该 host 暂停到指定时间
+- 延迟变差 (EWMA 超过基线 LATENCY_FACTOR 倍) 或错误率偏高时只保持、不再增长
+- 学到的 limit 按 host 存盘，下次运行从上次的值开始
+
+使用方式 (requests, 线程池):
+    from common.crawl.host_limiter import get_host_limiter
+
+    limiter = get_host_limiter()
+    with limiter.slot(url) as slot:
+        r = session.get(url, timeout=15)
+        slot.record(r.status_code)          # 不调用时按"无异常 = 成功"记
+
+使用方式 (aiohttp):
+    async with limiter.aslot(url) as slot:
+        async with session.get(url) as resp:
+            slot.record(resp.status)
+
+with 块内抛出的超时 / 连接错误 / 带 response 的 HTTPError 会自动记为对应结果。
+aslot 等待名额时挂在该 host 的等待队列上（不轮询），名额释放 / limit 变化时按空出的名额数依次唤醒。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from cfg.paths import BASE_DIR
+from cfg.settings import SETTINGS
+
+HOST_LIMIT_INITIAL = int(SETTINGS.get("HOST_CONCURRENCY_INITIAL", 4))
+HOST_LIMIT_MIN = 1
+HOST_LIMIT_MAX = int(SETTINGS.get("HOST_CONCURRENCY_MAX", 16))
+HOST_LIMITS_FILE = Path(SETTINGS.get("HOST_LIMITS_FILE") or BASE_DIR / "_crawl_frontier" / "host_limits.json")
+
+BACKOFF_FACTOR = 0.5        # 乘性减系数
+LATENCY_FACTOR = 2.0        # EWMA 延迟超过基线该倍数时停止增长
+ERROR_RATE_HOLD = 0.10      # 错误率 EWMA 超过该值时停止增长
+EWMA_ALPHA = 0.2
+MAX_RETRY_AFTER = 120.0     # Retry-After 最多暂停多久（秒）
+ASYNC_WAIT_MAX = 5.0        # aslot 等待者最长多久自查一次（兜底，正常由释放名额时唤醒）
+
+THROTTLE_STATUSES = {429, 503}
+ERROR_STATUSES = {500, 502, 504}
+
+
+@dataclass
+class HostState:
+    """单个 host 的并发状态"""
+    limit: float = float(HOST_LIMIT_INITIAL)
+    in_flight: int = 0
+    latency_ewma: Optional[float] = None
+    latency_base: Optional[float] = None      # 观察到的较低延迟（缓慢上漂）
+    error_ewma: float = 0.0
+    paused_until: float = 0.0
+    last_decrease: float = 0.0
+    successes: int = 0
+    throttled: int = 0
+    errors: int = 0
+    peak_limit: float = field(default=float(HOST_LIMIT_INITIAL))
+    async_waking: int = 0                     # 已唤醒、还没回来抢名额的异步等待者数
+
+
+class Slot:
+    """一次请求占用的并发名额；record() 记录结果，退出 with 时释放"""
+
+    def __init__(self, limiter: "AdaptiveHostLimiter", host: str):
+        self._limiter = limiter
+        self.host = host
+        self._t0 = time.perf_counter()
+        self._started = time.monotonic()
+        self._outcome: Optional[tuple] = None
+
+    def record(self, status: Optional[int] = None, retry_after: Optional[str | float] = None,
+               error: bool = False) -> None:
+        """status: HTTP 状态码；error: 超时 / 连接错误等无状态码的失败"""
+        self._outcome = (status, retry_after, error)
+
+    def _finish(self, exc: Optional[BaseException]) -> None:
+        latency = time.perf_counter() - self._t0
+        if self._outcome is None:
+            if exc is None:
+                self._outcome = (None, None, False)
+            else:
+                resp = getattr(exc, "response", None)
+                status = getattr(resp, "status_code", None) or getattr(exc, "status", None)
+                retry_after = getattr(resp, "headers", {}).get("Retry-After") if resp is not None else None
+                # 解析异常等非网络错误不计入 host 健康度
+                self._outcome = (status, retry_after, status is None and _is_network_error(exc))
+        status, retry_after, error = self._outcome
+        self._limiter._release(self.host, self._started, latency, status, retry_after, error)
+
+    def __enter__(self) -> "Slot":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._finish(exc)
+
+
+def _is_network_error(exc: BaseException) -> bool:
+    if isinstance(exc, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    name = type(exc).__name__
+    return any(k in name for k in ("Timeout", "ConnectionError", "ClientConnector", "ServerDisconnected"))
+
+
+def _parse_retry_after(value) -> float:
+    try:
+        return min(max(float(value), 0.0), MAX_RETRY_AFTER)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def host_of(url_or_host: str) -> str:
+    return urlparse(url_or_host).netloc or url_or_host
+
+
+class AdaptiveHostLimiter:
+    """按 host 的 AIMD 并发控制器（线程安全；异步接口在事件循环里挂起等待唤醒，不阻塞事件循环）"""
+
+    def __init__(
+        self,
+        state_file: Optional[Path | str] = HOST_LIMITS_FILE,
+        initial: int = HOST_LIMIT_INITIAL,
+        max_limit: int = HOST_LIMIT_MAX,
+    ):
+        self.state_file = Path(state_file) if state_file else None
+        self.initial = initial
+        self.max_limit = max_limit
+        self._cond = threading.Condition()
+        self._hosts: Dict[str, HostState] = {}
+        self._learned: Dict[str, float] = self._load()
+        # host → 等待名额的协程 (所属事件循环, future)，先来先唤醒
+        self._async_waiters: Dict[str, Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+
+    # ---------- 占用 / 释放 ----------
+
+    def slot(self, url_or_host: str, timeout: Optional[float] = None) -> Slot:
+        """阻塞直到该 host 有空闲名额"""
+        host = host_of(url_or_host)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                wait = self._try_acquire(host)
+                if wait == 0:
+                    return Slot(self, host)
+                if deadline is not None:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        raise TimeoutError(f"等待 {host} 并发名额超时")
+                    wait = min(wait, left)
+                self._cond.wait(wait)
+
+    def aslot(self, url_or_host: str) -> "_AsyncSlotCtx":
+        return _AsyncSlotCtx(self, host_of(url_or_host))
+
+    def _try_acquire(self, host: str) -> float:
+        """返回 0 表示已占用名额，否则返回建议等待秒数（调用方持有锁）"""
+        st = self._state(host)
+        now = time.monotonic()
+        if st.paused_until > now:
+            return st.paused_until - now
+        if st.in_flight < max(HOST_LIMIT_MIN, int(st.limit)):
+            st.in_flight += 1
+            return 0.0
+        return 0.5
+
+    def _release(self, host: str, started: float, latency: float, status: Optional[int],
+                 retry_after, error: bool) -> None:
+        with self._cond:
+            st = self._state(host)
+            st.in_flight = max(0, st.in_flight - 1)
+            now = time.monotonic()
+
+            throttled = status in THROTTLE_STATUSES or error
+            failed = throttled or status in ERROR_STATUSES
+            st.error_ewma = (1 - EWMA_ALPHA) * st.error_ewma + EWMA_ALPHA * (1.0 if failed else 0.0)
+
+            if throttled:
+                st.throttled += 1
+                # 同一批在途请求一起失败时只减一次
+                if started >= st.last_decrease:
+                    st.limit = max(float(HOST_LIMIT_MIN), st.limit * BACKOFF_FACTOR)
+                    st.last_decrease = now
+                pause = _parse_retry_after(retry_after)
+                if pause:
+                    st.paused_until = max(st.paused_until, now + pause)
+            elif failed:
+                st.errors += 1
+            else:
+                st.successes += 1
+                st.latency_ewma = latency if st.latency_ewma is None else (
+                    (1 - EWMA_ALPHA) * st.latency_ewma + EWMA_ALPHA * latency
+                )
+                if st.latency_base is None or latency < st.latency_base:
+                    st.latency_base = latency
+                else:
+                    st.latency_base *= 1.01     # 网络整体变慢时基线缓慢跟上
+                healthy = (
+                    st.latency_ewma <= st.latency_base * LATENCY_FACTOR
+                    and st.error_ewma <= ERROR_RATE_HOLD
+                )
+                # 只有名额用满时才增长（否则增长没有依据）
+                if healthy and st.in_flight + 1 >= int(st.limit):
+                    st.limit = min(float(self.max_limit), st.limit + 1.0 / st.limit)
+                    st.peak_limit = max(st.peak_limit, st.limit)
+
+            self._learned[host] = st.limit
+            self._cond.notify_all()
+            self._wake_async(host, st)
+
+    def _wake_async(self, host: str, st: HostState) -> None:
+        """按空出的名额数唤醒该 host 的异步等待者（调用方持有锁；暂停中不唤醒，等待者按暂停时长自行醒来）"""
+        waiters = self._async_waiters.get(host)
+        if not waiters or st.paused_until > time.monotonic():
+            return
+        free = max(HOST_LIMIT_MIN, int(st.limit)) - st.in_flight - st.async_waking
+        while waiters and free > 0:
+            loop, fut = waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_resolve_waiter, fut)
+            except RuntimeError:      # 事件循环已关闭
+                continue
+            st.async_waking += 1
+            free -= 1
+
+    def _state(self, host: str) -> HostState:
+        st = self._hosts.get(host)
+        if st is None:
+            start = self._learned.get(host, float(self.initial))
+            start = min(max(float(HOST_LIMIT_MIN), start), float(self.max_limit))
+            st = HostState(limit=start, peak_limit=start)
+            self._hosts[host] = st
+        return st
+
+    # ---------- 统计 / 持久化 ----------
+
+    def limit(self, url_or_host: str) -> int:
+        with self._cond:
+            return int(self._state(host_of(url_or_host)).limit)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._cond:
+            return {
+                host: {
+                    "limit": round(st.limit, 2),
+                    "peak": round(st.peak_limit, 2),
+                    "in_flight": st.in_flight,
+                    "ok": st.successes,
+                    "throttled": st.throttled,
+                    "errors": st.errors,
+                    "latency_ms": round((st.latency_ewma or 0) * 1000),
+                }
+                for host, st in self._hosts.items()
+            }
+
+    def format_stats(self) -> str:
+        lines = []
+        for host, s in sorted(self.stats().items()):
+            lines.append(
+                f"🚦 {host}: limit={s['limit']} (峰值 {s['peak']}) ok={s['ok']} "
+                f"限流={s['throttled']} 错误={s['errors']} 延迟≈{s['latency_ms']}ms"
+            )
+        return "\n".join(lines)
+
+    def save(self) -> None:
+        if self.state_file is None:
+            return
+        with self._cond:
+            data = {h: round(v, 2) for h, v in self._learned.items()}
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_file.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+            tmp.replace(self.state_file)
+        except Exception as e:
+            print(f"[host_limiter] ⚠️ 保存并发状态失败: {e}")
+
+    def _load(self) -> Dict[str, float]:
+        if self.state_file is None or not self.state_file.exists():
+            return {}
+        try:
+            raw = json.loads(self.state_file.read_text(encoding="utf-8"))
+            return {str(h): float(v) for h, v in raw.items()}
+        except Exception:
+            return {}
+
+
+class _AsyncSlotCtx:
+    """async with limiter.aslot(url) —— 等待名额时让出事件循环"""
+
+    def __init__(self, limiter: AdaptiveHostLimiter, host: str):
+        self._limiter = limiter
+        self._host = host
+        self._slot: Optional[Slot] = None
+
+    async def __aenter__(self) -> Slot:
+        limiter, host = self._limiter, self._host
+        loop = asyncio.get_running_loop()
+        woken = False
+        while True:
+            with limiter._cond:
+                st = limiter._state(host)
+                if woken:
+                    st.async_waking = max(0, st.async_waking - 1)
+                wait = limiter._try_acquire(host)
+                if wait == 0:
+                    self._slot = Slot(limiter, host)
+                    return self._slot
+                paused = st.paused_until > time.monotonic()
+                waiter = (loop, loop.create_future())
+                queue = limiter._async_waiters.setdefault(host, deque())
+                # 被唤醒后名额又被线程 / 新来的协程抢走：排回队首，不丢掉顺序
+                queue.appendleft(waiter) if woken else queue.append(waiter)
+            try:
+                await asyncio.wait({waiter[1]}, timeout=wait if paused else ASYNC_WAIT_MAX)
+            except asyncio.CancelledError:
+                with limiter._cond:
+                    if not self._dequeue(waiter):
+                        # 已被唤醒但不再需要名额：让给下一个等待者
+                        st.async_waking = max(0, st.async_waking - 1)
+                        limiter._wake_async(host, st)
+                raise
+            with limiter._cond:
+                # 超时醒来时还在队列里；被唤醒的已出队。两种都回到开头抢名额
+                woken = not self._dequeue(waiter)
+
+    def _dequeue(self, waiter) -> bool:
+        """从等待队列移除（调用方持有锁），返回是否还在队列里（即尚未被唤醒）"""
+        queue = self._limiter._async_waiters.get(self._host)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            return True
+        return False
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._slot is not None:
+            self._slot._finish(exc)
+
+
+def _resolve_waiter(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+_LIMITER: Optional[AdaptiveHostLimiter] = None
+_LIMITER_LOCK = threading.Lock()
+
+
+def get_host_limiter() -> AdaptiveHostLimiter:
+    """进程级控制器；退出时自动保存学到的 limit"""
+    global _LIMITER
+    with _LIMITER_LOCK:
+        if _LIMITER is None:
+            _LIMITER = AdaptiveHostLimiter()
+            atexit.register(_LIMITER.save)
+        return _LIMITER
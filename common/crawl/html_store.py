@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+原始 HTML 快照库 - 内容寻址 + 条件请求
+
+每个抓到的页面按 sha256 压缩存盘 (objects/ab/<sha>.html.gz)，相同内容只存一份；
+SQLite 索引记录 URL / 抓取时间 / ETag / Last-Modified / 内容指纹。
+
+用途:
+- 解析器修复后可离线重放，不必重新爬整站
+- 下次抓取时发 If-None-Match / If-Modified-Since，304 直接取本地快照
+- 内容指纹与上次相同且上次产出的 TXT 还在时跳过解析
+
+目录结构:
+    <HTML_STORE_DIR>/
+        index.sqlite
+        objects/ab/abcdef....html.gz
+
+使用方式 (requests):
+    from common.crawl.html_store import fetch_with_store, get_html_store
+
+    page = fetch_with_store(client, url, site="geox", timeout=15)   # HttpClient 或 requests.Session
+    if get_html_store().can_skip(url, page.changed):
+        return   # 内容没变，上次的 TXT 仍有效
+    info = parse(page.html)
+    format_txt(info, path)
+    get_html_store().mark_output(url, path)
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from cfg.paths import BASE_DIR
+from cfg.settings import SETTINGS
+from common.crawl.host_limiter import get_host_limiter
+from common.crawl.http_client import HttpClient
+from common.ingest.txt_records import txt_exists
+
+HTML_STORE_ENABLED = bool(SETTINGS.get("HTML_STORE_ENABLED", True))
+HTML_STORE_DIR = Path(SETTINGS.get("HTML_STORE_DIR") or BASE_DIR / "_html_store")
+
+# 计算内容指纹前去掉的易变片段（CSP nonce / CSRF token / 请求 id），否则每次抓取指纹都不同
+_VOLATILE_PATTERNS = [
+    re.compile(rb'\snonce="[^"]*"'),
+    re.compile(rb'name="csrf[-_]token"\s+content="[^"]*"', re.I),
+    re.compile(rb'"(?:requestId|traceId|csrfToken|nonce)"\s*:\s*"[^"]*"'),
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fetches (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    url           TEXT NOT NULL,
+    site          TEXT,
+    fetched_at    REAL NOT NULL,
+    status        INTEGER,
+    sha256        TEXT,
+    fingerprint   TEXT,
+    etag          TEXT,
+    last_modified TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_fetches_url ON fetches(url);
+
+CREATE TABLE IF NOT EXISTS latest (
+    url           TEXT PRIMARY KEY,
+    site          TEXT,
+    fetched_at    REAL NOT NULL,
+    sha256        TEXT NOT NULL,
+    fingerprint   TEXT NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    bytes         INTEGER,
+    output_path   TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_latest_site ON latest(site);
+"""
+
+
+@dataclass
+class Snapshot:
+    """某个 URL 最近一次快照的索引记录"""
+    url: str
+    site: str
+    fetched_at: float
+    sha256: str
+    fingerprint: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    bytes: int = 0
+    output_path: Optional[str] = None
+
+
+@dataclass
+class StoredPage:
+    """fetch_with_store / put 的结果"""
+    url: str
+    html: str
+    status: int
+    changed: bool           # 内容指纹与上次不同（首次抓取也算 changed）
+    not_modified: bool = False   # 服务器返回 304，html 来自本地快照
+
+
+def object_path(root: Path | str, sha256: str) -> Path:
+    """快照文件路径（子进程只读快照时不必打开 SQLite 索引）"""
+    return Path(root) / "objects" / sha256[:2] / f"{sha256}.html.gz"
+
+
+def load_object(root: Path | str, sha256: str) -> Optional[str]:
+    """按 sha256 读出快照 HTML；文件不存在返回 None"""
+    try:
+        with gzip.open(object_path(root, sha256), "rb") as f:
+            return f.read().decode("utf-8", errors="ignore")
+    except FileNotFoundError:
+        return None
+
+
+def _fingerprint(raw: bytes) -> str:
+    for pat in _VOLATILE_PATTERNS:
+        raw = pat.sub(b"", raw)
+    return hashlib.sha256(raw).hexdigest()
+
+
+class HtmlSnapshotStore:
+    """内容寻址的 HTML 快照库（线程安全）"""
+
+    def __init__(self, root: Path | str = HTML_STORE_DIR):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    # ---------- 写 ----------
+
+    def put(
+        self,
+        url: str,
+        html: str | bytes,
+        site: str = "",
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        status: int = 200,
+    ) -> StoredPage:
+        """存一次抓取结果；内容变化时清空上次的 output_path（旧 TXT 不再对应当前内容）"""
+        raw = html.encode("utf-8") if isinstance(html, str) else html
+        sha = hashlib.sha256(raw).hexdigest()
+        fp = _fingerprint(raw)
+        self._write_object(sha, raw)
+
+        now = time.time()
+        with self._lock:
+            prev = self._conn.execute(
+                "SELECT fingerprint, output_path FROM latest WHERE url = ?", (url,)
+            ).fetchone()
+            changed = prev is None or prev["fingerprint"] != fp
+            output_path = None if changed else prev["output_path"]
+
+            self._conn.execute(
+                "INSERT INTO fetches (url, site, fetched_at, status, sha256, fingerprint, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, site, now, status, sha, fp, etag, last_modified),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO latest "
+                "(url, site, fetched_at, sha256, fingerprint, etag, last_modified, bytes, output_path) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, site, now, sha, fp, etag, last_modified, len(raw), output_path),
+            )
+            self._conn.commit()
+
+        text = html if isinstance(html, str) else raw.decode("utf-8", errors="ignore")
+        return StoredPage(url=url, html=text, status=status, changed=changed)
+
+    def touch_not_modified(self, url: str, site: str = "") -> Optional[StoredPage]:
+        """服务器返回 304：记一次抓取，返回本地快照；本地快照丢失时返回 None"""
+        snap = self.latest(url)
+        if snap is None:
+            return None
+        html = self.load(snap.sha256)
+        if html is None:
+            return None
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO fetches (url, site, fetched_at, status, sha256, fingerprint, etag, last_modified) "
+                "VALUES (?, ?, ?, 304, ?, ?, ?, ?)",
+                (url, site or snap.site, now, snap.sha256, snap.fingerprint, snap.etag, snap.last_modified),
+            )
+            self._conn.execute("UPDATE latest SET fetched_at = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+        return StoredPage(url=url, html=html, status=304, changed=False, not_modified=True)
+
+    def mark_output(self, url: str, output_path: Path | str) -> None:
+        """记录该 URL 当前快照解析出的 TXT 路径（用于下次跳过解析）"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE latest SET output_path = ? WHERE url = ?", (str(output_path), url)
+            )
+            self._conn.commit()
+
+    # ---------- 读 ----------
+
+    def latest(self, url: str) -> Optional[Snapshot]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM latest WHERE url = ?", (url,)).fetchone()
+        return Snapshot(**dict(row)) if row else None
+
+    def load(self, sha256: str) -> Optional[str]:
+        return load_object(self.root, sha256)
+
+    def load_latest(self, url: str) -> Optional[str]:
+        snap = self.latest(url)
+        return self.load(snap.sha256) if snap else None
+
+    def iter_latest(self, site: Optional[str] = None) -> Iterator[Snapshot]:
+        """遍历各 URL 的最新快照（离线重放用）"""
+        sql = "SELECT * FROM latest"
+        args: tuple = ()
+        if site:
+            sql += " WHERE site = ?"
+            args = (site,)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY url", args).fetchall()
+        for row in rows:
+            yield Snapshot(**dict(row))
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """上次响应带了 ETag / Last-Modified 时，返回对应的条件请求头"""
+        snap = self.latest(url)
+        headers: Dict[str, str] = {}
+        if snap is None or not self._object_path(snap.sha256).exists():
+            return headers
+        if snap.etag:
+            headers["If-None-Match"] = snap.etag
+        if snap.last_modified:
+            headers["If-Modified-Since"] = snap.last_modified
+        return headers
+
+    def can_skip(self, url: str, changed: bool) -> bool:
+        """内容未变化且上次产出的 TXT 仍存在 → 可跳过解析"""
+        if changed:
+            return False
+        snap = self.latest(url)
+        return bool(snap and snap.output_path and txt_exists(snap.output_path))
+
+    # ---------- 内部 ----------
+
+    def _object_path(self, sha256: str) -> Path:
+        return object_path(self.root, sha256)
+
+    def _write_object(self, sha256: str, raw: bytes) -> None:
+        path = self._object_path(sha256)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with gzip.open(tmp, "wb", compresslevel=6) as f:
+            f.write(raw)
+        tmp.replace(path)
+
+
+_STORE: Optional[HtmlSnapshotStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_html_store() -> Optional[HtmlSnapshotStore]:
+    """进程级快照库；SETTINGS["HTML_STORE_ENABLED"] 为 False 时返回 None"""
+    global _STORE
+    if not HTML_STORE_ENABLED:
+        return None
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = HtmlSnapshotStore()
+        return _STORE
+
+
+def _limited_get(session, url: str, headers, timeout: float, **kwargs):
+    if isinstance(session, HttpClient):
+        # 客户端自己按 host 限流、重试并统计
+        return session.get(url, headers=headers, timeout=timeout, **kwargs)
+    with get_host_limiter().slot(url) as slot:
+        r = session.get(url, headers=headers, timeout=timeout, **kwargs)
+        slot.record(r.status_code, r.headers.get("Retry-After"))
+    return r
+
+
+def fetch_with_store(session, url: str, site: str = "", timeout: float = 20, **kwargs) -> StoredPage:
+    """
+    requests.Session / HttpClient 版抓取：带条件请求头 GET，结果写入快照库
+
+    - 304 → 返回本地快照 (changed=False)
+    - 200 → 存快照，changed 表示内容指纹是否变化（正文为空时不存，由调用方决定是否重试）
+    - 其他状态 → raise_for_status() 抛出 (与原 fetcher 行为一致)
+    快照库关闭时等价于普通 GET，changed 恒为 True。
+    每次 GET 占用 common.crawl.host_limiter 的一个 host 并发名额 (AIMD 自适应)。
+    """
+    store = get_html_store()
+    headers = dict(kwargs.pop("headers", None) or {})
+    if store is not None:
+        headers.update(store.conditional_headers(url))
+
+    r = _limited_get(session, url, headers or None, timeout, **kwargs)
+
+    if r.status_code == 304 and store is not None:
+        page = store.touch_not_modified(url, site)
+        if page is not None:
+            return page
+        # 本地快照丢失：去掉条件头重新拉一次
+        headers.pop("If-None-Match", None)
+        headers.pop("If-Modified-Since", None)
+        r = _limited_get(session, url, headers or None, timeout, **kwargs)
+
+    r.raise_for_status()
+    # 空正文不进快照库：否则带着它的 ETag 下次拿到 304，就一直是空页
+    if store is None or not r.text.strip():
+        return StoredPage(url=url, html=r.text, status=r.status_code, changed=True)
+    return store.put(
+        url,
+        r.text,
+        site=site,
+        etag=r.headers.get("ETag"),
+        last_modified=r.headers.get("Last-Modified"),
+        status=r.status_code,
+    )
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+统一的 requests 抓取客户端 - 连接池 / keep-alive / 压缩 / 重试退避 / 按 host 统计
+
+以前每个 fetcher 各写一套：camper 线程本地 Session、geox 8 个线程共用一个 Session、
+ecco 全局 Session + HTTPAdapter(Retry)、reiss 直接 requests.get + sleep(1.2) 重试，
+连接复用和重试行为各不相同，也无从比较。现在统一为 HttpClient:
+
+- 连接池: 同一个 client 的所有线程共用一个 HTTPAdapter（urllib3 连接池线程安全），
+          每个 host 保留 pool_size 个 keep-alive 连接，pool_size 按线程数设置
+- Session: 每个线程一个（requests.Session 本身不保证线程安全），共用 headers 与 cookie
+- 压缩: Accept-Encoding gzip / deflate（装了 brotli 时加 br）
+- 重试: 超时 / 连接错误 / 429 / 5xx 按指数退避 + 抖动重试；每次尝试都占一个
+        common.crawl.host_limiter 名额，429 / Retry-After 会让 AIMD 收缩并暂停该 host
+- 统计: 按 host 记录请求数 / 状态码 / 字节数 / 延迟直方图 / 重试次数 / 新建连接数
+
+使用方式:
+    from common.crawl.http_client import get_http_client
+
+    client = get_http_client("geox", headers=HEADERS, pool_size=MAX_THREADS)
+    r = client.get(url, timeout=15)          # 已含重试；最终状态码由调用方 raise_for_status
+    page = fetch_with_store(client, url, site="geox")   # 也可直接传给快照库
+    print(client.format_stats())
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cfg.settings import SETTINGS
+from common.crawl.host_limiter import get_host_limiter, host_of
+
+try:
+    import brotli  # noqa: F401  requests 装了 brotli 才能解 br
+    _ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    _ACCEPT_ENCODING = "gzip, deflate"
+
+HTTP_POOL_SIZE = int(SETTINGS.get("HTTP_POOL_SIZE", 16))
+HTTP_TIMEOUT = float(SETTINGS.get("HTTP_TIMEOUT", 20))
+HTTP_RETRIES = int(SETTINGS.get("HTTP_RETRIES", 2))
+HTTP_BACKOFF = float(SETTINGS.get("HTTP_BACKOFF", 0.8))
+HTTP_BACKOFF_MAX = 30.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# 延迟直方图分桶上限（秒）
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, float("inf"))
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/126.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-GB,en;q=0.9",
+}
+
+
+@dataclass
+class HostStats:
+    """单个 host 的请求统计"""
+    requests: int = 0
+    retries: int = 0
+    errors: int = 0
+    bytes: int = 0
+    latency_sum: float = 0.0
+    statuses: Counter = field(default_factory=Counter)
+    histogram: list = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS))
+
+    def observe(self, latency: float, status: Optional[int], nbytes: int) -> None:
+        self.requests += 1
+        self.latency_sum += latency
+        self.bytes += nbytes
+        if status is None:
+            self.errors += 1
+        else:
+            self.statuses[status] += 1
+        for i, upper in enumerate(LATENCY_BUCKETS):
+            if latency <= upper:
+                self.histogram[i] += 1
+                break
+
+    def percentile(self, q: float) -> float:
+        """按直方图估算分位数（返回所在桶的上限，秒）"""
+        if not self.requests:
+            return 0.0
+        target, seen = q * self.requests, 0
+        for upper, n in zip(LATENCY_BUCKETS, self.histogram):
+            seen += n
+            if seen >= target:
+                return upper
+        return LATENCY_BUCKETS[-1]
+
+
+class HttpClient:
+    """一组抓取线程共用的 HTTP 客户端（线程安全）"""
+
+    def __init__(
+        self,
+        name: str = "default",
+        headers: Optional[Dict[str, str]] = None,
+        pool_size: int = HTTP_POOL_SIZE,
+        retries: int = HTTP_RETRIES,
+        backoff: float = HTTP_BACKOFF,
+        timeout: float = HTTP_TIMEOUT,
+        use_host_limiter: bool = True,
+    ):
+        self.name = name
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.timeout = timeout
+        self.use_host_limiter = use_host_limiter
+        self.headers = {**DEFAULT_HEADERS, "Accept-Encoding": _ACCEPT_ENCODING, "Connection": "keep-alive"}
+        self.headers.update(headers or {})
+        self.cookies = requests.cookies.RequestsCookieJar()
+
+        self.pool_size = 0
+        self._adapter: Optional[HTTPAdapter] = None
+        self._generation = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, HostStats] = {}
+        self.ensure_pool_size(pool_size)
+
+    # ---------- 连接池 ----------
+
+    def ensure_pool_size(self, pool_size: int) -> None:
+        """连接池至少容纳 pool_size 个并发连接（线程数变大时调用）"""
+        with self._lock:
+            if pool_size <= self.pool_size:
+                return
+            self.pool_size = pool_size
+            # 重试由 get() 自己做（需要经过 host_limiter 并计入统计），适配器层不重试
+            self._adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_size, max_retries=0)
+            self._generation += 1
+
+    @property
+    def session(self) -> requests.Session:
+        """当前线程的 Session（共用连接池、headers、cookie）"""
+        sess = getattr(self._local, "session", None)
+        if sess is None or getattr(self._local, "generation", None) != self._generation:
+            sess = requests.Session()
+            sess.headers.update(self.headers)
+            sess.cookies = self.cookies
+            sess.mount("https://", self._adapter)
+            sess.mount("http://", self._adapter)
+            self._local.session = sess
+            self._local.generation = self._generation
+        return sess
+
+    # ---------- 请求 ----------
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def request(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> requests.Response:
+        """
+        发请求；超时 / 连接错误 / 429 / 5xx 时退避重试
+
+        返回最后一次的 Response（状态码由调用方判断）；所有尝试都是网络异常时抛出最后一个异常。
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        retries = self.retries if retries is None else retries
+        host = host_of(url)
+        limiter = get_host_limiter() if self.use_host_limiter else None
+
+        for attempt in range(retries + 1):
+            if attempt:
+                st = self._stat(host)
+                with self._lock:
+                    st.retries += 1
+            t0 = time.perf_counter()
+            resp = None
+            try:
+                if limiter is not None:
+                    with limiter.slot(url) as slot:
+                        t0 = time.perf_counter()      # 不计排队等名额的时间
+                        resp = self.session.request(method, url, **kwargs)
+                        slot.record(resp.status_code, resp.headers.get("Retry-After"))
+                else:
+                    resp = self.session.request(method, url, **kwargs)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                self._observe(host, time.perf_counter() - t0, None, 0)
+                if attempt >= retries:
+                    raise
+                print(f"[http:{self.name}] ⚠️ {type(e).__name__} 第 {attempt + 1} 次: {url}")
+                self._sleep(attempt, None)
+                continue
+
+            nbytes = int(resp.headers.get("Content-Length") or 0) if kwargs.get("stream") else len(resp.content)
+            self._observe(host, time.perf_counter() - t0, resp.status_code, nbytes)
+            if resp.status_code not in RETRY_STATUSES or attempt >= retries:
+                return resp
+            self._sleep(attempt, resp.headers.get("Retry-After"))
+        return resp
+
+    def _sleep(self, attempt: int, retry_after) -> None:
+        delay = min(self.backoff * 2 ** attempt, HTTP_BACKOFF_MAX)
+        try:
+            delay = max(delay, min(float(retry_after), HTTP_BACKOFF_MAX))
+        except (TypeError, ValueError):
+            pass
+        time.sleep(delay * random.uniform(0.8, 1.2))
+
+    # ---------- 统计 ----------
+
+    def _stat(self, host: str) -> HostStats:
+        with self._lock:
+            st = self._stats.get(host)
+            if st is None:
+                st = self._stats[host] = HostStats()
+            return st
+
+    def _observe(self, host: str, latency: float, status: Optional[int], nbytes: int) -> None:
+        st = self._stat(host)
+        with self._lock:
+            st.observe(latency, status, nbytes)
+
+    def _connections(self) -> Dict[str, int]:
+        """每个 host 新建过的 TCP 连接数（越少说明 keep-alive 复用越好）"""
+        result: Dict[str, int] = {}
+        adapter = self._adapter
+        if adapter is None:
+            return result
+        for key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is not None:
+                result[pool.host] = result.get(pool.host, 0) + pool.num_connections
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        conns = self._connections()
+        with self._lock:
+            return {
+                host: {
+                    "requests": st.requests,
+                    "retries": st.retries,
+                    "errors": st.errors,
+                    "bytes": st.bytes,
+                    "avg_ms": round(st.latency_sum / st.requests * 1000) if st.requests else 0,
+                    "p50_s": st.percentile(0.5),
+                    "p95_s": st.percentile(0.95),
+                    "statuses": dict(st.statuses),
+                    "histogram": dict(zip(LATENCY_BUCKETS, st.histogram)),
+                    "connections": conns.get(host.split(":")[0], 0),
+                }
+                for host, st in self._stats.items()
+            }
+
+    def format_stats(self) -> str:
+        lines = []
+        for host, s in sorted(self.stats().items()):
+            statuses = " ".join(f"{k}×{v}" for k, v in sorted(s["statuses"].items())) or "-"
+            lines.append(
+                f"🌐 [{self.name}] {host}: 请求 {s['requests']} (重试 {s['retries']}, 网络错误 {s['errors']}) "
+                f"状态 {statuses} | {s['bytes'] / 1024 / 1024:.1f} MB | 平均 {s['avg_ms']}ms "
+                f"p50≤{s['p50_s']}s p95≤{s['p95_s']}s | 新建连接 {s['connections']}"
+            )
+        return "\n".join(lines)
+
+
+_CLIENTS: Dict[str, HttpClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_http_client(name: str, pool_size: Optional[int] = None, **kwargs) -> HttpClient:
+    """
+    进程级客户端（每个 name 一个）；首次调用时的 headers / retries 等参数生效，
+    之后的调用只会按 pool_size 扩大连接池
+    """
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(name)
+        if client is None:
+            client = _CLIENTS[name] = HttpClient(name, pool_size=pool_size or HTTP_POOL_SIZE, **kwargs)
+            return client
+    if pool_size:
+        client.ensure_pool_size(pool_size)
+    return client
@@ -0,0 +1,619 @@
+# -*- coding: utf-8 -*-
+"""
+分布式抓取队列 - Postgres 任务表 + SELECT ... FOR UPDATE SKIP LOCKED，多台 VM 一起抓
+
+以前一次抓取只能在一台机器上跑完。现在:
+
+协调端（跑流水线的那台）:
+- enqueue(batch, site, urls): 采集完链接后把要抓的 URL 写入 crawl_jobs（同一批次内去重；
+  默认经过 link_diff.plan_fetch，只入队新增 + 数据过期的）
+- 等各 worker 把队列抽干后 collect(batch): 把其他 VM 写出的 TXT 落到本机相同路径，
+  并在本机 frontier 中标记完成；之后照常 TXT → DB（barbour_offers 等也由 TXT 导入生成）
+- TXT_OUTPUT_MODE="batch" 时没有单品 TXT 文件：complete 从批次库取该商品的记录，
+  collect 按本机的 TXT_OUTPUT_MODE 写 TXT 或追加到批次（common.ingest.txt_batch）
+
+worker 端（任意 VM，配置路径与协调端相同）:
+- 每次领取同一站点的一块 URL (CRAWL_QUEUE_CHUNK 条)，status → leased，租约 CRAWL_QUEUE_LEASE_SEC 秒
+- 后台线程每 1/3 租约发一次心跳续约；进程崩溃 / 断网时租约过期，其他 worker 重新领取
+- 交给站点原来的抓取入口（BaseFetcher.run_batch / camper / geox，仍走各自的 http_client、
+  host_limiter、frontier），按 frontier 结果逐条 complete（TXT 内容一并写回任务表）或 fail；
+  每块在 frontier 中单独一轮（begin_chunk），同机多个 worker 进程互不续跑 / 关闭对方的 run
+- complete / fail 都要求任务仍被自己持有：租约已被别人接手时结果丢弃，保证每个任务只完成一次
+- fail 后按 CRAWL_QUEUE_RETRY_BASE_SEC * 2^(n-1) 退避重新排队，达到 max_attempts 后置为 failed
+
+注意: host_limiter 的 AIMD 并发是每台 VM 各自学习的，同一站点的总在途请求数 ≈ 各 VM 之和。
+
+站点在 QUEUE_TARGETS 里登记 runner(urls, max_workers)，写法同 reparse.REPARSE_TARGETS。
+
+使用方式:
+    python -m common.crawl.job_queue enqueue 20261017 camper geox terraces
+    python -m common.crawl.job_queue work --batch 20261017          # 每台 VM 各起一个或几个
+    python -m common.crawl.job_queue status --batch 20261017
+    python -m common.crawl.job_queue collect 20261017               # 协调端，抓完后
+
+    from common.crawl.job_queue import run_distributed
+    run_distributed("20261017", ["camper", "geox"])   # 入队 + 本机一起抓 + 等其他 VM + collect
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import psycopg2
+
+from cfg.db_config import PGSQL_CONFIG
+from cfg.settings import SETTINGS
+from common.crawl.frontier import get_frontier
+from common.crawl.link_diff import plan_fetch
+from common.ingest.txt_batch import flush_batch_writers, read_txt_text, write_txt_text
+
+CRAWL_QUEUE_PGSQL = SETTINGS.get("CRAWL_QUEUE_PGSQL") or PGSQL_CONFIG
+CRAWL_QUEUE_LEASE_SEC = float(SETTINGS.get("CRAWL_QUEUE_LEASE_SEC", 300))
+CRAWL_QUEUE_MAX_ATTEMPTS = int(SETTINGS.get("CRAWL_QUEUE_MAX_ATTEMPTS", 3))
+CRAWL_QUEUE_CHUNK = int(SETTINGS.get("CRAWL_QUEUE_CHUNK", 20))
+CRAWL_QUEUE_POLL_SEC = float(SETTINGS.get("CRAWL_QUEUE_POLL_SEC", 5))
+CRAWL_QUEUE_RETRY_BASE_SEC = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_jobs (
+    id            BIGSERIAL PRIMARY KEY,
+    batch         TEXT NOT NULL,
+    site          TEXT NOT NULL,
+    url           TEXT NOT NULL,
+    status        TEXT NOT NULL DEFAULT 'pending',   -- pending / leased / done / failed
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL DEFAULT 3,
+    worker        TEXT,
+    lease_until   TIMESTAMPTZ,
+    heartbeat_at  TIMESTAMPTZ,
+    available_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    enqueued_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+    started_at    TIMESTAMPTZ,
+    finished_at   TIMESTAMPTZ,
+    last_error    TEXT,
+    output_path   TEXT,
+    output_txt    TEXT,
+    collected_at  TIMESTAMPTZ,
+    UNIQUE (batch, site, url)
+);
+CREATE INDEX IF NOT EXISTS idx_crawl_jobs_claim ON crawl_jobs (batch, status, available_at, id);
+"""
+
+# 可领取: 待抓且到了可重试时间，或租约已过期（持有者崩溃 / 失联）
+_CLAIMABLE = (
+    "((status = 'pending' AND available_at <= now()) "
+    "OR (status = 'leased' AND lease_until < now())) "
+    "AND attempts < max_attempts"
+)
+
+
+@dataclass(frozen=True)
+class QueueTarget:
+    """一个站点的队列抓取配置（只含字符串，各 VM 上按模块路径加载）"""
+    site: str                          # frontier 中的站点名
+    runner: str                        # "模块:属性"，runner(urls, max_workers)
+    links: str                         # "模块:属性"，协调端入队时默认读取的链接文件
+    factory: bool = False              # True: runner(**kwargs) 返回真正的 runner
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    max_workers: int = 4               # 每个 worker 进程内的抓取线程数
+    plan: Optional[str] = None         # "模块:属性"，入队前的额外筛选 plan(site, urls) -> urls
+
+
+def _fetcher_target(site: str, module: str, cls: str, **fetcher_kwargs) -> QueueTarget:
+    return QueueTarget(
+        site=site,
+        runner="brands.barbour.core.base_fetcher:make_batch_runner",
+        links=f"{module}:LINKS_FILE",
+        factory=True,
+        kwargs={"fetcher_cls": f"{module}:{cls}", **fetcher_kwargs},
+        plan="brands.barbour.core.supplier_skip:plan_supplier_skip",
+    )
+
+
+QUEUE_TARGETS: Dict[str, QueueTarget] = {
+    "camper": QueueTarget(
+        site="camper",
+        runner="brands.camper.fetch_product_info:camper_fetch_product_info",
+        links="brands.camper.fetch_product_info:PRODUCT_URLS_FILE",
+        max_workers=8,
+    ),
+    "geox": QueueTarget(
+        site="geox",
+        runner="brands.geox.fetch_product_info_fast:fetch_all_product_info",
+        links="brands.geox.fetch_product_info_fast:PRODUCT_LINK_FILE",
+        max_workers=8,
+    ),
+    "barbour": _fetcher_target(
+        "barbour", "brands.barbour.supplier.barbour_fetch_info", "BarbourFetcher", wait_seconds=0),
+    "allweathers": _fetcher_target(
+        "allweathers", "brands.barbour.supplier.allweathers_fetch_info", "AllweathersFetcher", wait_seconds=2.5),
+    "cho": _fetcher_target(
+        "cho", "brands.barbour.supplier.cho_fetch_info", "CHOFetcher", wait_seconds=2.5),
+    "terraces": _fetcher_target(
+        "terraces", "brands.barbour.supplier.terraces_fetch_info", "TerracesFetcher"),
+    "houseoffraser": _fetcher_target(
+        "houseoffraser", "brands.barbour.supplier.houseoffraser_fetch_info", "HouseOfFraserFetcher"),
+    "outdoorandcountry": _fetcher_target(
+        "outdoorandcountry", "brands.barbour.supplier.outdoorandcountry_fetch_info", "OutdoorAndCountryFetcher"),
+}
+
+
+@dataclass
+class Job:
+    """worker 领到的一个任务"""
+    id: int
+    batch: str
+    site: str
+    url: str
+    attempts: int
+
+
+def _resolve(path: str):
+    module_name, attr = path.split(":", 1)
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class CrawlQueue:
+    """crawl_jobs 表的读写（线程安全：每个线程一个 autocommit 连接）"""
+
+    def __init__(self, pg_config: Optional[Dict[str, Any]] = None, lease_sec: float = CRAWL_QUEUE_LEASE_SEC):
+        self.pg_config = dict(pg_config or CRAWL_QUEUE_PGSQL)
+        self.lease_sec = lease_sec
+        self._local = threading.local()
+        self._all_conns: List[Any] = []
+        self._lock = threading.Lock()
+        with self._cursor() as cur:
+            cur.execute(_SCHEMA)
+
+    # ---------- 连接 ----------
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or conn.closed:
+            conn = psycopg2.connect(**self.pg_config)
+            conn.autocommit = True
+            self._local.conn = conn
+            with self._lock:
+                self._all_conns.append(conn)
+        return conn
+
+    def _cursor(self):
+        return self._conn().cursor()
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._all_conns:
+                if not conn.closed:
+                    conn.close()
+            self._all_conns.clear()
+
+    # ---------- 协调端 ----------
+
+    def enqueue(self, batch: str, site: str, urls: Iterable[str],
+                max_attempts: int = CRAWL_QUEUE_MAX_ATTEMPTS) -> int:
+        """写入任务（同一批次内已存在的 URL 忽略），返回新增条数"""
+        urls = list(dict.fromkeys(u.strip() for u in urls if u and u.strip()))
+        if not urls:
+            return 0
+        with self._cursor() as cur:
+            cur.execute(
+                "INSERT INTO crawl_jobs (batch, site, url, max_attempts) "
+                "SELECT %s, %s, u, %s FROM unnest(%s::text[]) AS u "
+                "ON CONFLICT (batch, site, url) DO NOTHING",
+                (batch, site, max_attempts, urls),
+            )
+            added = cur.rowcount
+        print(f"📥 [{batch}] {site}: 入队 {added} / {len(urls)} 条")
+        return added
+
+    def requeue_failed(self, batch: str, site: Optional[str] = None) -> int:
+        """把最终失败的任务重新排队（attempts 清零）"""
+        with self._cursor() as cur:
+            cur.execute(
+                "UPDATE crawl_jobs SET status = 'pending', attempts = 0, available_at = now(), worker = NULL "
+                "WHERE batch = %s AND status = 'failed' AND (%s::text IS NULL OR site = %s)",
+                (batch, site, site),
+            )
+            return cur.rowcount
+
+    def collect(self, batch: str) -> int:
+        """
+        把已完成任务的 TXT 写到本机 output_path（内容相同的不重写；batch 模式写入批次库），
+        并在本机 frontier 标记完成
+
+        返回实际写入的 TXT 数。
+        """
+        with self._cursor() as cur:
+            cur.execute(
+                "SELECT id, site, url, output_path, output_txt FROM crawl_jobs "
+                "WHERE batch = %s AND status = 'done' AND collected_at IS NULL ORDER BY id",
+                (batch,),
+            )
+            rows = cur.fetchall()
+
+        written, ids = 0, []
+        for job_id, site, url, output_path, output_txt in rows:
+            path = Path(output_path) if output_path else None
+            if path is not None and output_txt is not None:
+                if read_txt_text(path) != output_txt:
+                    write_txt_text(path, output_txt)
+                    written += 1
+            frontier = get_frontier(site)
+            if frontier is not None:
+                if path is None:
+                    # 已下架（价格为 0 等）没写 TXT：清掉本机上次的 TXT 路径，不被 plan_fetch 当作新鲜数据沿用
+                    frontier.mark_delisted(url)
+                else:
+                    frontier.mark_done(url, path)
+            ids.append(job_id)
+
+        flush_batch_writers()
+        if ids:
+            with self._cursor() as cur:
+                cur.execute("UPDATE crawl_jobs SET collected_at = now() WHERE id = ANY(%s)", (ids,))
+        print(f"📦 [{batch}] collect: 完成任务 {len(ids)} 条，写入 TXT {written} 个（其余本机已有）")
+        return written
+
+    def counts(self, batch: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """{site: {status: n}}；租约过期的 leased 单独记为 expired"""
+        with self._cursor() as cur:
+            cur.execute(
+                "SELECT site, CASE WHEN status = 'leased' AND lease_until < now() THEN 'expired' "
+                "ELSE status END, COUNT(*) FROM crawl_jobs "
+                "WHERE (%s::text IS NULL OR batch = %s) GROUP BY 1, 2",
+                (batch, batch),
+            )
+            result: Dict[str, Dict[str, int]] = {}
+            for site, status, n in cur.fetchall():
+                result.setdefault(site, {})[status] = n
+        return result
+
+    def is_drained(self, batch: str) -> bool:
+        """批次内没有 pending / leased 任务"""
+        with self._cursor() as cur:
+            cur.execute(
+                "SELECT EXISTS (SELECT 1 FROM crawl_jobs WHERE batch = %s AND status IN ('pending', 'leased'))",
+                (batch,),
+            )
+            return not cur.fetchone()[0]
+
+    def format_status(self, batch: Optional[str] = None, window_min: int = 10) -> str:
+        lines = []
+        for site, c in sorted(self.counts(batch).items()):
+            total = sum(c.values())
+            detail = " ".join(f"{k}={v}" for k, v in sorted(c.items()))
+            lines.append(f"📊 {site}: 共 {total} | {detail}")
+        with self._cursor() as cur:
+            cur.execute(
+                "SELECT worker, COUNT(*) FROM crawl_jobs WHERE status = 'done' "
+                "AND finished_at > now() - %s * interval '1 minute' "
+                "AND (%s::text IS NULL OR batch = %s) GROUP BY worker ORDER BY worker",
+                (window_min, batch, batch),
+            )
+            for worker, n in cur.fetchall():
+                lines.append(f"⚙️ {worker}: 最近 {window_min} 分钟完成 {n} 条 ({n / window_min:.1f} 条/分钟)")
+        return "\n".join(lines) or "（队列为空）"
+
+    # ---------- worker 端 ----------
+
+    def claim(self, worker: str, batch: Optional[str] = None, sites: Optional[Sequence[str]] = None,
+              limit: int = CRAWL_QUEUE_CHUNK) -> List[Job]:
+        """领取同一站点的最多 limit 个任务（其他 worker 已锁定的行跳过，不等待）"""
+        where = _CLAIMABLE + " AND (%(batch)s::text IS NULL OR batch = %(batch)s)"
+        if sites:
+            where += " AND site = ANY(%(sites)s)"
+        sql = f"""
+            WITH head AS (
+                SELECT batch, site FROM crawl_jobs WHERE {where}
+                ORDER BY id LIMIT 1 FOR UPDATE SKIP LOCKED
+            ), pick AS (
+                SELECT id FROM crawl_jobs
+                WHERE batch = (SELECT batch FROM head) AND site = (SELECT site FROM head) AND {where}
+                ORDER BY id LIMIT %(limit)s FOR UPDATE SKIP LOCKED
+            )
+            UPDATE crawl_jobs t SET status = 'leased', worker = %(worker)s, attempts = t.attempts + 1,
+                   lease_until = now() + %(lease)s * interval '1 second', heartbeat_at = now(),
+                   started_at = COALESCE(t.started_at, now()), last_error = NULL
+            FROM pick WHERE t.id = pick.id
+            RETURNING t.id, t.batch, t.site, t.url, t.attempts
+        """
+        params = {"batch": batch, "sites": list(sites or []), "limit": limit,
+                  "worker": worker, "lease": self.lease_sec}
+        with self._cursor() as cur:
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+        return sorted((Job(*r) for r in rows), key=lambda j: j.id)
+
+    def heartbeat(self, worker: str, job_ids: Sequence[int]) -> int:
+        """续约，返回仍由自己持有的任务数"""
+        if not job_ids:
+            return 0
+        with self._cursor() as cur:
+            cur.execute(
+                "UPDATE crawl_jobs SET lease_until = now() + %s * interval '1 second', heartbeat_at = now() "
+                "WHERE id = ANY(%s) AND worker = %s AND status = 'leased'",
+                (self.lease_sec, list(job_ids), worker),
+            )
+            return cur.rowcount
+
+    def complete(self, worker: str, job: Job, output_path: Optional[Path | str] = None) -> bool:
+        """标记完成并写回 TXT 内容（batch 模式从批次库取）；租约已被其他 worker 接手时返回 False（结果丢弃）"""
+        text = read_txt_text(output_path) if output_path else None
+        with self._cursor() as cur:
+            cur.execute(
+                "UPDATE crawl_jobs SET status = 'done', finished_at = now(), lease_until = NULL, "
+                "output_path = %s, output_txt = %s, last_error = NULL "
+                "WHERE id = %s AND worker = %s AND status = 'leased'",
+                (str(output_path) if output_path else None, text, job.id, worker),
+            )
+            return cur.rowcount == 1
+
+    def fail(self, worker: str, job: Job, error: object = None) -> bool:
+        """失败：退避后重新排队，达到 max_attempts 后置为 failed"""
+        with self._cursor() as cur:
+            cur.execute(
+                "UPDATE crawl_jobs SET "
+                "status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END, "
+                "available_at = now() + LEAST(%s * power(2, attempts - 1), 3600) * interval '1 second', "
+                "finished_at = CASE WHEN attempts >= max_attempts THEN now() END, "
+                "lease_until = NULL, worker = NULL, last_error = %s "
+                "WHERE id = %s AND worker = %s AND status = 'leased'",
+                (CRAWL_QUEUE_RETRY_BASE_SEC, str(error)[:500] if error is not None else None, job.id, worker),
+            )
+            return cur.rowcount == 1
+
+    def release(self, worker: str, job_ids: Sequence[int]) -> int:
+        """worker 正常退出（Ctrl+C 等）时归还未处理完的任务，不计入尝试次数"""
+        if not job_ids:
+            return 0
+        with self._cursor() as cur:
+            cur.execute(
+                "UPDATE crawl_jobs SET status = 'pending', attempts = GREATEST(attempts - 1, 0), "
+                "available_at = now(), lease_until = NULL, worker = NULL "
+                "WHERE id = ANY(%s) AND worker = %s AND status = 'leased'",
+                (list(job_ids), worker),
+            )
+            return cur.rowcount
+
+    def reap(self, batch: Optional[str] = None) -> int:
+        """租约过期且已无重试次数的任务置为 failed"""
+        with self._cursor() as cur:
+            cur.execute(
+                "UPDATE crawl_jobs SET status = 'failed', finished_at = now(), worker = NULL, "
+                "last_error = COALESCE(last_error, '租约过期') "
+                "WHERE status = 'leased' AND lease_until < now() AND attempts >= max_attempts "
+                "AND (%s::text IS NULL OR batch = %s)",
+                (batch, batch),
+            )
+            return cur.rowcount
+
+
+class _Heartbeat:
+    """后台续约线程：持有任务期间每 lease/3 秒续约一次"""
+
+    def __init__(self, queue: CrawlQueue, worker: str):
+        self.queue = queue
+        self.worker = worker
+        self.job_ids: List[int] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="crawl-queue-heartbeat", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        interval = max(1.0, self.queue.lease_sec / 3)
+        while not self._stop.wait(interval):
+            ids = list(self.job_ids)
+            if not ids:
+                continue
+            try:
+                held = self.queue.heartbeat(self.worker, ids)
+                if held < len(ids):
+                    print(f"[job_queue] ⚠️ {len(ids) - held} 个任务的租约已失效（被其他 worker 接手）")
+            except Exception as e:
+                print(f"[job_queue] ⚠️ 心跳失败: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+
+def _load_runner(target: QueueTarget) -> Callable:
+    obj = _resolve(target.runner)
+    return obj(**target.kwargs) if target.factory else obj
+
+
+def _results_from_frontier(site: str, urls: Sequence[str], since: float) -> Dict[str, Optional[str]]:
+    """本块中 since 之后在 frontier 里标记完成的 URL → TXT 路径（价格为 0 跳过的为 None）"""
+    frontier = get_frontier(site)
+    if frontier is None:
+        raise RuntimeError(f"{site}: 队列 worker 需要开启 CRAWL_FRONTIER_ENABLED 才能得到抓取结果")
+    results: Dict[str, Optional[str]] = {}
+    for url in urls:
+        entry = frontier.entry(url)
+        if entry is not None and entry.status == "done" and (entry.last_success_at or 0) >= since:
+            results[url] = entry.output_path
+    return results
+
+
+def run_worker(
+    batch: Optional[str] = None,
+    sites: Optional[Sequence[str]] = None,
+    chunk: int = CRAWL_QUEUE_CHUNK,
+    max_workers: Optional[int] = None,
+    queue: Optional[CrawlQueue] = None,
+    runners: Optional[Dict[str, Callable]] = None,
+    exit_when_drained: bool = True,
+) -> Dict[str, int]:
+    """
+    领取 → 抓取 → 回报，直到批次抽干（batch 为 None 时一直轮询所有批次）
+
+    Args:
+        batch: 只处理该批次
+        sites: 只处理这些站点
+        chunk: 每次领取的 URL 数
+        max_workers: 覆盖 QueueTarget.max_workers
+        runners: {site: runner}，覆盖 QUEUE_TARGETS（测试用）；runner 返回 {url: TXT 路径} 时
+                 直接作为结果，否则从 frontier 读取
+        exit_when_drained: 批次内没有 pending / leased 任务时退出
+
+    Returns:
+        {"claimed": n, "done": n, "failed": n, "lost": n}
+    """
+    queue = queue or CrawlQueue()
+    me = worker_name()
+    loaded: Dict[str, Callable] = dict(runners or {})
+    counts = {"claimed": 0, "done": 0, "failed": 0, "lost": 0}
+    hb = _Heartbeat(queue, me)
+    t_start = time.time()
+    print(f"🚚 worker {me} 启动: batch={batch or '*'} sites={','.join(sites) if sites else '*'} chunk={chunk}")
+
+    try:
+        while True:
+            jobs = queue.claim(me, batch=batch, sites=sites, limit=chunk)
+            if not jobs:
+                queue.reap(batch)
+                if exit_when_drained and batch is not None and queue.is_drained(batch):
+                    break
+                time.sleep(CRAWL_QUEUE_POLL_SEC)
+                continue
+
+            site = jobs[0].site
+            counts["claimed"] += len(jobs)
+            hb.job_ids = [j.id for j in jobs]
+            target = QUEUE_TARGETS.get(site)
+            since = time.time()
+            results: Optional[Dict[str, Optional[str]]] = None
+            error: Optional[str] = None
+            try:
+                if site not in loaded:
+                    if target is None:
+                        raise KeyError(f"QUEUE_TARGETS 中没有站点 {site}")
+                    loaded[site] = _load_runner(target)
+                workers = max_workers or (target.max_workers if target else 4)
+                ret = loaded[site](urls=[j.url for j in jobs], max_workers=workers)
+                results = ret if isinstance(ret, dict) else _results_from_frontier(site, [j.url for j in jobs], since)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                print(f"[job_queue] ❌ {site} 整块失败: {error}")
+
+            for job in jobs:
+                if results is not None and job.url in results:
+                    ok = queue.complete(me, job, results[job.url])
+                    counts["done" if ok else "lost"] += 1
+                else:
+                    ok = queue.fail(me, job, error or "未写出 TXT（见 frontier last_error）")
+                    counts["failed" if ok else "lost"] += 1
+            hb.job_ids = []
+    finally:
+        hb.stop()
+        if hb.job_ids:
+            print(f"[job_queue] ↩️ 归还未完成的任务 {queue.release(me, hb.job_ids)} 条")
+
+    elapsed = time.time() - t_start
+    print(
+        f"🏁 worker {me}: 领取 {counts['claimed']} / 完成 {counts['done']} / 失败 {counts['failed']} / "
+        f"租约丢失 {counts['lost']}，耗时 {elapsed:.0f}s"
+    )
+    return counts
+
+
+def load_links(site: str) -> List[str]:
+    """QueueTarget.links 指向的链接文件内容"""
+    path = Path(_resolve(QUEUE_TARGETS[site].links))
+    if not path.exists():
+        print(f"❌ [{site}] 缺少链接文件: {path}")
+        return []
+    lines = path.read_text(encoding="utf-8", errors="ignore").splitlines()
+    return [u.strip() for u in lines if u.strip() and not u.strip().startswith("#")]
+
+
+def enqueue_sites(batch: str, sites: Sequence[str], queue: Optional[CrawlQueue] = None,
+                  incremental: bool = True) -> int:
+    """
+    读各站点链接文件入队；incremental 时经过 link_diff.plan_fetch（及 QueueTarget.plan，
+    如 Barbour 跨供货商跳过）只入队需要抓的
+    """
+    queue = queue or CrawlQueue()
+    total = 0
+    for site in sites:
+        target = QUEUE_TARGETS[site]
+        urls = load_links(site)
+        if incremental and urls:
+            urls = plan_fetch(site, urls, _resolve(target.links))
+            if target.plan:
+                urls = _resolve(target.plan)(site, urls)
+        total += queue.enqueue(batch, site, urls)
+    return total
+
+
+def run_distributed(batch: str, sites: Sequence[str], work_locally: bool = True,
+                    queue: Optional[CrawlQueue] = None) -> int:
+    """协调端一步到位: 入队 → 本机也当 worker → 等其他 VM 抽干 → collect，返回写入的 TXT 数"""
+    queue = queue or CrawlQueue()
+    enqueue_sites(batch, sites, queue)
+    if work_locally:
+        run_worker(batch, queue=queue)
+    while not queue.is_drained(batch):
+        queue.reap(batch)
+        print(queue.format_status(batch))
+        time.sleep(CRAWL_QUEUE_POLL_SEC * 6)
+    print(queue.format_status(batch))
+    return queue.collect(batch)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Postgres 分布式抓取队列")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("enqueue", help="读链接文件入队")
+    p.add_argument("batch")
+    p.add_argument("sites", nargs="+", choices=sorted(QUEUE_TARGETS))
+    p.add_argument("--full", action="store_true", help="不做链接增量筛选，全部入队")
+
+    p = sub.add_parser("work", help="领取并抓取")
+    p.add_argument("--batch", default=None, help="为空时轮询所有批次、不退出")
+    p.add_argument("--sites", nargs="*", default=None)
+    p.add_argument("--chunk", type=int, default=CRAWL_QUEUE_CHUNK)
+    p.add_argument("--max-workers", type=int, default=None)
+
+    p = sub.add_parser("status", help="查看进度")
+    p.add_argument("--batch", default=None)
+
+    p = sub.add_parser("collect", help="协调端: 把其他 VM 写出的 TXT 落到本机")
+    p.add_argument("batch")
+
+    p = sub.add_parser("requeue", help="最终失败的任务重新排队")
+    p.add_argument("batch")
+    p.add_argument("--site", default=None)
+
+    args = parser.parse_args(argv)
+    queue = CrawlQueue()
+    try:
+        if args.cmd == "enqueue":
+            enqueue_sites(args.batch, args.sites, queue, incremental=not args.full)
+        elif args.cmd == "work":
+            run_worker(args.batch, args.sites, chunk=args.chunk, max_workers=args.max_workers, queue=queue)
+        elif args.cmd == "status":
+            print(queue.format_status(args.batch))
+        elif args.cmd == "collect":
+            queue.collect(args.batch)
+        elif args.cmd == "requeue":
+            print(f"🔁 重新排队 {queue.requeue_failed(args.batch, args.site)} 条")
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+链接增量 (link diff) - 采集链接时与上一轮对比，抓取时只抓需要的
+
+采集脚本 (camper / ecco / geox collect_product_links、Barbour *_get_links) 以前每次重写整份
+product_links.txt，抓取脚本再全部重抓一遍。现在:
+
+采集端 save_links(site, links, links_file):
+- 写 links_file（内容同以前）
+- 与上一轮对比得到 新增 / 下架 / 未变化 三组，另写 *_added.txt / *_removed.txt 便于查看
+- 上一轮的链接与对比结果存在 CRAWL_FRONTIER_DIR/links/ 下（不在 publication 里，
+  不会被 backup_and_clear_brand_dirs 清掉）
+
+抓取端 plan_fetch(site, urls, links_file):
+- 新增 → 立即抓
+- 未变化 → frontier 中 LINK_DIFF_MAX_AGE_HOURS 内成功过且不是空壳的不抓；
+           其 TXT 若已被 backup_and_clear 清走，从最近一次备份拷回
+- 下架 → 删除其 TXT 并从 frontier 移除；TXT 导入数据库后这些商品不在库里，
+         随后的 insert_missing_products_with_zero_stock 会把它们补成库存 0，不需要整站重抓
+- 读的不是采集时写的那份 links_file（如补抓 missing / empty 链接）时不做筛选，原样返回
+
+一次"下架"超过上轮 LINK_DIFF_MAX_REMOVED_RATIO 时视为采集异常（被封 / 页面改版），
+不处理下架，也不把本轮链接当作下次对比的基准。
+
+使用方式:
+    from common.crawl.link_diff import save_links, plan_fetch
+
+    save_links("camper", all_links, LINKS_FILE)      # 采集脚本末尾，替代直接写文件
+    urls = plan_fetch("camper", urls, links_path)     # 抓取脚本读完链接后、frontier.begin 之前
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from cfg.settings import SETTINGS
+from common.crawl.frontier import CRAWL_FRONTIER_DIR, get_frontier
+from common.ingest.txt_batch import record_deleted
+from common.ingest.txt_records import txt_exists
+from common.maintenance.backup_and_clear import restore_from_latest_backup
+
+LINK_DIFF_ENABLED = bool(SETTINGS.get("LINK_DIFF_ENABLED", True))
+LINK_DIFF_MAX_AGE_HOURS = float(SETTINGS.get("LINK_DIFF_MAX_AGE_HOURS", 24))
+LINK_DIFF_MAX_REMOVED_RATIO = float(SETTINGS.get("LINK_DIFF_MAX_REMOVED_RATIO", 0.5))
+LINK_DIFF_DIR = CRAWL_FRONTIER_DIR / "links"
+
+
+@dataclass
+class LinkDiff:
+    """一次链接采集相对上一轮的变化"""
+    site: str
+    links_file: str
+    created_at: float
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    first_run: bool = False          # 没有上一轮可对比
+    suspicious: bool = False         # 下架比例过高，下架不处理
+    removed_applied: bool = False
+
+    def format(self) -> str:
+        if self.first_run:
+            return f"🔗 [{self.site}] 首次记录链接 {len(self.added)} 条（无上一轮可对比）"
+        return (
+            f"🔗 [{self.site}] 新增 {len(self.added)} / 下架 {len(self.removed)} / "
+            f"未变化 {len(self.unchanged)}"
+        )
+
+
+def _norm_path(path: Path | str) -> str:
+    return os.path.normcase(str(Path(path).resolve()))
+
+
+def _state_files(site: str):
+    return LINK_DIFF_DIR / f"{site}.txt", LINK_DIFF_DIR / f"{site}.diff.json"
+
+
+def _read_lines(path: Path) -> List[str]:
+    if not path.exists():
+        return []
+    return [u.strip() for u in path.read_text(encoding="utf-8", errors="ignore").splitlines() if u.strip()]
+
+
+def _write_lines(path: Path, lines: Iterable[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("".join(f"{u}\n" for u in lines), encoding="utf-8")
+
+
+def _save_diff(diff: LinkDiff) -> None:
+    _, diff_file = _state_files(diff.site)
+    diff_file.parent.mkdir(parents=True, exist_ok=True)
+    diff_file.write_text(json.dumps(asdict(diff), ensure_ascii=False), encoding="utf-8")
+
+
+def load_link_diff(site: str) -> Optional[LinkDiff]:
+    """最近一次 save_links 的结果"""
+    _, diff_file = _state_files(site)
+    if not diff_file.exists():
+        return None
+    try:
+        return LinkDiff(**json.loads(diff_file.read_text(encoding="utf-8")))
+    except Exception:
+        return None
+
+
+def save_links(site: str, urls: Iterable[str], links_file: Path | str) -> LinkDiff:
+    """
+    写 links_file（排序去重），并与上一轮对比
+
+    Args:
+        site: 站点名，需与抓取端 frontier 的站点名一致
+        urls: 本轮采集到的链接
+        links_file: 抓取脚本读取的链接文件
+    """
+    links_file = Path(links_file)
+    links = sorted({u.strip() for u in urls if u and u.strip()})
+    _write_lines(links_file, links)
+
+    diff = LinkDiff(site=site, links_file=_norm_path(links_file), created_at=time.time())
+    if not LINK_DIFF_ENABLED:
+        return diff
+
+    prev_file, _ = _state_files(site)
+    if not prev_file.exists():
+        diff.added, diff.first_run = links, True
+    else:
+        prev = set(_read_lines(prev_file))
+        current = set(links)
+        diff.added = [u for u in links if u not in prev]
+        diff.unchanged = [u for u in links if u in prev]
+        diff.removed = sorted(prev - current)
+        diff.suspicious = bool(prev) and len(diff.removed) > len(prev) * LINK_DIFF_MAX_REMOVED_RATIO
+
+    stem = links_file.stem
+    _write_lines(links_file.with_name(f"{stem}_added.txt"), diff.added)
+    _write_lines(links_file.with_name(f"{stem}_removed.txt"), diff.removed)
+    if not diff.suspicious:
+        _write_lines(prev_file, links)
+    _save_diff(diff)
+
+    print(diff.format())
+    if diff.suspicious:
+        print(
+            f"⚠️ [{site}] 下架 {len(diff.removed)} 条超过上轮的 {LINK_DIFF_MAX_REMOVED_RATIO:.0%}，"
+            f"疑似采集异常：本轮不处理下架，下次仍与上一轮对比"
+        )
+    return diff
+
+
+def apply_removed(diff: LinkDiff) -> int:
+    """删除下架商品的 TXT 并从 frontier 移除，返回删除的 TXT 数（同一个 diff 只处理一次）"""
+    if diff.suspicious or diff.removed_applied or not diff.removed:
+        return 0
+    frontier = get_frontier(diff.site)
+    paths = frontier.forget(diff.removed) if frontier is not None else []
+    deleted = 0
+    for p in map(Path, paths):
+        if p.exists():
+            p.unlink()
+            deleted += 1
+        record_deleted(p)
+    diff.removed_applied = True
+    _save_diff(diff)
+    print(f"🗑️ [{diff.site}] 下架 {len(diff.removed)} 条，删除 TXT {deleted} 个（随后按库存 0 处理）")
+    return deleted
+
+
+def plan_fetch(
+    site: str,
+    urls: List[str],
+    links_file: Path | str,
+    max_age_hours: Optional[float] = None,
+) -> List[str]:
+    """
+    从 links_file 的全部链接中挑出本次需要抓的（保持原顺序）
+
+    links_file 不是最近一次 save_links 写的那份、或没有 frontier 记录时原样返回。
+    """
+    diff = load_link_diff(site)
+    frontier = get_frontier(site)
+    if (
+        not LINK_DIFF_ENABLED
+        or diff is None
+        or frontier is None
+        or diff.links_file != _norm_path(links_file)
+    ):
+        return urls
+
+    apply_removed(diff)
+
+    max_age = (LINK_DIFF_MAX_AGE_HOURS if max_age_hours is None else max_age_hours) * 3600
+    added = set(diff.added)
+    fresh = frontier.fresh_outputs((u for u in urls if u not in added), max_age)
+    restored = restore_from_latest_backup(fresh.values())
+    reusable = {u for u, p in fresh.items() if txt_exists(p)}
+
+    todo = [u for u in urls if u not in reusable]
+    print(
+        f"🧮 [{site}] 本次抓取 {len(todo)} / {len(urls)} 条: 新增 {len(added & set(urls))}，"
+        f"数据过期或缺失 {len(todo) - len(added & set(todo))}；"
+        f"沿用 {len(reusable)} 条（其中从备份恢复 TXT {len(restored)} 个）"
+    )
+    return todo
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+离线重放 (reparse) - 用快照库里的 HTML 重新生成 TXT，不访问网络
+
+解析器修好后，不必重爬整站：读取 common.crawl.html_store 中各 URL 的最新快照，
+用进程池（默认 = CPU 核数）并行执行 parse → 写 TXT，绕开 GIL。
+
+每个站点在 REPARSE_TARGETS 里登记一个 handler(html, url) -> TXT 路径:
+- BaseFetcher 子类: brands.barbour.core.base_fetcher:make_reparser + 采集器类路径
+- 独立函数: geox / reiss 模块里的 reparse_html
+
+使用方式:
+    from common.crawl.reparse import run_reparse
+    run_reparse("houseoffraser")                 # 全部快照
+    run_reparse("geox", processes=4, limit=200)
+
+    python -m common.crawl.reparse houseoffraser --processes 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from common.crawl.html_store import get_html_store, load_object
+
+
+@dataclass(frozen=True)
+class ReparseTarget:
+    """一个站点的离线重放配置（只含字符串，便于传给子进程）"""
+    site: str                          # 快照库中的 site 名
+    handler: str                       # "模块:属性"
+    factory: bool = False              # True: handler(**kwargs) 返回真正的 handler
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+
+def _fetcher_target(site: str, fetcher_cls: str) -> ReparseTarget:
+    return ReparseTarget(
+        site=site,
+        handler="brands.barbour.core.base_fetcher:make_reparser",
+        factory=True,
+        kwargs={"fetcher_cls": fetcher_cls},
+    )
+
+
+REPARSE_TARGETS: Dict[str, ReparseTarget] = {
+    "allweathers": _fetcher_target(
+        "allweathers", "brands.barbour.supplier.allweathers_fetch_info:AllweathersFetcher"),
+    "cho": _fetcher_target(
+        "cho", "brands.barbour.supplier.cho_fetch_info:CHOFetcher"),
+    "terraces": _fetcher_target(
+        "terraces", "brands.barbour.supplier.terraces_fetch_info:TerracesFetcher"),
+    "houseoffraser": _fetcher_target(
+        "houseoffraser", "brands.barbour.supplier.houseoffraser_fetch_info:HouseOfFraserFetcher"),
+    "outdoorandcountry": _fetcher_target(
+        "outdoorandcountry", "brands.barbour.supplier.outdoorandcountry_fetch_info:OutdoorAndCountryFetcher"),
+    "barbour": _fetcher_target(
+        "barbour", "brands.barbour.supplier.barbour_fetch_info:BarbourFetcher"),
+    "very": ReparseTarget(
+        site="very", handler="brands.barbour.supplier.very_fetch_info:make_reparser", factory=True),
+    "geox": ReparseTarget(site="geox", handler="brands.geox.fetch_product_info_fast:reparse_html"),
+    "reiss": ReparseTarget(site="reiss", handler="brands.reiss.core.reiss_product_fetcher:reparse_html"),
+}
+
+
+@dataclass
+class ReparseReport:
+    site: str
+    pages: int
+    ok: int
+    failed: int
+    seconds: float
+    processes: int
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def pages_per_sec(self) -> float:
+        return self.pages / self.seconds if self.seconds > 0 else 0.0
+
+    def format(self) -> str:
+        return (
+            f"🔁 reparse [{self.site}] pages={self.pages} ok={self.ok} failed={self.failed} "
+            f"耗时={self.seconds:.1f}s 速度={self.pages_per_sec:.1f} pages/s (进程 {self.processes})"
+        )
+
+
+# ================== 子进程 ==================
+
+_WORKER_HANDLER: Optional[Callable[[str, str], Any]] = None
+_WORKER_STORE_ROOT: Optional[str] = None
+
+
+def _resolve(path: str):
+    module_name, attr = path.split(":", 1)
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def _init_worker(target: ReparseTarget, store_root: str) -> None:
+    global _WORKER_HANDLER, _WORKER_STORE_ROOT
+    obj = _resolve(target.handler)
+    _WORKER_HANDLER = obj(**target.kwargs) if target.factory else obj
+    _WORKER_STORE_ROOT = store_root
+
+
+def _reparse_one(item: Tuple[str, str]) -> Tuple[str, Optional[str], Optional[str]]:
+    """返回 (url, TXT 路径, 错误信息)"""
+    url, sha256 = item
+    html = load_object(_WORKER_STORE_ROOT, sha256)
+    if html is None:
+        return url, None, "快照文件缺失"
+    try:
+        path = _WORKER_HANDLER(html, url)
+    except Exception as e:
+        return url, None, f"{type(e).__name__}: {e}"
+    return url, str(path) if path else None, None
+
+
+# ================== 主进程 ==================
+
+def run_reparse(
+    target: str | ReparseTarget,
+    urls: Optional[Iterable[str]] = None,
+    processes: Optional[int] = None,
+    limit: Optional[int] = None,
+    chunksize: int = 8,
+) -> ReparseReport:
+    """
+    对某站点的最新快照重新解析并写 TXT
+
+    Args:
+        target: REPARSE_TARGETS 中的名称或 ReparseTarget
+        urls: 只重放这些 URL（默认该站点全部快照）
+        processes: 进程数，默认 os.cpu_count()
+        limit: 最多处理多少页（调试用）
+        chunksize: 每次分给子进程的页数
+    """
+    if isinstance(target, str):
+        if target not in REPARSE_TARGETS:
+            raise KeyError(f"未登记的 reparse 站点: {target}，可选: {sorted(REPARSE_TARGETS)}")
+        target = REPARSE_TARGETS[target]
+
+    store = get_html_store()
+    if store is None:
+        raise RuntimeError("HTML 快照库未启用 (SETTINGS['HTML_STORE_ENABLED'])，无法离线重放")
+
+    wanted = set(urls) if urls is not None else None
+    items = [
+        (snap.url, snap.sha256)
+        for snap in store.iter_latest(target.site)
+        if wanted is None or snap.url in wanted
+    ]
+    if limit:
+        items = items[:limit]
+
+    processes = max(1, processes or os.cpu_count() or 1)
+    report = ReparseReport(site=target.site, pages=len(items), ok=0, failed=0, seconds=0.0, processes=processes)
+    if not items:
+        print(f"⚠️ reparse [{target.site}] 快照库中没有页面")
+        return report
+
+    print(f"🔁 reparse [{target.site}] 共 {len(items)} 页，进程 {processes}")
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(target, str(store.root)),
+    ) as pool:
+        for url, path, err in pool.map(_reparse_one, items, chunksize=max(1, chunksize)):
+            if err is None and path:
+                report.ok += 1
+                store.mark_output(url, Path(path))
+            else:
+                report.failed += 1
+                report.errors.append((url, err or "未生成 TXT"))
+    report.seconds = time.perf_counter() - t0
+
+    print(report.format())
+    for url, err in report.errors[:5]:
+        print(f"   ❌ {url} → {err}")
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="用 HTML 快照离线重新生成 TXT")
+    ap.add_argument("site", choices=sorted(REPARSE_TARGETS))
+    ap.add_argument("--processes", type=int, default=None)
+    ap.add_argument("--limit", type=int, default=None)
+    args = ap.parse_args(argv)
+    run_reparse(args.site, processes=args.processes, limit=args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,769 @@
+# -*- coding: utf-8 -*-
+"""
+抓取回放基准 - 本地 HTTP 服务器回放录制的页面，测 fetcher 的吞吐量 / 延迟 / CPU，不访问任何站点
+
+以前要比较并发参数、解析器改动的快慢只能去打真实站点，结果受网络和对方限流影响，也没法放进 CI。
+现在:
+- 录制: HTML 快照库 (common.crawl.html_store) 里每个站点的最新快照就是录好的页面，
+        export 子命令可导出成 fixtures 目录 (manifest.jsonl + *.html.gz)，随仓库或 CI 缓存分发
+- 回放: 独立子进程里起一个 ThreadingHTTPServer（不占被测进程的 CPU），按原 URL 返回录制的页面，
+        可注入延迟（固定 + 抖动）、错误状态码（429 带 Retry-After / 5xx）、连接重置
+- 路由: 被测进程里 requests（HTTPAdapter.send）和 aiohttp（ClientSession._request）的请求
+        改发到本地服务器，原 URL 放在 X-Replay-Url 头；fetcher 代码、HttpClient 连接池、
+        host_limiter 限流和重试都照常运行
+- 隔离: 快照库换成临时目录，host_limiter 不读写学到的并发值，frontier 关闭，TXT 写到临时目录
+- 指标: 成功页数 / 秒、客户端请求延迟 p50 / p95、被测进程 CPU 时间 / 页；
+        --save 保存结果，--baseline 与上次结果比较，退步超过 --tolerance 时退出码为 1
+
+Selenium 采集器 (BaseFetcher 子类) 回放时不启动 Chrome: _fetch_html 改为普通 HTTP GET，
+测的是线程池 / 重试 / 解析 / 写文件这一段；FETCH_MODE = "async_http" 的站点照常走 aiohttp。
+
+列表页（链接采集, BenchTarget.listing=True）不经过 HTML 快照库，先用 record 子命令在线跑一遍
+采集器、把 requests 收到的页面录成 fixtures 目录，之后 run --fixtures 回放：采集器自己的入口 URL /
+翻页逻辑照常运行，翻页间隔跳过，链接写到临时目录（不做 link_diff 对比）；
+成功数为服务器返回 200 的列表页数，另报告采集到的链接数（链接数变少也算退步）。
+目前登记了用 requests 翻页的 camper / geox / terraces；Selenium 翻页的列表采集器不在范围内。
+
+使用方式:
+    python -m common.crawl.replay_bench export camper --out fixtures/camper --limit 300
+    python -m common.crawl.replay_bench run camper_v2 --fixtures fixtures/camper --workers 8
+    python -m common.crawl.replay_bench run geox --latency-ms 150 --jitter-ms 80 --error-rate 0.03
+    python -m common.crawl.replay_bench run houseoffraser --limit 200 --save bench/hof.json
+    python -m common.crawl.replay_bench run reiss --fixtures fixtures/reiss --baseline bench/reiss.json
+    python -m common.crawl.replay_bench record camper_links --out fixtures/camper_links   # 在线录制列表页
+    python -m common.crawl.replay_bench run camper_links --fixtures fixtures/camper_links
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import gzip
+import importlib
+import json
+import multiprocessing as mp
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.crawl import frontier as frontier_mod
+from common.crawl import host_limiter as host_limiter_mod
+from common.crawl import html_store as html_store_mod
+from common.crawl import link_diff as link_diff_mod
+from common.crawl.html_store import HtmlSnapshotStore, object_path
+
+REPLAY_HEADER = "X-Replay-Url"
+STATS_PATH = "/__replay/stats"
+MANIFEST = "manifest.jsonl"
+
+
+@dataclass(frozen=True)
+class BenchTarget:
+    """一个可回放的 fetcher（只含字符串，便于传给子进程 / 命令行选择）"""
+    site: str                          # 快照库中的 site 名（录制的页面来源）
+    runner: str                        # "模块:属性"，runner(urls, out_dir, max_workers, **kwargs)
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    listing: bool = False              # 列表页（链接采集）：只能从 record 录制的 fixtures 回放
+
+
+def _fetcher_target(site: str, fetcher_cls: str) -> BenchTarget:
+    return BenchTarget(
+        site=site,
+        runner="common.crawl.replay_bench:run_base_fetcher",
+        kwargs={"fetcher_cls": fetcher_cls},
+    )
+
+
+BENCH_TARGETS: Dict[str, BenchTarget] = {
+    "camper_v2": BenchTarget(site="camper", runner="common.crawl.replay_bench:run_camper_v2"),
+    "geox": BenchTarget(site="geox", runner="common.crawl.replay_bench:run_geox"),
+    "reiss": BenchTarget(site="reiss", runner="common.crawl.replay_bench:run_reiss"),
+    "allweathers": _fetcher_target(
+        "allweathers", "brands.barbour.supplier.allweathers_fetch_info:AllweathersFetcher"),
+    "cho": _fetcher_target(
+        "cho", "brands.barbour.supplier.cho_fetch_info:CHOFetcher"),
+    "terraces": _fetcher_target(
+        "terraces", "brands.barbour.supplier.terraces_fetch_info:TerracesFetcher"),
+    "houseoffraser": _fetcher_target(
+        "houseoffraser", "brands.barbour.supplier.houseoffraser_fetch_info:HouseOfFraserFetcher"),
+    "outdoorandcountry": _fetcher_target(
+        "outdoorandcountry", "brands.barbour.supplier.outdoorandcountry_fetch_info:OutdoorAndCountryFetcher"),
+    "barbour": _fetcher_target(
+        "barbour", "brands.barbour.supplier.barbour_fetch_info:BarbourFetcher"),
+    "camper_links": BenchTarget(
+        site="camper", runner="common.crawl.replay_bench:run_camper_links", listing=True),
+    "geox_links": BenchTarget(
+        site="geox", runner="common.crawl.replay_bench:run_geox_links", listing=True),
+    "terraces_links": BenchTarget(
+        site="terraces", runner="common.crawl.replay_bench:run_terraces_links", listing=True),
+}
+
+LINKS_OUT = "links.txt"                # 列表 runner 把采集到的链接写到 out_dir 下的这个文件
+
+
+# ================== 录制的页面 ==================
+
+def _url_key(url: str) -> str:
+    """查找用的 URL 键：去掉 #fragment 和路径末尾的 /"""
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/") or "/"
+    return f"{parts.netloc.lower()}{path}" + (f"?{parts.query}" if parts.query else "")
+
+
+def load_fixtures(
+    site: Optional[str] = None,
+    fixtures_dir: Optional[str] = None,
+    limit: int = 0,
+) -> Dict[str, bytes]:
+    """
+    读取录制的页面 {原 URL: gzip 压缩的 HTML}
+
+    fixtures_dir 给定时读其中的 manifest.jsonl，否则读 HTML 快照库中 site 的最新快照。
+    """
+    pages: Dict[str, bytes] = {}
+    if fixtures_dir:
+        root = Path(fixtures_dir)
+        with open(root / MANIFEST, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                path = root / row["file"]
+                if path.exists():
+                    pages[row["url"]] = path.read_bytes()
+                if limit and len(pages) >= limit:
+                    break
+        return pages
+
+    store = HtmlSnapshotStore(html_store_mod.HTML_STORE_DIR)
+    for snap in store.iter_latest(site):
+        path = object_path(store.root, snap.sha256)
+        if path.exists():
+            pages[snap.url] = path.read_bytes()
+        if limit and len(pages) >= limit:
+            break
+    return pages
+
+
+def export_fixtures(site: str, out_dir: str, limit: int = 0) -> int:
+    """把快照库中 site 的最新快照导出为 fixtures 目录，返回页数"""
+    root = Path(out_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    pages = load_fixtures(site=site, limit=limit)
+    with open(root / MANIFEST, "w", encoding="utf-8") as f:
+        for i, (url, body) in enumerate(pages.items()):
+            name = f"{i:05d}.html.gz"
+            (root / name).write_bytes(body)
+            f.write(json.dumps({"url": url, "file": name, "site": site}, ensure_ascii=False) + "\n")
+    print(f"📦 [{site}] 导出 {len(pages)} 页 → {root}")
+    return len(pages)
+
+
+@contextlib.contextmanager
+def record_to(out_dir: str, site: str) -> Iterator[List[str]]:
+    """把本进程 requests 收到的 200 页面录成 fixtures 目录（manifest 追加写，同 URL 后录的覆盖先录的）"""
+    root = Path(out_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = root / MANIFEST
+    start = sum(1 for _ in open(manifest, "r", encoding="utf-8")) if manifest.exists() else 0
+    recorded: List[str] = []
+    lock = threading.Lock()
+    orig_send = HTTPAdapter.send
+
+    def send(adapter, request, **kwargs):
+        resp = orig_send(adapter, request, **kwargs)
+        if resp.status_code == 200 and not kwargs.get("stream"):
+            body = gzip.compress(resp.content)
+            with lock:
+                name = f"{start + len(recorded):05d}.html.gz"
+                (root / name).write_bytes(body)
+                with open(manifest, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"url": request.url, "file": name, "site": site}, ensure_ascii=False) + "\n")
+                recorded.append(request.url)
+        return resp
+
+    HTTPAdapter.send = send
+    try:
+        yield recorded
+    finally:
+        HTTPAdapter.send = orig_send
+
+
+def record_listing(target: str, out_dir: str) -> int:
+    """在线跑一遍列表采集器（真实站点，保留翻页间隔），把列表页录成 fixtures 目录，返回页数"""
+    bench = BENCH_TARGETS.get(target)
+    if bench is None or not bench.listing:
+        listings = sorted(k for k, t in BENCH_TARGETS.items() if t.listing)
+        raise KeyError(f"{target} 不是列表回放目标，可选: {listings}（商品页用 export）")
+    module_name, attr = bench.runner.split(":", 1)
+    runner = getattr(importlib.import_module(module_name), attr)
+    with tempfile.TemporaryDirectory(prefix="replay_record_") as tmp, \
+            _patched(link_diff_mod, "LINK_DIFF_ENABLED", False), \
+            record_to(out_dir, bench.site) as recorded:
+        runner([], Path(tmp), 1, replay=False, **bench.kwargs)
+    print(f"📼 [{target}] 录制列表页 {len(recorded)} 页 → {out_dir}")
+    return len(recorded)
+
+
+# ================== 回放服务器（子进程） ==================
+
+@dataclass
+class FaultConfig:
+    """回放时注入的延迟与故障"""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0              # 按此概率返回 error_statuses 之一
+    error_statuses: Tuple[int, ...] = (503, 429)
+    reset_rate: float = 0.0              # 按此概率不回响应直接断开连接
+    seed: int = 0
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"       # keep-alive，和真实站点一样复用连接
+
+    def log_message(self, format, *args):   # noqa: A002  不打印每个请求
+        pass
+
+    def do_GET(self):
+        server: "_ReplayHTTPServer" = self.server  # type: ignore[assignment]
+        if self.path == STATS_PATH:
+            self._send(200, json.dumps(server.snapshot_stats()).encode("utf-8"), "application/json")
+            return
+
+        url = self.headers.get(REPLAY_HEADER) or self.path
+        body = server.pages.get(_url_key(url))
+        fault = server.fault
+        with server.lock:
+            roll = server.rng.random()
+            delay = max(0.0, fault.latency_ms + server.rng.uniform(-fault.jitter_ms, fault.jitter_ms)) / 1000
+            status = server.rng.choice(fault.error_statuses) if fault.error_statuses else 503
+        if delay:
+            time.sleep(delay)
+
+        if roll < fault.reset_rate:
+            server.count("resets")
+            self.close_connection = True
+            return
+        if roll < fault.reset_rate + fault.error_rate:
+            server.count("errors")
+            self._send(status, b"injected error", "text/plain", {"Retry-After": "1"} if status == 429 else None)
+            return
+        if body is None:
+            server.count("not_found")
+            self._send(404, b"not recorded", "text/plain")
+            return
+
+        server.count("ok")
+        if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            self._send(200, body, "text/html; charset=utf-8", {"Content-Encoding": "gzip"})
+        else:
+            self._send(200, gzip.decompress(body), "text/html; charset=utf-8")
+
+    def _send(self, status: int, body: bytes, ctype: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count("bytes", len(body))  # type: ignore[attr-defined]
+
+
+class _ReplayHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, pages: Dict[str, bytes], fault: FaultConfig):
+        super().__init__(("127.0.0.1", 0), _ReplayHandler)
+        self.pages = {_url_key(u): b for u, b in pages.items()}
+        self.fault = fault
+        self.rng = random.Random(fault.seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "resets": 0, "not_found": 0, "bytes": 0}
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self.lock:
+            self.stats[key] += n
+            if key != "bytes" and key != "requests":
+                self.stats["requests"] += 1
+
+    def snapshot_stats(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.stats)
+
+    def handle_error(self, request, client_address) -> None:
+        # 客户端关闭 keep-alive 连接（aiohttp 常见）属正常情况，不打印堆栈
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def _serve(site: Optional[str], fixtures_dir: Optional[str], limit: int, fault: FaultConfig, conn) -> None:
+    """子进程入口：读页面 → 起服务器 → 把 (端口, URL 列表) 发回父进程"""
+    try:
+        pages = load_fixtures(site=site, fixtures_dir=fixtures_dir, limit=limit)
+        server = _ReplayHTTPServer(pages, fault)
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", server.server_address[1], list(pages)))
+    server.serve_forever()
+
+
+class ReplayServer:
+    """在子进程里运行的回放服务器"""
+
+    def __init__(
+        self,
+        site: Optional[str] = None,
+        fixtures_dir: Optional[str] = None,
+        limit: int = 0,
+        fault: Optional[FaultConfig] = None,
+    ):
+        self.site = site
+        self.fixtures_dir = fixtures_dir
+        self.limit = limit
+        self.fault = fault or FaultConfig()
+        self.port = 0
+        self.urls: List[str] = []
+        self._proc: Optional[mp.Process] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "ReplayServer":
+        parent, child = mp.Pipe()
+        self._proc = mp.Process(
+            target=_serve,
+            args=(self.site, self.fixtures_dir, self.limit, self.fault, child),
+            daemon=True,
+        )
+        self._proc.start()
+        msg = parent.recv()
+        if msg[0] != "ready":
+            self.stop()
+            raise RuntimeError(f"回放服务器启动失败: {msg[1]}")
+        _, self.port, self.urls = msg
+        return self
+
+    def stats(self) -> Dict[str, int]:
+        r = requests.get(self.base_url + STATS_PATH, timeout=5, proxies={"http": None, "https": None})
+        return r.json()
+
+    def stop(self) -> None:
+        if self._proc is not None and self._proc.is_alive():
+            self._proc.terminate()
+            self._proc.join(5)
+        self._proc = None
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+# ================== 被测进程：路由与隔离 ==================
+
+class LatencyRecorder:
+    """客户端视角的请求耗时（发出 → 收到响应头）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: List[float] = []
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        with self._lock:
+            data = sorted(self.samples)
+        if not data:
+            return 0.0
+        return data[min(len(data) - 1, int(q * len(data)))]
+
+
+def _rewrite(url: str, base_url: str) -> Optional[str]:
+    parts = urlsplit(url)
+    if f"{parts.scheme}://{parts.netloc}" == base_url:
+        return None
+    return base_url + (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+
+@contextlib.contextmanager
+def route_to(base_url: str, recorder: LatencyRecorder) -> Iterator[None]:
+    """把本进程 requests / aiohttp 发出的请求改发到回放服务器"""
+    orig_send = HTTPAdapter.send
+
+    def send(adapter, request, **kwargs):
+        original = request.url
+        local = _rewrite(original, base_url)
+        if local is not None:
+            request.url = local
+            request.headers[REPLAY_HEADER] = original
+            kwargs["proxies"] = {}
+        t0 = time.perf_counter()
+        try:
+            resp = orig_send(adapter, request, **kwargs)
+        finally:
+            recorder.add(time.perf_counter() - t0)
+            request.url = original
+        resp.url = original
+        return resp
+
+    HTTPAdapter.send = send
+    aiohttp_session = None
+    try:
+        import aiohttp
+        aiohttp_session = aiohttp.ClientSession
+        orig_request = aiohttp_session._request
+
+        async def _request(session, method, str_or_url, **kwargs):
+            local = _rewrite(str(str_or_url), base_url)
+            if local is not None:
+                kwargs["headers"] = {**(kwargs.get("headers") or {}), REPLAY_HEADER: str(str_or_url)}
+                kwargs.pop("proxy", None)
+                str_or_url = local
+            t0 = time.perf_counter()
+            try:
+                return await orig_request(session, method, str_or_url, **kwargs)
+            finally:
+                recorder.add(time.perf_counter() - t0)
+
+        aiohttp_session._request = _request
+    except ImportError:
+        pass
+
+    try:
+        yield
+    finally:
+        HTTPAdapter.send = orig_send
+        if aiohttp_session is not None:
+            aiohttp_session._request = orig_request
+
+
+@contextlib.contextmanager
+def sandbox(work_dir: Path) -> Iterator[HtmlSnapshotStore]:
+    """
+    被测 fetcher 的隔离环境：临时快照库、不持久化的 host_limiter、关闭 frontier 与 link_diff 对比
+
+    返回临时快照库；fetcher 成功写出 TXT 时会 mark_output，据此统计成功页数。
+    """
+    saved = (
+        html_store_mod.HTML_STORE_ENABLED, html_store_mod._STORE,
+        host_limiter_mod._LIMITER, frontier_mod.CRAWL_FRONTIER_ENABLED, link_diff_mod.LINK_DIFF_ENABLED,
+    )
+    store = HtmlSnapshotStore(work_dir / "html_store")
+    html_store_mod.HTML_STORE_ENABLED = True
+    html_store_mod._STORE = store
+    host_limiter_mod._LIMITER = host_limiter_mod.AdaptiveHostLimiter(state_file=None)
+    frontier_mod.CRAWL_FRONTIER_ENABLED = False
+    link_diff_mod.LINK_DIFF_ENABLED = False
+    try:
+        yield store
+    finally:
+        (html_store_mod.HTML_STORE_ENABLED, html_store_mod._STORE, host_limiter_mod._LIMITER,
+         frontier_mod.CRAWL_FRONTIER_ENABLED, link_diff_mod.LINK_DIFF_ENABLED) = saved
+
+
+@contextlib.contextmanager
+def _patched(obj, name: str, value) -> Iterator[None]:
+    old = getattr(obj, name)
+    setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        setattr(obj, name, old)
+
+
+# ================== 各 fetcher 的 runner ==================
+
+def run_camper_v2(urls: List[str], out_dir: Path, max_workers: int) -> None:
+    from brands.camper import fetch_product_info_v2 as m
+    with _patched(m, "SAVE_PATH", out_dir):
+        m.camper_fetch_product_info(urls=urls, max_workers=max_workers)
+
+
+def run_geox(urls: List[str], out_dir: Path, max_workers: int) -> None:
+    from brands.geox import fetch_product_info_fast as m
+    with _patched(m, "TXT_OUTPUT_DIR", out_dir):
+        m.fetch_all_product_info(urls=urls, max_workers=max_workers)
+
+
+def run_reiss(urls: List[str], out_dir: Path, max_workers: int) -> None:
+    from brands.reiss.core import reiss_product_fetcher as m
+    links = out_dir.parent / "reiss_links.txt"
+    links.write_text("\n".join(urls) + "\n", encoding="utf-8")
+    m.reiss_fetch_all(urls_file=links, save_dir=out_dir, max_workers=max_workers)
+
+
+def run_base_fetcher(urls: List[str], out_dir: Path, max_workers: int, fetcher_cls: str) -> None:
+    """BaseFetcher 子类：不启动 Chrome，_fetch_html 改为 HTTP GET（经回放服务器）"""
+    from common.crawl.http_client import HttpClient
+
+    module_name, cls_name = fetcher_cls.split(":", 1)
+    module = importlib.import_module(module_name)
+    cls = getattr(module, cls_name)
+    client = HttpClient(f"replay-{module.SITE_NAME}", pool_size=max_workers, retries=0)
+
+    class ReplayFetcher(cls):
+        USE_FRONTIER = False
+        CROSS_SUPPLIER_SKIP = False
+
+        def _fetch_html(self, url: str) -> str:
+            r = client.get(url)
+            r.raise_for_status()
+            return r.text
+
+    ReplayFetcher.__name__ = f"Replay{cls.__name__}"
+    fetcher = ReplayFetcher(
+        site_name=module.SITE_NAME,
+        links_file=module.LINKS_FILE,
+        output_dir=out_dir,
+        max_workers=max_workers,
+    )
+    fetcher.run_batch(urls=urls)
+
+
+class _NoSleepTime:
+    """列表采集器里 time 模块的替身：翻页间隔 / 失败重试的等待是给真实站点的，回放时跳过"""
+
+    def __getattr__(self, name: str):
+        return getattr(time, name)
+
+    @staticmethod
+    def sleep(_seconds: float) -> None:
+        pass
+
+
+def _listing_env(module, replay: bool) -> contextlib.ExitStack:
+    stack = contextlib.ExitStack()
+    if replay:
+        stack.enter_context(_patched(module, "time", _NoSleepTime()))
+    return stack
+
+
+def run_camper_links(urls: List[str], out_dir: Path, max_workers: int, replay: bool = True) -> None:
+    from brands.camper import collect_product_links as m
+    with _listing_env(m, replay), _patched(m, "LINKS_FILE", out_dir / LINKS_OUT):
+        m.camper_get_links()
+
+
+def run_geox_links(urls: List[str], out_dir: Path, max_workers: int, replay: bool = True) -> None:
+    from brands.geox import collect_product_links as m
+    with _listing_env(m, replay), _patched(m, "SAVE_FILE", out_dir / LINKS_OUT), \
+            _patched(m, "HTML_DEBUG_FILE", out_dir / "debug_page.html"):
+        m.collect_all_product_links()
+
+
+def run_terraces_links(urls: List[str], out_dir: Path, max_workers: int, replay: bool = True) -> None:
+    from brands.barbour.supplier import terraces_get_links as m
+    with _listing_env(m, replay):
+        m.collect_terraces_links(wait=0 if replay else 1, output_file=out_dir / LINKS_OUT)
+
+
+# ================== 基准 ==================
+
+@dataclass
+class BenchReport:
+    target: str
+    workers: int
+    pages: int                 # 送入 fetcher 的 URL 数
+    ok: int                    # 写出 TXT 的页数（列表回放：返回 200 的列表页数）
+    seconds: float
+    cpu_seconds: float
+    p50_ms: float
+    p95_ms: float
+    requests: int              # 客户端发出的请求数（含重试）
+    server: Dict[str, int] = field(default_factory=dict)
+    fault: Dict[str, Any] = field(default_factory=dict)
+    links: Optional[int] = None   # 列表回放采集到的链接数
+
+    @property
+    def pages_per_sec(self) -> float:
+        return self.ok / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def cpu_ms_per_page(self) -> float:
+        return self.cpu_seconds / self.ok * 1000 if self.ok else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["pages_per_sec"] = round(self.pages_per_sec, 2)
+        d["cpu_ms_per_page"] = round(self.cpu_ms_per_page, 2)
+        return d
+
+    def format(self) -> str:
+        s = self.server
+        links = f" 链接 {self.links} 条" if self.links is not None else ""
+        return (
+            f"⏱️ replay [{self.target}] 线程 {self.workers} | 成功 {self.ok}/{self.pages} 页{links} "
+            f"耗时 {self.seconds:.1f}s → {self.pages_per_sec:.1f} pages/s | "
+            f"请求 {self.requests} p50 {self.p50_ms:.0f}ms p95 {self.p95_ms:.0f}ms | "
+            f"CPU {self.cpu_ms_per_page:.1f}ms/页\n"
+            f"   服务器: 200×{s.get('ok', 0)} 注入错误×{s.get('errors', 0)} "
+            f"断开×{s.get('resets', 0)} 未录制×{s.get('not_found', 0)} "
+            f"{s.get('bytes', 0) / 1024 / 1024:.1f} MB"
+        )
+
+
+def run_bench(
+    target: str | BenchTarget,
+    fixtures_dir: Optional[str] = None,
+    max_workers: int = 8,
+    limit: int = 0,
+    fault: Optional[FaultConfig] = None,
+    keep_output: Optional[str] = None,
+) -> BenchReport:
+    """
+    起回放服务器，在隔离环境里跑一遍 fetcher，返回指标
+
+    Args:
+        target: BENCH_TARGETS 中的名称或 BenchTarget
+        fixtures_dir: export / record 出的 fixtures 目录；None 时直接读 HTML 快照库（列表目标必须给）
+        max_workers: fetcher 线程数
+        limit: 最多回放多少页
+        fault: 注入的延迟 / 故障
+        keep_output: 把生成的 TXT 拷到这个目录（检查解析结果用）
+    """
+    name = target if isinstance(target, str) else target.site
+    if isinstance(target, str):
+        if target not in BENCH_TARGETS:
+            raise KeyError(f"未登记的回放目标: {target}，可选: {sorted(BENCH_TARGETS)}")
+        target = BENCH_TARGETS[target]
+    if target.listing and not fixtures_dir:
+        raise ValueError(f"[{name}] 列表页不在 HTML 快照库里，先用 record 录制再 --fixtures 回放")
+    fault = fault or FaultConfig()
+    module_name, attr = target.runner.split(":", 1)
+    runner = getattr(importlib.import_module(module_name), attr)
+
+    with ReplayServer(target.site, fixtures_dir, limit, fault) as server, \
+            tempfile.TemporaryDirectory(prefix="replay_bench_") as tmp:
+        if not server.urls:
+            raise RuntimeError(f"[{name}] 没有录制的页面（快照库 site={target.site} / fixtures={fixtures_dir}）")
+        work = Path(tmp)
+        out_dir = work / "txt"
+        out_dir.mkdir()
+        recorder = LatencyRecorder()
+        print(f"🎬 replay [{name}] {len(server.urls)} 页 @ {server.base_url}，线程 {max_workers}")
+
+        with sandbox(work) as store, route_to(server.base_url, recorder):
+            cpu0, t0 = time.process_time(), time.perf_counter()
+            runner(list(server.urls), out_dir, max_workers, **target.kwargs)
+            seconds, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+            ok = sum(1 for snap in store.iter_latest() if snap.output_path)
+        server_stats = server.stats()
+        links = None
+        if target.listing:
+            ok = server_stats.get("ok", 0)
+            links_file = out_dir / LINKS_OUT
+            links = len(links_file.read_text(encoding="utf-8").split()) if links_file.exists() else 0
+
+        report = BenchReport(
+            target=name,
+            workers=max_workers,
+            pages=len(server.urls),
+            ok=ok,
+            seconds=seconds,
+            cpu_seconds=cpu,
+            p50_ms=recorder.percentile(0.5) * 1000,
+            p95_ms=recorder.percentile(0.95) * 1000,
+            requests=len(recorder.samples),
+            server=server_stats,
+            fault=asdict(fault),
+            links=links,
+        )
+        if keep_output:
+            shutil.copytree(out_dir, keep_output, dirs_exist_ok=True)
+
+    print(report.format())
+    return report
+
+
+def compare(report: BenchReport, baseline_file: str, tolerance: float) -> bool:
+    """与基线比较：吞吐量下降或 CPU/页上升超过 tolerance（比例）视为退步"""
+    base = json.loads(Path(baseline_file).read_text(encoding="utf-8"))
+    cur = report.to_dict()
+    ok = True
+    checks = [
+        ("pages_per_sec", "吞吐量", cur["pages_per_sec"] < base["pages_per_sec"] * (1 - tolerance)),
+        ("cpu_ms_per_page", "CPU/页", cur["cpu_ms_per_page"] > base["cpu_ms_per_page"] * (1 + tolerance)),
+        ("ok", "成功页数", cur["ok"] < base["ok"] * (1 - tolerance)),
+    ]
+    if base.get("links") is not None and cur["links"] is not None:
+        checks.append(("links", "链接数", cur["links"] < base["links"] * (1 - tolerance)))
+    for key, label, worse in checks:
+        print(f"   {'❌' if worse else '✅'} {label}: {base[key]} → {cur[key]}")
+        ok &= not worse
+    return ok
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="本地回放录制页面，测 fetcher 吞吐量 / 延迟 / CPU")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("export", help="把快照库中某站点的页面导出为 fixtures 目录")
+    p.add_argument("site", help="快照库中的 site 名 (camper / geox / reiss / houseoffraser ...)")
+    p.add_argument("--out", required=True)
+    p.add_argument("--limit", type=int, default=0)
+
+    p = sub.add_parser("record", help="在线跑一遍列表采集器，把列表页录成 fixtures 目录")
+    p.add_argument("target", choices=sorted(k for k, t in BENCH_TARGETS.items() if t.listing))
+    p.add_argument("--out", required=True)
+
+    p = sub.add_parser("run", help="回放并测量")
+    p.add_argument("target", choices=sorted(BENCH_TARGETS))
+    p.add_argument("--fixtures", help="fixtures 目录（默认读 HTML 快照库）")
+    p.add_argument("--workers", type=int, default=8)
+    p.add_argument("--limit", type=int, default=0)
+    p.add_argument("--latency-ms", type=float, default=0.0)
+    p.add_argument("--jitter-ms", type=float, default=0.0)
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--error-status", default="503,429", help="注入的错误状态码，逗号分隔")
+    p.add_argument("--reset-rate", type=float, default=0.0)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--keep-output", help="把生成的 TXT 拷到此目录")
+    p.add_argument("--save", help="结果保存为 JSON（作为以后的 --baseline）")
+    p.add_argument("--baseline", help="与之前 --save 的结果比较，退步时退出码为 1")
+    p.add_argument("--tolerance", type=float, default=0.25)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "export":
+        export_fixtures(args.site, args.out, args.limit)
+        return
+    if args.cmd == "record":
+        record_listing(args.target, args.out)
+        return
+
+    fault = FaultConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_statuses=tuple(int(s) for s in args.error_status.split(",") if s.strip()),
+        reset_rate=args.reset_rate,
+        seed=args.seed,
+    )
+    report = run_bench(args.target, args.fixtures, args.workers, args.limit, fault, args.keep_output)
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save).write_text(json.dumps(report.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+    if args.baseline and not compare(report, args.baseline, args.tolerance):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
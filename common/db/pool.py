@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+数据库连接池 - 进程内按 PGSQL_CONFIG 复用连接，所有语句自动计时
+
+以前几乎每个模块各自 psycopg2.connect(**PGSQL_CONFIG) 或 create_engine(...)，
+一次 prepare_jingya_listing 要建几十次连接（每次 TCP + 认证）。
+
+现在:
+- connect(pg_config)：从进程级连接池取一个连接，可直接替换 psycopg2.connect(**pg_config)；
+  conn.close() 不真正断开，而是回滚未提交的事务后放回池中（同一配置最多保留 DB_POOL_MAX_IDLE 个空闲连接）
+- get_conn(pg_config)：with 块版本，正常结束提交、异常回滚，最后放回池中
+- get_engine(pg_config)：同一配置只建一个 SQLAlchemy Engine（pd.read_sql / engine.begin() 用）
+- 池里发出的连接是 TimedConnection，游标（包括 cursor_factory=RealDictCursor 等）
+  的 execute / executemany / copy_expert 都会记到 common.db.timing
+
+使用方式:
+    from common.db.pool import connect, get_conn, get_engine
+
+    conn = connect(PGSQL_CONFIG)          # 与 psycopg2.connect(**PGSQL_CONFIG) 用法相同
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(...)
+    conn.close()                          # 放回池中
+
+    with get_conn(PGSQL_CONFIG) as conn:  # 自动提交 / 回滚 / 归还
+        ...
+"""
+
+from __future__ import annotations
+
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterator, List, Mapping, Tuple
+
+import psycopg2
+import psycopg2.extensions
+
+from cfg.settings import SETTINGS
+from common.db import timing
+
+DB_POOL_MAX_IDLE = int(SETTINGS.get("DB_POOL_MAX_IDLE", 8))
+
+
+# ================== 计时游标 / 连接 ==================
+
+class TimedCursorMixin:
+    """execute / executemany / copy_expert 计时；服务端游标（有 name）的 execute 只是 DECLARE，由 iter_rows 统一计"""
+
+    def execute(self, query, vars=None):
+        t0 = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            if not self.name:
+                timing.record(query, time.perf_counter() - t0, self.rowcount)
+
+    def executemany(self, query, vars_list):
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            timing.record(query, time.perf_counter() - t0, self.rowcount)
+
+    def copy_expert(self, sql, file, size=8192):
+        t0 = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            timing.record(sql, time.perf_counter() - t0, self.rowcount)
+
+
+class TimedCursor(TimedCursorMixin, psycopg2.extensions.cursor):
+    pass
+
+
+@lru_cache(maxsize=None)
+def _timed_factory(factory: type) -> type:
+    """任意游标类 → 带计时的子类（RealDictCursor → TimedRealDictCursor）"""
+    if issubclass(factory, TimedCursorMixin):
+        return factory
+    return type(f"Timed{factory.__name__}", (TimedCursorMixin, factory), {})
+
+
+class TimedConnection(psycopg2.extensions.connection):
+    """池中的连接：游标自动计时，close() 归还到池"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursor_factory = TimedCursor
+        self._pool: "ConnectionPool | None" = None
+        self._checked_out = False
+        self.prepared: Dict[str, str] = {}     # SQL → 预备语句名（common.db.query.execute_prepared）
+        self.prepare_lock = threading.Lock()   # 多线程共用一个连接时，查重 + PREPARE + 登记要一起完成
+
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.get("cursor_factory") or self.cursor_factory
+        kwargs["cursor_factory"] = _timed_factory(factory)
+        return super().cursor(*args, **kwargs)
+
+    def close(self):
+        if self._pool is not None and self._checked_out and not self.closed:
+            self._pool.release(self)
+            return
+        super().close()
+
+    def discard(self):
+        """真正断开（不放回池）"""
+        self._pool = None
+        super().close()
+
+
+def new_connection(pg_config: Mapping) -> TimedConnection:
+    """不经过池、直接建一个计时连接（SQLAlchemy 的 creator 用）"""
+    return psycopg2.connect(connection_factory=TimedConnection, **pg_config)
+
+
+# ================== 连接池 ==================
+
+class ConnectionPool:
+    """
+    同一份配置的连接池：不限制同时借出的数量（与以前各自 connect 的行为一致，不会因为
+    某处忘了 close 而卡住别人），只限制保留的空闲连接数。借出前不做 ping，
+    断开的连接在归还 / 再次借出时发现 closed 后丢弃。
+    """
+
+    def __init__(self, pg_config: Mapping, max_idle: int = DB_POOL_MAX_IDLE):
+        self.pg_config = dict(pg_config)
+        self.max_idle = max_idle
+        self._idle: List[TimedConnection] = []
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self) -> TimedConnection:
+        conn = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.pop()
+                if not candidate.closed:
+                    conn = candidate
+                    self.reused += 1
+                    break
+        if conn is None:
+            conn = new_connection(self.pg_config)
+            conn._pool = self
+            with self._lock:
+                self.created += 1
+        conn._checked_out = True
+        return conn
+
+    def release(self, conn: TimedConnection) -> None:
+        conn._checked_out = False
+        try:
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            if conn.autocommit:
+                conn.autocommit = False
+        except Exception:
+            conn.discard()
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.discard()
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            try:
+                conn.discard()
+            except Exception:
+                pass
+
+
+_POOLS: Dict[Tuple, ConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+_ENGINES: Dict[Tuple, object] = {}
+
+
+def _config_key(pg_config: Mapping) -> Tuple:
+    return tuple(sorted((str(k), str(v)) for k, v in pg_config.items()))
+
+
+def get_pool(pg_config: Mapping) -> ConnectionPool:
+    key = _config_key(pg_config)
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = ConnectionPool(pg_config)
+        return pool
+
+
+def connect(pg_config: Mapping) -> TimedConnection:
+    """从池中取连接（替换 psycopg2.connect(**pg_config)）；用完 close() 即归还"""
+    return get_pool(pg_config).acquire()
+
+
+@contextmanager
+def get_conn(pg_config: Mapping) -> Iterator[TimedConnection]:
+    """借一个连接：块正常结束提交，异常回滚，最后归还到池"""
+    conn = connect(pg_config)
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def get_engine(pg_config: Mapping, **kwargs):
+    """
+    同一配置共用一个 SQLAlchemy Engine（连接由 SQLAlchemy 自己的池管理，底层同样是计时连接）；
+    kwargs 透传给 create_engine（如 pool_size），只在第一次创建时生效
+    """
+    from sqlalchemy import create_engine
+
+    key = _config_key(pg_config)
+    with _POOLS_LOCK:
+        engine = _ENGINES.get(key)
+        if engine is None:
+            cfg = dict(pg_config)
+            kwargs.setdefault("pool_pre_ping", True)
+            engine = _ENGINES[key] = create_engine(
+                "postgresql+psycopg2://", creator=lambda: new_connection(cfg), **kwargs
+            )
+        return engine
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """{"host/dbname": {"created": 新建连接数, "reused": 复用次数, "idle": 当前空闲数}}"""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+    return {
+        f"{p.pg_config.get('host', '')}/{p.pg_config.get('dbname', p.pg_config.get('database', ''))}": {
+            "created": p.created, "reused": p.reused, "idle": len(p._idle),
+        }
+        for p in pools
+    }
+
+
+def close_all() -> None:
+    """断开所有空闲连接并释放 Engine（进程退出时自动调用）"""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        engines = list(_ENGINES.values())
+        _ENGINES.clear()
+    for pool in pools:
+        pool.close_all()
+    for engine in engines:
+        try:
+            engine.dispose()
+        except Exception:
+            pass
+
+
+atexit.register(close_all)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+查询辅助 - 热点语句走预备语句，大结果集走服务端游标
+
+- execute_prepared(cur, sql, params)：同一连接上第一次执行时 PREPARE，之后只发 EXECUTE，
+  省掉每次的解析 / 规划（抓取时每个商品都要查的编码补全、关键词召回这类语句）；
+  只在 common.db.pool 的连接上缓存预备语句，其他连接照常 cur.execute
+- iter_rows(conn, sql, params)：服务端游标分批拉取（DB_FETCH_SIZE 行一批），不把整表读进客户端内存
+- read_frame(conn, sql, params)：iter_rows 的 DataFrame 版本，替换 pd.read_sql(sql, psycopg2连接)
+  （pandas 对裸 psycopg2 连接会告警，且一次性 fetchall）
+
+使用方式:
+    from common.db.query import execute_prepared, iter_rows, read_frame
+
+    with conn.cursor() as cur:
+        execute_prepared(cur, "SELECT product_code FROM barbour_products WHERE product_code ILIKE %s", (p,))
+        rows = cur.fetchall()
+    df = read_frame(conn, "SELECT * FROM camper_inventory WHERE stock_count > %s", (0,))
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import time
+from itertools import count
+from typing import Iterator, Optional, Sequence
+
+import pandas as pd
+import psycopg2.errors
+
+from cfg.settings import SETTINGS
+from common.db import timing
+
+DB_FETCH_SIZE = int(SETTINGS.get("DB_FETCH_SIZE", 5000))
+
+_PLACEHOLDER = re.compile(r"%%|%s")
+_CURSOR_SEQ = count(1)
+
+
+def _raw_connection(conn):
+    """SQLAlchemy 的 DBAPI 连接包装 → 底层 psycopg2 连接"""
+    return getattr(conn, "driver_connection", None) or getattr(conn, "dbapi_connection", None) or conn
+
+
+def _to_dollar_params(sql: str) -> tuple[str, int]:
+    """%s 占位符 → $1, $2 ...（%% 还原为 %），返回 (SQL, 参数个数)"""
+    n = 0
+
+    def repl(m):
+        nonlocal n
+        if m.group(0) == "%%":
+            return "%"
+        n += 1
+        return f"${n}"
+
+    return _PLACEHOLDER.sub(repl, sql), n
+
+
+def execute_prepared(cur, sql: str, params: Sequence = (), name: Optional[str] = None):
+    """
+    以预备语句执行 sql（%s 占位符，与 cur.execute 相同）；name 为空时按 SQL 文本生成。
+    连接不是 common.db.pool 的计时连接时退回普通 cur.execute。
+
+    预备语句属于会话，ROLLBACK 之后仍然存在：EXECUTE 失败（参数错误、事务中止等）时登记保留，
+    下次直接 EXECUTE；只有服务端确实没有该语句（DISCARD ALL / DEALLOCATE）时才删掉登记。
+    查重 + PREPARE + 登记在连接的 prepare_lock 内完成（多个线程共用一个连接时不会重复 PREPARE）；
+    任何一步出错都先回滚再抛出，连接不会停留在中止的事务里。
+    """
+    conn = _raw_connection(cur.connection)
+    registry = getattr(conn, "prepared", None)
+    if registry is None:
+        return cur.execute(sql, params)
+
+    try:
+        with conn.prepare_lock:
+            stmt = registry.get(sql)
+            if stmt is None:
+                stmt = (name or "ps_" + hashlib.md5(sql.encode("utf-8")).hexdigest()[:16]).lower()
+                body, _ = _to_dollar_params(sql)
+                # 会话里已有同名语句（登记丢失、或 name 与别的 SQL 重名）时先释放，避免 DuplicatePreparedStatement
+                cur.execute("SELECT 1 FROM pg_prepared_statements WHERE name = %s", (stmt,))
+                if cur.fetchone():
+                    cur.execute(f"DEALLOCATE {stmt}")
+                    for key in [k for k, v in registry.items() if v == stmt]:
+                        registry.pop(key, None)
+                cur.execute(f"PREPARE {stmt} AS {body}")
+                registry[sql] = stmt
+
+        placeholders = ", ".join(["%s"] * len(params))
+        return cur.execute(f"EXECUTE {stmt} ({placeholders})" if params else f"EXECUTE {stmt}", params)
+    except psycopg2.Error as e:
+        if isinstance(e, psycopg2.errors.InvalidSqlStatementName):
+            # 服务端没有这条预备语句了：下次重新 PREPARE
+            with conn.prepare_lock:
+                registry.pop(sql, None)
+        if not conn.autocommit:
+            conn.rollback()
+        raise
+
+
+def iter_rows(conn, sql: str, params: Optional[Sequence] = None, fetch_size: int = DB_FETCH_SIZE) -> Iterator[tuple]:
+    """服务端游标逐批读取；需在事务中（非 autocommit），读完后游标关闭"""
+    t0 = time.perf_counter()
+    rows = 0
+    with conn.cursor(name=f"ss_{next(_CURSOR_SEQ)}") as cur:
+        cur.itersize = fetch_size
+        cur.execute(sql, params)
+        for row in cur:
+            rows += 1
+            yield row
+    timing.record(sql, time.perf_counter() - t0, rows)
+
+
+def read_frame(conn, sql: str, params: Optional[Sequence] = None, fetch_size: int = DB_FETCH_SIZE) -> pd.DataFrame:
+    """服务端游标分批读成 DataFrame（列名取自结果集；与 pd.read_sql 一样把 Decimal 转成 float）"""
+    t0 = time.perf_counter()
+    rows = []
+    with conn.cursor(name=f"ss_{next(_CURSOR_SEQ)}") as cur:
+        cur.itersize = fetch_size
+        cur.execute(sql, params)
+        while True:
+            batch = cur.fetchmany(fetch_size)
+            if batch:
+                rows.extend(batch)
+            if len(batch) < fetch_size:
+                break
+        columns = [d[0] for d in cur.description] if cur.description else []
+    timing.record(sql, time.perf_counter() - t0, len(rows))
+    return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
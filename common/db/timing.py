@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+SQL 计时 - 每条语句的耗时 / 行数，按流水线步骤汇总
+
+common.db.pool 发出的连接（含 get_engine 的 SQLAlchemy 连接）上，每次 execute / executemany /
+copy_expert 都会调用 record()：
+- 语句按"指纹"归并（字符串 / 数字字面量替换成 ?，空白折叠，截断到 100 字符），
+  execute_batch / execute_values 拼出来的多页 SQL 也归到同一条
+- 归到当前步骤名下：db_step("...") 设置，可嵌套（内层优先），也可当装饰器；没有步骤时记在 "-" 下
+- 单条超过 DB_SLOW_QUERY_MS 毫秒时立即打印；DB_LOG_STATEMENTS=True 时每条都打印
+- 步骤结束打印本次调用的汇总（同名步骤多次调用时各算各的，如逐个品牌调用 insert_jingyaid_to_db）；
+  进程退出时（DB_TIMING_REPORT=True）打印全部步骤的累计汇总
+
+使用方式:
+    from common.db.timing import db_step, print_report
+
+    @db_step("Step 4 TXT 导入数据库")
+    def step_import_txt_to_db(brand): ...
+
+    with db_step("C6 回填价格"):
+        ...
+    print_report()
+"""
+
+from __future__ import annotations
+
+import atexit
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from cfg.settings import SETTINGS
+
+DB_SLOW_QUERY_MS = float(SETTINGS.get("DB_SLOW_QUERY_MS", 2000))
+DB_LOG_STATEMENTS = bool(SETTINGS.get("DB_LOG_STATEMENTS", False))
+DB_TIMING_REPORT = bool(SETTINGS.get("DB_TIMING_REPORT", True))
+
+_NO_STEP = "-"
+_STR_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUM_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+@dataclass
+class StatementStats:
+    calls: int = 0
+    rows: int = 0
+    total_sec: float = 0.0
+    max_sec: float = 0.0
+
+    def add(self, elapsed: float, rows: int) -> None:
+        self.calls += 1
+        self.rows += max(rows, 0)
+        self.total_sec += elapsed
+        self.max_sec = max(self.max_sec, elapsed)
+
+
+_lock = threading.Lock()
+# 当前步骤栈（进程级：抓取线程也记到主线程的步骤下）：(步骤名, 本次调用的 指纹 → 统计)
+_steps: List[Tuple[str, Dict[str, StatementStats]]] = []
+_stats: Dict[str, Dict[str, StatementStats]] = {}       # 步骤 → 指纹 → 累计统计
+
+
+def fingerprint(query) -> str:
+    """SQL → 归并用的指纹"""
+    if isinstance(query, bytes):
+        query = query[:400].decode("utf-8", "replace")
+    text = str(query)[:400]
+    text = _STR_LITERAL.sub("?", text)
+    text = _NUM_LITERAL.sub("?", text)
+    return _SPACES.sub(" ", text).strip()[:100]
+
+
+def current_step() -> str:
+    with _lock:
+        return _steps[-1][0] if _steps else _NO_STEP
+
+
+def record(query, elapsed: float, rows: int) -> None:
+    """记录一条语句（由 common.db.pool 的游标调用）"""
+    fp = fingerprint(query)
+    with _lock:
+        step = _steps[-1][0] if _steps else _NO_STEP
+        _stats.setdefault(step, {}).setdefault(fp, StatementStats()).add(elapsed, rows)
+        if _steps:
+            _steps[-1][1].setdefault(fp, StatementStats()).add(elapsed, rows)
+    if DB_LOG_STATEMENTS or elapsed * 1000 >= DB_SLOW_QUERY_MS:
+        icon = "🐢" if elapsed * 1000 >= DB_SLOW_QUERY_MS else "🗄️"
+        print(f"{icon} SQL {elapsed * 1000:.0f}ms / {max(rows, 0)} 行 [{step}] {fp}")
+
+
+def step_summary(step: str, top: int = 3) -> Optional[str]:
+    """某个步骤在本进程内的累计汇总（没有执行过 SQL 时返回 None）"""
+    with _lock:
+        stats = dict(_stats.get(step, {}))
+    return _format_summary(step, stats, top)
+
+
+def _format_summary(step: str, stats: Dict[str, StatementStats], top: int = 3) -> Optional[str]:
+    if not stats:
+        return None
+    calls = sum(s.calls for s in stats.values())
+    rows = sum(s.rows for s in stats.values())
+    total = sum(s.total_sec for s in stats.values())
+    lines = [f"🗄️ [{step}] SQL {calls} 次 / {rows} 行 / {total:.2f}s"]
+    for fp, s in sorted(stats.items(), key=lambda kv: kv[1].total_sec, reverse=True)[:top]:
+        lines.append(
+            f"   {s.total_sec:7.2f}s  ×{s.calls:<5} 最慢 {s.max_sec * 1000:.0f}ms  {s.rows} 行  {fp}"
+        )
+    return "\n".join(lines)
+
+
+@contextmanager
+def db_step(name: str):
+    """把块内（或被装饰函数内）的 SQL 计到步骤 name 下，结束时打印本次调用的汇总"""
+    frame: Tuple[str, Dict[str, StatementStats]] = (name, {})
+    with _lock:
+        _steps.append(frame)
+    try:
+        yield
+    finally:
+        with _lock:
+            for i in range(len(_steps) - 1, -1, -1):
+                if _steps[i] is frame:
+                    del _steps[i]
+                    break
+            stats = dict(frame[1])
+        summary = _format_summary(name, stats)
+        if summary:
+            print(summary)
+
+
+def snapshot() -> Dict[str, Dict[str, StatementStats]]:
+    with _lock:
+        return {step: dict(stats) for step, stats in _stats.items()}
+
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+
+
+def print_report(top: int = 3) -> None:
+    """全部步骤的汇总（按总耗时排序）"""
+    steps = snapshot()
+    if not steps:
+        return
+    order = sorted(steps, key=lambda st: sum(s.total_sec for s in steps[st].values()), reverse=True)
+    print("\n📊 数据库耗时汇总（按步骤）")
+    for step in order:
+        print(step_summary(step, top=top))
+
+
+def _report_at_exit() -> None:
+    if DB_TIMING_REPORT:
+        print_report()
+
+
+atexit.register(_report_at_exit)
@@ -1,17 +1,16 @@
 import os
 from pathlib import Path
 from config import BRAND_CONFIG
+from common.image.dir_index import get_dir_index
+from common.ingest.txt_batch import iter_txt_sources
 
 def get_all_product_codes(txt_dir: Path) -> set:
-    """从 TXT 文件名中提取所有商品编码（不带扩展名）"""
-    return {
-        f.stem for f in txt_dir.glob("*.txt")
-        if f.is_file()
-    }
+    """从 TXT 文件名中提取所有商品编码（不带扩展名，含 TXT 批次中的商品）"""
+    return {src.stem for src in iter_txt_sources(txt_dir)}
 
 def has_images(product_code: str, image_dir: Path) -> bool:
-    """判断该商品编码是否至少有一张图片"""
-    return any(image_dir.glob(f"{product_code}*.jpg"))
+    """判断该商品编码是否至少有一张图片：与以前 glob(f"{code}*.jpg") 一样按前缀匹配，查目录索引不逐个 glob"""
+    return bool(get_dir_index(image_dir).names_with_prefix(product_code, ".jpg"))
 
 def check_missing_images(brand: str):
     brand = brand.lower()
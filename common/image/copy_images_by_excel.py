@@ -3,6 +3,8 @@ import shutil
 import pandas as pd
 from typing import Tuple, List
 
+from common.image.dir_index import get_dir_index
+
 
 IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp")
 
@@ -78,23 +80,27 @@ def prepare_images_for_publication(
 
     codes = _read_codes_from_excel(excel_path)
 
+    # 两个图片库各列一次目录，每个编码查字典，不再逐个 isdir
+    processed_index = get_dir_index(processed_dir)
+    downloaded_index = get_dir_index(downloaded_dir)
+
     ready_codes: List[str] = []
     need_process_codes: List[str] = []
     missing_codes: List[str] = []
 
     for code in codes:
-        processed_src = os.path.join(processed_dir, code)
-        if os.path.isdir(processed_src) and _copy_product_folder(
-            processed_src, os.path.join(publish_ready_dir, code)
+        processed_src = processed_index.dir_path(code)
+        if processed_src is not None and _copy_product_folder(
+            str(processed_src), os.path.join(publish_ready_dir, code)
         ):
             ready_codes.append(code)
             if verbose:
                 print(f"[READY]   {code} <- processed")
             continue
 
-        downloaded_src = os.path.join(downloaded_dir, code)
-        if os.path.isdir(downloaded_src) and _copy_product_folder(
-            downloaded_src, os.path.join(publish_need_process_dir, code)
+        downloaded_src = downloaded_index.dir_path(code)
+        if downloaded_src is not None and _copy_product_folder(
+            str(downloaded_src), os.path.join(publish_need_process_dir, code)
         ):
             need_process_codes.append(code)
             if verbose:
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+目录索引 - 列一次目录，按 编码 / 后缀 分组，之后按编码查图片 / TXT 都是字典查找
+
+以前每个编码各查一次目录:
+- check_missing_images.has_images:   image_dir.glob(f"{code}*.jpg")
+- generate_html.find_image_path:     Clarks glob(f"{code}_*.jpg")，其他品牌逐个 exists() 最多 4 个候选
+- copy_images_by_excel:              每个编码 isdir(processed_dir/code)、isdir(downloaded_dir/code)
+在 D:\\TB\\Products 这类共享盘上是 编码数 × 文件数 次往返。
+
+现在 get_dir_index(dir) 第一次调用时 os.scandir 列一次目录:
+- 文件名 "<编码>_<后缀>.<扩展名>" 按最后一个 "_" 切分（没有 "_" 时整个文件名是编码、后缀为空），
+  分组为 编码 → {后缀: 文件名}；子目录单独记一份（按编码分目录的图片库）
+- 查找不区分大小写（与 Windows 文件系统一致），返回磁盘上的原文件名
+- 增量更新: 距上次检查超过 DIR_INDEX_REFRESH_SEC 秒时 stat 一次目录，目录 mtime 变了才重新列，
+  且只把新增 / 消失的条目合并进分组；本进程自己写入 / 删除文件后可 add / discard 立即生效
+
+使用方式:
+    from common.image.dir_index import get_dir_index
+
+    idx = get_dir_index(image_dir)
+    idx.files_for("K100123-001", ".jpg")        # ["K100123-001_1.jpg", "K100123-001_F.jpg", ...]
+    idx.find("K100123-001", "F", ".jpg")        # Path 或 None
+    idx.names_with_prefix("K100123-001", ".jpg")  # 同 glob("K100123-001*.jpg")
+    idx.has_dir("LQU1201BK11")                  # 按编码分目录的图片库
+    idx.codes(".txt")                           # 目录中所有 TXT 的编码
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from cfg.settings import SETTINGS
+
+DIR_INDEX_REFRESH_SEC = float(SETTINGS.get("DIR_INDEX_REFRESH_SEC", 5))
+
+
+def split_name(name: str) -> Tuple[str, str, str]:
+    """文件名 → (编码, 后缀, 扩展名)，均为小写；"K100_F.jpg" → ("k100", "f", ".jpg")"""
+    stem, ext = os.path.splitext(name)
+    code, sep, suffix = stem.rpartition("_")
+    if not sep:
+        code, suffix = stem, ""
+    return code.lower(), suffix.lower(), ext.lower()
+
+
+class DirIndex:
+    """一个目录（不递归）的文件 / 子目录索引，线程安全"""
+
+    def __init__(self, root: Path | str, refresh_sec: float = DIR_INDEX_REFRESH_SEC):
+        self.root = Path(root)
+        self.refresh_sec = refresh_sec
+        self._files: Dict[str, str] = {}                            # 小写文件名 → 原文件名
+        self._dirs: Dict[str, str] = {}                             # 小写目录名 → 原目录名
+        self._by_code: Dict[str, Dict[Tuple[str, str], str]] = {}   # 编码 → {(后缀, 扩展名): 原文件名}
+        self._sorted_keys: Optional[List[str]] = None               # 前缀查找用，文件有增删时作废
+        self._dir_mtime: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+        self.scans = 0
+        self.refresh(force=True)
+
+    # ---------- 维护 ----------
+
+    def refresh(self, force: bool = False) -> bool:
+        """目录有变化时重新列一次并增量合并，返回是否重新列过"""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._checked_at < self.refresh_sec:
+                return False
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.root).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if not force and mtime == self._dir_mtime:
+                return False
+            self._dir_mtime = mtime
+
+            files: Dict[str, str] = {}
+            dirs: Dict[str, str] = {}
+            if mtime is not None:
+                with os.scandir(self.root) as it:
+                    for entry in it:
+                        if entry.is_dir():
+                            dirs[entry.name.lower()] = entry.name
+                        else:
+                            files[entry.name.lower()] = entry.name
+            self.scans += 1
+
+            for key in self._files.keys() - files.keys():
+                self._forget(key)
+            for key, name in files.items():
+                if self._files.get(key) != name:
+                    self._remember(name)
+            self._dirs = dirs
+            return True
+
+    def _remember(self, name: str) -> None:
+        key = name.lower()
+        if key not in self._files:
+            self._sorted_keys = None
+        self._files[key] = name
+        code, suffix, ext = split_name(name)
+        self._by_code.setdefault(code, {})[(suffix, ext)] = name
+
+    def _forget(self, key: str) -> None:
+        name = self._files.pop(key, None)
+        if name is None:
+            return
+        self._sorted_keys = None
+        code, suffix, ext = split_name(name)
+        group = self._by_code.get(code)
+        if group is not None:
+            group.pop((suffix, ext), None)
+            if not group:
+                del self._by_code[code]
+
+    def add(self, name: str) -> None:
+        """本进程新写入了文件（不必等下次 refresh）"""
+        with self._lock:
+            if os.sep in name or "/" in name:
+                name = os.path.basename(name)
+            self._remember(name)
+
+    def discard(self, name: str) -> None:
+        with self._lock:
+            self._forget(os.path.basename(name).lower())
+
+    # ---------- 查询 ----------
+
+    def has(self, name: str) -> bool:
+        with self._lock:
+            return name.lower() in self._files
+
+    def has_dir(self, name: str) -> bool:
+        with self._lock:
+            return name.lower() in self._dirs
+
+    def path(self, name: str) -> Optional[Path]:
+        """文件名（不区分大小写）→ 磁盘上的路径"""
+        with self._lock:
+            real = self._files.get(name.lower())
+        return self.root / real if real else None
+
+    def dir_path(self, name: str) -> Optional[Path]:
+        with self._lock:
+            real = self._dirs.get(name.lower())
+        return self.root / real if real else None
+
+    def suffixes(self, code: str, ext: Optional[str] = None) -> Dict[str, str]:
+        """编码的 {后缀: 文件名}；ext 给定时只看该扩展名（如 ".jpg"）"""
+        ext = ext.lower() if ext else None
+        with self._lock:
+            group = self._by_code.get(code.lower(), {})
+            return {s: n for (s, e), n in group.items() if ext is None or e == ext}
+
+    def files_for(self, code: str, ext: Optional[str] = None) -> List[str]:
+        """编码的全部文件名（排序）"""
+        return sorted(self.suffixes(code, ext).values())
+
+    def find(self, code: str, suffix: str, ext: str = ".jpg") -> Optional[Path]:
+        """<编码>_<后缀><扩展名> 的路径"""
+        with self._lock:
+            real = self._by_code.get(code.lower(), {}).get((suffix.lower(), ext.lower()))
+        return self.root / real if real else None
+
+    def names_with_prefix(self, prefix: str, ext: Optional[str] = None) -> List[str]:
+        """
+        文件名以 prefix 开头的文件（不区分大小写），等价于 glob(f"{prefix}*{ext}")
+
+        与按编码分组不同，"<编码>-<名称>_<序号>.jpg"、"<编码>_1_rotate30L.jpg" 这类文件名也能匹配。
+        """
+        prefix = prefix.lower()
+        ext = ext.lower() if ext else None
+        with self._lock:
+            if self._sorted_keys is None:
+                self._sorted_keys = sorted(self._files)
+            keys = self._sorted_keys
+            out = []
+            for i in range(bisect.bisect_left(keys, prefix), len(keys)):
+                key = keys[i]
+                if not key.startswith(prefix):
+                    break
+                if ext is None or key.endswith(ext):
+                    out.append(self._files[key])
+            return out
+
+    def codes(self, ext: Optional[str] = None) -> Set[str]:
+        """有文件的编码（小写）"""
+        ext = ext.lower() if ext else None
+        with self._lock:
+            return {
+                code for code, group in self._by_code.items()
+                if ext is None or any(e == ext for _, e in group)
+            }
+
+    def names(self, ext: Optional[str] = None) -> List[str]:
+        ext = ext.lower() if ext else None
+        with self._lock:
+            return sorted(n for k, n in self._files.items() if ext is None or k.endswith(ext))
+
+    def dirs(self) -> List[str]:
+        with self._lock:
+            return sorted(self._dirs.values())
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+
+_INDEXES: Dict[str, DirIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_dir_index(root: Path | str, refresh: bool = True) -> DirIndex:
+    """进程级目录索引（每个目录一个）；refresh=True 时按 DIR_INDEX_REFRESH_SEC 检查目录是否有变化"""
+    key = os.path.normcase(os.path.abspath(str(root)))
+    with _INDEXES_LOCK:
+        idx = _INDEXES.get(key)
+        if idx is None:
+            _INDEXES[key] = DirIndex(root)
+            return _INDEXES[key]
+    if refresh:
+        idx.refresh()
+    return idx
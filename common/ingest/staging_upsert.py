@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+批量 UPSERT - COPY 进临时暂存表 + 一条 INSERT ... ON CONFLICT DO UPDATE，坏行隔离
+
+以前导入逐行 cur.execute(insert_sql, row)，任一行出错就 conn.rollback()，
+连同之前所有未提交的行一起丢掉。
+
+现在 copy_upsert(conn, table, columns, rows, conflict_cols):
+1. 按目标表的列类型 / NOT NULL 在 Python 侧预检每一行，类型不对、冲突键为空的行直接隔离
+2. COPY FROM STDIN 把其余行流式写入临时暂存表（结构取自目标表，不带约束）
+3. 一条 INSERT ... SELECT DISTINCT ON (冲突键) ... ON CONFLICT DO UPDATE 写入目标表
+   （同一批里冲突键重复时取最后一行，其余计为 duplicates）
+4. 写入前先和目标表比对，统计 inserted / updated / unchanged（compare_cols 都没变的行）
+5. COPY 或最终 INSERT 仍然失败时（如 CHECK / 外键约束），回滚到保存点后逐行重试，
+   只隔离出错的行；被隔离的行写到 QUARANTINE_DIR/<表名>_<时间>.jsonl，附原因
+
+全部在调用方的事务里（用 SAVEPOINT），不提交；连接不能是 autocommit。
+
+使用方式:
+    from common.ingest.staging_upsert import copy_upsert
+
+    stats = copy_upsert(
+        conn, "camper_inventory",
+        columns=["product_code", "size", "stock_name", "stock_count", "last_checked"],
+        rows=rows,
+        conflict_cols=["product_code", "size", "stock_name"],
+        compare_cols=["stock_count"],          # last_checked 照常更新，但不算"有变化"
+    )
+    conn.commit()
+    print(stats.format())
+"""
+
+from __future__ import annotations
+
+import io
+import itertools
+import json
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from psycopg2 import sql
+
+from cfg.paths import BASE_DIR
+from cfg.settings import SETTINGS
+
+QUARANTINE_DIR = Path(SETTINGS.get("UPSERT_QUARANTINE_DIR") or BASE_DIR / "_quarantine")
+
+_INT_TYPES = {"smallint", "integer", "bigint"}
+_FLOAT_TYPES = {"numeric", "real", "double precision"}
+_BOOL_STR = {"t", "f", "true", "false", "1", "0", "yes", "no"}
+_SEQ = itertools.count(1)
+
+
+@dataclass
+class UpsertStats:
+    table: str
+    total: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    duplicates: int = 0             # 同一批中被后面同键行覆盖的行
+    rejected: int = 0
+    quarantine_file: Optional[Path] = None
+    rejects: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+
+    def format(self) -> str:
+        line = (f"📦 [{self.table}] {self.total} 行：新增 {self.inserted}，更新 {self.updated}，"
+                f"未变化 {self.unchanged}，批内重复 {self.duplicates}，拒绝 {self.rejected}")
+        if self.quarantine_file:
+            line += f"\n   ⚠️ 被拒绝的行已隔离到 {self.quarantine_file}"
+        return line
+
+
+# ================== 预检 ==================
+
+def _table_columns(cur, table: str) -> Dict[str, Tuple[str, Optional[int], bool]]:
+    """{列名: (data_type, 最大长度, 可为空)}"""
+    schema, _, name = table.rpartition(".")
+    cur.execute(
+        """
+        SELECT column_name, data_type, character_maximum_length, is_nullable = 'YES'
+        FROM information_schema.columns
+        WHERE table_name = %s AND (%s = '' OR table_schema = %s)
+        """,
+        (name, schema, schema),
+    )
+    return {r[0]: (r[1], r[2], r[3]) for r in cur.fetchall()}
+
+
+def _check_value(value: Any, data_type: str, max_len: Optional[int]) -> Optional[str]:
+    """值能否写入该类型的列，不能时返回原因"""
+    try:
+        if data_type in _INT_TYPES:
+            if isinstance(value, float) and not value.is_integer():
+                return "不是整数"
+            int(value)
+        elif data_type in _FLOAT_TYPES:
+            if isinstance(value, bool):
+                return "不是数字"
+            v = float(value)
+            if math.isinf(v) and data_type == "numeric":
+                return "numeric 不接受无穷大"
+        elif data_type == "boolean":
+            if not isinstance(value, bool) and str(value).strip().lower() not in _BOOL_STR:
+                return "不是布尔值"
+        elif data_type.startswith("timestamp") or data_type == "date":
+            if not isinstance(value, (datetime, date, str)):
+                return "不是日期时间"
+        elif max_len is not None and len(str(value)) > max_len:
+            return f"超过长度 {max_len}"
+    except (TypeError, ValueError, OverflowError):
+        return f"不是 {data_type}"
+    return None
+
+
+def _validate(row: Sequence[Any], columns: Sequence[str], meta, conflict_cols) -> Optional[str]:
+    if len(row) != len(columns):
+        return f"列数 {len(row)} ≠ {len(columns)}"
+    for col, value in zip(columns, row):
+        if value is None:
+            if col in conflict_cols:
+                return f"{col}: 冲突键为空"
+            if col in meta and not meta[col][2]:
+                return f"{col}: NOT NULL 列为空"
+            continue
+        if col in meta:
+            reason = _check_value(value, meta[col][0], meta[col][1])
+            if reason:
+                return f"{col}: {value!r} {reason}"
+    return None
+
+
+# ================== COPY ==================
+
+def _copy_text(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def _coerce(row: Sequence[Any], int_cols: List[int]) -> Sequence[Any]:
+    """整数列上的 3.0 这类浮点值转成 3（COPY 文本格式里 "3.0" 写不进 integer 列）"""
+    if not any(isinstance(row[i], float) for i in int_cols):
+        return row
+    row = list(row)
+    for i in int_cols:
+        if isinstance(row[i], float):
+            row[i] = int(row[i])
+    return row
+
+
+def copy_rows(cur, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> None:
+    """COPY FROM STDIN（文本格式）把 rows 写入已存在的表（通常是临时表），不做预检"""
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join(_copy_text(value) for value in row))
+        buf.write("\n")
+    buf.seek(0)
+    cols = sql.SQL(", ").join(sql.Identifier(c) for c in columns)
+    cur.copy_expert(
+        sql.SQL("COPY {} ({}) FROM STDIN").format(sql.Identifier(table), cols).as_string(cur),
+        buf,
+    )
+
+
+def _copy_rows(cur, stage: str, columns: Sequence[str], rows: List[Tuple[int, Sequence[Any]]]) -> None:
+    copy_rows(cur, stage, ["_row", *columns], ((rid, *row) for rid, row in rows))
+
+
+def _json_safe(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _quarantine(table: str, rejects: List[Dict[str, Any]]) -> Path:
+    QUARANTINE_DIR.mkdir(parents=True, exist_ok=True)
+    path = QUARANTINE_DIR / f"{table.replace('.', '_')}_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+    with open(path, "a", encoding="utf-8") as f:
+        for rec in rejects:
+            f.write(json.dumps(rec, ensure_ascii=False, default=_json_safe) + "\n")
+    return path
+
+
+# ================== UPSERT ==================
+
+def copy_upsert(
+    conn,
+    table: str,
+    columns: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    conflict_cols: Sequence[str],
+    update_cols: Optional[Sequence[str]] = None,
+    compare_cols: Optional[Sequence[str]] = None,
+    quarantine: bool = True,
+) -> UpsertStats:
+    """
+    rows 批量 UPSERT 到 table（不提交）
+
+    Args:
+        columns:       rows 中各列对应的目标表列名
+        conflict_cols: ON CONFLICT 的键（目标表上须有对应的唯一约束）
+        update_cols:   冲突时更新的列，默认除冲突键外的全部列
+        compare_cols:  判断"有变化"用的列，默认同 update_cols（如 last_checked 这类每次都变的列应排除）
+        quarantine:    被拒绝的行是否写入隔离文件
+    """
+    columns = list(columns)
+    conflict_cols = list(conflict_cols)
+    update_cols = list(update_cols) if update_cols is not None else [c for c in columns if c not in conflict_cols]
+    compare_cols = list(compare_cols) if compare_cols is not None else update_cols
+    stats = UpsertStats(table=table, total=len(rows))
+    if not rows:
+        return stats
+
+    def reject(rid: int, row, reason: str) -> None:
+        stats.rejects.append({"row": rid, "reason": reason, "values": dict(zip(columns, row))})
+
+    stage = f"_stage_{next(_SEQ)}"
+    ident = lambda names: sql.SQL(", ").join(sql.Identifier(c) for c in names)  # noqa: E731
+    target = sql.Identifier(*table.split("."))
+
+    with conn.cursor() as cur:
+        # 1) 预检
+        meta = _table_columns(cur, table)
+        missing = [c for c in columns if c not in meta]
+        if missing:
+            raise ValueError(f"表 {table} 没有列: {missing}")
+        int_cols = [i for i, c in enumerate(columns) if meta[c][0] in _INT_TYPES]
+        good: List[Tuple[int, Sequence[Any]]] = []
+        for rid, row in enumerate(rows):
+            reason = _validate(row, columns, meta, conflict_cols)
+            if reason:
+                reject(rid, row, reason)
+            else:
+                good.append((rid, _coerce(row, int_cols)))
+
+        # 2) COPY 进暂存表
+        cur.execute(sql.SQL(
+            "CREATE TEMP TABLE {stage} ON COMMIT DROP AS "
+            "SELECT 0::bigint AS _row, {cols} FROM {target} WITH NO DATA"
+        ).format(stage=sql.Identifier(stage), cols=ident(columns), target=target))
+        cur.execute("SAVEPOINT stage_copy")
+        try:
+            _copy_rows(cur, stage, columns, good)
+            cur.execute("RELEASE SAVEPOINT stage_copy")
+        except Exception as e:
+            cur.execute("ROLLBACK TO SAVEPOINT stage_copy")
+            print(f"⚠️ [{table}] COPY 失败，逐行写入暂存表: {e}")
+            kept = []
+            for rid, row in good:
+                cur.execute("SAVEPOINT stage_row")
+                try:
+                    _copy_rows(cur, stage, columns, [(rid, row)])
+                    cur.execute("RELEASE SAVEPOINT stage_row")
+                    kept.append((rid, row))
+                except Exception as row_err:
+                    cur.execute("ROLLBACK TO SAVEPOINT stage_row")
+                    reject(rid, row, str(row_err).strip())
+            good = kept
+        by_id = dict(good)
+
+        # 3) 冲突键去重（取批内最后一行）+ 与目标表比对计数
+        dedup = sql.SQL(
+            "SELECT DISTINCT ON ({keys}) _row, {cols} FROM {stage} ORDER BY {keys}, _row DESC"
+        ).format(keys=ident(conflict_cols), cols=ident(columns), stage=sql.Identifier(stage))
+        join_on = sql.SQL(" AND ").join(
+            sql.SQL("t.{c} = s.{c}").format(c=sql.Identifier(c)) for c in conflict_cols
+        )
+        changed = (sql.SQL("({}) IS DISTINCT FROM ({})").format(
+            sql.SQL(", ").join(sql.SQL("t.{}").format(sql.Identifier(c)) for c in compare_cols),
+            sql.SQL(", ").join(sql.SQL("s.{}").format(sql.Identifier(c)) for c in compare_cols),
+        ) if compare_cols else sql.SQL("FALSE"))
+        cur.execute(sql.SQL(
+            "SELECT s._row, CASE WHEN t.ctid IS NULL THEN 'inserted' "
+            "WHEN {changed} THEN 'updated' ELSE 'unchanged' END "
+            "FROM ({dedup}) s LEFT JOIN {target} t ON {join_on}"
+        ).format(changed=changed, dedup=dedup, target=target, join_on=join_on))
+        outcome: Dict[int, str] = dict(cur.fetchall())
+        stats.duplicates = len(good) - len(outcome)
+
+        # 4) 一条 INSERT ... ON CONFLICT
+        if update_cols:
+            action = sql.SQL("DO UPDATE SET {}").format(sql.SQL(", ").join(
+                sql.SQL("{c} = EXCLUDED.{c}").format(c=sql.Identifier(c)) for c in update_cols
+            ))
+        else:
+            action = sql.SQL("DO NOTHING")
+        upsert = sql.SQL(
+            "INSERT INTO {target} ({cols}) SELECT {cols} FROM ({dedup}) s {where} "
+            "ON CONFLICT ({keys}) {action}"
+        )
+        cur.execute("SAVEPOINT stage_upsert")
+        try:
+            cur.execute(upsert.format(target=target, cols=ident(columns), dedup=dedup,
+                                      where=sql.SQL(""), keys=ident(conflict_cols), action=action))
+            cur.execute("RELEASE SAVEPOINT stage_upsert")
+            done = list(outcome.values())
+        except Exception as e:
+            # 约束冲突等：逐行重试，只隔离出错的行
+            cur.execute("ROLLBACK TO SAVEPOINT stage_upsert")
+            print(f"⚠️ [{table}] 批量 UPSERT 失败，逐行重试: {e}")
+            one = upsert.format(target=target, cols=ident(columns), dedup=dedup,
+                                where=sql.SQL("WHERE s._row = %s"), keys=ident(conflict_cols), action=action)
+            done = []
+            for rid in sorted(outcome):
+                cur.execute("SAVEPOINT stage_row")
+                try:
+                    cur.execute(one, (rid,))
+                    cur.execute("RELEASE SAVEPOINT stage_row")
+                    done.append(outcome[rid])
+                except Exception as row_err:
+                    cur.execute("ROLLBACK TO SAVEPOINT stage_row")
+                    reject(rid, by_id[rid], str(row_err).strip())
+
+        stats.inserted = done.count("inserted")
+        stats.updated = done.count("updated")
+        stats.unchanged = done.count("unchanged")
+        cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(stage)))
+
+    stats.rejected = len(stats.rejects)
+    if stats.rejects and quarantine:
+        stats.quarantine_file = _quarantine(table, stats.rejects)
+    return stats
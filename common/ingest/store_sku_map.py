@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+店铺 SKU 映射 - 店铺导出 Excel → { "编码,尺码": (skuID, 宝贝ID) }，按列一次算完并缓存解析结果
+
+以前 import_txt_to_db_common.load_sku_mapping_from_store 每次导入都 pd.read_excel 全部店铺 Excel，
+再 iterrows() 一行行拼字典；缺宝贝ID 的 SKU 还要在字典里按 skuID 线性找一遍。
+
+现在:
+- 每个 Excel 只做列运算：前向填充（合并单元格）→ 规范 sku规格 → 过滤空 spec / 空 skuID，
+  得到 spec_key / skuid / item_id 三列的 DataFrame
+- 解析结果按 Excel 缓存到 SKU_MAP_CACHE_DIR（有 pyarrow 时为 parquet，否则 pandas pickle），
+  旁边的 .json 记录 Excel 的 mtime_ns / size / sha1：
+    mtime 和 size 没变        → 直接读缓存
+    mtime 变了但 sha1 没变    → 读缓存并刷新 mtime（复制 / 重新下载的同一份导出）
+    内容变了                  → 重新解析 Excel 并覆盖缓存
+- 合并后一次建两个索引：spec → (skuID, 宝贝ID)（后读到的覆盖先读到的）、skuID → 宝贝ID
+
+使用方式:
+    from common.ingest.store_sku_map import load_store_sku_map
+
+    sku_map = load_store_sku_map(store_folder)
+    sku_map.lookup("K100123-001,42")        # ("5012345678", "6789012345") 或 None
+    sku_map.item_by_sku["5012345678"]       # 宝贝ID
+    sku_map.frame                           # spec_key / skuid / item_id，可直接 merge
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from cfg.paths import BASE_DIR
+from cfg.settings import SETTINGS
+
+try:
+    import pyarrow  # noqa: F401  parquet 引擎（可选）
+    CACHE_FORMAT = "parquet"
+except ImportError:
+    CACHE_FORMAT = "pkl"
+
+SKU_MAP_CACHE_DIR = Path(SETTINGS.get("SKU_MAP_CACHE_DIR") or BASE_DIR / "_sku_map_cache")
+CACHE_VERSION = 1  # 解析规则变了就加 1，旧缓存自动失效
+
+MAP_COLUMNS = ["spec_key", "skuid", "item_id"]
+
+
+@dataclass
+class StoreSkuMap:
+    """一个店铺目录的 SKU 映射"""
+    frame: pd.DataFrame                                   # spec_key / skuid / item_id，每个 spec 一行
+    item_by_sku: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "StoreSkuMap":
+        frame = frame.drop_duplicates("spec_key", keep="last").reset_index(drop=True)
+        with_item = frame[frame["item_id"].notna()].drop_duplicates("skuid", keep="first")
+        return cls(frame=frame, item_by_sku=dict(zip(with_item["skuid"], with_item["item_id"])))
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def lookup(self, spec: str) -> Optional[Tuple[str, Optional[str]]]:
+        hit = self.frame[self.frame["spec_key"] == spec]
+        if hit.empty:
+            return None
+        row = hit.iloc[0]
+        return row["skuid"], row["item_id"] if pd.notna(row["item_id"]) else None
+
+    def to_dict(self) -> Dict[str, Tuple[str, Optional[str]]]:
+        return {k: (s, i if pd.notna(i) else None) for k, s, i in self.frame[MAP_COLUMNS].itertuples(index=False)}
+
+
+def parse_store_excel(file: Path) -> pd.DataFrame:
+    """单个店铺 Excel → spec_key / skuid / item_id（宝贝ID 为空时为 None）"""
+    df = pd.read_excel(file, dtype=str).ffill()  # 修复合并单元格中缺失的宝贝ID、商家编码
+
+    def col(name: str) -> pd.Series:
+        if name not in df.columns:
+            return pd.Series("", index=df.index, dtype=object)
+        return df[name].fillna("").astype(str)
+
+    spec = col("sku规格").str.replace("，", ",", regex=False).str.strip().str.rstrip(",")
+    skuid = col("skuID").str.strip()
+    item_id = col("宝贝ID").str.strip()
+    out = pd.DataFrame({"spec_key": spec, "skuid": skuid, "item_id": item_id})
+    out = out[(out["spec_key"] != "") & (out["skuid"] != "")].reset_index(drop=True)
+    out = out.astype(object)
+    out["item_id"] = out["item_id"].where(out["item_id"] != "", None)
+    return out
+
+
+def _file_sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_paths(file: Path) -> Tuple[Path, Path]:
+    key = hashlib.sha1(os.path.normcase(os.path.abspath(file)).encode("utf-8")).hexdigest()[:20]
+    return SKU_MAP_CACHE_DIR / f"{key}.json", SKU_MAP_CACHE_DIR / f"{key}.{CACHE_FORMAT}"
+
+
+def _read_frame(path: Path) -> pd.DataFrame:
+    if CACHE_FORMAT == "parquet":
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def _write_frame(frame: pd.DataFrame, path: Path) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    if CACHE_FORMAT == "parquet":
+        frame.to_parquet(tmp, index=False)
+    else:
+        frame.to_pickle(tmp)
+    os.replace(tmp, path)
+
+
+def _write_meta(meta_path: Path, meta: dict) -> None:
+    tmp = meta_path.with_name(meta_path.name + ".tmp")
+    tmp.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, meta_path)
+
+
+def read_store_excel(file: Path, use_cache: bool = True) -> Tuple[pd.DataFrame, bool]:
+    """单个店铺 Excel 的映射行，返回 (frame, 是否命中缓存)；缓存读写失败时退回直接解析"""
+    if not use_cache:
+        return parse_store_excel(file), False
+
+    st = file.stat()
+    meta_path, data_path = _cache_paths(file)
+    digest = None
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else None
+        if meta and meta.get("version") == CACHE_VERSION and meta.get("format") == CACHE_FORMAT and data_path.exists():
+            if meta.get("mtime_ns") == st.st_mtime_ns and meta.get("size") == st.st_size:
+                return _read_frame(data_path), True
+            digest = _file_sha1(file)
+            if meta.get("sha1") == digest:
+                frame = _read_frame(data_path)
+                meta.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+                _write_meta(meta_path, meta)
+                return frame, True
+    except Exception as e:
+        print(f"⚠️ SKU 映射缓存读取失败，重新解析 {file.name}: {e}")
+
+    frame = parse_store_excel(file)
+    try:
+        SKU_MAP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _write_frame(frame, data_path)
+        _write_meta(meta_path, {
+            "version": CACHE_VERSION, "format": CACHE_FORMAT, "source": str(file),
+            "mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha1": digest or _file_sha1(file),
+        })
+    except Exception as e:
+        print(f"⚠️ SKU 映射缓存写入失败（{file.name}）: {e}")
+    return frame, False
+
+
+def load_store_sku_map(store_path: Path, use_cache: bool = True) -> StoreSkuMap:
+    """读取店铺目录下全部 *.xls*（跳过 ~$ 临时文件），合并为一个 StoreSkuMap"""
+    frames = []
+    for file in sorted(Path(store_path).glob("*.xls*")):
+        if file.name.startswith("~$"):
+            continue
+        frame, cached = read_store_excel(file, use_cache=use_cache)
+        print(f"📂 读取映射文件: {file.name}{'（缓存）' if cached else ''}")
+        frames.append(frame)
+    if not frames:
+        return StoreSkuMap.from_frame(pd.DataFrame(columns=MAP_COLUMNS, dtype=object))
+    return StoreSkuMap.from_frame(pd.concat(frames, ignore_index=True))
@@ -0,0 +1,442 @@
+# -*- coding: utf-8 -*-
+"""
+TXT 批次库 - 一次抓取写一个追加式压缩 JSONL，代替成千上万个单品 TXT 小文件
+
+fetcher 与下游之间的交换格式一直是每个商品一个 "key: value" TXT：format_txt 写，
+txt_parser / generate_html.parse_txt / import_supplier_to_db_offers.parse_txt 读。
+在 D:\\TB\\Products 这类 Windows 共享目录上，每过一遍就是几千次 open/close。
+
+现在（SETTINGS["TXT_OUTPUT_MODE"]）:
+- "txt":   只写 TXT（默认，与以前完全一致）
+- "both":  TXT 照写，同时写批次；下游改为从批次读，一个文件读完整个目录（过渡期推荐）
+- "batch": 只写批次；需要人工查看时用 export 导出 TXT
+
+批次文件: <TXT 目录>/_batch/<时间>_<pid>.jsonl.zst（未安装 zstandard 时为 .jsonl.gz）
+- 每行一条记录 {"name": "ABC123.txt", "ts": 写入时间, "fields": {"Product Code": ..., ...}}，
+  fields 的键和顺序与 TXT 各行一致；下架删除记一条 {"name": ..., "deleted": true}
+- 每个进程一个文件，只追加：每满 TXT_BATCH_FLUSH_EVERY 条压缩成一帧追加写入，进程退出时写最后一帧；
+  尚未写出的缓冲在本进程内同样可读（load_batch_view / iter_txt_sources 会合并进来），
+  同一进程里抓完接着导入（prepare_jingya_listing）不会漏掉最后不满一帧的记录
+- 同一目录的多个批次按文件名（时间）顺序合并，同名记录后写的覆盖先写的；compact 合并成一个文件
+
+读取（下游只需把 glob("*.txt") 换成 iter_txt_sources，把 open() 换成 read_txt_lines）:
+    from common.ingest.txt_batch import iter_txt_sources, read_txt_lines
+
+    for src in iter_txt_sources(txt_dir):       # 批次记录 + 批次里没有（或比批次新）的 TXT 文件
+        lines = read_txt_lines(src)             # 与逐行读 TXT 的结果相同
+        print(src.name, src.stem)               # 批次记录也有 name / stem
+
+命令行:
+    python -m common.ingest.txt_batch stats  D:/TB/Products/camper/publication/TXT
+    python -m common.ingest.txt_batch export D:/TB/Products/camper/publication/TXT --out D:/tmp/camper_txt
+    python -m common.ingest.txt_batch compact D:/TB/Products/camper/publication/TXT
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import fnmatch
+import gzip
+import io
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from config import SETTINGS
+
+try:
+    import zstandard  # 可选: pip install zstandard，比 gzip 快且压缩率更高
+except ImportError:
+    zstandard = None
+
+TXT_OUTPUT_MODES = ("txt", "both", "batch")
+TXT_OUTPUT_MODE = SETTINGS.get("TXT_OUTPUT_MODE", "txt")
+TXT_BATCH_FLUSH_EVERY = int(SETTINGS.get("TXT_BATCH_FLUSH_EVERY", 200))
+
+BATCH_DIR_NAME = "_batch"
+MTIME_TOLERANCE_SEC = 2.0
+_SUFFIXES = (".jsonl.zst", ".jsonl.gz")
+
+
+def writes_txt() -> bool:
+    return TXT_OUTPUT_MODE != "batch"
+
+
+def writes_batch() -> bool:
+    return TXT_OUTPUT_MODE in ("both", "batch")
+
+
+def batch_dir(txt_dir: Path | str) -> Path:
+    return Path(txt_dir) / BATCH_DIR_NAME
+
+
+def list_batches(txt_dir: Path | str) -> List[Path]:
+    """目录下的批次文件（按写入时间顺序）"""
+    d = batch_dir(txt_dir)
+    if not d.is_dir():
+        return []
+    return sorted(p for p in d.iterdir() if p.name.endswith(_SUFFIXES))
+
+
+# ================== 记录 ==================
+
+@dataclass(frozen=True)
+class BatchRecord:
+    """批次中的一个商品（对应原来的一个 TXT 文件）"""
+    name: str                                   # TXT 文件名，如 "K100123-001.txt"
+    fields: Dict[str, str]
+    ts: float = 0.0
+    txt_dir: str = ""
+    batch: str = field(default="", compare=False)   # 来源批次文件名
+
+    @property
+    def stem(self) -> str:
+        return Path(self.name).stem
+
+    @property
+    def suffix(self) -> str:
+        return Path(self.name).suffix
+
+    @property
+    def path(self) -> Path:
+        """导出后的 TXT 路径（文件本身不一定存在）"""
+        return Path(self.txt_dir) / self.name
+
+    def get(self, key: str, default: str = "") -> str:
+        return self.fields.get(key, default)
+
+    @property
+    def text(self) -> str:
+        """与 format_txt 写出的 TXT 内容逐字相同"""
+        return "\n".join(f"{k}: {v}" for k, v in self.fields.items())
+
+    def lines(self) -> List[str]:
+        return self.text.splitlines()
+
+    def __str__(self) -> str:
+        return str(self.path)
+
+
+TxtSource = Union[Path, BatchRecord]
+
+
+def read_txt_lines(source: TxtSource | str) -> List[str]:
+    """TXT 文件或批次记录的各行（不含换行符）"""
+    if isinstance(source, BatchRecord):
+        return source.lines()
+    with open(source, "r", encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+# ================== 写 ==================
+
+def _compress(data: bytes, suffix: str) -> bytes:
+    if suffix == ".jsonl.zst":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+class TxtBatchWriter:
+    """一个 TXT 目录在本进程中的批次写入器（线程安全）"""
+
+    def __init__(self, txt_dir: Path | str, flush_every: int = TXT_BATCH_FLUSH_EVERY):
+        self.txt_dir = Path(txt_dir)
+        self.flush_every = max(1, flush_every)
+        suffix = _SUFFIXES[0] if zstandard is not None else _SUFFIXES[1]
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        self.path = batch_dir(txt_dir) / f"{stamp}_{os.getpid()}{suffix}"
+        self.count = 0
+        self._suffix = suffix
+        self._buf: List[bytes] = []
+        self._unflushed: Dict[str, dict] = {}     # 缓冲中各记录的最新一条（写出前也能读到）
+        self._lock = threading.Lock()
+
+    def add(self, name: str, fields: Dict[str, str]) -> None:
+        self._append({"name": name, "ts": time.time(), "fields": fields})
+
+    def delete(self, name: str) -> None:
+        self._append({"name": name, "ts": time.time(), "deleted": True})
+
+    def pending(self, name: str) -> Optional[dict]:
+        with self._lock:
+            return self._unflushed.get(name)
+
+    def pending_all(self) -> Dict[str, dict]:
+        with self._lock:
+            return dict(self._unflushed)
+
+    def _append(self, rec: dict) -> None:
+        line = json.dumps(rec, ensure_ascii=False).encode("utf-8") + b"\n"
+        with self._lock:
+            self._buf.append(line)
+            self._unflushed[rec["name"]] = rec
+            self.count += 1
+            if len(self._buf) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buf:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 每次追加一个完整的压缩帧（gzip member / zstd frame），中途崩溃只丢未写出的缓冲
+        with open(self.path, "ab") as f:
+            f.write(_compress(b"".join(self._buf), self._suffix))
+        self._buf.clear()
+        self._unflushed.clear()
+        _VIEW_CACHE.pop(str(self.txt_dir), None)
+
+
+_WRITERS: Dict[str, TxtBatchWriter] = {}
+_WRITERS_LOCK = threading.Lock()
+
+
+def get_batch_writer(txt_dir: Path | str) -> TxtBatchWriter:
+    """进程级写入器（每个 TXT 目录一个，进程退出时写出缓冲）"""
+    key = str(Path(txt_dir))
+    with _WRITERS_LOCK:
+        w = _WRITERS.get(key)
+        if w is None:
+            w = _WRITERS[key] = TxtBatchWriter(txt_dir)
+        return w
+
+
+def flush_batch_writers() -> None:
+    with _WRITERS_LOCK:
+        writers = list(_WRITERS.values())
+    for w in writers:
+        w.flush()
+
+
+atexit.register(flush_batch_writers)
+
+
+def pending_record(txt_dir: Path | str, name: str) -> Optional[BatchRecord]:
+    """本进程写入器缓冲中（尚未写出）的记录；没有、或最新一条是删除时返回 None"""
+    with _WRITERS_LOCK:
+        w = _WRITERS.get(str(Path(txt_dir)))
+    rec = w.pending(name) if w is not None else None
+    if rec is None or rec.get("deleted"):
+        return None
+    return BatchRecord(name=name, fields=rec["fields"], ts=rec["ts"], txt_dir=str(Path(txt_dir)))
+
+
+def record_deleted(txt_path: Path | str) -> None:
+    """TXT 被删除（下架）时在批次里记一条删除，只写 TXT 的模式下不做任何事"""
+    if writes_batch():
+        p = Path(txt_path)
+        get_batch_writer(p.parent).delete(p.name)
+
+
+# ================== 读 ==================
+
+def _open_batch(path: Path) -> io.BufferedIOBase:
+    if path.name.endswith(".jsonl.zst"):
+        if zstandard is None:
+            raise RuntimeError(f"读取 {path.name} 需要 zstandard: pip install zstandard")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True)
+        return io.BufferedReader(reader)
+    return gzip.open(path, "rb")
+
+
+def iter_batch_file(path: Path) -> Iterator[dict]:
+    """逐条读取一个批次文件（末尾不完整的帧会被忽略）"""
+    try:
+        with _open_batch(path) as raw:
+            for line in io.TextIOWrapper(raw, encoding="utf-8"):
+                if line.strip():
+                    yield json.loads(line)
+    except (EOFError, OSError, ValueError) as e:
+        print(f"⚠️ 批次文件读取中断（已读部分有效）: {path.name} - {e}")
+
+
+_VIEW_CACHE: Dict[str, Tuple[tuple, Dict[str, BatchRecord]]] = {}
+_VIEW_LOCK = threading.Lock()
+
+
+def load_batch_view(txt_dir: Path | str) -> Dict[str, BatchRecord]:
+    """
+    合并目录下全部批次后的当前状态 {TXT 文件名: 记录}，含本进程写入器中尚未写出的缓冲
+
+    批次文件没变（文件名 / 大小 / mtime）时直接用进程内缓存，多个下游步骤不会重复解压。
+    """
+    key = str(Path(txt_dir))
+    view = _load_written_view(key)
+    with _WRITERS_LOCK:
+        w = _WRITERS.get(key)
+    pending = w.pending_all() if w is not None else {}
+    if not pending:
+        return view
+    # 缓冲里的记录一定比已写出的新：直接覆盖（删除则移除）
+    merged = dict(view)
+    for name, rec in pending.items():
+        if rec.get("deleted"):
+            merged.pop(name, None)
+        else:
+            merged[name] = BatchRecord(name=name, fields=rec["fields"], ts=rec["ts"], txt_dir=key)
+    return merged
+
+
+def _load_written_view(key: str) -> Dict[str, BatchRecord]:
+    """已写入批次文件的部分（带进程内缓存）"""
+    batches = list_batches(key)
+    sig = tuple((p.name, st.st_size, st.st_mtime_ns) for p in batches for st in [p.stat()])
+    with _VIEW_LOCK:
+        cached = _VIEW_CACHE.get(key)
+        if cached is not None and cached[0] == sig:
+            return cached[1]
+
+    view: Dict[str, BatchRecord] = {}
+    latest: Dict[str, float] = {}
+    for p in batches:
+        for rec in iter_batch_file(p):
+            name = rec.get("name")
+            if not name:
+                continue
+            # 多进程 / 合并后的批次文件名顺序不一定等于写入顺序，以记录 ts 为准
+            ts = rec.get("ts") or 0.0
+            if ts < latest.get(name, 0.0):
+                continue
+            latest[name] = ts
+            if rec.get("deleted"):
+                view.pop(name, None)
+            else:
+                view[name] = BatchRecord(
+                    name=name, fields=rec.get("fields") or {}, ts=ts,
+                    txt_dir=key, batch=p.name,
+                )
+    with _VIEW_LOCK:
+        _VIEW_CACHE[key] = (sig, view)
+    return view
+
+
+def iter_txt_sources(txt_dir: Path | str, pattern: str = "*.txt") -> List[TxtSource]:
+    """
+    目录中的全部商品：批次记录 + 不在批次中（或比批次记录新）的 TXT 文件，按文件名排序
+
+    没有批次时等价于 sorted(Path(txt_dir).glob(pattern))。
+    """
+    view = load_batch_view(txt_dir)
+    if not view:
+        return sorted(Path(txt_dir).glob(pattern))
+
+    sources: Dict[str, TxtSource] = dict(view)
+    # scandir 在 Windows 上列目录时就带回 mtime，不必逐个 stat
+    with os.scandir(txt_dir) as it:
+        for entry in it:
+            if not entry.is_file() or not fnmatch.fnmatch(entry.name, pattern):
+                continue
+            rec = view.get(entry.name)
+            # 同名时取较新的一方（如有未接入批次的脚本直接改写了 TXT）；容差应对共享盘时钟偏差
+            if rec is None or entry.stat().st_mtime > rec.ts + MTIME_TOLERANCE_SEC:
+                sources[entry.name] = Path(entry.path)
+    return [sources[name] for name in sorted(sources)]
+
+
+def read_txt_text(txt_path: Path | str) -> Optional[str]:
+    """
+    单个商品的 TXT 内容：TXT 文件存在时读文件，否则取批次中的同名记录（含本进程缓冲）；都没有时返回 None
+
+    供按路径取单条结果的调用方（如 common.crawl.job_queue）用，batch 模式下 TXT 文件本来就不存在。
+    """
+    p = Path(txt_path)
+    if p.exists():
+        return p.read_text(encoding="utf-8", errors="ignore")
+    rec = pending_record(p.parent, p.name) or load_batch_view(p.parent).get(p.name)
+    return rec.text if rec is not None else None
+
+
+def write_txt_text(txt_path: Path | str, text: str) -> None:
+    """按 TXT_OUTPUT_MODE 写入单个商品（TXT 文件 / 批次记录），text 为 format_txt 格式的内容"""
+    p = Path(txt_path)
+    if writes_txt():
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(text, encoding="utf-8")
+    if writes_batch():
+        fields = {}
+        for line in text.splitlines():
+            key, sep, value = line.partition(": ")
+            if sep:
+                fields[key] = value
+        get_batch_writer(p.parent).add(p.name, fields)
+
+
+# ================== 维护 ==================
+
+def export_txt(txt_dir: Path | str, out_dir: Optional[Path | str] = None, overwrite: bool = True) -> int:
+    """把批次导出为 TXT（默认写回 TXT 目录），返回写出的文件数"""
+    out = Path(out_dir) if out_dir else Path(txt_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    n = 0
+    for rec in load_batch_view(txt_dir).values():
+        target = out / rec.name
+        if not overwrite and target.exists():
+            continue
+        target.write_text(rec.text, encoding="utf-8")
+        n += 1
+    print(f"📤 导出 TXT {n} 个 → {out}")
+    return n
+
+
+def compact(txt_dir: Path | str) -> Optional[Path]:
+    """把目录下的多个批次合并成一个（去掉被覆盖和已删除的记录），返回新批次路径"""
+    flush_batch_writers()
+    old = list_batches(txt_dir)
+    if len(old) <= 1:
+        return old[0] if old else None
+    view = load_batch_view(txt_dir)
+    writer = TxtBatchWriter(txt_dir, flush_every=len(view) + 1)
+    # 文件名仍以当前时间开头，排在所有旧批次之后
+    writer.path = writer.path.with_name(writer.path.name.replace(".jsonl", "_compact.jsonl", 1))
+    for rec in view.values():
+        writer._append({"name": rec.name, "ts": rec.ts, "fields": rec.fields})
+    writer.flush()
+    for p in old:
+        p.unlink()
+    # 本进程之后的写入换一个新文件，免得追加到已删除的旧批次名下、排在合并结果之前
+    with _WRITERS_LOCK:
+        _WRITERS.pop(str(Path(txt_dir)), None)
+    print(f"🗜️ 合并 {len(old)} 个批次 → {writer.path.name}（{len(view)} 条）")
+    return writer.path
+
+
+def stats(txt_dir: Path | str) -> Dict[str, int]:
+    batches = list_batches(txt_dir)
+    return {
+        "batches": len(batches),
+        "bytes": sum(p.stat().st_size for p in batches),
+        "records": len(load_batch_view(txt_dir)),
+        "txt_files": sum(1 for _ in Path(txt_dir).glob("*.txt")),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="TXT 批次库：查看 / 导出 TXT / 合并")
+    ap.add_argument("cmd", choices=("stats", "export", "compact"))
+    ap.add_argument("txt_dir")
+    ap.add_argument("--out", help="export 的输出目录（默认写回 TXT 目录）")
+    ap.add_argument("--no-overwrite", action="store_true", help="export 时不覆盖已存在的 TXT")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "stats":
+        s = stats(args.txt_dir)
+        print(
+            f"📚 {args.txt_dir}: 批次 {s['batches']} 个 ({s['bytes'] / 1024:.0f} KB)，"
+            f"记录 {s['records']} 条，TXT 文件 {s['txt_files']} 个"
+        )
+    elif args.cmd == "export":
+        export_txt(args.txt_dir, args.out, overwrite=not args.no_overwrite)
+    else:
+        compact(args.txt_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
-from typing import List, Tuple
-from pathlib import Path
+from typing import List, Tuple, Union
+from common.ingest.txt_batch import TxtSource
+from common.ingest.txt_records import TxtRecord, load_txt_record
 
 MIN_STOCK_THRESHOLD = 1  # 小于该值视为 0（仅 Barbour/jingya 解析用）
 
-def parse_txt_to_record(filepath: Path, brand: str) -> List[Tuple]:
+TxtInput = Union[TxtSource, TxtRecord]
+
+def parse_txt_to_record(filepath: TxtInput, brand: str) -> List[Tuple]:
     b = (brand or "").lower()
     if b in {"camper", "clarks", "clarks"}:
         return parse_camper_or_generic(filepath)  # 旧逻辑保持
@@ -14,100 +17,40 @@ def parse_txt_to_record(filepath: Path, brand: str) -> List[Tuple]:
         return parse_generic_txt(filepath)        # 兜底
 
 # ===== 旧逻辑：与你上传的 txtparse.txt 完全一致的两套 =====
-def parse_generic_txt(filepath: Path) -> List[Tuple]:
+# 字段解析统一走 common.ingest.txt_records（带缓存），这里只负责拼记录
+def parse_generic_txt(filepath: TxtInput) -> List[Tuple]:
     records = []
-    with open(filepath, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    product_code = product_name = product_desc = gender = color = ""
-    original_price = discount_price = material = sizes_line = url = ""
-    feature = ""
-
-    for line in lines:
-        line = line.strip()
-        if line.startswith("Product Code:"):
-            product_code = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Name:"):
-            product_name = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Description:"):
-            product_desc = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Gender:"):
-            gender = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Color:"):
-            color = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Price:"):
-            original_price = line.split(":", 1)[1].strip().replace("£", "").strip()
-        elif line.startswith("Adjusted Price:"):
-            discount_price = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Material:"):
-            material = line.split(":", 1)[1].strip()
-        elif line.startswith("Feature:"):
-            feature = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Size:"):
-            sizes_line = line.split(":", 1)[1].strip()
-        elif line.startswith("Source URL:"):
-            url = line.split(":", 1)[1].strip()
+    rec = load_txt_record(filepath)
+    url = rec.get("Source URL")
 
-    for size_info in sizes_line.split(";"):
+    for size_info in rec.sizes.split(";"):
         if not size_info.strip():
             continue
         size, status = size_info.split(":")
         size = size.strip()
         status = status.strip()
         records.append((
-            product_code, url, size, gender, "",              # 第5位占位
+            rec.code, url, size, rec.gender, "",              # 第5位占位
             "有货" if "有货" in status else "无货",
-            original_price, discount_price, "",               # 第9位占位
+            rec.original_price, rec.discount_price, "",       # 第9位占位
         ))
     return records
 
-def parse_camper_or_generic(filepath: Path) -> List[Tuple]:
+def parse_camper_or_generic(filepath: TxtInput) -> List[Tuple]:
     """
     Camper/Clarks 版：保持你上传的旧逻辑（Product Size + 可选 Product Size Detail 里的 EAN）
     """
     records = []
-    with open(filepath, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    product_code = product_name = product_desc = gender = color = ""
-    original_price = discount_price = material = sizes_line = url = ""
-    feature = ""
-    ean_line = ""
-
-    for line in lines:
-        line = line.strip()
-        if line.startswith("Product Code:"):
-            product_code = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Name:"):
-            product_name = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Description:"):
-            product_desc = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Gender:"):
-            gender = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Color:"):
-            color = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Price:"):
-            original_price = line.split(":", 1)[1].strip().replace("£", "").strip()
-        elif line.startswith("Adjusted Price:"):
-            discount_price = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Material:"):
-            material = line.split(":", 1)[1].strip()
-        elif line.startswith("Feature:"):
-            feature = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Size:"):
-            sizes_line = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Size Detail:"):
-            ean_line = line.split(":", 1)[1].strip()
-        elif line.startswith("Source URL:"):
-            url = line.split(":", 1)[1].strip()
+    rec = load_txt_record(filepath)
+    url = rec.get("Source URL")
 
     if not url:
-        print(f"❌ 缺失 product_url，跳过编码: {product_code}")
+        print(f"❌ 缺失 product_url，跳过编码: {rec.code}")
         return []
 
     # 解析 EAN 映射（可为空）
     ean_dict = {}
-    for ean_info in ean_line.split(";"):
+    for ean_info in rec.size_detail.split(";"):
         if not ean_info.strip():
             continue
         try:
@@ -116,7 +59,7 @@ def parse_camper_or_generic(filepath: Path) -> List[Tuple]:
         except ValueError:
             continue
 
-    for size_info in sizes_line.split(";"):
+    for size_info in rec.sizes.split(";"):
         if not size_info.strip():
             continue
         try:
@@ -126,143 +69,81 @@ def parse_camper_or_generic(filepath: Path) -> List[Tuple]:
             stock_status = "有货" if "有货" in status else "无货"
             ean = ean_dict.get(size, "")
             records.append((
-                product_code, url, size, gender, "", stock_status,
-                original_price, discount_price, "", ean
+                rec.code, url, size, rec.gender, "", stock_status,
+                rec.original_price, rec.discount_price, "", ean
             ))
         except ValueError:
             continue
 
     return records
 
-# ===== Barbour 版：优先解析 Size Detail（带库存数），无则回退到通用版 =====
-def parse_barbour_jingya(filepath: Path) -> List[Tuple]:
-    with open(filepath, "r", encoding="utf-8") as f:
-        lines = f.read().splitlines()
-
-    info = {
-        "product_code": "", "product_url": "", "gender": "",
-        "original_price_gbp": "0", "discount_price_gbp": "0",
-    }
+def _size_detail_map(rec: TxtRecord) -> dict:
+    """Product Size Detail → {尺码: {"stock_count", "ean"}}（库存低于阈值置 0）"""
     size_detail_map = {}
-    sizes_line = ""
+    for size, stock_count, ean in rec.size_details():
+        try:
+            stock_count = int(stock_count)
+        except ValueError:
+            stock_count = 0
+        if stock_count < MIN_STOCK_THRESHOLD:
+            stock_count = 0
+        size_detail_map[size] = {"stock_count": stock_count, "ean": ean}
+    return size_detail_map
+
+def _to_float(val: str) -> float:
+    try:
+        return float(val)
+    except ValueError:
+        return 0.0
 
-    for line in lines:
-        s = line.strip()
-        if s.startswith("Product Code:"):
-            info["product_code"] = s.split(":", 1)[1].strip()
-        elif s.startswith("Source URL:") or s.startswith("Product URL:"):
-            info["product_url"] = s.split(":", 1)[1].strip()
-        elif s.startswith("Product Gender:"):
-            info["gender"] = s.split(":", 1)[1].strip()
-        elif s.startswith("Product Price:"):
-            info["original_price_gbp"] = s.split(":", 1)[1].strip().replace("£","").strip()
-        elif s.startswith("Adjusted Price:"):
-            info["discount_price_gbp"] = s.split(":", 1)[1].strip()
-        elif s.startswith("Product Size Detail:"):
-            raw = s.split(":", 1)[1]
-            for item in raw.split(";"):
-                parts = item.strip().split(":")
-                if len(parts) == 3:
-                    size, stock_count, ean = parts
-                    try:
-                        stock_count = int(stock_count)
-                    except:
-                        stock_count = 0
-                    if stock_count < MIN_STOCK_THRESHOLD:
-                        stock_count = 0
-                    size_detail_map[size] = {"stock_count": stock_count, "ean": ean}
-        elif s.startswith("Product Size:"):
-            sizes_line = s.split(":", 1)[1].strip()
+# ===== Barbour 版：优先解析 Size Detail（带库存数），无则回退到通用版 =====
+def parse_barbour_jingya(filepath: TxtInput) -> List[Tuple]:
+    rec = load_txt_record(filepath)
+    size_detail_map = _size_detail_map(rec)
 
-    # 优先用 Size Detail（有库存数字）
+    # 优先用 Size Detail（有库存数字）；价格字段缺失时为 "0"
+    original_price = rec.original_price if "Product Price" in rec.fields else "0"
+    discount_price = rec.discount_price if "Adjusted Price" in rec.fields else "0"
     if size_detail_map:
-        recs = []
-        for size, d in size_detail_map.items():
-            recs.append((
-                info["product_code"], info["product_url"], size, info["gender"],
-                d["ean"], d["stock_count"], info["original_price_gbp"], info["discount_price_gbp"], False
-            ))
-        return recs
+        return [
+            (
+                rec.code, rec.url, size, rec.gender,
+                d["ean"], d["stock_count"], original_price, discount_price, False
+            )
+            for size, d in size_detail_map.items()
+        ]
 
     # 回退：用通用版（仅 有货/无货）
-    return parse_generic_txt(filepath)
-
-def jingya_parse_txt_file(txt_path: Path) -> list:
-    with open(txt_path, "r", encoding="utf-8") as f:
-        lines = f.read().splitlines()
-
-    info = {}
-    size_detail_map = {}
-
-    # ✅ 新增：先给三个新字段占位
-    info["product_title"] = None         # Product Name
-    info["product_description"] = None   # Product Description
-    info["style_category"] = None        # Style Category
-
-    for line in lines:
-        line = line.strip()
-        if line.startswith("Product Code:"):
-            info["product_code"] = line.split(":", 1)[1].strip()
-        elif line.startswith("Source URL:") or line.startswith("Product URL:"):
-            info["product_url"] = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Gender:"):
-            info["gender"] = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Price:"):
-            try:
-                info["original_price_gbp"] = float(line.split(":", 1)[1].strip())
-            except:
-                info["original_price_gbp"] = 0.0
-        elif line.startswith("Adjusted Price:"):
-            try:
-                info["discount_price_gbp"] = float(line.split(":", 1)[1].strip())
-            except:
-                info["discount_price_gbp"] = 0.0
-
-        # ✅ 新增：三列的解析
-        elif line.startswith("Product Name:"):
-            info["product_title"] = line.split(":", 1)[1].strip()
-        elif line.startswith("Product Description:"):
-            info["product_description"] = line.split(":", 1)[1].strip()
-        elif line.startswith("Style Category:"):
-            info["style_category"] = line.split(":", 1)[1].strip()
-
-        elif line.startswith("Product Size Detail:"):
-            raw = line.split(":", 1)[1]
-            for item in raw.split(";"):
-                parts = item.strip().split(":")
-                if len(parts) == 3:
-                    size, stock_count, ean = parts
-                    try:
-                        stock_count = int(stock_count)
-                    except:
-                        stock_count = 0
+    return parse_generic_txt(rec)
 
-                    # ✅ 库存阈值
-                    if stock_count < MIN_STOCK_THRESHOLD:
-                        stock_count = 0
+def jingya_parse_txt_file(txt_path: TxtInput) -> list:
+    rec = load_txt_record(txt_path)
+    size_detail_map = _size_detail_map(rec)
 
-                    size_detail_map[size] = {
-                        "stock_count": stock_count,
-                        "ean": ean
-                    }
+    original_price_gbp = _to_float(rec.get("Product Price", "0"))
+    discount_price_gbp = _to_float(rec.get("Adjusted Price", "0"))
+    # 三个新字段没有时为 None
+    product_title = rec.fields.get("Product Name")
+    product_description = rec.fields.get("Product Description")
+    style_category = rec.fields.get("Style Category")
 
     records = []
     for size, detail in size_detail_map.items():
         records.append((
-            info.get("product_code"),
-            info.get("product_url"),
+            rec.code or None,
+            rec.url or None,
             size,
-            info.get("gender"),
+            rec.gender or None,
             detail["ean"],
             detail["stock_count"],
-            info.get("original_price_gbp", 0.0),
-            info.get("discount_price_gbp", 0.0),
+            original_price_gbp,
+            discount_price_gbp,
             False,  # is_published
 
             # ✅ 追加三列（顺序与下方 INSERT 一一对应）
-            info.get("product_description"),
-            info.get("product_title"),
-            info.get("style_category"),
+            product_description,
+            product_title,
+            style_category,
         ))
 
     return records
@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+TXT 记录缓存 - 同一批 TXT 只解析一次，prepare_jingya_listing 后面各步骤直接拿解析结果
+
+一次 prepare_jingya_listing 里，同一个 TXT 目录会被 import_txt_to_db_supplier、generate_html、
+generate_empty_product_links_for_brand、export_discount_candidates_excel、上新标题生成
+各自打开一遍，每处一串 line.startswith(...)。
+
+现在:
+- 解析只有一处：每行按第一个 ":" 切成 字段名 → 值（fields，顺序与 TXT 一致），
+  再按 _FIELD_DISPATCH 表（字段名 → 属性 + 转换函数）一次查表填到 TxtRecord 的属性上
+- 缓存键为 (路径, mtime_ns, size)：文件没变就不再打开；进程内一份，
+  并持久化到 SQLite（SETTINGS["TXT_RECORD_CACHE_FILE"]），下一个进程 / 下一步骤同样命中
+- 批次记录（common.ingest.txt_batch.BatchRecord）本身就是 fields，直接转成 TxtRecord
+
+使用方式:
+    from common.ingest.txt_records import load_txt_records, load_txt_record, get_txt_record
+
+    for rec in load_txt_records(txt_dir):       # 目录下全部商品（含 TXT 批次）
+        print(rec.code, rec.title, rec.original_price, rec.size_status())
+    rec = load_txt_record(Path(".../K100.txt"))  # 单个文件
+    rec = get_txt_record(txt_dir, "K100")        # 按编码取，文件和批次里都没有时返回 None
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from cfg.paths import BASE_DIR
+from cfg.settings import SETTINGS
+from common.ingest.txt_batch import (
+    MTIME_TOLERANCE_SEC, BatchRecord, TxtSource, iter_txt_sources, load_batch_view, pending_record,
+)
+
+TXT_RECORD_CACHE_ENABLED = bool(SETTINGS.get("TXT_RECORD_CACHE_ENABLED", True))
+TXT_RECORD_CACHE_FILE = Path(SETTINGS.get("TXT_RECORD_CACHE_FILE") or BASE_DIR / "_txt_cache" / "txt_records.sqlite")
+
+_FLUSH_EVERY = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS txt_records (
+    path      TEXT PRIMARY KEY,
+    dir       TEXT NOT NULL,
+    mtime_ns  INTEGER NOT NULL,
+    size      INTEGER NOT NULL,
+    fields    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_txt_records_dir ON txt_records(dir);
+"""
+
+
+# ================== 记录 ==================
+
+def _price(val: str) -> str:
+    return val.replace("£", "").strip()
+
+
+# 字段名 → (TxtRecord 属性, 转换函数)；同一属性有多个字段名时，TXT 中靠后的覆盖靠前的
+_FIELD_DISPATCH: Dict[str, Tuple[str, Optional[Callable[[str], str]]]] = {
+    "Product Code": ("code", None),
+    "Source URL": ("url", None),
+    "Product URL": ("url", None),
+    "Product Name": ("title", None),
+    "Product Description": ("description", None),
+    "Product Gender": ("gender", None),
+    "Product Color": ("color", None),
+    "Product Material": ("material", None),
+    "Feature": ("feature", None),
+    "Style Category": ("style_category", None),
+    "Product Price": ("original_price", _price),
+    "Adjusted Price": ("discount_price", None),
+    "Product Size": ("sizes", None),
+    "Product Size Detail": ("size_detail", None),
+}
+
+
+@dataclass
+class TxtRecord:
+    """一个商品 TXT 的解析结果"""
+    name: str                                   # TXT 文件名，如 "K100123-001.txt"
+    fields: Dict[str, str] = field(default_factory=dict, repr=False)
+    txt_dir: str = ""
+    code: str = ""
+    url: str = ""                               # Source URL / Product URL
+    title: str = ""
+    description: str = ""
+    gender: str = ""
+    color: str = ""
+    material: str = ""
+    feature: str = ""
+    style_category: str = ""
+    original_price: str = ""                    # Product Price（去掉 £）
+    discount_price: str = ""                    # Adjusted Price
+    sizes: str = ""                             # Product Size 原文 "SIZE:有货;..."
+    size_detail: str = ""                       # Product Size Detail 原文 "SIZE:库存:EAN;..."
+
+    @property
+    def stem(self) -> str:
+        return Path(self.name).stem
+
+    @property
+    def path(self) -> Path:
+        return Path(self.txt_dir) / self.name
+
+    def get(self, key: str, default: str = "") -> str:
+        return self.fields.get(key, default)
+
+    @property
+    def text(self) -> str:
+        """按 "key: value" 拼回的 TXT 内容（与 format_txt 写出的一致）"""
+        return "\n".join(f"{k}: {v}" for k, v in self.fields.items())
+
+    def lines(self) -> List[str]:
+        return self.text.splitlines()
+
+    def size_status(self) -> List[Tuple[str, str]]:
+        """Product Size → [(尺码, 状态), ...]，格式不对的项跳过"""
+        result = []
+        for item in self.sizes.split(";"):
+            parts = item.split(":")
+            if len(parts) == 2 and parts[0].strip():
+                result.append((parts[0].strip(), parts[1].strip()))
+        return result
+
+    def size_details(self) -> List[Tuple[str, str, str]]:
+        """Product Size Detail → [(尺码, 库存, EAN), ...]，格式不对的项跳过"""
+        result = []
+        for item in self.size_detail.split(";"):
+            parts = item.strip().split(":")
+            if len(parts) == 3:
+                result.append((parts[0], parts[1], parts[2]))
+        return result
+
+    def __str__(self) -> str:
+        return str(self.path)
+
+
+def parse_fields(lines: Iterable[str]) -> Dict[str, str]:
+    """TXT 各行 → {字段名: 值}（按第一个 ":" 切分，去首尾空白；同名字段后者覆盖前者）"""
+    fields: Dict[str, str] = {}
+    for line in lines:
+        key, sep, val = line.partition(":")
+        if sep:
+            fields[key.strip()] = val.strip()
+    return fields
+
+
+def build_record(name: str, fields: Dict[str, str], txt_dir: str = "") -> TxtRecord:
+    rec = TxtRecord(name=name, fields=fields, txt_dir=txt_dir)
+    for key, val in fields.items():
+        hit = _FIELD_DISPATCH.get(key)
+        if hit is not None:
+            attr, conv = hit
+            setattr(rec, attr, conv(val) if conv else val)
+    return rec
+
+
+# ================== 缓存 ==================
+
+class TxtRecordCache:
+    """(路径, mtime_ns, size) → fields；进程内 dict + 可选 SQLite 持久化"""
+
+    def __init__(self, db_file: Optional[Path] = None):
+        self.db_file = Path(db_file) if db_file else None
+        self._mem: Dict[str, Tuple[int, int, Dict[str, str]]] = {}
+        self._pending: Dict[str, Tuple[str, int, int, str]] = {}
+        self._loaded_dirs: set = set()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        if self.db_file is not None:
+            try:
+                self.db_file.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(str(self.db_file), timeout=30, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.executescript(_SCHEMA)
+            except sqlite3.Error as e:
+                print(f"⚠️ TXT 记录缓存库不可用，只用进程内缓存: {e}")
+                self._conn = None
+
+    def preload(self, dir_key: str) -> None:
+        """一次查询把某个目录的缓存读进内存"""
+        if self._conn is None or dir_key in self._loaded_dirs:
+            return
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, mtime_ns, size, fields FROM txt_records WHERE dir = ?", (dir_key,)
+            ).fetchall()
+            for path, mtime_ns, size, raw in rows:
+                if path not in self._mem:
+                    self._mem[path] = (mtime_ns, size, json.loads(raw))
+            self._loaded_dirs.add(dir_key)
+
+    def get(self, path: str, dir_key: str, st: os.stat_result) -> Optional[Dict[str, str]]:
+        if dir_key not in self._loaded_dirs:
+            self.preload(dir_key)
+        with self._lock:
+            hit = self._mem.get(path)
+            if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+                self.hits += 1
+                return hit[2]
+            self.misses += 1
+            return None
+
+    def put(self, path: str, dir_key: str, st: os.stat_result, fields: Dict[str, str]) -> None:
+        with self._lock:
+            self._mem[path] = (st.st_mtime_ns, st.st_size, fields)
+            if self._conn is not None:
+                self._pending[path] = (dir_key, st.st_mtime_ns, st.st_size,
+                                       json.dumps(fields, ensure_ascii=False))
+            full = len(self._pending) >= _FLUSH_EVERY
+        if full:
+            self.flush()
+
+    def prune(self, dir_key: str, keep: Iterable[str]) -> None:
+        """删除目录下已不存在的文件的缓存"""
+        keep = set(keep)
+        with self._lock:
+            gone = [p for p in self._mem if os.path.dirname(p) == dir_key and p not in keep]
+            for p in gone:
+                self._mem.pop(p, None)
+                self._pending.pop(p, None)
+            if self._conn is not None and gone:
+                with self._conn:
+                    self._conn.executemany("DELETE FROM txt_records WHERE path = ?", [(p,) for p in gone])
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._conn is None or not self._pending:
+                return
+            rows = [(p, d, m, s, f) for p, (d, m, s, f) in self._pending.items()]
+            self._pending.clear()
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO txt_records (path, dir, mtime_ns, size, fields) "
+                        "VALUES (?, ?, ?, ?, ?)", rows
+                    )
+            except sqlite3.Error as e:
+                print(f"⚠️ TXT 记录缓存写入失败: {e}")
+
+
+_CACHE: Optional[TxtRecordCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_record_cache() -> TxtRecordCache:
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = TxtRecordCache(TXT_RECORD_CACHE_FILE if TXT_RECORD_CACHE_ENABLED else None)
+            atexit.register(_CACHE.flush)
+        return _CACHE
+
+
+# ================== 读取 ==================
+
+def _norm(path: Union[Path, str]) -> str:
+    return os.path.abspath(str(path))
+
+
+def load_txt_record(source: Union[TxtSource, TxtRecord, str]) -> TxtRecord:
+    """
+    TXT 文件 / 批次记录 → TxtRecord；文件没变时直接用缓存，不打开文件
+
+    文件不存在时抛 FileNotFoundError（与 open() 一致）。
+    """
+    if isinstance(source, TxtRecord):
+        return source
+    if isinstance(source, BatchRecord):
+        return build_record(source.name, source.fields, source.txt_dir)
+
+    path = _norm(source)
+    dir_key, name = os.path.split(path)
+    st = os.stat(path)
+    cache = get_record_cache()
+    fields = cache.get(path, dir_key, st)
+    if fields is None:
+        with open(path, "r", encoding="utf-8") as f:
+            fields = parse_fields(f.read().splitlines())
+        cache.put(path, dir_key, st, fields)
+    return build_record(name, fields, dir_key)
+
+
+def load_txt_records(txt_dir: Path | str, pattern: str = "*.txt") -> List[TxtRecord]:
+    """目录下全部商品的 TxtRecord（TXT 文件 + TXT 批次，按文件名排序）；读不了的文件跳过"""
+    dir_key = _norm(txt_dir)
+    cache = get_record_cache()
+    hits, misses = cache.hits, cache.misses
+    records: List[TxtRecord] = []
+    seen: List[str] = []
+    for src in iter_txt_sources(txt_dir, pattern):
+        try:
+            records.append(load_txt_record(src))
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"⚠️ 读取 TXT 失败: {src} → {e}")
+            continue
+        if not isinstance(src, BatchRecord):
+            seen.append(_norm(src))
+    if pattern == "*.txt":
+        cache.prune(dir_key, seen)
+    cache.flush()
+    print(f"📑 TXT 记录 {len(records)} 条（缓存命中 {cache.hits - hits}，重新解析 {cache.misses - misses}）")
+    return records
+
+
+def get_txt_record(txt_dir: Path | str, code: str) -> Optional[TxtRecord]:
+    """按编码（或 TXT 文件名）取记录：TXT 文件与批次（含本进程未写出的缓冲）中较新的一方；都没有返回 None"""
+    name = code if code.endswith(".txt") else f"{code}.txt"
+    path = Path(txt_dir) / name
+    rec = pending_record(txt_dir, name) or load_batch_view(txt_dir).get(name)
+    # 与 iter_txt_sources 相同：同名时取较新的一方
+    if rec is not None:
+        try:
+            newer_file = path.stat().st_mtime > rec.ts + MTIME_TOLERANCE_SEC
+        except FileNotFoundError:
+            newer_file = False
+        if not newer_file:
+            return load_txt_record(rec)
+    try:
+        return load_txt_record(path)
+    except FileNotFoundError:
+        return None
+
+
+def txt_exists(path: Path | str) -> bool:
+    """
+    商品 TXT 是否还在：文件存在，或 TXT 批次（含本进程未写出的缓冲）里有同名记录
+
+    只写批次（TXT_OUTPUT_MODE="batch"）时没有单品文件，增量跳过的判断要用这个代替 Path.exists()。
+    """
+    p = Path(path)
+    return p.exists() or get_txt_record(p.parent, p.name) is not None
@@ -2,6 +2,7 @@
 from pathlib import Path
 from typing import Dict, Any
 from config import SETTINGS
+from common.ingest.txt_batch import get_batch_writer, writes_batch, writes_txt
 
 # —— 仅 Barbour 分支会用到（Camper/Clarks 不触发）——
 try:
@@ -191,9 +192,15 @@ def format_txt(info: dict, filepath: Path, brand: str = None):
     _write_line(lines, "Site Name", info.get("Site Name"))
     _write_line(lines, "Source URL", info.get("Source URL"))
 
-    # 写文件
-    filepath.parent.mkdir(parents=True, exist_ok=True)
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
-
-    print(f"✅ 写入 TXT: {filepath.name}")
+    # 写文件（TXT_OUTPUT_MODE: txt / both / batch，见 common/ingest/txt_batch.py）
+    filepath = Path(filepath)
+    if writes_txt():
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        with open(filepath, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+    # 批次记录在 TXT 之后写，时间戳不早于 TXT 的 mtime（读取时同名取较新者）
+    if writes_batch():
+        fields = dict(line.split(": ", 1) for line in lines)
+        get_batch_writer(filepath.parent).add(filepath.name, fields)
+
+    print(f"✅ 写入 {'TXT' if writes_txt() else '批次'}: {filepath.name}")
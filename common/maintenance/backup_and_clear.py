@@ -1,3 +1,4 @@
+import re
 import shutil
 import datetime
 from pathlib import Path
@@ -20,6 +21,11 @@ def backup_and_clear_txt(txt_dir: Path, backup_root: Path):
     for file in txt_dir.glob("*.txt"):
         file.unlink()
 
+    # TXT 批次库（common/ingest/txt_batch.py）随 TXT 一起备份清空
+    batch_dir = txt_dir / "_batch"
+    if batch_dir.is_dir():
+        shutil.move(str(batch_dir), str(backup_dir / "_batch"))
+
     print(f"📦 已备份 TXT → {backup_dir}")
     print(f"🧹 已清空 TXT 目录: {txt_dir}")
 
@@ -64,3 +70,48 @@ def backup_and_clear_brand_dirs(brand_config: dict):
     # 整体备份并清空 repulibcation
     backup_and_clear_dir(repub_dir, BACKUP_DIR, "repulibcation")
 
+
+
+_SNAPSHOT_NAME = re.compile(r"\d{8}_\d{6}")
+
+
+def _latest_publication_snapshot(base: Path):
+    """<BASE>/backup 下最近一次 backup_and_clear_brand_dirs 的快照目录（含 publication）；没有时返回 None"""
+    backup_root = base / "backup"
+    if not backup_root.exists():
+        return None
+    # 快照目录名为 %Y%m%d_%H%M%S，按名字排序即时间顺序（txt_backup_* 等其他备份不算）
+    snaps = [
+        d for d in backup_root.iterdir()
+        if d.is_dir() and _SNAPSHOT_NAME.fullmatch(d.name) and (d / "publication").is_dir()
+    ]
+    return max(snaps, key=lambda d: d.name) if snaps else None
+
+
+def restore_from_latest_backup(paths) -> list:
+    """
+    把 publication 下被 backup_and_clear_brand_dirs 清掉的文件从最近一次备份拷回原位
+
+    paths: 文件原路径（须位于 <BASE>/publication 下，备份在 <BASE>/backup/<时间戳>/publication）
+    只从最近一次快照恢复：上一轮清理时就已经不在的文件不会从更早的备份里翻出来
+    返回成功恢复的路径；已存在或最近一次快照里没有的跳过
+    """
+    restored = []
+    snapshots = {}
+    for p in map(Path, paths):
+        if p.exists() or "publication" not in p.parts:
+            continue
+        idx = len(p.parts) - 1 - p.parts[::-1].index("publication")
+        base = Path(*p.parts[:idx])
+        rel = Path(*p.parts[idx:])
+        if base not in snapshots:
+            snapshots[base] = _latest_publication_snapshot(base)
+        snap_dir = snapshots[base]
+        if snap_dir is None:
+            continue
+        src = snap_dir / rel
+        if src.exists():
+            p.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(src, p)
+            restored.append(p)
+    return restored
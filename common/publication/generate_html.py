@@ -5,6 +5,9 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from common.text.translate import safe_translate
 from common.text.ad_sanitizer import sanitize_text, sanitize_features
 from config import BRAND_CONFIG
+from common.ingest.txt_batch import iter_txt_sources
+from common.ingest.txt_records import load_txt_record
+from common.image.dir_index import get_dir_index
 
 PLACEHOLDER_IMG = "https://via.placeholder.com/500x500?text=No+Image"
 
@@ -177,44 +180,28 @@ HTML_TEMPLATE = """
 
 # === 工具函数 ===
 def parse_txt(txt_path):
-    data = {}
-    with open(txt_path, "r", encoding="utf-8") as f:
-        for line in f:
-            if ":" in line:
-                key, val = line.split(":", 1)
-                data[key.strip()] = val.strip()
-    return data
+    """TXT 文件或 TXT 批次记录 → {字段: 值}（解析结果走 txt_records 缓存）"""
+    return dict(load_txt_record(txt_path).fields)
 
 def find_image_path(code, image_dir: Path, brand: str):
     cfg = BRAND_CONFIG.get(brand.lower(), {})
     priority = cfg.get("IMAGE_DES_PRIORITY", ["F", "C", "1", "01"])
 
-    if not image_dir.exists():
-        return PLACEHOLDER_IMG
+    # 目录只列一次，之后每个编码都是字典查找
+    index = get_dir_index(image_dir)
 
     # ==== Clarks-Jingya 特殊逻辑：取最大数字后缀的图片 ====
     if brand.lower() == "clarks":
-        pattern = re.compile(rf"^{re.escape(code)}_(\d+)\.jpg$", re.IGNORECASE)
-        max_num = -1
-        best_file = None
-
-        for img_file in image_dir.glob(f"{code}_*.jpg"):
-            m = pattern.match(img_file.name)
-            if m:
-                num = int(m.group(1))
-                if num > max_num:
-                    max_num = num
-                    best_file = img_file
-
-        if best_file:
-            return best_file.resolve().as_uri()
+        numbered = {int(s): name for s, name in index.suffixes(code, ".jpg").items() if s.isdigit()}
+        if numbered:
+            return (image_dir / numbered[max(numbered)]).resolve().as_uri()
 
         return PLACEHOLDER_IMG
 
     # ==== 其他品牌：原逻辑 ====
     for suffix in priority:
-        candidate = image_dir / f"{code}_{suffix}.jpg"
-        if candidate.exists():
+        candidate = index.find(code, suffix, ".jpg")
+        if candidate is not None:
             return f"file:///{candidate.as_posix()}"
 
     return PLACEHOLDER_IMG
@@ -343,7 +330,7 @@ def generate_html_main(brand=None, max_workers=4):
     html_dir = cfg["HTML_DIR_DES"]
     html_dir.mkdir(parents=True, exist_ok=True)
 
-    files = list(txt_dir.glob("*.txt"))
+    files = iter_txt_sources(txt_dir)
     if not files:
         print(f"❌ 未找到 TXT 文件: {txt_dir}")
         return
@@ -419,7 +406,7 @@ def generate_html_from_images(brand: str, max_workers: int = 4):
 
     # 2) 建立 TXT 索引（按编码匹配）
     txt_index = {}
-    for txt in txt_dir.glob("*.txt"):
+    for txt in iter_txt_sources(txt_dir):
         try:
             d = parse_txt(txt)
             code_in_txt = d.get("Product Code", "") or txt.stem
@@ -539,7 +526,7 @@ def generate_html_from_codes_files(brand: str, codes_file: str | Path, max_worke
 
     # 建立 TXT 索引（以“规范化后的编码”为键）
     txt_index = {}
-    for txt in txt_dir.glob("*.txt"):
+    for txt in iter_txt_sources(txt_dir):
         try:
             d = parse_txt(txt)
             code_in_txt = d.get("Product Code", "")
@@ -1,21 +1,70 @@
+from pathlib import Path
+from typing import Dict
+
+from common.ingest.txt_batch import BatchRecord
+from common.ingest.txt_records import TxtRecord, get_txt_record, load_txt_record
+
+
 def extract_product_info(txt_file) -> dict:
     """
-    从商品 TXT 文件中提取字段
+    从商品 TXT 文件中提取字段（文件没变时用 txt_records 缓存；只写批次时从 TXT 批次中取同名记录）
     支持字段: Product Name, Product Description, Upper Material, AdjustedPrice, Price, gender
     """
-    info = {}
-    if not txt_file.exists():
-        return info
-
     try:
-        with open(txt_file, "r", encoding="utf-8") as f:
-            for line in f:
-                if ":" in line:
-                    key, val = line.strip().split(":", 1)
-                    info[key.strip()] = val.strip()
-    except:
+        if isinstance(txt_file, (BatchRecord, TxtRecord)):
+            rec = load_txt_record(txt_file)
+        else:
+            txt_file = Path(txt_file)
+            rec = get_txt_record(txt_file.parent, txt_file.name)
+        return dict(rec.fields) if rec is not None else {}
+    except Exception:
         return {}
 
-    return info
 
 
+
+# 视为"无价格"的占位值
+_EMPTY_PRICE_VALUES = {"", "0", "0.0", "0.00"}
+
+
+def _is_price_empty(info: Dict[str, str]) -> bool:
+    for key in ("Product Price", "Adjusted Price"):
+        val = (info.get(key) or "").strip()
+        if val not in _EMPTY_PRICE_VALUES:
+            return False
+    return True
+
+
+def _has_stock(info: Dict[str, str]) -> bool:
+    # 1) 优先看 Product Size Detail: "SIZE:stock:EAN;..."（stock 为数字时判断 > 0）
+    detail = (info.get("Product Size Detail") or "").strip()
+    for token in detail.split(";"):
+        token = token.strip()
+        if not token:
+            continue
+        parts = token.split(":")
+        if len(parts) >= 2:
+            try:
+                if int(parts[1]) > 0:
+                    return True
+            except ValueError:
+                pass  # 非数字库存写法（如 barbour 的 text 模式），交给下面的 Product Size 判断
+
+    # 2) 兜底看 Product Size: "SIZE:有货/无货;..."
+    size_map = (info.get("Product Size") or "").strip()
+    for token in size_map.split(";"):
+        token = token.strip()
+        if not token:
+            continue
+        parts = token.split(":")
+        if len(parts) >= 2 and parts[1].strip() == "有货":
+            return True
+
+    return False
+
+
+def is_empty_product_info(info: Dict[str, str]) -> bool:
+    """价格和库存是否同时全空（典型的网络失败空壳 TXT），info 为 extract_product_info 的结果"""
+    if not info:
+        return True
+    return _is_price_empty(info) and not _has_stock(info)
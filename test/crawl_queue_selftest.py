@@ -0,0 +1,144 @@
+"""
+分布式抓取队列 (common.crawl.job_queue) 自检 — 需要一个可写的 Postgres
+
+不访问任何站点：用假的 runner（每个 URL sleep 一会儿再写一个 TXT）模拟抓取，检查
+  1. 1 个 worker 与 N 个 worker 进程抽干同样多的任务，吞吐量之比
+  2. 每个任务恰好完成一次，TXT 内容写回任务表
+  3. 持有租约的 worker "崩溃"（不心跳、不回报）后，租约过期由其他 worker 接手，
+     崩溃的 worker 再回报时结果被丢弃
+
+运行方法（项目根目录）：
+  python test/crawl_queue_selftest.py                                  # 本机 postgres/postgres@localhost
+  python test/crawl_queue_selftest.py --host 192.168.1.202 --password xxx --dbname test_db
+  python test/crawl_queue_selftest.py --workers 4 --jobs 200 --delay 0.05
+只在 crawl_jobs 表里写 batch 以 selftest- 开头的行，结束后删除。有检查失败时退出码为 1。
+"""
+
+import argparse
+import functools
+import multiprocessing as mp
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.crawl import job_queue as jq
+
+SITE = "_selftest"
+
+
+def _fake_runner(urls, max_workers=1, out_dir="", delay=0.05):
+    """假抓取：每个 URL 写一个 TXT，返回 {url: TXT 路径}"""
+    results = {}
+    for url in urls:
+        time.sleep(delay)
+        path = Path(out_dir) / f"{url.rsplit('/', 1)[-1]}.txt"
+        path.write_text(f"Source URL: {url}\n", encoding="utf-8")
+        results[url] = str(path)
+    return results
+
+
+def _worker_proc(pg, batch, lease, out_dir, delay, chunk):
+    queue = jq.CrawlQueue(pg, lease_sec=lease)
+    runner = functools.partial(_fake_runner, out_dir=out_dir, delay=delay)
+    try:
+        jq.run_worker(batch, chunk=chunk, queue=queue, runners={SITE: runner})
+    finally:
+        queue.close()
+
+
+def _drain(pg, batch, workers, lease, out_dir, delay, chunk) -> float:
+    procs = [
+        mp.Process(target=_worker_proc, args=(pg, batch, lease, out_dir, delay, chunk))
+        for _ in range(workers)
+    ]
+    t0 = time.perf_counter()
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    return time.perf_counter() - t0
+
+
+def _rows(queue, batch):
+    with queue._cursor() as cur:
+        cur.execute(
+            "SELECT url, status, attempts, worker, output_txt FROM crawl_jobs WHERE batch = %s", (batch,)
+        )
+        return cur.fetchall()
+
+
+def check(label: str, ok: bool, detail: str = "") -> bool:
+    print(f"  {'✅' if ok else '❌'} {label}" + (f"  ({detail})" if detail else ""))
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="localhost")
+    ap.add_argument("--port", type=int, default=5432)
+    ap.add_argument("--user", default="postgres")
+    ap.add_argument("--password", default="postgres")
+    ap.add_argument("--dbname", default="postgres")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--jobs", type=int, default=200)
+    ap.add_argument("--delay", type=float, default=0.05, help="假抓取每个 URL 的耗时（秒）")
+    ap.add_argument("--chunk", type=int, default=5)
+    args = ap.parse_args()
+
+    pg = {"host": args.host, "port": args.port, "user": args.user,
+          "password": args.password, "dbname": args.dbname}
+    queue = jq.CrawlQueue(pg)
+    run_id = time.strftime("%Y%m%d%H%M%S")
+    urls = [f"https://selftest.local/p/{i:05d}" for i in range(args.jobs)]
+    all_ok = True
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        # 1. 吞吐量：1 个 worker vs N 个
+        print(f"\n== 吞吐量 ({args.jobs} 个任务, 每个 {args.delay}s) ==")
+        timings = {}
+        for n in (1, args.workers):
+            batch = f"selftest-{run_id}-w{n}"
+            queue.enqueue(batch, SITE, urls)
+            timings[n] = _drain(pg, batch, n, 30, out_dir, args.delay, args.chunk)
+            rows = _rows(queue, batch)
+            done = [r for r in rows if r[1] == "done"]
+            print(f"  {n} worker: {timings[n]:.1f}s, {args.jobs / timings[n]:.1f} 任务/s")
+            all_ok &= check(f"{n} worker 全部完成", len(done) == args.jobs, f"{len(done)}/{args.jobs}")
+            all_ok &= check("每个任务只领取一次", all(r[2] == 1 for r in rows))
+            all_ok &= check("TXT 内容写回任务表", all(r[4] and r[0] in r[4] for r in done))
+        speedup = timings[1] / timings[args.workers]
+        print(f"  加速比 {speedup:.2f}x（理想 {args.workers}x，含进程启动与轮询开销）")
+
+        # 2. 崩溃的 worker：领了任务后不心跳、不回报
+        print("\n== 租约过期接手 ==")
+        lease = 3
+        batch = f"selftest-{run_id}-crash"
+        queue.enqueue(batch, SITE, urls[:40])
+        crashed = jq.CrawlQueue(pg, lease_sec=lease)
+        held = crashed.claim("crashed-worker", batch=batch, limit=10)
+        all_ok &= check("崩溃前领取 10 个任务", len(held) == 10, str(len(held)))
+        _drain(pg, batch, 2, lease, out_dir, args.delay, args.chunk)
+
+        rows = {r[0]: r for r in _rows(queue, batch)}
+        all_ok &= check("全部完成", all(r[1] == "done" for r in rows.values()))
+        all_ok &= check(
+            "被接手的任务尝试 2 次且由其他 worker 完成",
+            all(rows[j.url][2] == 2 and rows[j.url][3] != "crashed-worker" for j in held),
+        )
+        late = crashed.complete("crashed-worker", held[0], None)
+        all_ok &= check("崩溃的 worker 迟到的回报被丢弃", not late)
+        crashed.close()
+
+        with queue._cursor() as cur:
+            cur.execute("DELETE FROM crawl_jobs WHERE batch LIKE %s", (f"selftest-{run_id}-%",))
+    queue.close()
+
+    print("\n全部通过" if all_ok else "\n有检查未通过")
+    sys.exit(0 if all_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+预备语句 (common.db.query.execute_prepared) 自检 — EXECUTE 失败后同一连接还能继续用
+
+检查
+  1. EXECUTE 出错（参数类型错误）→ 回滚 → 同一 SQL 再执行成功，不会重复 PREPARE
+     （预备语句属于会话，ROLLBACK 后仍在；以前失败时删掉登记，下次 PREPARE 报 DuplicatePreparedStatement）
+  2. 连接上的登记丢失、会话里仍有同名语句 → 先 DEALLOCATE 再 PREPARE
+  3. 会话里的语句被 DISCARD ALL 清掉 → EXECUTE 报 InvalidSqlStatementName → 回滚后重新 PREPARE
+  4. 出错时 execute_prepared 自己回滚，调用方不回滚也能继续用这个连接
+  5. 多个线程共用一个连接、同时第一次执行同一 SQL → 只 PREPARE 一次，没有 DuplicatePreparedStatement
+
+运行方法（项目根目录）：
+  python test/db_prepared_selftest.py                                   # 不连库：模拟会话
+  python test/db_prepared_selftest.py --host 192.168.1.202 --password xxx --dbname test_db
+有检查失败时退出码为 1。
+"""
+
+import argparse
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import psycopg2.errors
+
+from common.db.query import execute_prepared
+
+SQL = "SELECT %s::int + 1"
+
+
+class _FakeSession:
+    """只模拟用到的语义：预备语句属于会话（不随 ROLLBACK 消失）、出错后事务中止直到 ROLLBACK"""
+
+    def __init__(self):
+        self.statements = {}
+        self.aborted = False
+        self.prepare_count = 0
+        self.prepared = {}          # 与 TimedConnection.prepared / prepare_lock 相同
+        self.prepare_lock = threading.Lock()
+        self.autocommit = False
+
+    def rollback(self):
+        self.aborted = False
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+
+class _FakeCursor:
+    def __init__(self, session):
+        self.connection = session
+        self._result = None
+
+    def fetchone(self):
+        return self._result
+
+    def _fail(self, exc):
+        self.connection.aborted = True
+        raise exc
+
+    def execute(self, sql, params=None):
+        s = self.connection
+        if s.aborted:
+            raise psycopg2.errors.InFailedSqlTransaction("current transaction is aborted")
+        self._result = None
+        if sql.startswith("SELECT 1 FROM pg_prepared_statements"):
+            self._result = (1,) if params[0] in s.statements else None
+            time.sleep(0.01)        # 放大查重与 PREPARE 之间的窗口，没有锁时多线程必然撞上
+        elif sql == "DISCARD ALL":
+            s.statements.clear()
+        elif m := re.match(r"DEALLOCATE (\w+)$", sql):
+            s.statements.pop(m.group(1), None)
+        elif m := re.match(r"PREPARE (\w+) AS (.*)$", sql, re.S):
+            if m.group(1) in s.statements:
+                self._fail(psycopg2.errors.DuplicatePreparedStatement(f"prepared statement \"{m.group(1)}\" already exists"))
+            s.statements[m.group(1)] = m.group(2)
+            s.prepare_count += 1
+        elif m := re.match(r"EXECUTE (\w+)", sql):
+            if m.group(1) not in s.statements:
+                self._fail(psycopg2.errors.InvalidSqlStatementName(f"prepared statement \"{m.group(1)}\" does not exist"))
+            try:
+                self._result = (int(params[0]) + 1,)
+            except ValueError:
+                self._fail(psycopg2.errors.InvalidTextRepresentation("invalid input syntax for type integer"))
+        else:
+            raise AssertionError(f"unexpected SQL: {sql}")
+
+
+def check(label: str, ok: bool) -> bool:
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+
+def _run(conn, prepare_count=None) -> bool:
+    def call(value):
+        cur = conn.cursor()
+        try:
+            execute_prepared(cur, SQL, (value,))
+            return cur.fetchone()[0]
+        except psycopg2.Error as e:
+            conn.rollback()
+            return type(e).__name__
+
+    all_ok = True
+    all_ok &= check("首次执行", call(1) == 2)
+    all_ok &= check("EXECUTE 参数错误时抛出原错误", call("abc") == "InvalidTextRepresentation")
+    all_ok &= check("出错回滚后同一 SQL 再执行成功", call(41) == 42)
+    all_ok &= check("连续多次仍然成功", all(call(i) == i + 1 for i in range(3)))
+    if prepare_count:
+        all_ok &= check("整个过程只 PREPARE 一次", prepare_count() == 1)
+
+    conn.prepared.clear()
+    all_ok &= check("登记丢失、会话仍有同名语句时先 DEALLOCATE 再 PREPARE", call(5) == 6)
+
+    cur = conn.cursor()
+    cur.execute("DISCARD ALL")
+    all_ok &= check("语句被 DISCARD ALL 清掉时报 InvalidSqlStatementName", call(1) == "InvalidSqlStatementName")
+    all_ok &= check("之后重新 PREPARE 并成功", call(7) == 8)
+
+    cur = conn.cursor()
+    try:
+        execute_prepared(cur, SQL, ("abc",))
+    except psycopg2.Error:
+        pass
+    try:
+        cur = conn.cursor()
+        execute_prepared(cur, SQL, (2,))
+        ok = cur.fetchone()[0] == 3
+    except psycopg2.Error as e:
+        ok = False
+        conn.rollback()
+    all_ok &= check("出错后调用方不回滚，同一连接仍可继续执行", ok)
+    return all_ok
+
+
+def _run_threads(conn, prepare_count, threads: int = 8) -> bool:
+    """多个线程共用一个连接，同时第一次执行同一条新 SQL"""
+    sql = "SELECT %s::int + 1 -- threads"
+    start = threading.Barrier(threads)
+
+    def one(i):
+        start.wait()
+        cur = conn.cursor()
+        try:
+            execute_prepared(cur, sql, (i,))
+            return cur.fetchone()[0] == i + 1
+        except psycopg2.Error as e:
+            return type(e).__name__
+
+    before = prepare_count()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        results = list(ex.map(one, range(threads)))
+    all_ok = check(f"{threads} 个线程同时首次执行全部成功", all(r is True for r in results))
+    all_ok &= check("只 PREPARE 一次", prepare_count() - before == 1)
+    return all_ok
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host")
+    ap.add_argument("--port", type=int, default=5432)
+    ap.add_argument("--user", default="postgres")
+    ap.add_argument("--password", default="postgres")
+    ap.add_argument("--dbname", default="postgres")
+    args = ap.parse_args()
+
+    if args.host:
+        from common.db.pool import connect
+        conn = connect({"host": args.host, "port": args.port, "user": args.user,
+                        "password": args.password, "dbname": args.dbname})
+        conn.autocommit = True          # DISCARD ALL 不能在事务块里执行
+        try:
+            all_ok = _run(conn)
+        finally:
+            conn.discard()
+    else:
+        session = _FakeSession()
+        all_ok = _run(session, prepare_count=lambda: session.prepare_count)
+        all_ok &= _run_threads(session, lambda: session.prepare_count)
+
+    print("\n全部通过" if all_ok else "\n有检查未通过")
+    sys.exit(0 if all_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+目录索引 (common.image.dir_index) 自检 — has_images 的前缀匹配与以前 glob(f"{code}*.jpg") 一致
+
+在临时目录里按各流水线实际写出的文件名建空文件，逐个编码比较
+  check_missing_images.has_images(code, dir)  与  any(dir.glob(f"{code}*.jpg"))
+覆盖的文件名形状:
+  <编码>_<序号>.jpg                 下载 / 重命名后的标准图
+  <编码>-<名称>_<序号>.jpg          brands/barbour/supplier/barbour_download_images_only.py
+  <编码><后缀>_rotate30L.jpg        各品牌 image_pipeline_step2_ai_rotate.py
+  <编码>.jpg                        单张图
+以及只有 .png / 只有别的编码前缀相近的文件时应判为缺图。
+
+运行方法（项目根目录）：
+  python test/dir_index_selftest.py
+有检查失败时退出码为 1。
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.image.check_missing_images import has_images
+from common.image.dir_index import get_dir_index
+
+FILES = [
+    "K100123-001_1.jpg",
+    "K100123-001_F.jpg",
+    "LQU1201BK11-Beaufort Jacket_1.jpg",
+    "LQU1201BK11-Beaufort Jacket_2.jpg",
+    "36001-001_1_rotate30L.jpg",
+    "26163-1010.jpg",
+    "MWX0018NY91_1.png",
+    "AB12_1.jpg",
+]
+
+CODES = {
+    "K100123-001": True,
+    "k100123-001": True,        # Windows 上 glob 不区分大小写
+    "LQU1201BK11": True,
+    "36001-001": True,
+    "26163-1010": True,
+    "MWX0018NY91": False,       # 只有 png
+    "AB1": True,                # 与 glob 相同：AB12_1.jpg 也以 AB1 开头
+    "ZZ999": False,
+}
+
+
+def check(label: str, ok: bool) -> bool:
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+
+def main():
+    all_ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        d = Path(tmp)
+        for name in FILES:
+            (d / name).write_bytes(b"")
+
+        for code, expected in CODES.items():
+            got = has_images(code, d)
+            all_ok &= check(f"has_images({code!r}) = {got}（期望 {expected}）", got == expected)
+            if code == code.upper():
+                all_ok &= check(f"  与 glob('{code}*.jpg') 一致", got == any(d.glob(f"{code}*.jpg")))
+
+        idx = get_dir_index(d)
+        all_ok &= check(
+            "names_with_prefix 返回磁盘上的原文件名",
+            idx.names_with_prefix("lqu1201bk11", ".jpg")
+            == ["LQU1201BK11-Beaufort Jacket_1.jpg", "LQU1201BK11-Beaufort Jacket_2.jpg"],
+        )
+        idx.add("ZZ999_1.jpg")
+        all_ok &= check("add() 后前缀查找立即可见", has_images("ZZ999", d))
+        idx.discard("ZZ999_1.jpg")
+        all_ok &= check("discard() 后前缀查找立即消失", not idx.names_with_prefix("ZZ999", ".jpg"))
+
+    print("\n全部通过" if all_ok else "\n有检查未通过")
+    sys.exit(0 if all_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+html_parser 解析后端基准 + 一致性校验 (bs4 / bs4-lxml / selectolax)
+
+对每个页面分别用各后端建树并跑一遍 brands.barbour.core.html_parser 的提取函数，
+输出每页平均耗时，并逐字段比对结果是否与 bs4 (html.parser) 完全一致。
+
+运行方法（项目根目录）：
+  python test/html_parser_benchmark.py                        # 内置样例页
+  python test/html_parser_benchmark.py --site houseoffraser   # HTML 快照库中的页面
+  python test/html_parser_benchmark.py --dir D:/pages --limit 200
+有字段不一致时退出码为 1。
+"""
+
+import argparse
+import gzip
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from brands.barbour.core import html_parser as hp
+
+PRICE_CONTAINERS = (
+    'p[data-testid="price"], [data-testid="price"], div.price, div.product-price, '
+    'span.price, price-list, div[class*="Price"]'
+)
+
+SAMPLE_PAGES = {
+    "sample_product": """
+<html><head>
+<meta name="description" content="Barbour Ashby Waxed Jacket MWX0339NY91">
+<meta property="og:title" content="Ashby Wax Jacket | Navy">
+<meta property="og:image" content="https://cdn.example.com/a.jpg">
+<meta name="twitter:title" content="Ashby Wax Jacket">
+<meta property="product:price:amount" content="279.00">
+<script type="application/ld+json">{"@type": "BreadcrumbList", "itemListElement": []}</script>
+<script type="application/ld+json">
+  [{"@type": ["Product"], "name": "Ashby", "sku": "MWX0339NY91", "description": "Classic wax. MWX0339NY91"}]
+</script>
+</head><body>
+<div data-testid="price" data-testvalue="27900">
+  <span data-testid="ticket-price"> £279.00 </span>
+  <span class="Price_isDiscounted__x"> £199.00 </span>
+</div>
+<img data-testid="product-image-1" src="https://cdn.example.com/1.jpg">
+<img class="product-image" data-src="https://cdn.example.com/2.jpg">
+<select name="size"><option>Select size</option><option> S </option><option>M</option></select>
+<p>Care: <b>wax</b> only</p><div><span>Style MWX0339NY91</span></div>
+</body></html>
+""",
+    "sample_group": """
+<html><head>
+<meta property="og:title" content="Bedale &quot;Classic&quot; Jacket">
+<script type="application/ld+json">{"@type": "ProductGroup", "name": "Bedale",
+  "hasVariant": [{"sku": "LWX0668SG91-10"}, {"sku": "LWX0668SG91-12"}]}</script>
+</head><body>
+<div class="product-price"><span>£319</span></div>
+<select id="size-select"><option>--</option><option>10</option><option>12</option></select>
+<span>No code here</span>
+</body></html>
+""",
+    "sample_empty": "<html><body><p>404</p></body></html>",
+}
+
+
+def extract_all(doc) -> dict:
+    price_el = hp._select_one(doc, PRICE_CONTAINERS)
+    return {
+        "jsonld": hp.extract_jsonld(doc, ["Product", "ProductGroup"]),
+        "jsonld_name": hp.extract_jsonld_field(doc, "name", target_type="ProductGroup"),
+        "meta_description": hp.extract_meta_tag(doc, "description"),
+        "meta_price": hp.extract_meta_tag(doc, "product:price:amount", name_attr="property"),
+        "og_title": hp.extract_og_tag(doc, "title"),
+        "og_image": hp.extract_og_tag(doc, "image"),
+        "twitter_title": hp.extract_twitter_tag(doc, "title"),
+        "images": hp.extract_image_urls(doc),
+        "sizes": hp.extract_sizes_from_select(doc),
+        "prices": hp.extract_prices_from_element(price_el),
+        "barbour_code": hp.extract_barbour_code_from_description(doc),
+    }
+
+
+def load_pages(args) -> dict:
+    pages = {}
+    if args.site:
+        from common.crawl.html_store import get_html_store
+        store = get_html_store()
+        if store is None:
+            raise SystemExit("HTML 快照库未启用")
+        for snap in store.iter_latest(args.site):
+            html = store.load(snap.sha256)
+            if html:
+                pages[snap.url] = html
+            if args.limit and len(pages) >= args.limit:
+                break
+    if args.dir:
+        for p in sorted(Path(args.dir).iterdir()):
+            if p.name.endswith(".html.gz"):
+                pages[p.name] = gzip.open(p, "rb").read().decode("utf-8", errors="ignore")
+            elif p.suffix in (".html", ".htm"):
+                pages[p.name] = p.read_text(encoding="utf-8", errors="ignore")
+            if args.limit and len(pages) >= args.limit:
+                break
+    if not pages:
+        pages = dict(SAMPLE_PAGES)
+    return pages
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--site", help="从 HTML 快照库读取该站点的页面")
+    ap.add_argument("--dir", help="读取目录下的 .html / .html.gz")
+    ap.add_argument("--limit", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=3, help="每页重复次数，取中位数")
+    args = ap.parse_args()
+
+    backends = ["bs4", "bs4-lxml"]
+    if hp.LexborHTMLParser is not None:
+        backends.append("selectolax")
+    else:
+        print("⚠️ 未安装 selectolax，跳过该后端 (pip install selectolax)")
+
+    pages = load_pages(args)
+    print(f"📄 页面数: {len(pages)}  后端: {', '.join(backends)}")
+
+    timings = {b: [] for b in backends}
+    mismatches = []
+    for name, html in pages.items():
+        baseline = None
+        for backend in backends:
+            runs = []
+            for _ in range(max(1, args.repeat)):
+                t0 = time.perf_counter()
+                result = extract_all(hp.parse_document(html, backend))
+                runs.append(time.perf_counter() - t0)
+            timings[backend].append(statistics.median(runs))
+            if baseline is None:
+                baseline = result
+                continue
+            for field, expected in baseline.items():
+                if result[field] != expected:
+                    mismatches.append((name, backend, field, expected, result[field]))
+
+    print(f"\n{'后端':<12} {'avg ms/页':>10} {'p50':>8} {'max':>8} {'vs bs4':>8}")
+    base_avg = statistics.mean(timings["bs4"])
+    for backend in backends:
+        ts = timings[backend]
+        avg = statistics.mean(ts)
+        print(
+            f"{backend:<12} {avg * 1000:>10.2f} {statistics.median(ts) * 1000:>8.2f} "
+            f"{max(ts) * 1000:>8.2f} {base_avg / avg if avg else 0:>7.1f}x"
+        )
+
+    if mismatches:
+        print(f"\n❌ 字段不一致: {len(mismatches)}")
+        for name, backend, field, expected, got in mismatches[:20]:
+            print(f"  [{backend}] {name} · {field}\n     bs4: {expected!r}\n     got: {got!r}")
+        sys.exit(1)
+    print("\n✅ 所有后端提取结果一致")
+
+
+if __name__ == "__main__":
+    main()